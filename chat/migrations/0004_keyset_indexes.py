@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_message_reaction_messagereaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['thread', 'timestamp', 'id'], name='message_thread_ts_idx'),
+        ),
+    ]
@@ -36,6 +36,11 @@ class Message(models.Model):
     read = models.BooleanField(default=False)
     reaction = models.CharField(max_length=10, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['thread', 'timestamp', 'id'], name='message_thread_ts_idx'),
+        ]
+
     def __str__(self):
         return f"{self.sender.username}: {self.textor or self.file.name}"
 
@@ -22,6 +22,8 @@ class ReactionSerializer(serializers.ModelSerializer):
 class MessageSerializer(serializers.ModelSerializer):
     sender_username = serializers.CharField(source='sender.username', read_only=True)
     sender_id = serializers.IntegerField(source='sender.id', read_only=True)
+    # Durum kaydı olmayan gönderenlerde None
+    sender = UserStatusSerializer(source='sender.status', read_only=True, allow_null=True)
     file_url = serializers.SerializerMethodField()
     reactions = ReactionSerializer(many=True, read_only=True)
 
@@ -32,7 +34,7 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
-        fields = ["id", "sender_id", "sender_username", "text", "file_url", "timestamp", "read", "reactions"]
+        fields = ["id", "sender_id", "sender_username", "sender", "text", "file_url", "timestamp", "read", "reactions"]
 
 class ChatThreadSerializer(serializers.ModelSerializer):
     user1 = UserStatusSerializer(read_only=True)
@@ -42,17 +44,3 @@ class ChatThreadSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChatThread
         fields = ["id", "user1", "user2", "messages"]
-
-class MessageSerializer(serializers.ModelSerializer):
-    sender = UserStatusSerializer(read_only=True)
-    file_url = serializers.SerializerMethodField()
-    reactions = ReactionSerializer(many=True, read_only=True)
-
-    class Meta:
-        model = Message
-        fields = ["id", "sender", "text", "file_url", "timestamp", "read", "reactions"]
-
-    def get_file_url(self, obj):
-        if obj.file:
-            return obj.file.url
-        return None
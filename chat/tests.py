@@ -0,0 +1,58 @@
+# chat/tests.py
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from chat.models import ChatThread, Message, MessageReaction, UserStatus
+from chat.views import MessageListView, UserListView
+
+User = get_user_model()
+
+
+class UserListQueryCountTests(TestCase):
+
+    def test_user_list_single_query(self):
+        me = User.objects.create_user(username='ben', email='ben@example.com', password='password')
+        for i in range(5):
+            user = User.objects.create_user(username=f'kisi{i}', email=f'kisi{i}@example.com', password='password')
+            if i % 2:
+                UserStatus.objects.create(user=user, is_online=True)
+
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=me)
+        # Durumu olan ve olmayan kullanıcılar tek sorguda
+        with self.assertNumQueries(1):
+            response = UserListView.as_view()(request)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(sum(row['is_online'] for row in response.data), 2)
+
+
+class MessageListQueryCountTests(TestCase):
+
+    def setUp(self):
+        self.me = User.objects.create_user(username='ben', email='ben@example.com', password='password')
+        other = User.objects.create_user(username='sen', email='sen@example.com', password='password')
+        UserStatus.objects.create(user=other, is_online=True)
+        self.thread = ChatThread.objects.create(user1=self.me, user2=other)
+        for i in range(6):
+            message = Message.objects.create(thread=self.thread, sender=(self.me, other)[i % 2], text=f'mesaj {i}')
+            MessageReaction.objects.create(message=message, user=(other, self.me)[i % 2], emoji='👍')
+
+    def _get(self, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.me)
+        return MessageListView.as_view()(request, thread_id=self.thread.id)
+
+    def test_message_page_query_count(self):
+        # sohbet, mesajlar (+ gönderen durumu), tepkiler, tepki sahipleri
+        with self.assertNumQueries(4):
+            response = self._get(page_size=4)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertEqual(response.data['results'][1]['sender']['is_online'], True)
+        self.assertIsNone(response.data['results'][0]['sender'])
+        self.assertEqual(response.data['results'][0]['reactions'][0]['user'], 'sen')
+
+    def test_message_list_query_count(self):
+        with self.assertNumQueries(4):
+            response = self._get()
+        self.assertEqual(len(response.data), 6)
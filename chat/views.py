@@ -8,6 +8,7 @@ from .serializers import ChatThreadSerializer, MessageSerializer
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from cloud_mvp.pagination import paginate
 
 User = get_user_model()
 
@@ -15,11 +16,12 @@ class UserListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        users = User.objects.exclude(id=request.user.id)
+        # Durum kaydı aynı sorguda (LEFT JOIN) gelir; kullanıcı başına sorgu yok
+        users = User.objects.exclude(id=request.user.id).select_related('status')
         user_data = []
         for user in users:
             try:
-                user_status = UserStatus.objects.get(user=user)
+                user_status = user.status
                 is_online = user_status.is_online
                 last_seen = user_status.last_seen
             except UserStatus.DoesNotExist:
@@ -53,9 +55,15 @@ class MessageListView(APIView):
 
     def get(self, request, thread_id):
         thread = get_object_or_404(ChatThread, id=thread_id)
-        if request.user not in [thread.user1, thread.user2]:
+        if request.user.id not in (thread.user1_id, thread.user2_id):
             return Response({"error": "Bu sohbete erisimin yok."}, status=403)
-        messages = thread.messages.order_by("timestamp")
+        # Gönderen durumu JOIN ile, tepkiler ve sahipleri toplu ön yüklemeyle
+        messages = thread.messages.select_related('sender__status').prefetch_related(
+            'reactions__user'
+        ).order_by("timestamp")
+        page = paginate(request, messages, MessageSerializer, "timestamp")
+        if page is not None:
+            return page
         serializer = MessageSerializer(messages, many=True)
         return Response(serializer.data)
 
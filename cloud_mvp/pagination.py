@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# cloud_mvp/pagination.py
+"""
+Liste endpoint'leri için isteğe bağlı keyset (cursor) sayfalama.
+
+- İstemci `cursor` veya `page_size` gönderirse devreye girer; göndermezse
+  endpoint eskisi gibi düz liste döndürür (geriye dönük uyumluluk)
+- Sıralama alanı view'daki `cursor_ordering` ile belirlenir
+  (ör. '-uploaded_at', '-created_at', 'timestamp')
+- Opak cursor, COUNT(*) yok: yanıt süresi kaydırma derinliğinden bağımsız
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-created_at'
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        # Aynı zaman damgalı satırlarda kararlı sıra için id eklenir
+        tiebreaker = '-id' if ordering[0].startswith('-') else 'id'
+        if tiebreaker not in ordering:
+            ordering = tuple(ordering) + (tiebreaker,)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+def paginate(request, queryset, serializer_class, cursor_ordering, serializer_context=None):
+    """
+    APIView / fonksiyon view'lar için yardımcı. Sayfalama istenmişse
+    sayfalı yanıtı, istenmemişse None döndürür.
+    """
+    paginator = OptionalCursorPagination()
+    paginator.ordering = cursor_ordering
+    page = paginator.paginate_queryset(queryset, request)
+    if page is None:
+        return None
+    serializer = serializer_class(page, many=True, context=serializer_context or {'request': request})
+    return paginator.get_paginated_response(serializer.data)
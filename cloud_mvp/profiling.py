@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# cloud_mvp/profiling.py
+"""
+İsteğe bağlı istek profilleme.
+
+Bir istek şu durumlarda profillenir (settings.PROFILING['ENABLED'] açıkken):
+- `X-Profile: <HEADER_TOKEN>` başlığı gönderilmişse
+- `?_profile=1` ile staff kullanıcı istemişse
+- SAMPLE_RATE olasılığıyla rastgele örneklenmişse (PATH_PREFIXES ile sınırlanabilir)
+
+Profil (cProfile ya da kuruluysa pyinstrument) ve SQL sorguları süreleriyle
+birlikte diskteki sınırlı halka tampona (en fazla MAX_ARTIFACTS kayıt) yazılır.
+Kayıtlar /api/profiles/ altında staff kullanıcılara listelenir.
+ENABLED kapalıyken middleware yüklenmez (MiddlewareNotUsed): ek yük sıfırdır.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.0,
+    'PATH_PREFIXES': (),
+    'HEADER_TOKEN': '',
+    'QUERY_PARAM': '_profile',
+    'ENGINE': 'cprofile',  # 'cprofile' | 'pyinstrument'
+    'DIR': os.path.join(settings.BASE_DIR, '.cache', 'profiles'),
+    'MAX_ARTIFACTS': 50,
+    'TOP_FUNCTIONS': 40,
+    'MAX_QUERIES': 500,
+}
+ARTIFACT_ID_RE = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9]{6}-[0-9a-f]{4}$')
+
+
+def profiling_settings():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+# --- Halka tampon ---
+
+def _artifact_paths(directory, artifact_id):
+    base = os.path.join(directory, artifact_id)
+    return {'json': f'{base}.json', 'prof': f'{base}.prof', 'html': f'{base}.html'}
+
+
+def list_artifacts():
+    conf = profiling_settings()
+    directory = conf['DIR']
+    if not os.path.isdir(directory):
+        return []
+    artifacts = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as handle:
+                meta = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        artifacts.append({key: meta.get(key) for key in (
+            'id', 'created_at', 'method', 'path', 'status', 'duration_ms', 'query_count',
+            'query_time_ms', 'engine', 'trigger', 'user'
+        )})
+    return artifacts
+
+
+def artifact_file(artifact_id, kind):
+    """İndirilecek dosyanın yolu; geçersiz id/tür ya da yoksa None."""
+    if not ARTIFACT_ID_RE.match(artifact_id or ''):
+        return None
+    path = _artifact_paths(profiling_settings()['DIR'], artifact_id).get(kind)
+    return path if path and os.path.exists(path) else None
+
+
+def _trim(directory, keep):
+    stems = {name.rsplit('.', 1)[0] for name in os.listdir(directory)}
+    ids = sorted(stem for stem in stems if ARTIFACT_ID_RE.match(stem))
+    for artifact_id in ids[:-keep] if keep > 0 else ids:
+        for path in _artifact_paths(directory, artifact_id).values():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+# --- Profilleyiciler ---
+
+class _CProfileEngine:
+    name = 'cprofile'
+    extension = 'prof'
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def summary(self, limit):
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self, path):
+        self.profiler.dump_stats(path)
+
+
+class _PyinstrumentEngine:
+    name = 'pyinstrument'
+    extension = 'html'
+
+    def __init__(self):
+        from pyinstrument import Profiler
+        self.profiler = Profiler()
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def summary(self, limit):
+        return self.profiler.output_text(unicode=True)
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(self.profiler.output_html())
+
+
+def _make_engine(name):
+    if name == 'pyinstrument':
+        try:
+            return _PyinstrumentEngine()
+        except ImportError:
+            pass
+    return _CProfileEngine()
+
+
+class _QueryRecorder:
+    """connection.execute_wrapper ile her SQL sorgusunu süresiyle kaydeder."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.queries = []
+        self.count = 0
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.total += duration
+            if len(self.queries) < self.limit:
+                self.queries.append({'sql': sql, 'many': many, 'duration_ms': round(duration * 1000, 3)})
+
+
+# --- Middleware ---
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.conf = profiling_settings()
+        if not self.conf['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def _trigger(self, request):
+        token = self.conf['HEADER_TOKEN']
+        if token and request.META.get('HTTP_X_PROFILE') == token:
+            return 'header'
+        if request.GET.get(self.conf['QUERY_PARAM']) == '1' and _is_staff(request):
+            return 'staff'
+        rate = self.conf['SAMPLE_RATE']
+        if rate > 0 and random.random() < rate:
+            prefixes = self.conf['PATH_PREFIXES']
+            if not prefixes or request.path.startswith(tuple(prefixes)):
+                return 'sample'
+        return None
+
+    def __call__(self, request):
+        trigger = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        engine = _make_engine(self.conf['ENGINE'])
+        recorder = _QueryRecorder(self.conf['MAX_QUERIES'])
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            engine.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                engine.stop()
+        duration = time.perf_counter() - started
+
+        artifact_id = self._save(request, response, engine, recorder, duration, trigger)
+        response['X-Profile-Id'] = artifact_id
+        return response
+
+    def _save(self, request, response, engine, recorder, duration, trigger):
+        directory = self.conf['DIR']
+        os.makedirs(directory, exist_ok=True)
+        # Ad sırası = zaman sırası (halka tamponda en eskiler silinir)
+        artifact_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{uuid.uuid4().hex[:4]}"
+        paths = _artifact_paths(directory, artifact_id)
+
+        user = getattr(request, 'user', None)
+        meta = {
+            'id': artifact_id,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'trigger': trigger,
+            'engine': engine.name,
+            'user': user.get_username() if user is not None and user.is_authenticated else None,
+            'query_count': recorder.count,
+            'query_time_ms': round(recorder.total * 1000, 3),
+            'queries': recorder.queries,
+            'profile_file': os.path.basename(paths[engine.extension]),
+            'summary': engine.summary(self.conf['TOP_FUNCTIONS']),
+        }
+        engine.dump(paths[engine.extension])
+        with open(paths['json'], 'w', encoding='utf-8') as handle:
+            json.dump(meta, handle, ensure_ascii=False, indent=2)
+        _trim(directory, self.conf['MAX_ARTIFACTS'])
+        return artifact_id
+
+
+def _is_staff(request):
+    """Oturum kullanıcısı ya da (API istemcileri için) JWT kullanıcısı staff mı?"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        result = JWTAuthentication().authenticate(request)
+    except Exception:
+        return False
+    return bool(result and result[0].is_staff)
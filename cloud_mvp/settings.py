@@ -36,6 +36,8 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # PROFILING['ENABLED'] kapalıyken yüklenmez
+    'cloud_mvp.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
    # 'users.security.middleware.CameraSecurityMiddleware',
@@ -172,4 +174,92 @@ SECURE_VIEWER_CONFIG = {
     'MAX_VIOLATIONS': 2,
     'BLOCK_DURATION': 3600,  # 1 saat
     'DETECT_SCREENSHOT_APIS': True,
-}
\ No newline at end of file
+}
+
+# Önizleme (rendition) önbelleği
+RENDITION_ROOT = os.path.join(MEDIA_ROOT, 'renditions')
+RENDITION_FORMAT = 'WEBP'
+RENDITION_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# İmzalı önizleme URL'lerinin en kısa geçerlilik süresi (saniye)
+PREVIEW_URL_MAX_AGE = 3600
+# Sayılan görüntülemenin devam (Range) istekleri için izin çerezinin ömrü (saniye)
+VIEW_GRANT_MAX_AGE = 300
+
+# Tek gösterimlik / paylaşım limitli olmayan dosya yanıtları için önbellek politikası
+FILE_CACHE_CONTROL_PUBLIC = 'public, max-age=86400'
+FILE_CACHE_CONTROL_PRIVATE = 'private, max-age=3600'
+
+# Tamponlu yazıcıların (files.buffering) yazamadığı kayıtlar
+BUFFERED_WRITER_DEAD_LETTER_DIR = os.path.join(BASE_DIR, '.cache', 'dead_letter')
+
+# Paylaşım görüntüleme olayları için tamponlu yazıcı
+SHARE_VIEW_BUFFER = {
+    'MAX_BATCH': 500,
+    'FLUSH_INTERVAL': 2.0,  # sn; 0 -> arka plan iş parçacığı yok
+    'MAX_PENDING': 10000,
+}
+
+# UserActivity tamponu (memory.services.activity_buffer)
+USER_ACTIVITY_BUFFER = {
+    'MAX_BATCH': 500,
+    'FLUSH_INTERVAL': 1.0,  # sn; 0 -> arka plan iş parçacığı yok
+    'MAX_PENDING': 10000,
+    'MAX_EVENTS_PER_REQUEST': 500,  # /api/memory/activity/batch/
+    'MAX_EVENT_AGE_HOURS': 24,  # istemci timestamp'i en fazla bu kadar geriye gidebilir
+    'MAX_CLOCK_SKEW_SECONDS': 300,  # bundan ileri timestamp reddedilir
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# `perf` etiketli performans testleri yalnızca `--tag perf` ile çalışır
+TEST_RUNNER = 'cloud_mvp.test_runner.ProjectTestRunner'
+
+# Aşama zamanlamaları (cloud_mvp.tracing) konsola tek satır JSON olarak yazılır
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'tracing_console': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+    },
+    'loggers': {
+        'cloud_mvp.tracing': {
+            'handlers': ['tracing_console'],
+            'level': os.environ.get('TRACING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# İstek profilleme (cloud_mvp.profiling). Kapalıyken middleware hiç yüklenmez.
+PROFILING = {
+    'ENABLED': os.environ.get('PROFILING_ENABLED', '') == '1',
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', '0')),
+    'PATH_PREFIXES': ('/api/memory/search/', '/api/trending/'),
+    # Boşsa başlıkla tetikleme kapalı
+    'HEADER_TOKEN': os.environ.get('PROFILING_HEADER_TOKEN', ''),
+    'ENGINE': os.environ.get('PROFILING_ENGINE', 'cprofile'),
+    'DIR': os.path.join(BASE_DIR, '.cache', 'profiles'),
+    'MAX_ARTIFACTS': 50,
+}
+
+# Bellek katmanı geçiş kuralları (memory.services.tier_engine). None: kural kapalı.
+MEMORY_TIER_POLICY = {
+    # short_term -> long_term: bu kadar saat içinde süresi dolacak öğeler değerlendirilir
+    'PROMOTE_WINDOW_HOURS': 6,
+    # long_term'e geçmek için gereken en az erişim sayısı
+    'PROMOTE_MIN_ACCESS': 0,
+    # True ise PROMOTE_MIN_ACCESS altında kalan adayların süresi hemen doldurulur (--cleanup siler)
+    'EVICT_UNPROMOTED': False,
+    # instant -> short_term için gereken en az erişim sayısı
+    'INSTANT_PROMOTE_MIN_ACCESS': None,
+    # long_term -> short_term: bu kadar gündür erişilmeyen öğeler
+    'DEMOTE_IDLE_DAYS': None,
+    'BATCH_SIZE': 1000,
+}
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+# cloud_mvp/test_runner.py
+from django.test.runner import DiscoverRunner
+
+
+class ProjectTestRunner(DiscoverRunner):
+    """
+    `perf` etiketli (uzun süren performans) testleri yalnızca
+    `--tag perf` ile açıkça istendiğinde çalıştırır.
+    """
+    opt_in_tags = {'perf'}
+
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs):
+        requested = set(tags or ())
+        exclude_tags = set(exclude_tags or ()) | (self.opt_in_tags - requested)
+        super().__init__(*args, tags=tags, exclude_tags=exclude_tags, **kwargs)
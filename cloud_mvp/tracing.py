@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# cloud_mvp/tracing.py
+"""
+Hafif aşama (span) zamanlaması.
+
+    with span('upload.embed', file_type='image') as attrs:
+        ...
+        attrs['dim'] = 512          # span'a sonradan alan eklenebilir
+
+    @traced('search.total')
+    def semantic_search(...): ...
+
+Her span:
+- `cloud_mvp.tracing` logger'ına tek satır JSON olarak yazılır
+- süreç içi histogram kaydına (REGISTRY) işlenir; /api/metrics/ bu kaydı
+  Prometheus metin formatında sunar
+İç içe span'lar `parent` alanıyla ilişkilendirilir (contextvars; thread/async güvenli).
+"""
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+METRIC_NAME = 'cloud_mvp_span_duration_seconds'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_span = contextvars.ContextVar('cloud_mvp_current_span', default=None)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # son hücre: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class HistogramRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, span_name, seconds, status='ok'):
+        key = (span_name, status)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: (list(histogram.counts), histogram.sum, histogram.count)
+                for key, histogram in self._histograms.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render_prometheus(self):
+        lines = [
+            f'# HELP {METRIC_NAME} Duration of instrumented pipeline stages.',
+            f'# TYPE {METRIC_NAME} histogram',
+        ]
+        for (span_name, status), (counts, total, count) in sorted(self.snapshot().items()):
+            labels = f'span="{_escape(span_name)}",status="{_escape(status)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{METRIC_NAME}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REGISTRY = HistogramRegistry()
+
+
+@contextmanager
+def span(name, **attributes):
+    parent = _current_span.get()
+    token = _current_span.set(name)
+    status = 'ok'
+    started = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        _current_span.reset(token)
+        REGISTRY.observe(name, duration, status)
+        if logger.isEnabledFor(logging.INFO):
+            record = {'span': name, 'parent': parent, 'duration_ms': round(duration * 1000, 3), 'status': status}
+            record.update(attributes)
+            logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+def traced(name=None):
+    """Fonksiyonun tamamını bir span olarak ölçen dekoratör."""
+    def decorator(func):
+        span_name = name or f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
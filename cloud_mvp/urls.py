@@ -5,6 +5,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from chat.routing import websocket_urlpatterns
 from memory.views import intelligent_search, get_contextual_suggestions
+from .views import metrics_view, profile_list_view, profile_download_view
 
 urlpatterns = [
     # test_view kaldırıldı, share_file_view etkinleştirildi
@@ -23,6 +24,9 @@ urlpatterns = [
     path('api/memory/', include('memory.urls')),  # Memory URLs eklenmiş olmalı
     path('api/memory/search/', intelligent_search, name='intelligent_search'),
     path('api/memory/suggestions/', get_contextual_suggestions, name='context_suggestions'),
+    path('api/metrics/', metrics_view, name='metrics'),
+    path('api/profiles/', profile_list_view, name='profile_list'),
+    path('api/profiles/<str:artifact_id>/', profile_download_view, name='profile_download'),
 ]
 
 from django.conf import settings
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# cloud_mvp/views.py
+"""Proje geneli operasyon endpoint'leri (yalnızca yöneticiler)."""
+from django.http import FileResponse, Http404, HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from . import profiling
+from .tracing import REGISTRY
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PROFILE_CONTENT_TYPES = {
+    'json': 'application/json',
+    'prof': 'application/octet-stream',
+    'html': 'text/html; charset=utf-8',
+}
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """Span histogramları, Prometheus metin formatında."""
+    return HttpResponse(REGISTRY.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_list_view(request):
+    """Halka tampondaki profil kayıtları (en yeni önce)."""
+    return Response(profiling.list_artifacts())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_download_view(request, artifact_id):
+    """?kind=json (varsayılan; sorgular + özet), prof (pstats) veya html (pyinstrument)."""
+    kind = request.query_params.get('kind', 'json')
+    path = profiling.artifact_file(artifact_id, kind)
+    if path is None:
+        raise Http404('Profil bulunamadı')
+    return FileResponse(
+        open(path, 'rb'), as_attachment=kind != 'json',
+        filename=f'{artifact_id}.{kind}', content_type=PROFILE_CONTENT_TYPES[kind]
+    )
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# files/buffering.py
+"""
+Yüksek frekanslı, sadece-ekleme (append-only) kayıtlar için tamponlu toplu yazıcı.
+
+İstek yolunda sadece bellekteki kuyruğa eklenir; kayıtlar arka plan
+iş parçacığında (veya kuyruk dolunca çağıranın kendisinde) tek bir
+bulk_create ile yazılır. Süreç kapanırken atexit ile kalanlar boşaltılır.
+
+Yazılamayan parça kuyruğun başına geri konur ve sonraki boşaltmada yeniden
+denenir; max_retries denemeden sonra dead-letter dosyasına
+(`<DEAD_LETTER_DIR>/<ad>.jsonl`, `loaddata` ile geri yüklenebilir) yazılır.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.core import serializers
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedBulkWriter:
+    """
+    max_batch:      bu kadar kayıt birikince boşaltma tetiklenir
+    flush_interval: arka plan boşaltma aralığı (sn); 0 ise arka plan yok
+    max_pending:    geri basınç sınırı; aşılırsa çağıran eşzamanlı boşaltır
+    on_flush:       yazılan kayıt listesiyle çağrılan geri çağırımlar
+    max_retries:    bir parçanın dead-letter'a yazılmadan önceki başarısız deneme sayısı
+    """
+
+    def __init__(self, model, max_batch=500, flush_interval=2.0, max_pending=10000,
+                 on_flush=None, name=None, max_retries=3):
+        self.model = model
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.name = name or model.__name__
+        self._failures = 0
+        self._on_flush = list(on_flush or [])
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def add_flush_callback(self, callback):
+        self._on_flush.append(callback)
+
+    def __len__(self):
+        return len(self._queue)
+
+    def add(self, obj):
+        """Kaydı kuyruğa ekler; gerekirse boşaltmayı tetikler."""
+        with self._lock:
+            self._queue.append(obj)
+            pending = len(self._queue)
+
+        if pending >= self.max_pending or not self.flush_interval:
+            # Geri basınç: arka plan yetişemiyorsa çağıran yazar
+            if pending >= self.max_batch:
+                self.flush()
+            return
+
+        self._ensure_thread()
+        if pending >= self.max_batch:
+            self._wakeup.set()
+
+    def extend(self, objs):
+        for obj in objs:
+            self.add(obj)
+
+    def _drain(self):
+        with self._lock:
+            batch = list(self._queue)
+            self._queue.clear()
+        return batch
+
+    def _requeue(self, objs):
+        """Yazılamayan kayıtları sıralarını koruyarak kuyruğun başına koyar."""
+        with self._lock:
+            self._queue.extendleft(reversed(objs))
+
+    def dead_letter_path(self):
+        directory = getattr(
+            settings, 'BUFFERED_WRITER_DEAD_LETTER_DIR', os.path.join(settings.BASE_DIR, '.cache', 'dead_letter')
+        )
+        return os.path.join(directory, f"{self.name}.jsonl")
+
+    def _dead_letter(self, chunk):
+        path = self.dead_letter_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(serializers.serialize('jsonl', chunk))
+            logger.error("%s: %d kayıt %d denemeden sonra %s dosyasına yazıldı",
+                         self.name, len(chunk), self.max_retries, path)
+        except Exception as e:
+            logger.error("%s: %d kayıt kaybedildi (dead-letter yazılamadı: %s)", self.name, len(chunk), e)
+
+    def flush(self):
+        """
+        Kuyruktaki tüm kayıtları yazar; yazılan kayıt sayısını döndürür.
+        Yazma hatasında kalan kayıtlar kuyruğa geri konur ve boşaltma durur.
+        """
+        with self._flush_lock:
+            written = 0
+            while True:
+                batch = self._drain()
+                if not batch:
+                    return written
+                for start in range(0, len(batch), self.max_batch):
+                    chunk = batch[start:start + self.max_batch]
+                    try:
+                        self.model.objects.bulk_create(chunk, batch_size=self.max_batch)
+                    except Exception as e:
+                        self._failures += 1
+                        logger.error("%s toplu yazma hatası (%d kayıt, deneme %d/%d): %s",
+                                     self.name, len(chunk), self._failures, self.max_retries, e)
+                        if self._failures < self.max_retries:
+                            self._requeue(batch[start:])
+                            return written
+                        self._failures = 0
+                        self._dead_letter(chunk)
+                        continue
+                    self._failures = 0
+                    written += len(chunk)
+                    for callback in self._on_flush:
+                        try:
+                            callback(chunk)
+                        except Exception as e:
+                            logger.error("%s flush geri çağırım hatası: %s", self.name, e)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f"{self.name}-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error("%s arka plan boşaltma hatası: %s", self.name, e)
+            finally:
+                connection.close()
+
+    def close(self):
+        """Süreç kapanırken kalan kayıtları yazar."""
+        self._closed = True
+        self._wakeup.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("%s kapanışta boşaltılamadı: %s", self.name, e)
+        remaining = self._drain()
+        if remaining:
+            self._dead_letter(remaining)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# files/engagement.py
+"""
+Paylaşım görüntüleme olayları ve zaman sönümlü etkileşim sayaçları.
+
+- record_share_view: olay tampona eklenir, istek yolunda DB yazımı yok
+- consume_share_view: view_count tek UPDATE ile artar (post_save yok); trend
+  satırı tampon boşaltılınca bir kez güncellenir
+- Tampon boşaltılınca olaylar paylaşım başına toplanır ve
+  ShareEngagement sayaçları tek geçişte güncellenir
+- Sayaçlar üstel sönümlüdür: c(t) = c(t0) * exp(-(t - t0) / tau)
+- Sayılan görüntülemeyle birlikte kısa ömürlü, imzalı bir izin çerezi
+  verilir; oynatıcının devam aralık istekleri yalnızca bu izinle hak
+  tüketmeden sunulur (bayt konumundan çıkarım yapılmaz)
+"""
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .buffering import BufferedBulkWriter
+from .models import FileShare, ShareViewEvent, ShareEngagement
+
+# Sayaç adı -> sönüm süresi (sn)
+DECAY_WINDOWS = {
+    'views_1h': 3600,
+    'views_24h': 24 * 3600,
+    'views_7d': 7 * 24 * 3600,
+}
+
+
+def decay_factor(elapsed_seconds, tau):
+    if elapsed_seconds <= 0:
+        return 1.0
+    return math.exp(-elapsed_seconds / tau)
+
+
+def decayed_counters(engagement, now=None):
+    """Sayaçların `now` anına sönümlenmiş değerleri (DB'ye yazmadan)."""
+    if engagement is None:
+        return {field: 0.0 for field in DECAY_WINDOWS}
+    now = now or timezone.now()
+    elapsed = (now - engagement.updated_at).total_seconds()
+    return {
+        field: getattr(engagement, field) * decay_factor(elapsed, tau)
+        for field, tau in DECAY_WINDOWS.items()
+    }
+
+
+def apply_view_events(events):
+    """
+    Boşaltılan olay grubunu sayaçlara işler: paylaşım başına tek satır.
+
+    Sönüm F() ifadesiyle yazılamadığı için oku-değiştir-yaz tek işlem içinde
+    satır kilidiyle (select_for_update) yapılır; eşzamanlı boşaltan süreçler
+    birbirinin artışını ezmez. Eksik satırlar önce çakışmada dokunulmadan
+    eklenir, böylece her paylaşım kilitlenebilir bir satıra sahip olur.
+    """
+    if not events:
+        return []
+
+    per_share = defaultdict(list)
+    for event in events:
+        per_share[event.share_id].append(event.viewed_at)
+
+    with transaction.atomic():
+        ShareEngagement.objects.bulk_create(
+            [ShareEngagement(share_id=share_id, updated_at=min(timestamps))
+             for share_id, timestamps in per_share.items()],
+            ignore_conflicts=True,
+        )
+        # Sabit sıra: aynı paylaşımları kilitleyen süreçler kilitlenmeye (deadlock) girmez
+        engagements = list(
+            ShareEngagement.objects.select_for_update()
+            .filter(share_id__in=list(per_share)).order_by('share_id')
+        )
+
+        for engagement in engagements:
+            for viewed_at in sorted(per_share[engagement.share_id]):
+                elapsed = (viewed_at - engagement.updated_at).total_seconds()
+                for field, tau in DECAY_WINDOWS.items():
+                    if elapsed >= 0:
+                        value = getattr(engagement, field) * decay_factor(elapsed, tau) + 1
+                    else:
+                        # Geç gelen olay: geçmişteki katkısı bugüne sönümlenerek eklenir
+                        value = getattr(engagement, field) + decay_factor(-elapsed, tau)
+                    setattr(engagement, field, value)
+                if elapsed > 0:
+                    engagement.updated_at = viewed_at
+
+        ShareEngagement.objects.bulk_update(
+            engagements, ['views_1h', 'views_24h', 'views_7d', 'updated_at']
+        )
+    return list(per_share)
+
+
+def _refresh_trending(events):
+    from .trending import update_scores_for_shares
+
+    update_scores_for_shares({event.share_id for event in events})
+
+
+def _build_writer():
+    config = getattr(settings, 'SHARE_VIEW_BUFFER', {})
+    return BufferedBulkWriter(
+        ShareViewEvent,
+        max_batch=config.get('MAX_BATCH', 500),
+        flush_interval=config.get('FLUSH_INTERVAL', 2.0),
+        max_pending=config.get('MAX_PENDING', 10000),
+        on_flush=[apply_view_events, _refresh_trending],
+        name='ShareViewEvent',
+    )
+
+
+view_event_writer = _build_writer()
+
+
+def record_share_view(share, request=None):
+    """Görüntülemeyi olay günlüğüne (tamponlu) ekler."""
+    viewer = None
+    ip_address = None
+    if request is not None:
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            viewer = user
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        ip_address = forwarded.split(',')[0].strip() if forwarded else request.META.get('REMOTE_ADDR')
+
+    view_event_writer.add(ShareViewEvent(
+        share_id=share.pk,
+        viewer=viewer,
+        ip_address=ip_address or None,
+        viewed_at=timezone.now(),
+    ))
+
+
+def consume_share_view(share, request=None):
+    """
+    Görüntüleme hakkından birini kullanır: view_count koşullu ve atomik
+    olarak artar, olay tampona eklenir. Hak kalmadıysa (eşzamanlı istekler
+    dahil) False döner.
+    """
+    consumed = FileShare.objects.filter(
+        pk=share.pk, view_count__lt=F('max_views')
+    ).update(view_count=F('view_count') + 1)
+    if not consumed:
+        return False
+    share.view_count += 1
+    record_share_view(share, request)
+    return True
+
+
+VIEW_GRANT_SALT = 'files.view-grant'
+
+
+def _view_grant_cookie(resource):
+    return f'view_grant_{resource}'
+
+
+def has_view_grant(request, resource):
+    """İstek, bu kaynak için sayılmış bir görüntülemenin geçerli iznini taşıyor mu?"""
+    value = request.get_signed_cookie(
+        _view_grant_cookie(resource), default=None, salt=VIEW_GRANT_SALT,
+        max_age=getattr(settings, 'VIEW_GRANT_MAX_AGE', 300),
+    )
+    return value == resource
+
+
+def grant_view(request, response, resource):
+    """Sayılan görüntüleme için yanıta kısa ömürlü izin çerezi ekler."""
+    response.set_signed_cookie(
+        _view_grant_cookie(resource), resource, salt=VIEW_GRANT_SALT,
+        max_age=getattr(settings, 'VIEW_GRANT_MAX_AGE', 300),
+        path=request.path, secure=request.is_secure(), httponly=True, samesite='Lax',
+    )
+    return response
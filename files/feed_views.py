@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import CloudGroup, GroupFeed, GroupFile
 from .serializers import GroupFeedSerializer
+from cloud_mvp.pagination import paginate
 
 
 @api_view(["GET"])
@@ -14,7 +15,12 @@ def group_feed(request, group_id):
     except CloudGroup.DoesNotExist:
         return Response({"error": "Group not found"}, status=404)
 
-    feed_items = GroupFeed.objects.filter(group=group)
+    feed_items = GroupFeed.objects.filter(group=group).select_related(
+        "group", "user", "related_file"
+    )
+    page = paginate(request, feed_items, GroupFeedSerializer, "-created_at")
+    if page is not None:
+        return page
     serializer = GroupFeedSerializer(feed_items, many=True)
     return Response(serializer.data)
 
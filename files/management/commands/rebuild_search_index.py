@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+# files/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from files import search_index
+
+
+class Command(BaseCommand):
+    help = 'Tam metin arama indeksini (FTS5) sıfırdan oluşturur.'
+
+    def handle(self, *args, **options):
+        if not search_index.is_available():
+            self.stdout.write(self.style.WARNING(
+                'Veritabanı FTS5 desteklemiyor; aramalar icontains ile yapılır.'
+            ))
+            return
+        count = search_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Arama indeksi yeniden oluşturuldu: {count} belge.'))
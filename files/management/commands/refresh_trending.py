@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# files/management/commands/refresh_trending.py
+from django.core.management.base import BaseCommand
+
+from files.trending import refresh_trending_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Trend skor tablosunu (TrendingScore) yeniden hesaplar. Sıralama doğruluğu buna bağlı değildir; '
+        'saatlik (ör. cron) çalıştırmak okuma sırasında taranan satır sayısını düşük tutar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Toplu yazma boyutu.')
+
+    def handle(self, *args, **options):
+        updated, deleted = refresh_trending_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Trend skorları güncellendi: {updated} satır yazıldı, {deleted} satır silindi.'
+        ))
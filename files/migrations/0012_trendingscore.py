@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0011_fileshare_is_revoked'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(default='other', max_length=20)),
+                ('score', models.FloatField(default=0)),
+                ('shared_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('share', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending_score', to='files.fileshare')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score'], name='trending_score_idx'), models.Index(fields=['category', '-score'], name='trending_category_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0012_trendingscore'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShareEngagement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('views_1h', models.FloatField(default=0)),
+                ('views_24h', models.FloatField(default=0)),
+                ('views_7d', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('share', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='engagement', to='files.fileshare')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ShareViewEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('viewed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('share', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_events', to='files.fileshare')),
+                ('viewer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['share', 'viewed_at'], name='share_view_event_idx')],
+            },
+        ),
+    ]
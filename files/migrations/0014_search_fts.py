@@ -0,0 +1,88 @@
+import os
+import unicodedata
+
+from django.db import migrations
+
+# Uygulama koduna (files.search_index) bağımlı olmamak için bu migration'ın
+# kullandığı tanımlar burada sabitlenmiştir
+FTS_TABLE = 'search_fts'
+ENTITY_SLOTS = 8
+ENTITIES = {'file': 1, 'file_share': 2, 'cloud_group': 3, 'group_file': 4, 'public_group_file': 5}
+TURKISH_FOLD = str.maketrans({'ı': 'i', 'İ': 'i', 'I': 'i'})
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, owner, extra, tokenize = 'unicode61 remove_diacritics 2')"
+)
+# Başlık eşleşmeleri sahip ve ek alanlardan daha ağır basar
+RANK_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 2.0, 1.0)')"
+
+
+def normalize_text(text):
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text.translate(TURKISH_FOLD).lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _insert(cursor, entity, object_id, title, owner='', extra=''):
+    cursor.execute(
+        f"INSERT INTO {FTS_TABLE}(rowid, title, owner, extra) VALUES (%s, %s, %s, %s)",
+        [object_id * ENTITY_SLOTS + ENTITIES[entity],
+         normalize_text(title), normalize_text(owner), normalize_text(extra)]
+    )
+
+
+def create_and_backfill(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    File = apps.get_model('files', 'File')
+    FileShare = apps.get_model('files', 'FileShare')
+    CloudGroup = apps.get_model('files', 'CloudGroup')
+    GroupFile = apps.get_model('files', 'GroupFile')
+    PublicGroupFile = apps.get_model('groups', 'GroupFile')
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        cursor.execute(RANK_SQL)
+
+        for obj in File.objects.filter(is_public=True).select_related('owner'):
+            name = os.path.basename(obj.file.name)
+            _insert(cursor, 'file', obj.pk, name, obj.owner.username, os.path.splitext(name)[1])
+        for obj in FileShare.objects.filter(share_type='public', is_revoked=False).select_related(
+            'file', 'created_by'
+        ):
+            _insert(cursor, 'file_share', obj.pk, os.path.basename(obj.file.file.name),
+                    obj.created_by.username)
+        for obj in CloudGroup.objects.filter(is_public=True).select_related('owner'):
+            _insert(cursor, 'cloud_group', obj.pk, obj.name, obj.owner.username)
+        for obj in GroupFile.objects.filter(is_public=True, group__is_public=True).select_related(
+            'group', 'uploader'
+        ):
+            _insert(cursor, 'group_file', obj.pk, os.path.basename(obj.file.name),
+                    obj.uploader.username, obj.group.name)
+        for obj in PublicGroupFile.objects.filter(group__is_public=True).select_related(
+            'group', 'uploaded_by'
+        ):
+            _insert(cursor, 'public_group_file', obj.pk, obj.filename,
+                    obj.uploaded_by.username, f"{obj.group.name} {obj.file_type}")
+
+
+def drop_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0013_share_view_events'),
+        ('groups', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_and_backfill, drop_table),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0014_search_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['owner', '-uploaded_at', '-id'], name='file_owner_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupfeed',
+            index=models.Index(fields=['group', '-created_at', '-id'], name='groupfeed_group_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupfile',
+            index=models.Index(fields=['group', '-uploaded_at', '-id'], name='groupfile_group_uploaded_idx'),
+        ),
+    ]
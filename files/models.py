@@ -34,6 +34,60 @@ class FileShare(models.Model):
     def __str__(self):
         return f"FileShare - {self.share_type}"
 
+
+class TrendingScore(models.Model):
+    """
+    Herkese açık paylaşımlar için önceden hesaplanmış trend skoru.
+    refresh_trending komutu ile periyodik, görüntülemelerde artımlı güncellenir.
+    """
+    share = models.OneToOneField(FileShare, on_delete=models.CASCADE, related_name='trending_score')
+    category = models.CharField(max_length=20, default='other')
+    score = models.FloatField(default=0)
+    shared_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='trending_score_idx'),
+            models.Index(fields=['category', '-score'], name='trending_category_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"Trend {self.share_id} ({self.category}): {self.score}"
+
+
+class ShareViewEvent(models.Model):
+    """Paylaşım görüntüleme olay günlüğü (sadece ekleme, tamponlu yazılır)."""
+    share = models.ForeignKey(FileShare, on_delete=models.CASCADE, related_name='view_events')
+    viewer = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    viewed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['share', 'viewed_at'], name='share_view_event_idx'),
+        ]
+
+    def __str__(self):
+        return f"View {self.share_id} @ {self.viewed_at}"
+
+
+class ShareEngagement(models.Model):
+    """
+    Üstel sönümlü (exponential decay) görüntüleme sayaçları.
+    Her sayaç `updated_at` anındaki değeri tutar; okurken şimdiye sönümlenir.
+    """
+    share = models.OneToOneField(FileShare, on_delete=models.CASCADE, related_name='engagement')
+    views_1h = models.FloatField(default=0)
+    views_24h = models.FloatField(default=0)
+    views_7d = models.FloatField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Engagement {self.share_id}: {self.views_1h:.1f}/{self.views_24h:.1f}/{self.views_7d:.1f}"
+
 class MediaFile(models.Model):
     file = models.FileField(upload_to="media_files/")
     uploader = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -68,6 +122,12 @@ class File(models.Model):
     ]
     view_duration = models.CharField(max_length=20, choices=VIEW_DURATIONS, default="unlimited")
 
+    class Meta:
+        indexes = [
+            # Keyset sayfalama: owner=? ORDER BY uploaded_at DESC, id DESC
+            models.Index(fields=['owner', '-uploaded_at', '-id'], name='file_owner_uploaded_idx'),
+        ]
+
     def __str__(self):
         try:
             return self.file.name if self.file else f"File-{self.id}"
@@ -100,6 +160,11 @@ class GroupFile(models.Model):
     view_token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     is_public = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', '-uploaded_at', '-id'], name='groupfile_group_uploaded_idx'),
+        ]
+
     def __str__(self):
         return f"{self.file.name} in {self.group.name}"
 
@@ -169,6 +234,9 @@ class GroupFeed(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=['group', '-created_at', '-id'], name='groupfeed_group_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.group.name} - {self.feed_type} - {self.user.username}"
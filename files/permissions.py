@@ -2,6 +2,15 @@
 
 from rest_framework.permissions import BasePermission
 
+from .renditions import check_preview_signature
+
 class IsOwner(BasePermission):
     def has_object_permission(self, request, view, obj):
         return obj.owner == request.user
+
+
+class HasPreviewSignature(BasePermission):
+    """İmzalı önizleme URL'si (renditions.signed_preview_params) ile gelen istek."""
+    def has_permission(self, request, view):
+        params = request.query_params
+        return check_preview_signature(view.kwargs.get('pk'), params.get('expires'), params.get('signature'))
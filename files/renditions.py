@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# files/renditions.py
+"""
+Önizleme (rendition) servisi.
+
+- Görseller için sabit boyutlu WebP/JPEG küçük resimler
+- Videolar için poster karesi (ingest sırasında çözülen kareden)
+- İlk istekte tembel (lazy) üretim, (dosya id, boyut, mtime) anahtarıyla
+  diskte önbellek; kaynak dosya istek sırasında okunup hash'lenmez
+- Toplam boyuta göre LRU temizliği
+- <img>/<video poster> JWT göndermediği için imzalı, süreli önizleme URL'leri
+"""
+import os
+import time
+import uuid
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+RENDITION_SIZES = {
+    'small': 256,
+    'medium': 640,
+    'large': 1280,
+}
+DEFAULT_SIZE = 'medium'
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+FORMAT_EXTENSIONS = {
+    'WEBP': 'webp',
+    'JPEG': 'jpg',
+}
+CONTENT_TYPES = {
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+}
+
+PREVIEW_URL_SALT = 'files.renditions.preview'
+
+
+def rendition_root():
+    return getattr(settings, 'RENDITION_ROOT', os.path.join(settings.MEDIA_ROOT, 'renditions'))
+
+
+def rendition_format():
+    fmt = getattr(settings, 'RENDITION_FORMAT', 'WEBP').upper()
+    return fmt if fmt in FORMAT_EXTENSIONS else 'JPEG'
+
+
+def rendition_content_type():
+    return CONTENT_TYPES[rendition_format()]
+
+
+def is_image(path):
+    return path.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def is_video(path):
+    return path.lower().endswith(VIDEO_EXTENSIONS)
+
+
+def source_key(file_id, path):
+    """
+    Önbellek anahtarı: dosya id'si, boyutu ve mtime'ı. Dosya değişirse
+    anahtar da değişir; eski önizlemeler LRU temizliğiyle silinir.
+    """
+    stat_result = os.stat(path)
+    key = f"{file_id}:{stat_result.st_size}:{stat_result.st_mtime_ns}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _rendition_path(digest, suffix, ext):
+    # İlk iki karakter alt klasör: tek klasörde binlerce dosya birikmesin
+    return os.path.join(rendition_root(), digest[:2], f"{digest}_{suffix}.{ext}")
+
+
+def poster_path_for(file_id, source_path):
+    """Video poster karesinin (tam boy JPEG) önbellek yolu."""
+    return _rendition_path(source_key(file_id, source_path), 'poster', 'jpg')
+
+
+def _touch(path):
+    """
+    LRU sırası için son erişim zamanını (atime) günceller. mtime korunur:
+    ETag/Last-Modified ondan türetildiği için değişirse koşullu istekler
+    hiç 304 alamaz.
+    """
+    try:
+        os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+    except OSError:
+        pass
+
+
+def _atomic_save(image, target_path, fmt, **options):
+    """Geçici dosyaya yazıp yerine taşır; yarım dosya hiç görünmez."""
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    tmp_path = f"{target_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        image.save(tmp_path, fmt, **options)
+        os.replace(tmp_path, target_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _to_rgb(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def _render_thumbnail(source, target_path, max_px):
+    fmt = rendition_format()
+    with Image.open(source) as image:
+        if image.format == 'JPEG':
+            # Büyük JPEG'ler küçültülmüş ölçekte çözülür
+            image.draft('RGB', (max_px, max_px))
+        image = _to_rgb(image)
+        image.thumbnail((max_px, max_px), reducing_gap=2.0)
+        _atomic_save(image, target_path, fmt, quality=80)
+
+
+def save_video_poster(frame_image, file_id, source_path):
+    """
+    Ingest sırasında zaten çözülmüş bir kareyi (PIL.Image) poster olarak kaydeder.
+
+    Videonun ikinci kez çözülmesine gerek kalmaz; poster yolunu döndürür.
+    """
+    target_path = poster_path_for(file_id, source_path)
+    if not os.path.exists(target_path):
+        _atomic_save(_to_rgb(frame_image), target_path, 'JPEG', quality=85)
+        evict_renditions()
+    return target_path
+
+
+def _extract_video_poster(source_path, target_path):
+    """Ingest posteri yoksa videonun ilk okunabilir karesini alır."""
+    import cv2
+
+    cap = cv2.VideoCapture(source_path)
+    try:
+        ret, frame = cap.read()
+    finally:
+        cap.release()
+    if not ret:
+        return None
+    frame_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    _atomic_save(frame_image, target_path, 'JPEG', quality=85)
+    return target_path
+
+
+def get_rendition(file_id, source_path, size=DEFAULT_SIZE):
+    """
+    Görsel veya video için istenen boyuttaki önizlemenin yolunu döndürür.
+
+    Önizleme ilk istekte üretilir, sonraki isteklerde diskten okunur.
+    Desteklenmeyen türlerde veya poster çıkarılamazsa None döner.
+    """
+    max_px = RENDITION_SIZES.get(size, RENDITION_SIZES[DEFAULT_SIZE])
+    digest = source_key(file_id, source_path)
+    target_path = _rendition_path(digest, max_px, FORMAT_EXTENSIONS[rendition_format()])
+
+    if os.path.exists(target_path):
+        _touch(target_path)
+        return target_path
+
+    if is_image(source_path):
+        source = source_path
+    elif is_video(source_path):
+        source = _rendition_path(digest, 'poster', 'jpg')
+        if os.path.exists(source):
+            _touch(source)
+        elif not _extract_video_poster(source_path, source):
+            return None
+    else:
+        return None
+
+    _render_thumbnail(source, target_path, max_px)
+    evict_renditions()
+    return target_path
+
+
+def evict_renditions(max_bytes=None):
+    """
+    Önbellek toplam boyutu sınırı aşarsa en uzun süre kullanılmayanları siler.
+    Silinen bayt miktarını döndürür.
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'RENDITION_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+
+    root = rendition_root()
+    if not os.path.isdir(root):
+        return 0
+
+    entries = []
+    total = 0
+    for bucket in os.scandir(root):
+        if not bucket.is_dir():
+            continue
+        for entry in os.scandir(bucket.path):
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            stat_result = entry.stat()
+            entries.append((stat_result.st_atime, stat_result.st_size, entry.path))
+            total += stat_result.st_size
+
+    if total <= max_bytes:
+        return 0
+
+    freed = 0
+    for _, file_size, path in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            freed += file_size
+        except OSError as e:
+            logger.warning("Rendition silinemedi %s: %s", path, e)
+    return freed
+
+
+def _preview_signature(file_id, expires):
+    return signing.Signer(salt=PREVIEW_URL_SALT).signature(f"{file_id}:{expires}")
+
+
+def signed_preview_params(file_id, size=DEFAULT_SIZE, now=None):
+    """
+    Önizleme URL'sinin sorgu parametreleri (size, expires, signature).
+
+    Süre sonu PREVIEW_URL_MAX_AGE'e yuvarlanır: aynı pencerede üretilen URL
+    değişmez, tarayıcı önbelleği korunur; URL en az MAX_AGE saniye geçerlidir.
+    """
+    max_age = getattr(settings, 'PREVIEW_URL_MAX_AGE', 3600)
+    expires = (int(now or time.time()) // max_age + 2) * max_age
+    return {'size': size, 'expires': expires, 'signature': _preview_signature(file_id, expires)}
+
+
+def check_preview_signature(file_id, expires, signature, now=None):
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < (now or time.time()):
+        return False
+    return constant_time_compare(signature or '', _preview_signature(file_id, expires))
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# files/search_index.py
+"""
+Herkese açık dosyalar, gruplar ve grup dosyaları için tam metin arama indeksi.
+
+SQLite'ta FTS5 sanal tablosu (`search_fts`) kullanılır:
+- bm25 ile sıralı sonuç (başlık > sahip > ek alanlar)
+- önek eşleşmesi ("rap" -> "rapor")
+- Türkçe karakter katlama (ı/İ/ş/ğ/ç/ö/ü -> i/s/g/c/o/u), hem indekste hem sorguda
+
+rowid = object_id * ENTITY_SLOTS + varlık kodu; böylece güncelleme/silme
+rowid üzerinden O(log n) yapılır. FTS tablosu queryset'e tek bir MATCH ile
+birleştirilir: görünürlük/tür filtreleri ve sıralama aynı SQL'de uygulanır;
+alaka sıralı sorgular çağıranda LIMIT ile kesilir. SQLite dışındaki veritabanlarında fonksiyonlar None
+döndürür ve view'lar icontains aramasına düşer.
+"""
+import os
+import re
+import unicodedata
+
+from django.db import connection
+
+FTS_TABLE = 'search_fts'
+ENTITY_SLOTS = 8
+
+# Varlık adı -> rowid içindeki kod
+ENTITIES = {
+    'file': 1,               # files.File (is_public)
+    'file_share': 2,         # files.FileShare (share_type='public')
+    'cloud_group': 3,        # files.CloudGroup (is_public)
+    'group_file': 4,         # files.GroupFile (is_public ve grubu herkese açık)
+    'public_group_file': 5,  # groups.GroupFile (grubu herkese açık)
+}
+
+MAX_TERMS = 8
+# Arama endpoint'lerinde varlık türü başına sonuç sayısı (`limit` parametresi)
+DEFAULT_RESULTS = 20
+MAX_RESULTS = 100
+
+_TURKISH_FOLD = str.maketrans({'ı': 'i', 'İ': 'i', 'I': 'i'})
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_text(text):
+    """Küçük harfe çevirir, Türkçe ve diğer aksanlı karakterleri katlar."""
+    if not text:
+        return ''
+    text = text.translate(_TURKISH_FOLD).lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def _rowid(entity, object_id):
+    return int(object_id) * ENTITY_SLOTS + ENTITIES[entity]
+
+
+def build_match_expression(query, any_term=False):
+    """Kullanıcı sorgusunu güvenli bir FTS5 MATCH ifadesine çevirir."""
+    terms = _TOKEN_RE.findall(normalize_text(query))[:MAX_TERMS]
+    if not terms:
+        return None
+    # Her terim tırnaklanır (FTS5 sözdizimi enjeksiyonu yok) ve önek araması yapılır
+    joiner = ' OR ' if any_term else ' '
+    return joiner.join(f'"{term}"*' for term in terms)
+
+
+def index_document(entity, object_id, title, owner='', extra=''):
+    if not is_available():
+        return
+    rowid = _rowid(entity, object_id)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [rowid])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, owner, extra) VALUES (%s, %s, %s, %s)",
+            [rowid, normalize_text(title), normalize_text(owner), normalize_text(extra)]
+        )
+
+
+def remove_document(entity, object_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [_rowid(entity, object_id)])
+
+
+def filter_ranked(queryset, entity, query, any_term=False):
+    """
+    Queryset'i sorguya uyan nesnelerle sınırlar ve `search_rank` (bm25; küçük
+    olan daha alakalı) ekler. FTS kullanılamıyorsa None döner (çağıran
+    icontains'e düşmeli).
+    """
+    if not is_available():
+        return None
+    expression = build_match_expression(query, any_term=any_term)
+    if expression is None:
+        return queryset.none()
+
+    code = ENTITIES[entity]
+    id_column = f"{connection.ops.quote_name(queryset.model._meta.db_table)}." \
+                f"{connection.ops.quote_name(queryset.model._meta.pk.column)}"
+    # FTS tablosu bir kez birleştirilir: tek MATCH eşleşen rowid'leri ve
+    # rank'i verir, tabloya birincil anahtarla gidilir
+    return queryset.extra(
+        select={'search_rank': f"{FTS_TABLE}.rank"},
+        tables=[FTS_TABLE],
+        where=[
+            f"{FTS_TABLE} MATCH %s",
+            f"{id_column} = {FTS_TABLE}.rowid / {ENTITY_SLOTS}",
+            f"({FTS_TABLE}.rowid %% {ENTITY_SLOTS}) = %s",
+        ],
+        params=[expression, code],
+    )
+
+
+def result_limit(value):
+    """`limit` sorgu parametresini [1, MAX_RESULTS] aralığına çeker."""
+    try:
+        return max(1, min(int(value), MAX_RESULTS))
+    except (TypeError, ValueError):
+        return DEFAULT_RESULTS
+
+
+def search(queryset, entity, query, fallback_q, any_term=False, limit=DEFAULT_RESULTS):
+    """
+    Alaka sıralı arama sonucunun ilk `limit` kaydı. FTS yoksa `fallback_q`
+    (icontains) kullanılır. `queryset` görünürlük filtrelerini zaten içermelidir.
+    """
+    ranked = filter_ranked(queryset, entity, query, any_term=any_term)
+    if ranked is None:
+        return queryset.filter(fallback_q).distinct()[:limit]
+    return ranked.order_by('search_rank')[:limit]
+
+
+# --- Varlık -> indeks belgesi eşlemeleri ---
+
+def _basename(field_file):
+    return os.path.basename(field_file.name) if field_file else ''
+
+
+def _username(user):
+    return user.username if user else ''
+
+
+def index_file(file_obj):
+    if not file_obj.is_public:
+        return remove_document('file', file_obj.pk)
+    name = _basename(file_obj.file)
+    index_document('file', file_obj.pk, name, _username(file_obj.owner), os.path.splitext(name)[1])
+
+
+def index_file_share(share):
+    if share.share_type != 'public' or share.is_revoked:
+        return remove_document('file_share', share.pk)
+    index_document('file_share', share.pk, _basename(share.file.file), _username(share.created_by))
+
+
+def index_cloud_group(group):
+    if not group.is_public:
+        remove_document('cloud_group', group.pk)
+    else:
+        index_document('cloud_group', group.pk, group.name, _username(group.owner))
+    for group_file in group.files.select_related('uploader'):
+        index_group_file(group_file, group=group)
+
+
+def index_group_file(group_file, group=None):
+    group = group or group_file.group
+    if not (group_file.is_public and group.is_public):
+        return remove_document('group_file', group_file.pk)
+    index_document(
+        'group_file', group_file.pk, _basename(group_file.file),
+        _username(group_file.uploader), group.name
+    )
+
+
+def index_public_group(group):
+    for group_file in group.files.select_related('uploaded_by'):
+        index_public_group_file(group_file, group=group)
+
+
+def index_public_group_file(group_file, group=None):
+    group = group or group_file.group
+    if not group.is_public:
+        return remove_document('public_group_file', group_file.pk)
+    index_document(
+        'public_group_file', group_file.pk, group_file.filename,
+        _username(group_file.uploaded_by), f"{group.name} {group_file.file_type}"
+    )
+
+
+def rebuild():
+    """İndeksi sıfırdan kurar; indekslenen belge sayısını döndürür."""
+    from groups.models import GroupFile as PublicGroupFile
+    from .models import File, FileShare, CloudGroup, GroupFile
+
+    if not is_available():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    count = 0
+    for file_obj in File.objects.filter(is_public=True).select_related('owner').iterator():
+        index_file(file_obj)
+        count += 1
+    for share in FileShare.objects.filter(share_type='public', is_revoked=False).select_related(
+        'file', 'created_by'
+    ).iterator():
+        index_file_share(share)
+        count += 1
+    for group in CloudGroup.objects.filter(is_public=True).select_related('owner').iterator():
+        index_document('cloud_group', group.pk, group.name, _username(group.owner))
+        count += 1
+    for group_file in GroupFile.objects.filter(is_public=True, group__is_public=True).select_related(
+        'group', 'uploader'
+    ).iterator():
+        index_group_file(group_file)
+        count += 1
+    for group_file in PublicGroupFile.objects.filter(group__is_public=True).select_related(
+        'group', 'uploaded_by'
+    ).iterator():
+        index_public_group_file(group_file)
+        count += 1
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return count
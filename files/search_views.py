@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from django.db.models import Q
 from .models import CloudGroup, GroupFile, File
+from . import search_index
 from .serializers import CloudGroupSerializer, GroupFileSerializer, FileSerializer
 
 class SearchView(generics.GenericAPIView):
@@ -17,38 +18,35 @@ class SearchView(generics.GenericAPIView):
         if not q:
             return Response({"detail": "q param is required"}, status=400)
 
+        limit = search_index.result_limit(request.query_params.get('limit'))
         results = {}
 
         try:
             if type_ in ['all', 'groups']:
-                groups_qs = CloudGroup.objects.filter(
-                    is_public=True
-                ).filter(
-                    Q(name__icontains=q)
-                ).order_by('-id')
+                groups_qs = search_index.search(
+                    CloudGroup.objects.filter(is_public=True),
+                    'cloud_group', q, Q(name__icontains=q), limit=limit
+                )
                 
                 groups_ser = CloudGroupSerializer(groups_qs, many=True, context={'request': request})
                 results['groups'] = groups_ser.data
 
             if type_ in ['all', 'files']:
-                files_qs = File.objects.filter(
-                    is_public=True
-                ).filter(
-                    Q(file__icontains=q) | 
-                    Q(owner__username__icontains=q)
-                ).order_by('-uploaded_at')
+                files_qs = search_index.search(
+                    File.objects.filter(is_public=True).select_related('owner'),
+                    'file', q,
+                    Q(file__icontains=q) | Q(owner__username__icontains=q), limit=limit
+                )
                 
                 files_ser = FileSerializer(files_qs, many=True, context={'request': request})
                 results['files'] = files_ser.data
 
             if type_ in ['all', 'group_files']:
-                gf_qs = GroupFile.objects.filter(
-                    is_public=True, 
-                    group__is_public=True
-                ).filter(
-                    Q(file__icontains=q) | 
-                    Q(uploader__username__icontains=q)
-                ).order_by('-uploaded_at')
+                gf_qs = search_index.search(
+                    GroupFile.objects.filter(is_public=True, group__is_public=True),
+                    'group_file', q,
+                    Q(file__icontains=q) | Q(uploader__username__icontains=q), limit=limit
+                )
                 
                 gf_ser = GroupFileSerializer(gf_qs, many=True, context={'request': request})
                 results['group_files'] = gf_ser.data
@@ -62,29 +60,38 @@ class SearchView(generics.GenericAPIView):
 def search_view(request):
     query = request.GET.get("q", "")
     search_type = request.GET.get("type", "all")
+    limit = search_index.result_limit(request.GET.get("limit"))
 
     try:
         results = {}
 
+        # Sorgu yoksa en yeni kayıtlar; her durumda tür başına en fazla `limit`
         if search_type in ["all", "groups"]:
-            groups = CloudGroup.objects.filter(
-                is_public=True,
-                name__icontains=query
-            )
+            groups = CloudGroup.objects.filter(is_public=True)
+            if query:
+                groups = search_index.search(groups, 'cloud_group', query, Q(name__icontains=query), limit=limit)
+            else:
+                groups = groups.order_by('-id')[:limit]
             results["groups"] = CloudGroupSerializer(groups, many=True, context={'request': request}).data
 
         if search_type in ["all", "files"]:
-            files = File.objects.filter(
-                is_public=True,
-                file__icontains=query
-            )
+            files = File.objects.filter(is_public=True).select_related('owner')
+            if query:
+                files = search_index.search(files, 'file', query, Q(file__icontains=query), limit=limit)
+            else:
+                files = files.order_by('-id')[:limit]
             results["files"] = FileSerializer(files, many=True, context={'request': request}).data
 
         if search_type in ["all", "group_files"]:
-            group_files = GroupFile.objects.filter(
-                is_public=True,
-                file__icontains=query
-            )
+            # Arama indeksi yalnızca herkese açık gruplardaki dosyaları içerir
+            group_files = GroupFile.objects.filter(is_public=True)
+            if query:
+                group_files = search_index.search(
+                    group_files.filter(group__is_public=True), 'group_file', query,
+                    Q(file__icontains=query), limit=limit
+                )
+            else:
+                group_files = group_files.order_by('-id')[:limit]
             results["group_files"] = GroupFileSerializer(group_files, many=True, context={'request': request}).data
 
         return Response(results)
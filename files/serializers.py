@@ -1,10 +1,12 @@
 ﻿# -*- coding: utf-8 -*-
 import os 
+from urllib.parse import urlencode
 from rest_framework import serializers
 from django.utils import timesince
 from django.urls import reverse
 from .models import File, CloudGroup, GroupFile, FileComment, GroupInvite, GroupFeed, Ad, UserEarning, SecureLink, MediaFile, FileShare  
 from django.utils import timezone
+from . import renditions
 from datetime import timedelta
 
 class MediaFileSerializer(serializers.ModelSerializer):
@@ -30,11 +32,12 @@ class FileSerializer(serializers.ModelSerializer):
     file_name = serializers.SerializerMethodField()
     file_size_mb = serializers.SerializerMethodField()
     share_url = serializers.SerializerMethodField() # Frontend'in tıkladığı ana URL
+    preview_url = serializers.SerializerMethodField() # Kartlar için küçük önizleme
 
     class Meta:
         model = File
         fields = [
-            'id', 'file', 'file_url', 'share_url', 'file_name', 
+            'id', 'file', 'file_url', 'share_url', 'preview_url', 'file_name', 
             'uploaded_at', 'one_time_view', 'has_been_viewed', 
             'view_token', 'is_public', 'file_size', 'file_size_mb', 
             'view_duration', 'can_download', 'created_by_username', 
@@ -42,7 +45,7 @@ class FileSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = [
             'uploaded_at', 'has_been_viewed', 'view_token', 
-            'file_size', 'file_url', 'share_url', 'file_name', 
+            'file_size', 'file_url', 'share_url', 'preview_url', 'file_name', 
             'file_size_mb', 'created_by_username', 'upload_time_ago',
             'is_password_protected'
         ]
@@ -84,10 +87,26 @@ class FileSerializer(serializers.ModelSerializer):
         # Standart dosya URL'sini döndür
         return self.get_file_url(obj)
         
+    # YENİ ALAN: Önizleme URL'si (tam boy dosya yerine küçük rendition)
+    def get_preview_url(self, obj):
+        try:
+            request = self.context.get('request')
+            if not request or not obj.file or obj.one_time_view:
+                return None
+            name = obj.file.name
+            if not (renditions.is_image(name) or renditions.is_video(name)):
+                return None
+            url = reverse('file_preview', args=[obj.id])
+            # <img> JWT göndermez; URL'nin kendisi süreli erişim yetkisi taşır
+            query = urlencode(renditions.signed_preview_params(obj.id, 'small'))
+            return request.build_absolute_uri(f"{url}?{query}")
+        except Exception:
+            return None
+
     # YENİ ALAN: Yükleyen Kullanıcı Adı
     def get_created_by_username(self, obj):
-        # Varsayalım ki dosyanın sahibi 'owner' alanında tutuluyor.
-        return obj.owner.username if hasattr(obj, 'owner') and obj.owner else 'Anonim'
+        # owner liste sorgularında select_related ile gelir; owner_id kontrolü sorgu atmaz
+        return obj.owner.username if obj.owner_id else 'Anonim'
 
     # YENİ ALAN: Yükleme Zamanı
     def get_upload_time_ago(self, obj):
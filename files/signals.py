@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# files/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from groups.models import Group as PublicGroup, GroupFile as PublicGroupFile
+from . import search_index
+from .models import FileShare, File, CloudGroup, GroupFile
+from .trending import update_share_score
+
+
+@receiver(post_save, sender=FileShare)
+def refresh_share_trending_score(sender, instance, raw=False, **kwargs):
+    """
+    Paylaşım oluşturulduğunda/değiştiğinde (tür, iptal) trend satırını günceller.
+    Görüntülemeler save() çağırmaz; onları engagement tamponu işler.
+    """
+    if raw:
+        return
+    try:
+        update_share_score(instance)
+    except Exception as e:
+        print(f"Trend skoru güncellenemedi (share {instance.pk}): {e}")
+
+
+# ==================== ARAMA İNDEKSİ ====================
+
+_INDEXERS = {
+    File: ('file', search_index.index_file),
+    FileShare: ('file_share', search_index.index_file_share),
+    CloudGroup: ('cloud_group', search_index.index_cloud_group),
+    GroupFile: ('group_file', search_index.index_group_file),
+    PublicGroupFile: ('public_group_file', search_index.index_public_group_file),
+    PublicGroup: (None, search_index.index_public_group),
+}
+
+
+def _update_search_index(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _, indexer = _INDEXERS[sender]
+    try:
+        indexer(instance)
+    except Exception as e:
+        print(f"Arama indeksi güncellenemedi ({sender.__name__} {instance.pk}): {e}")
+
+
+def _remove_from_search_index(sender, instance, **kwargs):
+    entity, _ = _INDEXERS[sender]
+    if entity is None:
+        return
+    try:
+        search_index.remove_document(entity, instance.pk)
+    except Exception as e:
+        print(f"Arama indeksinden silinemedi ({sender.__name__} {instance.pk}): {e}")
+
+
+for _model in _INDEXERS:
+    post_save.connect(_update_search_index, sender=_model, dispatch_uid=f"search_index_save_{_model._meta.label}")
+    post_delete.connect(_remove_from_search_index, sender=_model, dispatch_uid=f"search_index_delete_{_model._meta.label}")
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# files/streaming.py
+"""
+Tüm indirme endpoint'lerinin kullandığı ortak dosya sunma katmanı.
+
+- Tam dosya: FileResponse (wsgi.file_wrapper / sendfile kullanılabilir)
+- Tek aralık: sabit bellekli parça parça (chunked) okuma, 206
+- Çoklu aralık: multipart/byteranges, 206
+- Suffix (bytes=-500) ve açık uçlu (bytes=100-) aralıklar
+- If-Range (ETag veya Last-Modified) ve 416 desteği
+- Önbelleklenebilir içerik için If-None-Match / If-Modified-Since -> 304
+"""
+import os
+import re
+import uuid
+import mimetypes
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+MAX_RANGES = 16
+
+RANGE_SPEC_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+def file_etag(stat_result):
+    """Dosyanın mtime ve boyutundan güçlü (strong) bir ETag üretir."""
+    return '"%x-%x"' % (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def file_cache_control(public=False):
+    """
+    Tek gösterimlik veya paylaşım limitli OLMAYAN dosyalar için Cache-Control.
+
+    Güvenlik gerektiren yanıtlar bunu kullanmaz, no-store olarak kalır.
+    """
+    if public:
+        return getattr(settings, 'FILE_CACHE_CONTROL_PUBLIC', 'public, max-age=86400')
+    return getattr(settings, 'FILE_CACHE_CONTROL_PRIVATE', 'private, max-age=3600')
+
+
+def parse_range_header(header, file_size):
+    """
+    Range başlığını (start, end) çiftlerine çevirir (end dahil).
+
+    Dönüş:
+      None -> başlık geçersiz/desteklenmiyor, tam dosya sunulmalı
+      []   -> hiçbir aralık karşılanamıyor (416)
+      list -> sıralı ve birleştirilmiş aralıklar
+    """
+    if not header:
+        return None
+
+    unit, _, range_set = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not range_set.strip():
+        return None
+
+    ranges = []
+    for spec in range_set.split(','):
+        match = RANGE_SPEC_RE.match(spec)
+        if not match:
+            return None
+
+        first, last = match.groups()
+        if not first and not last:
+            return None
+
+        if not first:
+            # Suffix aralık: son N bayt
+            suffix_length = int(last)
+            if suffix_length == 0:
+                continue
+            start = max(file_size - suffix_length, 0)
+            end = file_size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else file_size - 1
+            if last and end < start:
+                return None
+            end = min(end, file_size - 1)
+
+        if start >= file_size or file_size == 0:
+            continue
+        ranges.append((start, end))
+
+    if len(ranges) > MAX_RANGES:
+        # Çok sayıda küçük aralık (kötüye kullanım) -> tam dosya
+        return None
+
+    return _coalesce_ranges(ranges)
+
+
+def _coalesce_ranges(ranges):
+    """Çakışan veya bitişik aralıkları birleştirir."""
+    if len(ranges) < 2:
+        return ranges
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_matches(if_range, etag, mtime):
+    """If-Range başlığı mevcut temsil ile eşleşiyor mu?"""
+    if not if_range:
+        return True
+
+    if_range = if_range.strip()
+    if if_range.startswith('W/'):
+        # Zayıf ETag'ler If-Range için asla eşleşmez
+        return False
+    if if_range.startswith('"'):
+        return if_range == etag
+
+    since = parse_http_date_safe(if_range)
+    return since is not None and since == int(mtime)
+
+
+def requested_ranges(request, stat_result):
+    """
+    İsteğin karşılanacak aralıkları (parse_range_header dönüşü).
+    None -> tam dosya sunulur (Range yok, geçersiz veya If-Range eşleşmiyor).
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    range_header = request.headers.get('Range', '').strip()
+    if not range_header:
+        return None
+    if not if_range_matches(request.headers.get('If-Range'), file_etag(stat_result),
+                            stat_result.st_mtime):
+        return None
+    return parse_range_header(range_header, stat_result.st_size)
+
+
+def iter_file_range(file_path, start, end, chunk_size=CHUNK_SIZE):
+    """Dosyanın [start, end] aralığını sabit boyutlu parçalar halinde okur."""
+    remaining = end - start + 1
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def _multipart_parts(ranges, content_type, file_size, boundary):
+    """Her aralık için multipart başlık baytlarını hazırlar."""
+    parts = []
+    for start, end in ranges:
+        header = (
+            f"\r\n--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+        ).encode('ascii')
+        parts.append((header, start, end))
+    closing = f"\r\n--{boundary}--\r\n".encode('ascii')
+    return parts, closing
+
+
+def _iter_multipart(file_path, parts, closing):
+    for header, start, end in parts:
+        yield header
+        yield from iter_file_range(file_path, start, end)
+    yield closing
+
+
+def range_file_response(request, file_path, content_type=None, as_attachment=False,
+                        filename=None, cache_control=None):
+    """
+    Bir diskteki dosyayı Range/If-Range kurallarına uygun şekilde sunar.
+
+    Tüm indirme/görüntüleme endpoint'leri tarafından ortak kullanılır;
+    hangi aralık istenirse istensin bellek kullanımı sabittir.
+
+    cache_control verilirse yanıt önbelleklenebilir kabul edilir: koşullu
+    istekler (If-None-Match / If-Modified-Since) 304 ile yanıtlanır.
+    """
+    stat_result = os.stat(file_path)
+    file_size = stat_result.st_size
+    etag = file_etag(stat_result)
+    last_modified = http_date(stat_result.st_mtime)
+
+    if cache_control:
+        conditional = get_conditional_response(
+            request, etag=etag, last_modified=int(stat_result.st_mtime)
+        )
+        if conditional is not None:
+            conditional['ETag'] = etag
+            conditional['Last-Modified'] = last_modified
+            conditional['Cache-Control'] = cache_control
+            return conditional
+
+    if not content_type:
+        content_type, _ = mimetypes.guess_type(file_path)
+        content_type = content_type or 'application/octet-stream'
+    if filename is None:
+        filename = os.path.basename(file_path)
+
+    ranges = requested_ranges(request, stat_result)
+    if ranges is None:
+        response = FileResponse(
+            open(file_path, 'rb'),
+            content_type=content_type,
+            as_attachment=as_attachment,
+            filename=filename,
+        )
+    elif not ranges:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{file_size}"
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(
+            iter_file_range(file_path, start, end),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f"bytes {start}-{end}/{file_size}"
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        boundary = uuid.uuid4().hex
+        parts, closing = _multipart_parts(ranges, content_type, file_size, boundary)
+        content_length = len(closing) + sum(
+            len(header) + (end - start + 1) for header, start, end in parts
+        )
+        response = StreamingHttpResponse(
+            _iter_multipart(file_path, parts, closing),
+            status=206,
+            content_type=f"multipart/byteranges; boundary={boundary}",
+        )
+        response['Content-Length'] = str(content_length)
+
+    if response.status_code == 206:
+        content_disposition = content_disposition_header(as_attachment, filename)
+        if content_disposition:
+            response['Content-Disposition'] = content_disposition
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,634 @@
+# files/tests.py
+import atexit
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+import numpy as np
+from PIL import Image
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from files import renditions, search_index
+from files.buffering import BufferedBulkWriter
+from files.engagement import apply_view_events, consume_share_view, view_event_writer
+from files.models import (
+    CloudGroup, File, FileShare, GroupFile, ShareEngagement, ShareViewEvent, TrendingScore,
+)
+from files.search_views import SearchView, search_view
+from files.streaming import file_etag, parse_range_header, range_file_response
+from files.trending import TrendingAlgorithm, top_trending_shares
+from files.utils import watermark_upload
+from memory.models import MemoryItem, UserMemoryProfile
+from files.views import (
+    CloudGroupDetailView, FilePreviewView, FileUploadListView, GroupFileCommentCreateView,
+    GroupFileUploadView, download_file, secure_file_view, secure_media_view,
+)
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class FileQueryCountTests(TestCase):
+    """Sorgu sayısı satır/üye sayısından bağımsız olmalı (N+1 yok)."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(username='sahip', email='sahip@example.com', password='password')
+        self.outsider = User.objects.create_user(username='yabanci', email='yabanci@example.com', password='password')
+        members = [
+            User.objects.create_user(username=f'uye{i}', email=f'uye{i}@example.com', password='password')
+            for i in range(5)
+        ]
+        for i in range(5):
+            File.objects.create(owner=self.user, file=ContentFile(b'data', name=f'dosya{i}.txt'))
+        self.group = CloudGroup.objects.create(name='grup', owner=self.user)
+        self.group.members.add(self.user, *members)
+        self.group_file = GroupFile.objects.create(
+            group=self.group, uploader=self.user, file=ContentFile(b'data', name='grup.txt')
+        )
+
+    def _call(self, view, method='get', user=None, data=None, **kwargs):
+        request = getattr(self.factory, method)('/', data or {})
+        force_authenticate(request, user=user or self.user)
+        return view.as_view()(request, **kwargs)
+
+    def test_file_list(self):
+        with self.assertNumQueries(1):
+            response = self._call(FileUploadListView)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual({row['created_by_username'] for row in response.data}, {'sahip'})
+
+    def test_group_detail_membership(self):
+        # grup + EXISTS üyelik kontrolü
+        with self.assertNumQueries(2):
+            response = self._call(CloudGroupDetailView, pk=self.group.pk)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(2):
+            response = self._call(CloudGroupDetailView, user=self.outsider, pk=self.group.pk)
+        self.assertEqual(response.status_code, 403)
+
+    def test_group_file_upload_rejects_non_member(self):
+        upload = ContentFile(b'data', name='yeni.txt')
+        # serializer doğrulaması (grup) + grup + EXISTS üyelik kontrolü; üye listesi yüklenmez
+        with self.assertNumQueries(3):
+            response = self._call(
+                GroupFileUploadView, method='post', user=self.outsider,
+                data={'file': upload, 'group': self.group.pk}, group_id=self.group.pk
+            )
+        self.assertEqual(response.status_code, 403)
+
+    def test_group_file_comment_rejects_non_member(self):
+        # serializer doğrulaması (dosya) + dosya + EXISTS üyelik kontrolü
+        with self.assertNumQueries(3):
+            response = self._call(
+                GroupFileCommentCreateView, method='post', user=self.outsider,
+                data={'content': 'yorum', 'file': self.group_file.pk}, file_id=self.group_file.pk
+            )
+        self.assertEqual(response.status_code, 403)
+
+
+class RangeHeaderTests(SimpleTestCase):
+
+    def test_single_and_open_ended(self):
+        self.assertEqual(parse_range_header('bytes=0-99', 1000), [(0, 99)])
+        self.assertEqual(parse_range_header('bytes=900-', 1000), [(900, 999)])
+        self.assertEqual(parse_range_header('bytes=990-2000', 1000), [(990, 999)])
+
+    def test_suffix(self):
+        self.assertEqual(parse_range_header('bytes=-100', 1000), [(900, 999)])
+        self.assertEqual(parse_range_header('bytes=-5000', 1000), [(0, 999)])
+
+    def test_multi_range_is_sorted_and_coalesced(self):
+        self.assertEqual(parse_range_header('bytes=500-599, 0-99, 100-199', 1000), [(0, 199), (500, 599)])
+
+    def test_unsatisfiable_and_invalid(self):
+        self.assertEqual(parse_range_header('bytes=1000-', 1000), [])
+        self.assertEqual(parse_range_header('bytes=-0', 1000), [])
+        self.assertIsNone(parse_range_header('bytes=5-1', 1000))
+        self.assertIsNone(parse_range_header('items=0-1', 1000))
+        self.assertIsNone(parse_range_header('bytes=abc', 1000))
+
+
+class RangeFileResponseTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, 'veri.bin')
+        with open(cls.path, 'wb') as f:
+            f.write(bytes(range(256)) * 4)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def _get(self, **headers):
+        return range_file_response(RequestFactory().get('/', headers=headers), self.path)
+
+    def test_single_range(self):
+        response = self._get(Range='bytes=-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 1020-1023/1024')
+        self.assertEqual(b''.join(response.streaming_content), bytes([252, 253, 254, 255]))
+
+    def test_multipart(self):
+        response = self._get(Range='bytes=0-1,10-11')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertIn(b'Content-Range: bytes 10-11/1024\r\n\r\n\x0a\x0b', body)
+
+    def test_unsatisfiable(self):
+        response = self._get(Range='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_if_range(self):
+        etag = file_etag(os.stat(self.path))
+        self.assertEqual(self._get(Range='bytes=0-1', If_Range=etag).status_code, 206)
+        # Değişmiş temsil (veya zayıf ETag) -> tam dosya
+        self.assertEqual(self._get(Range='bytes=0-1', If_Range='"baska"').status_code, 200)
+        self.assertEqual(self._get(Range='bytes=0-1', If_Range=f'W/{etag}').status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ShareViewCountTests(TestCase):
+    """Devam aralık istekleri yalnızca sayılan görüntülemenin izin çereziyle sunulur."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='paylasan', email='paylasan@example.com', password='password')
+        self.file = File.objects.create(owner=self.user, file=ContentFile(b'x' * 1024, name='video.mp4'))
+        self.share = FileShare.objects.create(file=self.file, created_by=self.user, max_views=1)
+        self.factory = APIRequestFactory()
+
+    def _get(self, view=secure_media_view, token=None, **headers):
+        request = self.factory.get('/', headers=headers)
+        response = view(request, token=token or str(self.share.token))
+        # Tarayıcı gibi: verilen izin çerezi sonraki isteklerde gönderilir
+        self.factory.cookies.update(response.cookies)
+        return response
+
+    def test_range_requests_with_grant_count_once(self):
+        self.assertEqual(self._get(Range='bytes=0-').status_code, 206)
+        for headers in ({'Range': 'bytes=512-'}, {'Range': 'bytes=-100'}, {'Range': 'bytes=100-199,300-399'}):
+            self.assertEqual(self._get(**headers).status_code, 206)
+        self.share.refresh_from_db()
+        self.assertEqual(self.share.view_count, 1)
+        view_event_writer.flush()
+        self.assertEqual(ShareViewEvent.objects.filter(share=self.share).count(), 1)
+
+    def test_used_up_share_is_gone_without_grant(self):
+        for view in (secure_media_view, secure_file_view):
+            self.factory.cookies.clear()
+            FileShare.objects.filter(pk=self.share.pk).update(view_count=1)
+            # Baştan başlamayan aralık da izin olmadan hak tüketir
+            for headers in ({'Range': 'bytes=1-'}, {'Range': 'bytes=-100'}, {}):
+                self.assertEqual(self._get(view, **headers).status_code, 410)
+        self.share.refresh_from_db()
+        self.assertEqual(self.share.view_count, 1)
+
+    def test_first_request_counts_and_grants(self):
+        response = self._get(secure_file_view, Range='bytes=512-')
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.cookies[f'view_grant_share-{self.share.pk}']['httponly'])
+        self.assertEqual(self._get(secure_file_view, Range='bytes=0-9').status_code, 206)
+        self.share.refresh_from_db()
+        self.assertEqual(self.share.view_count, 1)
+        view_event_writer.flush()
+
+    def test_forged_or_foreign_grant_is_ignored(self):
+        FileShare.objects.filter(pk=self.share.pk).update(view_count=1)
+        other = FileShare.objects.create(file=self.file, created_by=self.user, max_views=1)
+        self.assertEqual(self._get(token=str(other.token)).status_code, 200)
+        # Başka paylaşımın izni ve imzasız değer geçersizdir
+        self.factory.cookies[f'view_grant_share-{self.share.pk}'] = f'share-{self.share.pk}'
+        self.assertEqual(self._get(Range='bytes=1-').status_code, 410)
+        view_event_writer.flush()
+
+    def test_one_time_file(self):
+        self.file.one_time_view = True
+        self.file.save()
+        token = str(self.file.view_token)
+        self.assertEqual(self._get(token=token).status_code, 200)
+        self.assertEqual(self._get(token=token, Range='bytes=1-').status_code, 206)
+        self.file.refresh_from_db()
+        self.assertTrue(self.file.has_been_viewed)
+
+        self.factory.cookies.clear()
+        self.assertEqual(self._get(token=token, Range='bytes=1-').status_code, 410)
+        self.assertEqual(self._get(token=token).status_code, 410)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, RENDITION_ROOT=os.path.join(MEDIA_ROOT, 'renditions'))
+class ConditionalGetTests(TestCase):
+    """Önbelleklenebilir yanıtlarda 304 ve Cache-Control; görüntüleme sayılı içerikte no-store."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='kosullu', email='kosullu@example.com', password='password')
+        buffer = BytesIO()
+        Image.new('RGB', (400, 300), (10, 200, 10)).save(buffer, 'JPEG')
+        self.file = File.objects.create(owner=self.owner, file=ContentFile(buffer.getvalue(), name='resim.jpg'))
+        self.factory = APIRequestFactory()
+
+    def _request(self, **headers):
+        request = self.factory.get('/', headers=headers)
+        force_authenticate(request, user=self.owner)
+        return request
+
+    def _assert_conditional(self, get, cache_control):
+        response = get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], cache_control)
+        for headers in ({'If-None-Match': response['ETag']},
+                        {'If-Modified-Since': response['Last-Modified']}):
+            not_modified = get(**headers)
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified['Cache-Control'], cache_control)
+            self.assertEqual(not_modified['ETag'], response['ETag'])
+        self.assertEqual(get(**{'If-None-Match': '"baska"'}).status_code, 200)
+
+    def test_download(self):
+        self._assert_conditional(
+            lambda **headers: download_file(self._request(**headers), file_id=self.file.pk),
+            'private, max-age=3600',
+        )
+
+    def test_preview(self):
+        File.objects.filter(pk=self.file.pk).update(is_public=True)
+        self._assert_conditional(
+            lambda **headers: FilePreviewView.as_view()(self._request(**headers), pk=self.file.pk),
+            'public, max-age=86400',
+        )
+
+    def test_view_token_media(self):
+        self._assert_conditional(
+            lambda **headers: secure_media_view(self._request(**headers), token=str(self.file.view_token)),
+            'private, max-age=3600',
+        )
+
+    def test_view_limited_media_is_never_cached(self):
+        share = FileShare.objects.create(file=self.file, created_by=self.owner, max_views=5)
+        File.objects.filter(pk=self.file.pk).update(one_time_view=True)
+        for token in (str(share.token), str(self.file.view_token)):
+            response = secure_media_view(self._request(), token=token)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('no-store', response['Cache-Control'])
+            # İzinli devam isteği koşullu olsa bile 304 almaz
+            self.factory.cookies.update(response.cookies)
+            response = secure_media_view(self._request(**{'If-None-Match': response['ETag']}), token=token)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('no-store', response['Cache-Control'])
+        view_event_writer.flush()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SearchLimitTests(TestCase):
+    """Arama endpoint'leri tek MATCH ile sıralar ve tür başına `limit` kadar döndürür."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.owner = owner = User.objects.create_user(username='arayan', email='arayan@example.com', password='password')
+        for i in range(5):
+            File.objects.create(owner=owner, is_public=True, file=ContentFile(b'data', name=f'rapor{i}.txt'))
+        File.objects.create(owner=owner, is_public=True, file=ContentFile(b'data', name='rapor-rapor-ozet.txt'))
+        File.objects.create(owner=owner, is_public=True, file=ContentFile(b'data', name='fatura.txt'))
+
+    def _names(self, rows):
+        return [os.path.basename(row['file']) for row in rows]
+
+    def test_search_view_limit(self):
+        request = APIRequestFactory().get('/', {'q': 'rapor', 'type': 'files', 'limit': 2})
+        with self.assertNumQueries(1):
+            response = SearchView.as_view()(request)
+        self.assertEqual(len(response.data['results']['files']), 2)
+
+        for limit, expected in (('x', 6), (0, 1), (500, 6)):
+            request = APIRequestFactory().get('/', {'q': 'rapor', 'type': 'files', 'limit': limit})
+            self.assertEqual(len(SearchView.as_view()(request).data['results']['files']), expected)
+
+    def _search_alt(self, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.owner)
+        return search_view(request).data['files']
+
+    def test_search_alt_limit_with_and_without_query(self):
+        self.assertEqual(len(self._search_alt(type='files', limit=3)), 3)
+        self.assertEqual(len(self._search_alt(type='files')), 7)
+        names = self._names(self._search_alt(q='fatura', type='files', limit=3))
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names[0].startswith('fatura'))
+
+    def test_rank_is_read_from_the_joined_match(self):
+        ranked = search_index.filter_ranked(File.objects.all(), 'file', 'rapor')
+        self.assertEqual(ranked.count(), 6)
+        # Terimi iki kez içeren başlık en alakalı
+        best = ranked.order_by('search_rank').first()
+        self.assertTrue(os.path.basename(best.file.name).startswith('rapor-rapor-ozet'))
+        self.assertEqual(str(ranked.query).count('MATCH'), 1)
+
+
+class WatermarkTests(SimpleTestCase):
+
+    def _upload(self, image, name, format):
+        buffer = BytesIO()
+        image.save(buffer, format)
+        return ContentFile(buffer.getvalue(), name=name)
+
+    def test_keeps_full_resolution(self):
+        upload = self._upload(Image.new('RGB', (5000, 300), (0, 0, 0)), 'genis.jpg', 'JPEG')
+        result = watermark_upload(upload, 'sahip')
+        self.assertEqual(result.name, 'genis_wm.jpg')
+        with Image.open(BytesIO(result.read())) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (5000, 300)))
+            # Damga sağ alt köşede, sol üst el değmemiş
+            self.assertGreater(max(image.crop((4800, 250, 5000, 300)).convert('L').getdata()), 60)
+            self.assertLess(max(image.crop((0, 0, 200, 50)).convert('L').getdata()), 10)
+
+    def test_transparent_png_flattened_to_white(self):
+        upload = self._upload(Image.new('RGBA', (200, 200), (0, 0, 0, 0)), 'seffaf.png', 'PNG')
+        with Image.open(BytesIO(watermark_upload(upload, 'sahip').read())) as image:
+            self.assertEqual(image.mode, 'RGB')
+            self.assertGreater(min(image.getpixel((5, 5))), 245)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, RENDITION_ROOT=os.path.join(MEDIA_ROOT, 'renditions'))
+class FilePreviewTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='sahip', email='sahip@example.com', password='password')
+        self.other = User.objects.create_user(username='diger', email='diger@example.com', password='password')
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), (200, 10, 10)).save(buffer, 'JPEG')
+        self.file = File.objects.create(owner=self.owner, file=ContentFile(buffer.getvalue(), name='foto.jpg'))
+
+    def _get(self, user=None, **params):
+        request = APIRequestFactory().get('/', params)
+        if user:
+            force_authenticate(request, user=user)
+        return FilePreviewView.as_view()(request, pk=self.file.pk)
+
+    def test_signed_url_without_jwt(self):
+        params = renditions.signed_preview_params(self.file.pk, 'small')
+        response = self._get(**params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], renditions.rendition_content_type())
+        with Image.open(BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(max(image.size), renditions.RENDITION_SIZES['small'])
+
+    def test_rejects_missing_expired_or_foreign_signature(self):
+        self.assertIn(self._get().status_code, (401, 403))
+        expired = renditions.signed_preview_params(self.file.pk, now=time.time() - 10 * 24 * 3600)
+        self.assertIn(self._get(**expired).status_code, (401, 403))
+        foreign = renditions.signed_preview_params(self.file.pk + 1)
+        self.assertIn(self._get(**foreign).status_code, (401, 403))
+
+    def test_session_access_is_owner_or_public(self):
+        self.assertEqual(self._get(user=self.owner).status_code, 200)
+        self.assertEqual(self._get(user=self.other).status_code, 404)
+
+    def test_rendition_keyed_on_file_stat(self):
+        path = self.file.file.path
+        first = renditions.get_rendition(self.file.pk, path, 'small')
+        self.assertEqual(renditions.get_rendition(self.file.pk, path, 'small'), first)
+        with open(path, 'ab') as f:
+            f.write(b'\0' * 16)
+        self.assertNotEqual(renditions.get_rendition(self.file.pk, path, 'small'), first)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TrendingRankingTests(TestCase):
+    """Saklanan skorlar eskimiş olsa da sıralama güncel skora göre olmalı."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def _share(self, name, age, view_count, engagement=None):
+        user = User.objects.create_user(username=name, email=f'{name}@example.com', password='password')
+        file_obj = File.objects.create(owner=user, file=ContentFile(b'data', name=f'{name}.jpg'))
+        share = FileShare.objects.create(file=file_obj, created_by=user, share_type='public', max_views=100)
+        FileShare.objects.filter(pk=share.pk).update(created_at=self.now - age, view_count=view_count)
+        if engagement:
+            ShareEngagement.objects.create(share=share, **engagement)
+        return FileShare.objects.select_related('engagement').get(pk=share.pk)
+
+    def setUp(self):
+        self.now = timezone.now()
+        three_days_ago = self.now - timedelta(days=3)
+        # Üç gün önce patlama yapmış paylaşım: o anki skor yüksek, bugün sönümlenmiş
+        self.burst = self._share('patlama', timedelta(days=4), 30, {
+            'views_1h': 20, 'views_24h': 30, 'views_7d': 30, 'updated_at': three_days_ago,
+        })
+        self.fresh = self._share('yeni', timedelta(hours=1), 10)
+        self.old = self._share('eski', timedelta(days=10), 1)
+        stored = {
+            self.burst: TrendingAlgorithm.calculate_trend_score(self.burst, now=three_days_ago),
+            self.fresh: TrendingAlgorithm.calculate_trend_score(self.fresh, now=self.now),
+            self.old: TrendingAlgorithm.calculate_trend_score(self.old, now=self.now - timedelta(days=9)),
+        }
+        for share, score in stored.items():
+            TrendingScore.objects.filter(share=share).update(score=score)
+        self.assertGreater(stored[self.burst], stored[self.fresh])
+
+    def test_ranks_by_current_score(self):
+        current = {
+            share.pk: TrendingAlgorithm.calculate_trend_score(share, now=self.now)
+            for share in (self.burst, self.fresh, self.old)
+        }
+        expected = sorted(current, key=current.get, reverse=True)
+        self.assertEqual(expected[0], self.fresh.pk)
+        self.assertEqual([share.pk for share in top_trending_shares(3, now=self.now)], expected)
+        self.assertEqual([share.pk for share in top_trending_shares(1, now=self.now)], expected[:1])
+        self.assertEqual([share.pk for share in top_trending_shares(5, category='image', now=self.now)], expected)
+        self.assertEqual(top_trending_shares(5, category='video', now=self.now), [])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BufferedBulkWriterTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        user = User.objects.create_user(username='paylasan', email='paylasan@example.com', password='password')
+        file_obj = File.objects.create(owner=user, file=ContentFile(b'data', name='foto.jpg'))
+        self.share = FileShare.objects.create(file=file_obj, created_by=user, share_type='public', max_views=3)
+        self.flushed = []
+        self.writer = BufferedBulkWriter(
+            ShareViewEvent, max_batch=2, flush_interval=0, on_flush=[self.flushed.append], max_retries=2,
+        )
+        self.addCleanup(atexit.unregister, self.writer.close)
+
+    def _event(self):
+        return ShareViewEvent(share_id=self.share.pk)
+
+    def test_backpressure_flushes_in_batches(self):
+        self.writer.extend([self._event() for _ in range(5)])
+        self.assertEqual(ShareViewEvent.objects.count(), 4)
+        self.assertEqual(len(self.writer), 1)
+        self.assertEqual(self.writer.flush(), 1)
+        self.assertEqual([len(chunk) for chunk in self.flushed], [2, 2, 1])
+
+    def test_failed_chunk_is_retried_then_dead_lettered(self):
+        self.writer.max_batch = 10
+        self.writer.extend([self._event() for _ in range(3)])
+        with patch.object(ShareViewEvent.objects, 'bulk_create', side_effect=DatabaseError('kilitli')), \
+                self.assertLogs('files.buffering', 'ERROR'):
+            self.assertEqual(self.writer.flush(), 0)
+        # Kayıtlar kaybolmadı, sonraki boşaltmada yazılır
+        self.assertEqual(len(self.writer), 3)
+        self.assertEqual(self.writer.flush(), 3)
+        self.assertEqual(ShareViewEvent.objects.count(), 3)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(BUFFERED_WRITER_DEAD_LETTER_DIR=directory):
+            self.writer.extend([self._event() for _ in range(2)])
+            with patch.object(ShareViewEvent.objects, 'bulk_create', side_effect=DatabaseError('kilitli')), \
+                    self.assertLogs('files.buffering', 'ERROR'):
+                self.writer.flush()
+                self.writer.flush()
+            self.assertEqual(len(self.writer), 0)
+            with open(self.writer.dead_letter_path(), encoding='utf-8') as f:
+                self.assertEqual(len(f.readlines()), 2)
+        self.assertEqual(ShareViewEvent.objects.count(), 3)
+        self.assertEqual(sum(len(chunk) for chunk in self.flushed), 3)
+
+    def test_share_view_updates_trending_once_on_flush(self):
+        with patch('files.signals.update_share_score') as signal_update:
+            for _ in range(3):
+                self.assertTrue(consume_share_view(self.share))
+            self.assertFalse(consume_share_view(self.share))
+        signal_update.assert_not_called()
+        self.share.refresh_from_db()
+        self.assertEqual(self.share.view_count, 3)
+
+        with patch('files.trending.update_scores_for_shares') as rescore:
+            view_event_writer.flush()
+        rescore.assert_called_once_with({self.share.pk})
+        self.assertAlmostEqual(self.share.engagement.views_1h, 3, places=2)
+
+    def test_engagement_counters_accumulate_across_flushes(self):
+        other = FileShare.objects.create(file=self.share.file, created_by=self.share.created_by, max_views=3)
+        now = timezone.now()
+        apply_view_events([ShareViewEvent(share_id=self.share.pk, viewed_at=now)] * 2)
+        # Var olan satır kilitlenip güncellenir, eksik olan eklenir
+        with self.assertNumQueries(5):
+            apply_view_events([
+                ShareViewEvent(share_id=self.share.pk, viewed_at=now),
+                ShareViewEvent(share_id=other.pk, viewed_at=now),
+            ])
+        counters = dict(ShareEngagement.objects.values_list('share_id', 'views_24h'))
+        self.assertAlmostEqual(counters[self.share.pk], 3)
+        self.assertAlmostEqual(counters[other.pk], 1)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class UploadQuotaTests(TestCase):
+    """Kota hafızaya alınan her yükleme için AI işlemeden önce ayrılır; aşılırsa yükleme 400 ile geri alınır."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='kota', email='kota@example.com', password='password')
+        # 1 KB kota
+        UserMemoryProfile.objects.create(user=self.user, memory_quota_mb=1 / 1024)
+        patcher = patch('files.views.AIService')
+        self.ai_service = patcher.start()
+        service = self.ai_service.return_value
+        self.addCleanup(patcher.stop)
+        service.extract_text_from_file.return_value = 'toplantı notları ve kararlar'
+        service.get_text_embedding.return_value = np.ones(4, dtype=np.float32)
+
+    def _upload(self, name, size):
+        request = APIRequestFactory().post(
+            '/', {'file': SimpleUploadedFile(name, b'x' * size)}, format='multipart'
+        )
+        force_authenticate(request, user=self.user)
+        return FileUploadListView.as_view()(request)
+
+    def _profile(self):
+        return UserMemoryProfile.objects.get(user=self.user)
+
+    def test_reserves_bytes_with_memory_item(self):
+        response = self._upload('notlar.txt', 600)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(MemoryItem.objects.filter(user=self.user).count(), 1)
+        self.assertEqual((self._profile().total_items, self._profile().total_bytes), (1, 600))
+
+    def test_quota_exceeded_returns_400_and_rolls_back(self):
+        self.assertEqual(self._upload('notlar.txt', 600).status_code, 201)
+        response = self._upload('ikinci.txt', 600)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('kotası', str(response.data))
+        self.assertEqual(File.objects.filter(owner=self.user).count(), 1)
+        self.assertEqual(MemoryItem.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self._profile().total_bytes, 600)
+
+    def test_quota_checked_before_storage_and_ai(self):
+        self.assertEqual(self._upload('notlar.txt', 600).status_code, 201)
+        self.ai_service.reset_mock()
+        with patch('files.views.watermark_upload') as watermark:
+            response = self._upload('ikinci.png', 600)
+        self.assertEqual(response.status_code, 400)
+        watermark.assert_not_called()
+        self.ai_service.assert_not_called()
+        self.assertEqual(File.objects.filter(owner=self.user).count(), 1)
+
+    def test_reserves_quota_when_embedding_fails(self):
+        self.ai_service.return_value.get_text_embedding.side_effect = RuntimeError('model yok')
+        response = self._upload('notlar.txt', 600)
+        self.assertEqual(response.status_code, 201)
+        # Kayıt vektörsüz kalır; generate_embeddings sonradan tamamlar
+        item = MemoryItem.objects.get(user=self.user)
+        self.assertIsNone(item.vector_embedding)
+        self.assertEqual((self._profile().total_items, self._profile().total_bytes), (1, 600))
+
+    def test_files_without_memory_item_do_not_use_quota(self):
+        # Hafızaya alınmayan türler (ör. arşiv) kotaya takılmaz
+        response = self._upload('yedek.zip', 4096)
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(MemoryItem.objects.filter(user=self.user).exists())
+        self.assertEqual(self._profile().total_bytes, 0)
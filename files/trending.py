@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# files/trending.py
+"""
+Trend skoru hesaplama ve materyalize trend tablosu (TrendingScore) bakımı.
+
+Saklanan skor, hesaplandığı andaki değerdir. Yaş ağırlığı ve sönümlü
+sayaçlar zamanla yalnızca azaldığından bu değer güncel skorun üst sınırıdır.
+top_trending_shares satırları bu üst sınıra göre (indeksle) okur, güncel
+skoru okuma anında yeniden hesaplar ve sıradaki üst sınır elindeki en düşük
+güncel skoru geçemediği anda durur. Sıralama bu yüzden yenileme sıklığından
+bağımsız olarak doğrudur; refresh_trending (ör. saatlik) yalnızca okunan
+fazladan satır sayısını düşük tutar.
+"""
+import heapq
+import os
+from datetime import timedelta
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+
+from .engagement import decayed_counters
+from .models import FileShare, TrendingScore
+
+TRENDING_WINDOW_DAYS = 30
+
+CATEGORY_EXTENSIONS = {
+    'image': ('.jpg', '.jpeg', '.png', '.gif', '.bmp'),
+    'video': ('.mp4', '.avi', '.mov', '.mkv'),
+    'document': ('.pdf', '.doc', '.docx', '.txt'),
+    'audio': ('.mp3', '.wav', '.ogg'),
+}
+DEFAULT_CATEGORY = 'other'
+
+
+def category_for_name(file_name):
+    ext = os.path.splitext(file_name or '')[1].lower()
+    for category, extensions in CATEGORY_EXTENSIONS.items():
+        if ext in extensions:
+            return category
+    return DEFAULT_CATEGORY
+
+
+def trending_window_start():
+    return timezone.now() - timedelta(days=TRENDING_WINDOW_DAYS)
+
+
+def _engagement_of(share):
+    try:
+        return share.engagement
+    except ObjectDoesNotExist:
+        return None
+
+
+class TrendingAlgorithm:
+    @staticmethod
+    def calculate_trend_score(file_share, now=None):
+        """
+        Skor; toplam görüntüleme, paylaşımın yaşı ve sönümlü etkileşim
+        sayaçlarından (ShareEngagement) hesaplanır. Paylaşım başına ek sorgu yok
+        (engagement select_related ile gelmelidir).
+        """
+        try:
+            now = now or timezone.now()
+            counters = decayed_counters(_engagement_of(file_share), now)
+
+            view_weight = (file_share.view_count / max(file_share.max_views, 1)) * 0.4
+            time_elapsed = (now - file_share.created_at).total_seconds()
+            time_weight = max(0, 1 - (time_elapsed / 604800)) * 0.3
+            # Son 24 saatte gelen görüntülemelerin toplam içindeki payı
+            engagement_weight = min(1.0, counters['views_24h'] / max(file_share.view_count, 1)) * 0.2
+            # Hız: son 1 saat, son 24 saatin saatlik ortalamasına göre kaç kat
+            hourly_average = counters['views_24h'] / 24
+            velocity = counters['views_1h'] / max(hourly_average, 1.0)
+            momentum = min(1.0, velocity / 4) * 0.1 if counters['views_7d'] > 10 else 0
+            total_score = (view_weight + time_weight + engagement_weight + momentum) * 100
+            return round(total_score, 2)
+        except Exception as e:
+            print(f"Trend score hesaplama hatası: {e}")
+            return 0
+
+
+def _is_trending_candidate(share):
+    return share.share_type == 'public' and not share.is_revoked
+
+
+def update_share_score(share):
+    """Tek bir paylaşımın trend satırını artımlı olarak günceller."""
+    if not _is_trending_candidate(share):
+        TrendingScore.objects.filter(share_id=share.pk).delete()
+        return None
+
+    score = TrendingAlgorithm.calculate_trend_score(share)
+    TrendingScore.objects.update_or_create(
+        share_id=share.pk,
+        defaults={
+            'category': category_for_name(share.file.file.name),
+            'score': score,
+            'shared_at': share.created_at,
+        }
+    )
+    return score
+
+
+def refresh_trending_scores(batch_size=1000):
+    """
+    Penceredeki tüm herkese açık paylaşımların skorlarını yeniden hesaplar,
+    pencere dışına düşen veya artık aday olmayan satırları siler.
+    Dönüş: (güncellenen, silinen)
+    """
+    now = timezone.now()
+    window_start = now - timedelta(days=TRENDING_WINDOW_DAYS)
+
+    shares = FileShare.objects.filter(
+        share_type='public', is_revoked=False, created_at__gte=window_start
+    ).select_related('file', 'engagement')
+
+    updated = 0
+    batch = []
+    for share in shares.iterator(chunk_size=batch_size):
+        batch.append(TrendingScore(
+            share_id=share.id,
+            category=category_for_name(share.file.file.name),
+            score=TrendingAlgorithm.calculate_trend_score(share, now=now),
+            shared_at=share.created_at,
+            updated_at=now,
+        ))
+        if len(batch) >= batch_size:
+            updated += _upsert_scores(batch)
+            batch = []
+    if batch:
+        updated += _upsert_scores(batch)
+
+    deleted, _ = TrendingScore.objects.exclude(
+        share__share_type='public', share__is_revoked=False, shared_at__gte=window_start
+    ).delete()
+    return updated, deleted
+
+
+def update_scores_for_shares(share_ids):
+    """Görüntüleme olayı gelen paylaşımların skorlarını toplu günceller."""
+    if not share_ids:
+        return 0
+    now = timezone.now()
+    shares = FileShare.objects.filter(
+        id__in=share_ids, share_type='public', is_revoked=False
+    ).select_related('file', 'engagement')
+    rows = [
+        TrendingScore(
+            share_id=share.id,
+            category=category_for_name(share.file.file.name),
+            score=TrendingAlgorithm.calculate_trend_score(share, now=now),
+            shared_at=share.created_at,
+            updated_at=now,
+        )
+        for share in shares
+    ]
+    return _upsert_scores(rows) if rows else 0
+
+
+def _upsert_scores(rows):
+    TrendingScore.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['share'],
+        update_fields=['category', 'score', 'shared_at', 'updated_at'],
+    )
+    return len(rows)
+
+
+def top_trending_shares(limit, category=None, now=None):
+    """
+    Güncel skoru en yüksek paylaşımlar. Satırlar saklanan skora (üst sınır)
+    göre parça parça okunur; genellikle tek sorgu yeter.
+
+    Tampondaki (henüz boşaltılmamış) görüntülemeler skoru birkaç saniyeliğine
+    saklanan değerin üzerine çıkarabilir; tampon boşaltılınca satır yenilenir.
+    """
+    if limit <= 0:
+        return []
+    now = now or timezone.now()
+    qs = TrendingScore.objects.filter(shared_at__gte=now - timedelta(days=TRENDING_WINDOW_DAYS))
+    if category:
+        qs = qs.filter(category=category)
+    qs = qs.select_related(
+        'share__file__owner', 'share__created_by', 'share__engagement'
+    ).order_by('-score', 'share_id')
+
+    # (güncel skor, -sıra, paylaşım) min-heap'i: eşit skorda önce okunan kazanır
+    best = []
+    chunk_size = limit * 2
+    offset = 0
+    while True:
+        rows = list(qs[offset:offset + chunk_size])
+        for position, row in enumerate(rows, start=offset):
+            if len(best) >= limit and row.score <= best[0][0]:
+                rows = []
+                break
+            entry = (TrendingAlgorithm.calculate_trend_score(row.share, now=now), -position, row.share)
+            if len(best) < limit:
+                heapq.heappush(best, entry)
+            elif entry[:2] > best[0][:2]:
+                heapq.heapreplace(best, entry)
+        if len(rows) < chunk_size:
+            break
+        offset += chunk_size
+    return [share for _, _, share in sorted(best, key=lambda entry: entry[:2], reverse=True)]
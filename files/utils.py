@@ -1,46 +1,97 @@
 # -*- coding: utf-8 -*-
 
+import os
+from functools import lru_cache
+from io import BytesIO
+
+from django.core.files.base import ContentFile
 from PIL import Image, ImageDraw, ImageFont
 
+WATERMARK_FONT_SIZE = 36
+WATERMARK_MARGIN = 10
+WATERMARK_FILL = (255, 255, 255, 128)
+WATERMARK_JPEG_QUALITY = 95
+
+
+@lru_cache(maxsize=8)
+def _load_font(size):
+    """Fontu bir kez yükler; her yüklemede diskten tekrar okunmaz."""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=256)
+def _watermark_stamp(text, font_size):
+    """
+    Sadece metni içeren küçük RGBA katmanı (metin, boyut) başına önbelleğe alınır.
+    Tam görüntü boyutunda şeffaf katman oluşturmaya gerek kalmaz.
+    """
+    font = _load_font(font_size)
+    bbox = ImageDraw.Draw(Image.new('RGBA', (1, 1))).textbbox((0, 0), text, font=font)
+    stamp = Image.new('RGBA', (bbox[2], bbox[3]), (255, 255, 255, 0))
+    ImageDraw.Draw(stamp).text((0, 0), text, font=font, fill=WATERMARK_FILL)
+    # Metnin gerçek kutusu (sol/üst boşluk hariç) konumlandırmada kullanılır
+    return stamp, bbox
+
+
+def _flatten_to_rgb(image):
+    """Şeffaf görüntüleri beyaz zemine oturtur, JPEG için RGB döndürür."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def render_watermark(source, output, username):
+    """
+    Görüntüye filigran ekler ve sonucu JPEG olarak tek seferde `output`a yazar.
+
+    `source` ve `output` dosya yolu ya da dosya benzeri nesne olabilir.
+    Görüntü tam çözünürlükte saklanır; küçük kopyalar önizleme
+    (renditions) tarafından ayrıca üretilir.
+    """
+    image = _flatten_to_rgb(Image.open(source))
+
+    stamp, bbox = _watermark_stamp(f"© {username}", WATERMARK_FONT_SIZE)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+
+    # Metin konumu (sağ alt köşe)
+    x = image.width - text_width - WATERMARK_MARGIN - bbox[0]
+    y = image.height - text_height - WATERMARK_MARGIN - bbox[1]
+
+    # Yalnızca damga bölgesi harmanlanır (RGB üzerine alfa maskesiyle)
+    image.paste(stamp, (x, y), mask=stamp)
+    image.save(output, "JPEG", quality=WATERMARK_JPEG_QUALITY)
+
+
 def add_watermark(input_image_path, output_image_path, username):
     try:
-        # Görüntüyü aç
-        image = Image.open(input_image_path).convert("RGBA")
-        
-        # Şeffaf bir katman oluştur
-        watermark = Image.new('RGBA', image.size, (255, 255, 255, 0))
-        
-        # Yazı fontu ve boyutu
-        try:
-            font = ImageFont.truetype("arial.ttf", 36)
-        except:
-            font = ImageFont.load_default()
-        
-        draw = ImageDraw.Draw(watermark)
-        text = f"© {username}"
-        
-        # Metin boyutunu al (yeni yöntem)
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        
-        # Metin konumu (sağ alt köşe)
-        x = image.width - text_width - 10
-        y = image.height - text_height - 10
-        
-        # Metni çiz
-        draw.text((x, y), text, font=font, fill=(255, 255, 255, 128))
-        
-        # Orijinal görüntüyle birleştir
-        watermarked = Image.alpha_composite(image, watermark)
-        
-        # JPEG formatında kaydetmek için RGB'ye çevir
-        if watermarked.mode in ('RGBA', 'LA'):
-            background = Image.new('RGB', watermarked.size, (255, 255, 255))
-            background.paste(watermarked, mask=watermarked.split()[-1])
-            watermarked = background
-        
-        watermarked.save(output_image_path, "JPEG", quality=95)
-        
+        render_watermark(input_image_path, output_image_path, username)
     except Exception as e:
         raise Exception(f"Watermark eklenirken hata oluştu: {str(e)}")
+
+
+def watermark_upload(uploaded_file, username):
+    """
+    Yüklenen dosyayı diske yazmadan bellekte filigranlar.
+
+    Dönen ContentFile `<ad>_wm.jpg` adını taşır ve doğrudan
+    `serializer.save(file=...)` ile hedef depolamaya bir kez yazılır.
+    """
+    uploaded_file.seek(0)
+    buffer = BytesIO()
+    try:
+        render_watermark(uploaded_file, buffer, username)
+    except Exception as e:
+        uploaded_file.seek(0)
+        raise Exception(f"Watermark eklenirken hata oluştu: {str(e)}")
+
+    base_name = os.path.splitext(os.path.basename(uploaded_file.name))[0]
+    return ContentFile(buffer.getvalue(), name=f"{base_name}_wm.jpg")
@@ -28,7 +28,7 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST, require_http_methods
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Count, Q, F, ExpressionWrapper, FloatField
 from django.db.models.functions import Coalesce
 
@@ -52,13 +52,21 @@ from .serializers import (
     FileCommentSerializer, GroupInviteSerializer, FileShareSerializer,
     SecureLinkSerializer, MediaFileSerializer
 )
-from .utils import add_watermark
+from .utils import watermark_upload
+from .streaming import range_file_response, file_cache_control
+from . import renditions, search_index
+from .trending import CATEGORY_EXTENSIONS, top_trending_shares
+from .engagement import consume_share_view, grant_view, has_view_grant
+from .permissions import HasPreviewSignature
+from cloud_mvp.pagination import OptionalCursorPagination
+from cloud_mvp.tracing import span, traced
 
 from users.models import Device
 from users.security.camera_detector import security_detector
 
 from memory.models import MemoryItem, MemoryTier, VideoFrame
 from memory.services.ai_services import AIService
+from memory.services.usage import QuotaExceeded, record_created, reserve_quota
 
 logger = logging.getLogger(__name__)
 
@@ -226,26 +234,6 @@ def render_secure_html_page(request, file_obj):
 
 # ==================== TREND ALGORİTMASI ====================
 
-class TrendingAlgorithm:
-    @staticmethod
-    def calculate_trend_score(file_share):
-        try:
-            view_weight = (file_share.view_count / max(file_share.max_views, 1)) * 0.4
-            time_elapsed = (timezone.now() - file_share.created_at).total_seconds()
-            time_weight = max(0, 1 - (time_elapsed / 604800)) * 0.3
-            recent_views = FileShare.objects.filter(
-                id=file_share.id,
-                created_at__gte=timezone.now() - timedelta(hours=24)
-            ).count()
-            engagement_weight = (recent_views / max(file_share.view_count, 1)) * 0.2
-            momentum = min(1.0, file_share.view_count / 100) * 0.1 if file_share.view_count > 10 else 0
-            total_score = (view_weight + time_weight + engagement_weight + momentum) * 100
-            return round(total_score, 2)
-        except Exception as e:
-            print(f"Trend score hesaplama hatası: {e}")
-            return 0
-
-
 # ==================== GÜVENLİK MİDDLEWARE ====================
 
 class SecurityMiddleware:
@@ -372,34 +360,13 @@ def download_file(request, file_id):
     file_path = file_obj.file.path
     if not os.path.exists(file_path):
         return HttpResponse("Dosya bulunamadı", status=404)
-    
-    file_size = os.path.getsize(file_path)
-    range_header = request.headers.get("Range", "").strip()
-
-    if range_header:
-        range_value = range_header.split("=")[1]
-        start, end = range_value.split("-")
-        start = int(start)
-        end = int(end) if end else file_size - 1
-        length = end - start + 1
-
-        with open(file_path, "rb") as f:
-            f.seek(start)
-            data = f.read(length)
-
-        response = HttpResponse(data, status=206, content_type="application/octet-stream")
-        response["Content-Range"] = f"bytes {start}-{end}/{file_size}"
-        response["Accept-Ranges"] = "bytes"
-        response["Content-Length"] = str(length)
-        return response
-    else:
-        response = FileResponse(
-            open(file_path, "rb"), 
-            as_attachment=True, 
-            filename=os.path.basename(file_path)
-        )
-        response["Accept-Ranges"] = "bytes"
-        return response
+
+    return range_file_response(
+        request, file_path,
+        content_type="application/octet-stream",
+        as_attachment=True,
+        cache_control=None if file_obj.one_time_view else file_cache_control()
+    )
 
 
 def consume_file(request, file_id):
@@ -460,28 +427,32 @@ def secure_file_view(request, token):
     if share.is_expired():
         return HttpResponseGone("Bu paylaşım süresi doldu.")
     
-    if share.view_count >= share.max_views:
-        return HttpResponseGone("Maksimum görüntüleme sayısına ulaşıldı.")
-
     try:
-        share.view_count += 1
-        share.save()
-        
         file_object = share.file.file
         file_path = file_object.path
     except Exception:
         return HttpResponseGone("Dosya içeriği bulunamadı.")
+
+    # Sayılmış görüntülemenin izni yoksa her istek yeni görüntülemedir
+    resource = f'share-{share.pk}'
+    granted = has_view_grant(request, resource)
+    if not granted and not consume_share_view(share, request):
+        return HttpResponseGone("Maksimum görüntüleme sayısına ulaşıldı.")
     
     content_type = file_object.file.content_type if hasattr(
         file_object.file, 'content_type'
     ) else 'application/octet-stream'
 
-    response = FileResponse(open(file_path, 'rb'), content_type=content_type)
-    response['Content-Disposition'] = f'inline; filename="{file_object.name}"'
+    response = range_file_response(
+        request, file_path, content_type=content_type,
+        filename=os.path.basename(file_object.name)
+    )
     response['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
     response['Pragma'] = 'no-cache'
     response['Expires'] = '0'
     response['X-Content-Type-Options'] = 'nosniff'
+    if not granted:
+        grant_view(request, response, resource)
 
     return response
 
@@ -505,16 +476,6 @@ def secure_media_view(request, token):
             except File.DoesNotExist:
                 return Response({"error": "Geçersiz token"}, status=404)
 
-        is_already_consumed = False
-        if file_share:
-            if file_share.view_count >= file_share.max_views:
-                is_already_consumed = True
-        elif file_obj and file_obj.one_time_view and file_obj.has_been_viewed:
-            is_already_consumed = True
-
-        if is_already_consumed:
-            return Response({"error": "Bu medya zaten tüketildi."}, status=410)
-
         if not file_obj or not file_obj.file:
             return Response({"error": "Dosya bulunamadı"}, status=404)
 
@@ -522,24 +483,41 @@ def secure_media_view(request, token):
         if not os.path.exists(file_path):
             return Response({"error": "Dosya diskte bulunamadı"}, status=404)
 
+        # Görüntüleme sayılı içerikte izinsiz her istek hak tüketir
+        resource = None
+        counted = False
+        if file_share:
+            resource = f'share-{file_share.pk}'
+        elif file_obj.one_time_view:
+            resource = f'file-{file_obj.pk}'
+        if resource and not has_view_grant(request, resource):
+            if file_share:
+                counted = consume_share_view(file_share, request)
+            else:
+                counted = bool(File.objects.filter(
+                    pk=file_obj.pk, has_been_viewed=False
+                ).update(has_been_viewed=True))
+            if not counted:
+                return Response({"error": "Bu medya zaten tüketildi."}, status=410)
+
         content_type, encoding = mimetypes.guess_type(file_path)
         if not content_type:
             content_type = 'application/octet-stream'
 
-        if file_share:
-            file_share.view_count += 1
-            file_share.save()
-        elif file_obj and file_obj.one_time_view and not file_obj.has_been_viewed:
-            file_obj.has_been_viewed = True
-            file_obj.save()
-
-        response = FileResponse(open(file_path, 'rb'), content_type=content_type)
-        filename = os.path.basename(file_path)
-        response['Content-Disposition'] = f'inline; filename="{filename}"'
-        response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
+        if file_share or file_obj.one_time_view:
+            # Görüntüleme sayılı içerik: asla önbelleğe alınmaz
+            response = range_file_response(request, file_path, content_type=content_type)
+            response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+            response['Pragma'] = 'no-cache'
+            response['Expires'] = '0'
+        else:
+            response = range_file_response(
+                request, file_path, content_type=content_type,
+                cache_control=file_cache_control(public=file_obj.is_public)
+            )
         response['X-Content-Type-Options'] = 'nosniff'
+        if counted:
+            grant_view(request, response, resource)
 
         return response
 
@@ -645,13 +623,16 @@ class SecureMediaView(APIView):
             
             share = get_object_or_404(FileShare, token=token, is_revoked=False)
             
-            if share.is_expired() or share.view_count >= share.max_views:
+            file_path = share.file.file.path
+            resource = f'share-{share.pk}'
+            granted = has_view_grant(request, resource)
+            if share.is_expired() or (not granted and not consume_share_view(share, request)):
                 return self.render_security_block("Link süresi doldu veya limit aşıldı.")
-
-            share.view_count += 1
-            share.save()
             
-            return FileResponse(share.file.file.open('rb'))
+            response = range_file_response(request, file_path)
+            if not granted:
+                grant_view(request, response, resource)
+            return response
             
         except Exception as e:
             return Response({'error': str(e)}, status=500)
@@ -686,20 +667,7 @@ class SecureMediaView(APIView):
 def trending_files(request):
     """Trend dosyaları listele"""
     try:
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        
-        trending_shares = FileShare.objects.filter(
-            share_type='public',
-            created_at__gte=thirty_days_ago
-        ).select_related('file', 'created_by')
-        
-        shares_with_scores = []
-        for share in trending_shares:
-            score = TrendingAlgorithm.calculate_trend_score(share)
-            shares_with_scores.append((share, score))
-        
-        shares_with_scores.sort(key=lambda x: x[1], reverse=True)
-        sorted_shares = [share for share, score in shares_with_scores[:50]]
+        sorted_shares = top_trending_shares(50)
         
         serializer = FileShareSerializer(
             sorted_shares, many=True, context={'request': request}
@@ -718,29 +686,10 @@ def trending_files(request):
 def trending_by_category(request, category):
     """Kategoriye göre trend dosyalar"""
     try:
-        file_extensions = {
-            'image': ['.jpg', '.jpeg', '.png', '.gif', '.bmp'],
-            'video': ['.mp4', '.avi', '.mov', '.mkv'],
-            'document': ['.pdf', '.doc', '.docx', '.txt'],
-            'audio': ['.mp3', '.wav', '.ogg']
-        }
-        
-        extensions = file_extensions.get(category, [])
-        if not extensions:
+        if category not in CATEGORY_EXTENSIONS:
             return Response({"error": "Geçersiz kategori"}, status=400)
         
-        trending_shares = FileShare.objects.filter(
-            share_type='public',
-            file__file__endswith=tuple(extensions)
-        )
-        
-        shares_with_scores = []
-        for share in trending_shares:
-            score = TrendingAlgorithm.calculate_trend_score(share)
-            shares_with_scores.append((share, score))
-        
-        shares_with_scores.sort(key=lambda x: x[1], reverse=True)
-        sorted_shares = [share for share, score in shares_with_scores[:20]]
+        sorted_shares = top_trending_shares(20, category=category)
         
         serializer = FileShareSerializer(
             sorted_shares, many=True, context={'request': request}
@@ -768,12 +717,15 @@ def search_public_files_view(request):
 
     public_shares_queryset = FileShare.objects.filter(
         share_type='public', file__isnull=False
-    )
+    ).select_related('file__owner', 'created_by')
     
     search_criteria = Q(file__file__icontains=query) | Q(
         created_by__username__icontains=query
     )
-    search_results = public_shares_queryset.filter(search_criteria).distinct()
+    search_results = search_index.search(
+        public_shares_queryset, 'file_share', query, search_criteria,
+        limit=search_index.result_limit(request.query_params.get('limit'))
+    )
     
     serializer = FileShareSerializer(
         search_results, many=True, context={'request': request}
@@ -781,7 +733,7 @@ def search_public_files_view(request):
     
     return Response({
         'fileshares': serializer.data,
-        'message': f"'{query}' için {search_results.count()} sonuç bulundu."
+        'message': f"'{query}' için {len(search_results)} sonuç bulundu."
     })
 
 
@@ -813,7 +765,7 @@ def download_with_token(request, token):
         return HttpResponseForbidden("Link expired or max uses reached")
     link.used_count += 1
     link.save()
-    return FileResponse(link.file.file.open("rb"), as_attachment=True)
+    return range_file_response(request, link.file.file.path, as_attachment=True)
 
 
 # ==================== GRUP YÖNETİMİ ====================
@@ -915,7 +867,7 @@ def access_file(request, file_name):
     if not os.path.exists(file_path):
         return HttpResponse("Dosya bulunamadı", status=404)
     
-    return FileResponse(open(file_path, "rb"), as_attachment=True)
+    return range_file_response(request, file_path, as_attachment=True)
 
 
 # ==================== AKILLI ARAMA ====================
@@ -1069,36 +1021,32 @@ class MediaFileViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         file_obj = self.request.data.get("file")
-        instance = serializer.save(uploader=self.request.user)
 
         mime_type, _ = mimetypes.guess_type(file_obj.name)
         if mime_type and mime_type.startswith("image"):
             try:
-                instance.save()
-                original_path = instance.file.path
-                base_path = os.path.splitext(original_path)[0]
-                watermarked_path = base_path + "_wm.jpg"
-
-                add_watermark(
-                    original_path, watermarked_path, 
-                    username=self.request.user.username
-                )
-
-                with open(watermarked_path, "rb") as f:
-                    instance.file.save(
-                        os.path.basename(watermarked_path), 
-                        ContentFile(f.read()), 
-                        save=True
-                    )
-
-                if os.path.exists(original_path):
-                    os.remove(original_path)
-                if os.path.exists(watermarked_path):
-                    os.remove(watermarked_path)
-                    
+                file_obj = watermark_upload(file_obj, self.request.user.username)
             except Exception as e:
                 print(f"Watermark hatası: {str(e)}")
 
+        serializer.save(uploader=self.request.user, file=file_obj)
+
+
+def memory_file_type(mime_type, file_name):
+    """Yüklemenin hafıza türü; hafızaya alınmayan dosyalar için 'unknown'."""
+    if not mime_type:
+        return 'unknown'
+    if mime_type.startswith('image'):
+        return 'image'
+    if mime_type.startswith('text') or mime_type == 'application/pdf' or \
+            file_name.lower().endswith(('.docx', '.py', '.js', '.md')):
+        return 'text'
+    if mime_type.startswith('video'):
+        return 'video'
+    if mime_type.startswith('audio'):
+        return 'audio'
+    return 'unknown'
+
 
 class FileUploadListView(
     mixins.ListModelMixin, mixins.CreateModelMixin, generics.GenericAPIView
@@ -1107,12 +1055,12 @@ class FileUploadListView(
     serializer_class = FileSerializer
     parser_classes = (MultiPartParser, FormParser)
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = '-uploaded_at'
 
     def get_queryset(self):
         try:
-            qs = File.objects.filter(owner=self.request.user).order_by('-uploaded_at')
-            print(f"📁 File count: {qs.count()}")
-            return qs
+            return File.objects.filter(owner=self.request.user).select_related('owner').order_by('-uploaded_at')
         except Exception as e:
             print(f"Get queryset error: {str(e)}")
             return File.objects.none()
@@ -1127,6 +1075,9 @@ class FileUploadListView(
         try:
             print("File upload başlıyor...")
             return super().create(request, *args, **kwargs)
+        except serializers.ValidationError:
+            # Eksik dosya / kota aşımı: 400 olarak dönsün
+            raise
         except Exception as e:
             print(f"File upload error: {str(e)}")
             import traceback
@@ -1136,6 +1087,7 @@ class FileUploadListView(
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @traced('upload.total')
     def perform_create(self, serializer):
         try:
             file_obj = self.request.data.get("file")
@@ -1150,127 +1102,142 @@ class FileUploadListView(
                 'true', 't', '1', 'on'
             )
             
-            instance = serializer.save(
-                owner=self.request.user, 
-                file_size=file_obj.size,
-                view_duration=view_duration,
-                one_time_view=one_time_view,
-                is_public=is_public
-            )
-
             mime_type, _ = mimetypes.guess_type(file_obj.name)
-            
-            if mime_type and mime_type.startswith("image"):
+            ftype = memory_file_type(mime_type, file_obj.name)
+
+            if ftype != 'unknown':
+                # Kota filigran, depolama ve AI işlemlerinden önce denetlenir
                 try:
-                    original_path = instance.file.path
-                    if os.path.exists(original_path):
-                        base_path = os.path.splitext(original_path)[0]
-                        watermarked_path = base_path + "_wm.jpg"
-                        
-                        add_watermark(
-                            original_path, watermarked_path, 
-                            username=self.request.user.username
-                        )
+                    with transaction.atomic():
+                        reserve_quota(self.request.user, file_obj.size)
+                except QuotaExceeded as e:
+                    raise serializers.ValidationError(str(e))
 
-                        with open(watermarked_path, "rb") as f:
-                            instance.file.save(
-                                os.path.basename(watermarked_path), 
-                                ContentFile(f.read()), 
-                                save=True
-                            )
-                        
-                        if os.path.exists(original_path):
-                            os.remove(original_path)
-                        if os.path.exists(watermarked_path):
-                            os.remove(watermarked_path)
+            if ftype == 'image':
+                try:
+                    with span('upload.watermark'):
+                        file_obj = watermark_upload(file_obj, self.request.user.username)
                 except Exception as e:
                     print(f"Watermark hatası: {e}")
 
-            if instance.one_time_view:
-                instance.view_token = str(uuid.uuid4())
-                instance.has_been_viewed = False
-                instance.save()
+            with span('upload.db_write', size=file_obj.size):
+                instance = serializer.save(
+                    owner=self.request.user, 
+                    file=file_obj,
+                    file_size=file_obj.size,
+                    view_duration=view_duration,
+                    one_time_view=one_time_view,
+                    is_public=is_public
+                )
+
+                if instance.one_time_view:
+                    instance.view_token = str(uuid.uuid4())
+                    instance.has_been_viewed = False
+                    instance.save()
 
             print(f"✅ Dosya yüklendi: {instance.file.name}")
 
+            if ftype == 'unknown':
+                return
+
+            try:
+                with span('upload.memory_write', file_type=ftype), transaction.atomic():
+                    # Kota kilitli profil satırında, AI işlemeden önce ayrılır. Vektör
+                    # sonradan yazılır; üretilemezse generate_embeddings tamamlar.
+                    reserve_quota(self.request.user, instance.file_size)
+                    default_tier, _ = MemoryTier.objects.get_or_create(name="short_term")
+                    memory_item = MemoryItem.objects.create(
+                        user=self.request.user,
+                        file_name=os.path.basename(instance.file.name),
+                        file_path=instance.file.path,
+                        file_type=ftype,
+                        original_size=instance.file_size,
+                        memory_tier=default_tier,
+                    )
+                    record_created(memory_item)
+            except QuotaExceeded as e:
+                # Yükleme geri alınır: dosya hafızaya alınamadan saklanmasın
+                instance.file.delete(save=False)
+                instance.delete()
+                raise serializers.ValidationError(str(e))
+            print(f"🧠 Ana hafıza kaydı oluşturuldu. (ID: {memory_item.id})")
+
             # AI/Memory İşleme
             try:
                 print("🧠 Yapay Hafıza işleniyor...")
                 ai_service = AIService()
-                default_tier, _ = MemoryTier.objects.get_or_create(name="short_term")
-                
-                ftype = 'unknown'
+
+                content = None
                 embedding = None
+                thumbnail_path = None
                 video_frames_data = []
 
-                if mime_type:
-                    if mime_type.startswith('image'): 
-                        ftype = 'image'
+                if ftype == 'image':
+                    with span('upload.embed', file_type=ftype):
                         embedding = ai_service.get_image_embedding(instance.file.path)
-                    
-                    elif mime_type.startswith('text') or mime_type == 'application/pdf' or \
-                         instance.file.name.lower().endswith(('.docx', '.py', '.js', '.md')):
-                        
-                        ftype = 'text'
-                        print(f"📄 Metin analizi başlatılıyor: {instance.file.name}")
+                
+                elif ftype == 'text':
+                    print(f"📄 Metin analizi başlatılıyor: {instance.file.name}")
+                    with span('upload.extract', file_type=ftype):
                         content = ai_service.extract_text_from_file(instance.file.path)
-                        
+                    
+                    with span('upload.embed', file_type=ftype):
                         if content:
                             combined_text = f"{instance.file.name} : {content[:1000]}"
                             embedding = ai_service.get_text_embedding(combined_text)
                         else:
                             embedding = ai_service.get_text_embedding(instance.file.name)
+                
+                elif ftype == 'video':
+                    print(f"🎥 Video analizi: {instance.file.name}")
                     
-                    elif mime_type.startswith('video'):
-                        ftype = 'video'
-                        print(f"🎥 Video analizi: {instance.file.name}")
-                        
-                        # 1. Kareleri Al
-                        video_frames = ai_service.analyze_video_content(instance.file.path, interval_seconds=5)
-                        if video_frames: embedding = video_frames[0]['embedding']
-                        
-                        # 2. Sesi Dinle (YENİ)
+                    # 1. Kareleri Al
+                    posters = []
+                    with span('upload.embed', file_type=ftype) as attrs:
+                        video_frames = ai_service.analyze_video_content(
+                            instance.file.path, interval_seconds=5,
+                            on_poster=lambda frame: posters.append(
+                                renditions.save_video_poster(frame, instance.id, instance.file.path)
+                            )
+                        )
+                        attrs['frames'] = len(video_frames or [])
+                    if posters: thumbnail_path = posters[0]
+                    if video_frames: embedding = video_frames[0]['embedding']
+                    
+                    # 2. Sesi Dinle (YENİ)
+                    with span('upload.transcribe', file_type=ftype):
                         transcript = ai_service.transcribe_audio(instance.file.path)
-                        if transcript:
-                            content = f"[TRANSCRIPT]: {transcript}" # content değişkenine ata
+                    if transcript:
+                        content = f"[TRANSCRIPT]: {transcript}" # content değişkenine ata
 
-                    elif mime_type.startswith('audio'):
-                        ftype = 'audio'
-                        print(f"🎤 Ses analizi: {instance.file.name}")
+                elif ftype == 'audio':
+                    print(f"🎤 Ses analizi: {instance.file.name}")
+                    with span('upload.transcribe', file_type=ftype):
                         content = ai_service.transcribe_audio(instance.file.path)
+                    with span('upload.embed', file_type=ftype):
                         if content:
                             embedding = ai_service.get_text_embedding(f"{instance.file.name} : {content[:500]}")
                         else:
                             embedding = ai_service.get_text_embedding(instance.file.name)
 
+                memory_item.thumbnail_path = thumbnail_path
+                memory_item.content_summary = content[:500] if content else None
                 if embedding is not None:
-                    emb_bytes = embedding.tobytes() if hasattr(
+                    memory_item.vector_embedding = embedding.tobytes() if hasattr(
                         embedding, 'tobytes'
                     ) else embedding
-
-                    memory_item = MemoryItem.objects.create(
-                        user=self.request.user,
-                        file_name=os.path.basename(instance.file.name),
-                        file_path=instance.file.path,
-                        file_type=ftype,
-                        original_size=instance.file_size,
-                        vector_embedding=emb_bytes,
-                        memory_tier=default_tier,
-                        content_summary=content[:500] if 'content' in locals() and content else None
-                    )
-                    print(f"🧠 Ana hafıza kaydı oluşturuldu. (ID: {memory_item.id})")
-
-                    if ftype == 'video' and video_frames_data:
-                        for frame in video_frames_data:
-                            VideoFrame.objects.create(
-                                memory_item=memory_item,
-                                timestamp=frame['timestamp'],
-                                vector_embedding=frame['embedding'].tobytes()
-                            )
-                        print(f"   ↳ {len(video_frames_data)} adet video karesi işlendi.")
-
                 else:
                     print("⚠️ Vektör oluşturulamadı.")
+                memory_item.save(update_fields=['vector_embedding', 'thumbnail_path', 'content_summary'])
+
+                if ftype == 'video' and video_frames_data:
+                    for frame in video_frames_data:
+                        VideoFrame.objects.create(
+                            memory_item=memory_item,
+                            timestamp=frame['timestamp'],
+                            vector_embedding=frame['embedding'].tobytes()
+                        )
+                    print(f"   ↳ {len(video_frames_data)} adet video karesi işlendi.")
 
             except Exception as e:
                 print(f"❌ Hafıza oluşturma hatası: {e}")
@@ -1303,7 +1270,7 @@ class FileDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return File.objects.filter(owner=self.request.user)
+        return File.objects.filter(owner=self.request.user).select_related('owner')
 
     def perform_destroy(self, instance):
         if instance.file:
@@ -1338,10 +1305,7 @@ class FileOneTimeView(generics.RetrieveAPIView):
         file_path = file_obj.file.path
         
         try:
-            response = FileResponse(open(file_path, 'rb'))
-            content_type, encoding = mimetypes.guess_type(file_path)
-            response['Content-Type'] = content_type or 'application/octet-stream'
-            response['Content-Disposition'] = f'inline; filename="{file_obj.file.name.split("/")[-1]}"'
+            response = range_file_response(request, file_path)
             response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
             response['Pragma'] = 'no-cache'
             response['Expires'] = '0'
@@ -1362,29 +1326,47 @@ class FileOneTimeView(generics.RetrieveAPIView):
 
 
 class FilePreviewView(generics.RetrieveAPIView):
-    """Dosya önizleme"""
-    permission_classes = [permissions.IsAuthenticated]
+    """Dosya önizleme (küçük resim / video posteri)"""
+    # <img>/<video poster> etiketleri JWT göndermez: bu istekler serializer'ın
+    # verdiği imzalı preview_url ile gelir. Oturumlu isteklerde sahip ya da
+    # herkese açık dosya
+    permission_classes = [permissions.IsAuthenticated | HasPreviewSignature]
     
     def get(self, request, *args, **kwargs):
+        files = File.objects.all()
+        if not HasPreviewSignature().has_permission(request, self):
+            files = files.filter(Q(owner=request.user) | Q(is_public=True, one_time_view=False))
+        file_obj = get_object_or_404(files, id=kwargs.get('pk'))
+
         try:
-            file_id = kwargs.get('pk')
-            file_obj = get_object_or_404(File, id=file_id, owner=request.user)
-            
             if not file_obj.file:
                 return Response({"error": "Dosya bulunamadı"}, status=404)
             
-            file_name = file_obj.file.name.lower()
-            if not any(file_name.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']):
+            file_path = file_obj.file.path
+            if not (renditions.is_image(file_path) or renditions.is_video(file_path)):
                 return Response(
-                    {"error": "Preview sadece görseller için kullanılabilir"}, 
+                    {"error": "Preview sadece görsel ve videolar için kullanılabilir"}, 
                     status=400
                 )
-            
-            response = FileResponse(
-                file_obj.file.open('rb'), content_type='image/jpeg'
+
+            size = request.query_params.get('size', renditions.DEFAULT_SIZE)
+            if size not in renditions.RENDITION_SIZES:
+                return Response(
+                    {"error": f"Geçersiz boyut. Seçenekler: {', '.join(renditions.RENDITION_SIZES)}"},
+                    status=400
+                )
+
+            rendition_path = renditions.get_rendition(file_obj.id, file_path, size)
+            if not rendition_path:
+                return Response({"error": "Önizleme oluşturulamadı"}, status=404)
+
+            return range_file_response(
+                request, rendition_path,
+                content_type=renditions.rendition_content_type(),
+                cache_control=file_cache_control(public=file_obj.is_public),
+                filename=os.path.splitext(os.path.basename(file_obj.file.name))[0]
+                + os.path.splitext(rendition_path)[1]
             )
-            response['Content-Disposition'] = f'inline; filename="{os.path.basename(file_obj.file.name)}"'
-            return response
         except Exception as e:
             print(f"Preview error: {str(e)}")
             return Response(
@@ -1444,7 +1426,7 @@ class CloudGroupDetailView(generics.RetrieveAPIView):
     
     def get_object(self):
         group = super().get_object()
-        if self.request.user not in group.members.all():
+        if not group.members.filter(pk=self.request.user.pk).exists():
             raise PermissionDenied('Bu gruba erişim izniniz yok')
         return group
 
@@ -1454,6 +1436,8 @@ class GroupFileUploadView(generics.ListCreateAPIView):
     serializer_class = GroupFileSerializer
     parser_classes = (MultiPartParser, FormParser)
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = '-uploaded_at'
 
     def get_queryset(self):
         gid = self.kwargs.get('group_id')
@@ -1462,31 +1446,13 @@ class GroupFileUploadView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         gid = self.kwargs.get('group_id')
         group = get_object_or_404(CloudGroup, pk=gid)
-        if self.request.user not in group.members.all():
+        if not group.members.filter(pk=self.request.user.pk).exists():
             raise PermissionDenied('not a member')
         file_obj = self.request.data.get('file')
-        instance = serializer.save(group=group, uploader=self.request.user)
         mime_type, _ = mimetypes.guess_type(file_obj.name)
         if mime_type and mime_type.startswith("image"):
-            original_path = instance.file.path
-            watermarked_path = original_path.replace(
-                os.path.splitext(original_path)[1], "_wm.jpg"
-            )
-            add_watermark(
-                original_path, watermarked_path, 
-                username=self.request.user.username
-            )
-            with open(watermarked_path, "rb") as f:
-                instance.file.save(
-                    os.path.basename(watermarked_path), 
-                    ContentFile(f.read()), 
-                    save=True
-                )
-            try:
-                os.remove(original_path)
-                os.remove(watermarked_path)
-            except:
-                pass
+            file_obj = watermark_upload(file_obj, self.request.user.username)
+        instance = serializer.save(group=group, uploader=self.request.user, file=file_obj)
         if instance.one_time_view:
             instance.view_token = uuid.uuid4()
             instance.save()
@@ -1500,8 +1466,7 @@ class GroupFileCommentCreateView(generics.CreateAPIView):
     def perform_create(self, serializer):
         file_id = self.kwargs.get('file_id')
         gf = get_object_or_404(GroupFile, pk=file_id)
-        group = gf.group
-        if self.request.user not in group.members.all():
+        if not CloudGroup.objects.filter(pk=gf.group_id, members=self.request.user).exists():
             raise PermissionDenied('not a member')
         serializer.save(author=self.request.user, file=gf)
 
@@ -1515,25 +1480,4 @@ def range_download_view(request, file_name):
     if not os.path.exists(file_path):
         return HttpResponse("Dosya bulunamadı", status=404)
 
-    file_size = os.path.getsize(file_path)
-    range_header = request.headers.get('Range', None)
-
-    if range_header:
-        start, end = range_header.replace("bytes=", "").split("-")
-        start = int(start) if start else 0
-        end = int(end) if end else file_size - 1
-        length = end - start + 1
-
-        with open(file_path, 'rb') as f:
-            f.seek(start)
-            data = f.read(length)
-
-        response = HttpResponse(
-            data, status=206, content_type="application/octet-stream"
-        )
-        response['Content-Range'] = f"bytes {start}-{end}/{file_size}"
-        response['Accept-Ranges'] = "bytes"
-        response['Content-Length'] = str(length)
-        return response
-
-    return FileResponse(open(file_path, 'rb'), as_attachment=True)
\ No newline at end of file
+    return range_file_response(request, file_path, as_attachment=True)
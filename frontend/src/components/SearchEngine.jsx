@@ -131,7 +131,7 @@ const SearchEngine = () => {
             );
         }
 
-        if (isVideo && previewSrc) {
+        if (isVideo && fileShare.file_url) {
             return (
                 <div
                     className="file-preview-content"
@@ -142,10 +142,11 @@ const SearchEngine = () => {
                         ref={el => setVideoRef(fileShare.id, el)}
                         muted
                         loop={false}
-                        preload="metadata"
+                        preload="none"
+                        poster={fileShare.preview_url || undefined}
                         className="preview-video"
                     >
-                        <source src={previewSrc} type={`video/${fileExtension}`} />
+                        <source src={fileShare.file_url} type={`video/${fileExtension}`} />
                     </video>
                 </div>
             );
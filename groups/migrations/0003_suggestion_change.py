@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuggestionChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('entry', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
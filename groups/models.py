@@ -130,4 +130,19 @@ class FileViewLog(models.Model):
     viewed_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.user.username} → {self.file.filename} @ {self.viewed_at}"
\ No newline at end of file
+        return f"{self.user.username} → {self.file.filename} @ {self.viewed_at}"
+
+
+class SuggestionChange(models.Model):
+    """
+    Arama önerisi indeksinin değişiklik günlüğü. Her worker yerel indeksini
+    son uyguladığı id'den sonraki satırları okuyarak artımlı günceller.
+    entry boşsa kayıt indeksten silinmiştir.
+    """
+    kind = models.CharField(max_length=10)
+    object_id = models.PositiveBigIntegerField()
+    entry = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} #{self.pk}"
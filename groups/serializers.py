@@ -16,7 +16,9 @@ class GroupFileSerializer(serializers.ModelSerializer):
         read_only_fields = ["uploaded_by", "created_at", "has_been_viewed", "filename"]
     
     def get_comment_count(self, obj):
-        return obj.comments.count()
+        # Liste view'ları comment_count'u annotate eder; tekil nesnede sayılır
+        count = getattr(obj, 'comment_count', None)
+        return count if count is not None else obj.comments.count()
 
 class PublicFileSearchSerializer(serializers.ModelSerializer):
     uploaded_by = serializers.CharField(source="uploaded_by.username", read_only=True)
@@ -54,7 +56,8 @@ class GroupSerializer(serializers.ModelSerializer):
         }
     
     def get_member_count(self, obj):
-        return obj.members.count()
+        count = getattr(obj, 'member_count', None)
+        return count if count is not None else obj.members.count()
 
     def create(self, validated_data):
         # Remove members from validated_data if present
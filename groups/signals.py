@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# groups/signals.py
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from . import suggestions
+from .models import FileViewLog, Group, GroupFile
+
+
+def _safely(action, *args):
+    try:
+        action(*args)
+    except Exception as e:
+        print(f"Öneri indeksi güncellenemedi: {e}")
+
+
+@receiver(post_save, sender=GroupFile)
+def group_file_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _safely(suggestions.update_file, instance.pk)
+
+
+@receiver(post_delete, sender=GroupFile)
+def group_file_deleted(sender, instance, **kwargs):
+    _safely(suggestions.remove_file, instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _safely(suggestions.update_group, instance.pk)
+
+
+@receiver(post_save, sender=FileViewLog)
+def file_viewed(sender, instance, created=False, raw=False, **kwargs):
+    # Görüntülenme sayısı dosya önerisinin popülerliğidir; toplu ve seyrek yazılır
+    if created and not raw:
+        _safely(suggestions.touch_file, instance.file_id)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    _safely(suggestions.remove_group, instance.pk)
+
+
+@receiver(m2m_changed, sender=Group.members.through)
+def group_members_changed(sender, instance, action, reverse=False, pk_set=None, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # Kullanıcı tarafından değiştirildi: etkilenen gruplar pk_set'te
+        for group_id in pk_set or []:
+            _safely(suggestions.update_group, group_id)
+    else:
+        _safely(suggestions.update_group, instance.pk)
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+# groups/suggestions.py
+"""
+Arama önerileri (autocomplete) için önek indeksi.
+
+- Herkese açık gruplardaki dosya adları ve grup adları normalize edilip
+  kelime başlarından anahtarlanır, sıralı dizide bisect ile aranır;
+  dosyalar bulundukları grubun adıyla da eşleşir
+- Popülerlik (görüntülenme) ve üye sayıları önceden hesaplanır; görüntülenme
+  kaynaklı güncellemeler POPULARITY_REFRESH_INTERVAL'da bir toplu yazılır
+- Değişiklikler commit sonrası veritabanındaki SuggestionChange günlüğüne
+  kayıt başına yazılır (paylaşılan kayıt üzerinde oku-değiştir-yaz yok)
+- Her worker yerel indeksini günlükte son uyguladığı id'den sonrasını
+  okuyarak artımlı günceller; tam yeniden kurulum yalnızca fark dizisi
+  büyüdüğünde ya da günlük budandığında yapılır
+"""
+import time
+import threading
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from files.search_index import normalize_text
+from .models import Group, GroupFile, SuggestionChange
+
+# Yerel kopyanın değişiklik günlüğüyle karşılaştırılma aralığı (sn)
+VERSION_CHECK_INTERVAL = 2.0
+# Günlükte tutulan süre; bundan uzun süre senkronize olmayan worker baştan kurar
+CHANGE_RETENTION = timedelta(hours=1)
+# Kaç yeni kayıtta bir eski günlük satırlarının budanacağı
+PRUNE_EVERY = 500
+MAX_FILE_SUGGESTIONS = 10
+MAX_GROUP_SUGGESTIONS = 5
+MAX_SUGGESTIONS = 15
+# Çok genel öneklerde taranacak en fazla aday. Adaylar anahtar sırasıyla
+# kesilir, popülerlik sıralaması kesilen küme içinde yapılır: aralığı bunu
+# aşan öneklerde "en popüler" sonuçlar tüm eşleşmelerin en popülerleri
+# olmayabilir (ilk MAX_CANDIDATES anahtarın en popülerleridir)
+MAX_CANDIDATES = 2000
+# Görüntülenen dosyaların popülerlik güncellemelerini toplama aralığı (sn)
+POPULARITY_REFRESH_INTERVAL = 30.0
+# Fark dizisi bu boyutu (ya da ana dizinin 1/8'ini) aşınca indeks sıkıştırılır
+MIN_COMPACT_THRESHOLD = 1024
+
+
+def _file_entry(file_id, filename, group_name, file_type, view_count):
+    return ('file', file_id), {
+        "type": "file",
+        "name": filename,
+        "group": group_name,
+        "file_type": file_type,
+        "popularity": view_count,
+    }
+
+
+def _group_entry(group_id, name, member_count):
+    return ('group', group_id), {
+        "type": "group",
+        "name": name,
+        "member_count": member_count,
+        "popularity": member_count,
+    }
+
+
+def _file_rows(queryset):
+    return queryset.filter(group__is_public=True).annotate(
+        view_count=Count('view_logs')
+    ).values_list('id', 'filename', 'group__name', 'file_type', 'view_count')
+
+
+def _group_rows(queryset):
+    return queryset.filter(is_public=True).annotate(
+        member_count=Count('members')
+    ).values_list('id', 'name', 'member_count')
+
+
+def load_entries_from_db():
+    """Tüm indeksi iki toplu sorgu ile oluşturur (satır başına sorgu yok)."""
+    entries = {}
+    for row in _file_rows(GroupFile.objects.all()).iterator():
+        key, entry = _file_entry(*row)
+        entries[key] = entry
+    for row in _group_rows(Group.objects.all()).iterator():
+        key, entry = _group_entry(*row)
+        entries[key] = entry
+    return entries
+
+
+def _word_starts(text):
+    name = normalize_text(text or '')
+    words = name.replace('_', ' ').replace('-', ' ').replace('.', ' ').split()
+    # Tam ad ve her kelime başı anahtar olur ("notu" -> "ders notu.pdf")
+    starts = {name} if name else set()
+    for i in range(len(words)):
+        starts.add(' '.join(words[i:]))
+    return starts
+
+
+def _entry_keys(entry):
+    keys = _word_starts(entry["name"])
+    if entry["type"] == "file":
+        keys |= _word_starts(entry.get("group"))
+    return frozenset(keys)
+
+
+class PrefixIndex:
+    """
+    Normalize edilmiş kelime başları üzerinde sıralı dizi + bisect.
+
+    Artımlı güncellemede ana dizi yeniden sıralanmaz: yeni anahtarlar küçük
+    bir fark dizisine eklenir, eski anahtarlar kaydın güncel anahtar
+    kümesinde olmadığı için aramada elenir.
+    """
+
+    def __init__(self, entries):
+        self.entries = dict(entries)
+        self._keys_of = {}
+        pairs = []
+        for uid, entry in self.entries.items():
+            keys = _entry_keys(entry)
+            self._keys_of[uid] = keys
+            pairs.extend((key, uid) for key in keys)
+        pairs.sort(key=lambda pair: pair[0])
+        self._keys = [key for key, _ in pairs]
+        self._uids = [uid for _, uid in pairs]
+        self._delta = []
+        self._stale = 0
+
+    def apply(self, uid, entry):
+        """Tek kaydı (None -> silindi) indekse işler."""
+        old_keys = self._keys_of.pop(uid, frozenset())
+        if entry is None:
+            self.entries.pop(uid, None)
+            self._stale += len(old_keys)
+            return
+        keys = _entry_keys(entry)
+        self.entries[uid] = entry
+        self._keys_of[uid] = keys
+        for key in keys - old_keys:
+            insort(self._delta, (key, uid))
+        self._stale += len(old_keys - keys)
+
+    def needs_compaction(self):
+        threshold = max(MIN_COMPACT_THRESHOLD, len(self._keys) // 8)
+        return len(self._delta) + self._stale > threshold
+
+    def _postings(self, prefix):
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + '\uffff', lo)
+        hi = min(hi, lo + MAX_CANDIDATES)
+        yield from zip(self._keys[lo:hi], self._uids[lo:hi])
+        lo = bisect_left(self._delta, (prefix,))
+        hi = bisect_left(self._delta, (prefix + '\uffff',), lo)
+        yield from self._delta[lo:min(hi, lo + MAX_CANDIDATES)]
+
+    def lookup(self, query):
+        """
+        Önekle eşleşen dosya ve grupları popülerliğe göre döndürür. Eşleşme
+        sayısı MAX_CANDIDATES'ı aşarsa sıralama yalnızca ilk adaylar arasındadır.
+        """
+        prefix = normalize_text(query).strip()
+        if not prefix:
+            return []
+
+        seen = set()
+        files, groups = [], []
+        for key, uid in self._postings(prefix):
+            if uid in seen or key not in self._keys_of.get(uid, ()):
+                continue
+            seen.add(uid)
+            (groups if uid[0] == 'group' else files).append(self.entries[uid])
+
+        files.sort(key=lambda e: -e["popularity"])
+        groups.sort(key=lambda e: -e["popularity"])
+        suggestions = files[:MAX_FILE_SUGGESTIONS] + groups[:MAX_GROUP_SUGGESTIONS]
+        return [
+            {k: v for k, v in entry.items() if k != "popularity"}
+            for entry in suggestions[:MAX_SUGGESTIONS]
+        ]
+
+
+_local = {"index": None, "last_change_id": 0, "checked_at": 0.0}
+_local_lock = threading.Lock()
+
+
+def _last_change_id():
+    return SuggestionChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _load_local(now):
+    # Önce günlük konumu alınır: yükleme sırasında gelen değişiklikler
+    # bir sonraki senkronda yeniden uygulanır (kayıtlar tam değer, idempotent)
+    last_id = _last_change_id()
+    _local.update(
+        index=PrefixIndex(load_entries_from_db()), last_change_id=last_id, checked_at=now
+    )
+
+
+def rebuild():
+    """Bu süreçteki indeksi veritabanından baştan kurar."""
+    with _local_lock:
+        _load_local(time.monotonic())
+        return len(_local["index"].entries)
+
+
+def get_index():
+    """
+    Yerel indeks kopyası; değişiklik günlüğü en fazla VERSION_CHECK_INTERVAL'da
+    bir okunur ve yalnızca yeni satırlar uygulanır.
+    """
+    now = time.monotonic()
+    if _local["index"] is not None and now - _local["checked_at"] < VERSION_CHECK_INTERVAL:
+        return _local["index"]
+
+    with _local_lock:
+        index = _local["index"]
+        if index is None or now - _local["checked_at"] > CHANGE_RETENTION.total_seconds():
+            _load_local(now)
+            return _local["index"]
+
+        changes = SuggestionChange.objects.filter(
+            id__gt=_local["last_change_id"]
+        ).order_by('id').values_list('id', 'kind', 'object_id', 'entry')
+        last_id = _local["last_change_id"]
+        for change_id, kind, object_id, entry in changes.iterator():
+            index.apply((kind, object_id), entry)
+            last_id = change_id
+        if index.needs_compaction():
+            index = PrefixIndex(index.entries)
+        _local.update(index=index, last_change_id=last_id, checked_at=now)
+        return index
+
+
+def suggest(query):
+    return get_index().lookup(query)
+
+
+def _record(changes):
+    """Değişen kayıtları (None -> silindi) günlüğe ekler."""
+    if not changes:
+        return
+    created = SuggestionChange.objects.bulk_create([
+        SuggestionChange(kind=kind, object_id=object_id, entry=entry)
+        for (kind, object_id), entry in changes.items()
+    ])
+    last_id = created[-1].pk or _last_change_id()
+    if last_id // PRUNE_EVERY != (last_id - len(created)) // PRUNE_EVERY:
+        SuggestionChange.objects.filter(
+            created_at__lt=timezone.now() - CHANGE_RETENTION
+        ).delete()
+
+
+def _file_changes(file_ids):
+    changes = {('file', file_id): None for file_id in file_ids}
+    changes.update(
+        _file_entry(*row) for row in _file_rows(GroupFile.objects.filter(pk__in=file_ids))
+    )
+    return changes
+
+
+def _group_changes(group_id):
+    changes = {('group', group_id): None}
+    changes.update(_group_entry(*row) for row in _group_rows(Group.objects.filter(pk=group_id)))
+    # Ad/görünürlük değişmiş olabileceği için grubun dosyaları da yenilenir
+    file_ids = list(GroupFile.objects.filter(group_id=group_id).values_list('id', flat=True))
+    changes.update(_file_changes(file_ids))
+    return changes
+
+
+def _on_commit(build, *args):
+    # Kayıt commit sonrası veritabanının son halinden hesaplanır; hata
+    # kaydı yapan isteği bozmaz (robust), loglanır
+    transaction.on_commit(lambda: _record(build(*args)), robust=True)
+
+
+def update_file(group_file_id):
+    _on_commit(_file_changes, [group_file_id])
+
+
+_popularity = {"pending": set(), "flushed_at": float('-inf')}
+_popularity_lock = threading.Lock()
+
+
+def touch_file(group_file_id):
+    """
+    Görüntülenen dosyayı işaretler. Görüntülenme en sık yazılan yol olduğu
+    için her görüntülemede günlüğe yazılmaz: işaretliler en fazla
+    POPULARITY_REFRESH_INTERVAL'da bir, tek sorgu ve tek toplu eklemeyle
+    günlüğe geçer. Sessiz kalan süreçteki son işaretler bir sonraki
+    görüntülemeyle yazılır.
+    """
+    now = time.monotonic()
+    with _popularity_lock:
+        _popularity["pending"].add(group_file_id)
+        if now - _popularity["flushed_at"] < POPULARITY_REFRESH_INTERVAL:
+            return
+        file_ids = sorted(_popularity["pending"])
+        _popularity.update(pending=set(), flushed_at=now)
+    _on_commit(_file_changes, file_ids)
+
+
+def remove_file(group_file_id):
+    _on_commit(lambda: {('file', group_file_id): None})
+
+
+def update_group(group_id):
+    _on_commit(_group_changes, group_id)
+
+
+def remove_group(group_id):
+    _on_commit(lambda: {('group', group_id): None})
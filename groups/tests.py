@@ -0,0 +1,271 @@
+# groups/tests.py
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from files import search_index
+from groups import suggestions
+from groups.models import Comment, FileViewLog, Group, GroupFile, SuggestionChange
+from groups.views import FileDownloadView, GroupFilesView, GroupListView, PopularSearchesView, PublicFileSearchView
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class GroupQueryCountTests(TestCase):
+    """Liste endpoint'lerinin sorgu sayısı satır sayısından bağımsız olmalı (N+1 yok)."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(username='uye', email='uye@example.com', password='password')
+        self.others = [
+            User.objects.create_user(username=f'uye{i}', email=f'uye{i}@example.com', password='password') for i in range(3)
+        ]
+        self.groups = []
+        for i in range(3):
+            group = Group.objects.create(name=f'grup {i}', created_by=self.user, is_public=True)
+            group.members.add(self.user, *self.others)
+            self.groups.append(group)
+        for i in range(4):
+            group_file = GroupFile.objects.create(
+                group=self.groups[0], uploaded_by=self.others[i % 3],
+                file=ContentFile(b'data', name=f'dosya{i}.txt'), filename=f'dosya{i}.txt'
+            )
+            Comment.objects.create(file=group_file, user=self.user, text='yorum')
+
+    def _get(self, view, **kwargs):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        return view.as_view()(request, **kwargs)
+
+    def test_group_list(self):
+        # gruplar (+ üye sayısı) ve üyeler (prefetch)
+        with self.assertNumQueries(2):
+            response = self._get(GroupListView)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual({row['member_count'] for row in response.data}, {4})
+
+    def test_group_files(self):
+        # grup, üyelik kontrolü, dosyalar (+ yorum sayısı)
+        with self.assertNumQueries(3):
+            response = self._get(GroupFilesView, group_id=self.groups[0].id)
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual({row['comment_count'] for row in response.data}, {1})
+
+    def test_popular_searches(self):
+        with self.assertNumQueries(2):
+            response = self._get(PopularSearchesView)
+        self.assertEqual(len(response.data['recent_files']), 4)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class GroupFileDownloadCacheTests(TestCase):
+    """Grup dosyası indirmede 304 ve Cache-Control; tek gösterimlikte no-store."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='indiren', email='indiren@example.com', password='password')
+        group = Group.objects.create(name='Arsiv', created_by=self.user)
+        self.file = GroupFile.objects.create(group=group, uploaded_by=self.user, file=ContentFile(b'data', name='not.txt'))
+
+    def _get(self, **headers):
+        request = APIRequestFactory().get('/', headers=headers)
+        force_authenticate(request, user=self.user)
+        return FileDownloadView.as_view()(request, file_id=self.file.id)
+
+    def test_conditional_get(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=3600')
+        for headers in ({'If-None-Match': response['ETag']}, {'If-Modified-Since': response['Last-Modified']}):
+            not_modified = self._get(**headers)
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified['Cache-Control'], 'private, max-age=3600')
+
+    def test_one_time_is_not_stored(self):
+        GroupFile.objects.filter(pk=self.file.pk).update(one_time_view=True)
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-store', response['Cache-Control'])
+        self.assertEqual(self._get(**{'If-None-Match': response['ETag']}).status_code, 403)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PublicFileSearchTests(TestCase):
+    """İndeks ve icontains yedeği aynı sonucu vermeli; filtreler sonuçları kırpmamalı."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        user = User.objects.create_user(username='yukleyen', email='yukleyen@example.com', password='password')
+        public = Group.objects.create(name='Muhasebe', created_by=user, is_public=True)
+        private = Group.objects.create(name='Gizli', created_by=user, is_public=False)
+        for group, filename in (
+            (public, 'rapor_2024.pdf'),
+            (public, 'Rapor özeti.docx'),
+            (public, 'fatura.pdf'),
+            (public, 'gezi.jpg'),
+            (private, 'rapor_gizli.pdf'),
+        ):
+            # filename, file_type ve boyut save() içinde dosyadan türetilir
+            GroupFile.objects.create(group=group, uploaded_by=user, file=ContentFile(b'data', name=filename))
+
+    def _search(self, **params):
+        request = APIRequestFactory().get('/', params)
+        response = PublicFileSearchView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        return [os.path.basename(row['filename']) for row in response.data['results']]
+
+    def _assert_searches(self):
+        self.assertEqual(set(self._search(q='rapor')), {'rapor_2024.pdf', 'Rapor özeti.docx'})
+        self.assertEqual(self._search(q='rapor', type='PDF'), ['rapor_2024.pdf'])
+        self.assertEqual(
+            self._search(q='rapor fatura', sort='name'), ['fatura.pdf', 'Rapor özeti.docx', 'rapor_2024.pdf']
+        )
+        self.assertEqual(self._search(q='gizli'), [])
+
+    def test_index(self):
+        self.assertTrue(search_index.is_available())
+        self._assert_searches()
+        # Türkçe karakter katlama ve önek eşleşmesi yalnızca indekste
+        self.assertEqual(self._search(q='ozet'), ['Rapor özeti.docx'])
+        self.assertEqual(self._search(q='fat'), ['fatura.pdf'])
+
+    def test_icontains_fallback(self):
+        with patch('files.search_index.is_available', return_value=False):
+            self._assert_searches()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SearchSuggestionTests(TestCase):
+    """Öneri indeksi değişiklik günlüğünden artımlı güncellenmeli, güncelleme kaybolmamalı."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='yukleyen', email='yukleyen@example.com', password='password')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group = Group.objects.create(name='Muhasebe Ekibi', created_by=self.user, is_public=True)
+            self.group.members.add(self.user)
+            self.report = self._create_file('rapor_2024.pdf')
+            self.invoice = self._create_file('fatura.pdf')
+        suggestions.rebuild()
+        self.addCleanup(suggestions._local.update, index=None, last_change_id=0, checked_at=0.0)
+        self.addCleanup(suggestions._popularity.update, pending=set(), flushed_at=float('-inf'))
+
+    def _create_file(self, filename, group=None):
+        return GroupFile.objects.create(
+            group=group or self.group, uploaded_by=self.user,
+            file=ContentFile(b'data', name=filename), filename=filename
+        )
+
+    def _suggest(self, query):
+        # Kontrol aralığı dolmuş gibi: günlükteki yeni satırlar okunur
+        suggestions._local["checked_at"] = time.monotonic() - suggestions.VERSION_CHECK_INTERVAL
+        return [(row['type'], row['name']) for row in suggestions.suggest(query)]
+
+    def test_changes_are_applied_without_rebuild(self):
+        index = suggestions.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_file('rapor_butce.xlsx')
+            self.invoice.delete()
+
+        self.assertEqual(
+            sorted(self._suggest('rapor')), [('file', 'rapor_2024.pdf'), ('file', 'rapor_butce.xlsx')]
+        )
+        self.assertEqual(self._suggest('fatura'), [])
+        self.assertIs(suggestions.get_index(), index)
+
+    def test_concurrent_writers_do_not_lose_updates(self):
+        # İki süreç aynı anda kayıt eklese de her değişiklik kendi satırındadır
+        with self.captureOnCommitCallbacks() as callbacks:
+            self._create_file('sunum.pptx')
+            self._create_file('sozlesme.pdf')
+        for callback in reversed(callbacks):
+            callback()
+        self.assertEqual(self._suggest('sunum'), [('file', 'sunum.pptx')])
+        self.assertEqual(self._suggest('sozlesme'), [('file', 'sozlesme.pdf')])
+
+    def test_views_change_popularity(self):
+        viewer = User.objects.create_user(username='okuyucu', email='okuyucu@example.com', password='password')
+        self.assertEqual(self._suggest('pdf')[0], ('file', 'rapor_2024.pdf'))
+        with self.captureOnCommitCallbacks(execute=True):
+            FileViewLog.objects.create(file=self.invoice, user=viewer)
+        self.assertEqual(self._suggest('pdf')[0], ('file', 'fatura.pdf'))
+
+    def test_view_popularity_is_batched(self):
+        viewer = User.objects.create_user(username='okuyucu', email='okuyucu@example.com', password='password')
+        with self.captureOnCommitCallbacks(execute=True):
+            FileViewLog.objects.create(file=self.invoice, user=viewer)
+        changes = SuggestionChange.objects.count()
+        # Aralık dolmadan gelen görüntülemeler günlüğe yazılmaz, sorgu çalıştırmaz
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            FileViewLog.objects.create(file=self.report, user=viewer)
+        with self.captureOnCommitCallbacks(execute=True):
+            FileViewLog.objects.create(file=self.report, user=viewer)
+        self.assertEqual(SuggestionChange.objects.count(), changes)
+
+        suggestions._popularity["flushed_at"] -= suggestions.POPULARITY_REFRESH_INTERVAL
+        with self.captureOnCommitCallbacks(execute=True):
+            FileViewLog.objects.create(file=self.invoice, user=viewer)
+        self.assertEqual(SuggestionChange.objects.count(), changes + 2)
+        self._suggest('pdf')
+        popularity = {row['name']: row for row in suggestions.get_index().entries.values()}
+        self.assertEqual(popularity['rapor_2024.pdf']['popularity'], 2)
+        self.assertEqual(popularity['fatura.pdf']['popularity'], 2)
+
+    def test_files_match_group_name(self):
+        self.assertEqual(
+            sorted(self._suggest('ekib')),
+            [('file', 'fatura.pdf'), ('file', 'rapor_2024.pdf'), ('group', 'Muhasebe Ekibi')],
+        )
+
+    def test_group_visibility_and_rename(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.name = 'Finans'
+            self.group.save()
+        self.assertEqual(self._suggest('muhasebe'), [])
+        self.assertIn(('group', 'Finans'), self._suggest('fin'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.is_public = False
+            self.group.save()
+        self.assertEqual(self._suggest('rapor'), [])
+        self.assertEqual(self._suggest('fin'), [])
+
+    def test_no_queries_within_check_interval(self):
+        suggestions.get_index()
+        with self.assertNumQueries(0):
+            self.assertTrue(suggestions.suggest('rapor'))
+
+    def test_index_compacts_after_many_changes(self):
+        index = suggestions.PrefixIndex({})
+        for i in range(suggestions.MIN_COMPACT_THRESHOLD + 1):
+            key, entry = suggestions._file_entry(i, f'dosya{i}.txt', 'grup', 'Other', 0)
+            index.apply(key, entry)
+        self.assertTrue(index.needs_compaction())
+        compacted = suggestions.PrefixIndex(index.entries)
+        self.assertEqual(compacted.lookup('dosya7.'), index.lookup('dosya7.'))
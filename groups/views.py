@@ -1,5 +1,5 @@
 ﻿from django.utils import timezone
-from django.http import FileResponse, HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -7,6 +7,9 @@ from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth.models import User
 from notifications.models import Notification
 from notifications.utils import send_notification
+from files.streaming import range_file_response, file_cache_control
+from files import search_index
+from . import suggestions
 from .models import Group, GroupFile, Comment, FileViewLog, GroupInvitation
 from .serializers import GroupFileSerializer, CommentSerializer, FileViewLogSerializer, GroupSerializer, GroupInvitationSerializer, PublicFileSearchSerializer, SearchStatsSerializer
 from django.db.models import Count
@@ -60,37 +63,42 @@ class PublicFileSearchView(APIView):
     def get(self, request):
         query = request.GET.get('q', '').strip()
         file_type = request.GET.get('type', '')
-        sort_by = request.GET.get('sort', 'recent')  # recent, popular, size, name
+        # relevance (sorgu varsa varsayılan), recent, popular, size, name
+        sort_by = request.GET.get('sort', 'relevance' if query else 'recent')
         
         if not query and not file_type:
             return Response({"error": "Arama terimi veya dosya türü gereklidir"}, status=400)
         
         # Halka açık gruplardaki dosyaları filtrele
-        files = GroupFile.objects.filter(group__is_public=True)
+        files = GroupFile.objects.filter(group__is_public=True).select_related('group', 'uploaded_by')
         
-        # Arama sorgusu
+        # Arama sorgusu: FTS indeksi (herhangi bir terim); tür filtresi ve
+        # sıralama aynı sorguda uygulanır
+        ranked = None
         if query:
-            # Arama terimlerini ayır ve her biri için arama yap
-            search_terms = query.split()
-            search_queries = []
-            
-            for term in search_terms:
-                search_queries.extend([
-                    Q(filename__icontains=term),
-                    Q(uploaded_by__username__icontains=term),
-                    Q(group__name__icontains=term),
-                    Q(search_index__icontains=term.lower())
-                ])
-            
-            # OR koşulu ile tüm arama terimlerini birleştir
-            files = files.filter(reduce(operator.or_, search_queries))
+            ranked = search_index.filter_ranked(files, 'public_group_file', query, any_term=True)
+            if ranked is not None:
+                files = ranked
+            else:
+                # FTS yoksa: terim başına icontains, OR ile birleştirilir
+                search_queries = []
+                for term in query.split():
+                    search_queries.extend([
+                        Q(filename__icontains=term),
+                        Q(uploaded_by__username__icontains=term),
+                        Q(group__name__icontains=term),
+                        Q(search_index__icontains=term.lower())
+                    ])
+                files = files.filter(reduce(operator.or_, search_queries))
         
         # Dosya türüne göre filtrele
         if file_type:
             files = files.filter(file_type=file_type)
         
         # Sıralama
-        if sort_by == 'popular':
+        if sort_by == 'relevance' and ranked is not None:
+            files = files.order_by('search_rank', '-created_at')
+        elif sort_by == 'popular':
             files = files.annotate(view_count=Count('view_logs')).order_by('-view_count', '-created_at')
         elif sort_by == 'size':
             files = files.order_by('-file_size', '-created_at')
@@ -108,7 +116,7 @@ class PublicFileSearchView(APIView):
         return Response({
             "query": query,
             "results": serializer.data,
-            "total_results": files.count(),
+            "total_results": len(serializer.data),
             "filters": {
                 "file_type": file_type,
                 "sort_by": sort_by
@@ -127,39 +135,9 @@ class SearchSuggestionsView(APIView):
         if len(query) < 2:
             return Response({"suggestions": []})
         
-        # Halka açık gruplardaki dosyalarda arama
-        files = GroupFile.objects.filter(
-            group__is_public=True
-        ).filter(
-            Q(filename__icontains=query) |
-            Q(group__name__icontains=query)
-        )[:10]  # İlk 10 öneri
-        
-        suggestions = []
-        
-        # Dosya isimlerinden öneriler
-        for file in files:
-            suggestions.append({
-                "type": "file",
-                "name": file.filename,
-                "group": file.group.name,
-                "file_type": file.file_type
-            })
-        
-        # Grup isimlerinden öneriler
-        groups = Group.objects.filter(
-            is_public=True,
-            name__icontains=query
-        )[:5]
-        
-        for group in groups:
-            suggestions.append({
-                "type": "group",
-                "name": group.name,
-                "member_count": group.members.count()
-            })
-        
-        return Response({"suggestions": suggestions[:15]})  # Maksimum 15 öneri
+        # Worker başına yerel önek indeksi (SuggestionChange günlüğünden artımlı
+        # güncellenir); olağan durumda veritabanına gidilmez
+        return Response({"suggestions": suggestions.suggest(query)})
 
 class SearchStatsView(APIView):
     """
@@ -201,14 +179,14 @@ class PopularSearchesView(APIView):
         # En çok görüntülenen dosyalar (popüler)
         popular_files = GroupFile.objects.filter(
             group__is_public=True
-        ).annotate(
+        ).select_related('group', 'uploaded_by').annotate(
             view_count=Count('view_logs')
         ).order_by('-view_count')[:10]
         
         # Yeni yüklenen dosyalar (trend)
         recent_files = GroupFile.objects.filter(
             group__is_public=True
-        ).order_by('-created_at')[:10]
+        ).select_related('group', 'uploaded_by').order_by('-created_at')[:10]
         
         popular_serializer = PublicFileSearchSerializer(popular_files, many=True)
         recent_serializer = PublicFileSearchSerializer(recent_files, many=True)
@@ -236,7 +214,10 @@ class GroupListView(APIView):
 
     def get(self, request):
         # Kullanıcının üye olduğu gruplar
-        groups = Group.objects.filter(members=request.user)
+        # annotate filtreden önce: üye sayısı filtrelenmiş join'den değil tüm üyelerden sayılır
+        groups = Group.objects.annotate(
+            member_count=Count('members', distinct=True)
+        ).filter(members=request.user).select_related('created_by').prefetch_related('members')
         serializer = GroupSerializer(groups, many=True)
         return Response(serializer.data)
 
@@ -412,7 +393,9 @@ class GroupFilesView(APIView):
         # Kullanıcının gruba üye olup olmadığını kontrol et
         if not group.members.filter(id=request.user.id).exists():
             return Response({"error": "Bu gruba erişim izniniz yok."}, status=403)
-        files = GroupFile.objects.filter(group=group)
+        files = GroupFile.objects.filter(group=group).select_related(
+            'group', 'uploaded_by'
+        ).annotate(comment_count=Count('comments'))
         serializer = GroupFileSerializer(files, many=True)
         return Response(serializer.data)
 
@@ -444,7 +427,14 @@ class FileDownloadView(APIView):
         # Log kaydı (her indirmede/görüntülemede)
         FileViewLog.objects.create(file=file, user=request.user)
 
-        return FileResponse(file.file.open("rb"), as_attachment=True, filename=file.filename)
+        if file.one_time_view:
+            response = range_file_response(request, file.file.path, as_attachment=True, filename=file.filename)
+            response["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
+            return response
+        return range_file_response(
+            request, file.file.path, as_attachment=True, filename=file.filename,
+            cache_control=file_cache_control()
+        )
 
 class FileUploadView(APIView):
     permission_classes = [IsAuthenticated]
@@ -541,7 +531,7 @@ class FileDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, file_id):
-        file = get_object_or_404(GroupFile, id=file_id)
+        file = get_object_or_404(GroupFile.objects.select_related('group', 'uploaded_by'), id=file_id)
         file_data = GroupFileSerializer(file).data
 
         # Tek seferlik görüntüleme
@@ -1,5 +1,6 @@
 ﻿# memory/__init__.py - Eğer yoksa oluşturalım veya düzenleyelim
 import logging
+from importlib.util import find_spec
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +16,10 @@ def check_dependencies():
     
     missing = []
     for pkg_name, import_name in dependencies.items():
-        try:
-            __import__(import_name)
+        # Yalnızca kurulu mu diye bakılır; içe aktarmak (torch, sklearn...) saniyeler sürer
+        if find_spec(import_name) is not None:
             logger.info(f"✅ {pkg_name} yüklü")
-        except ImportError:
+        else:
             missing.append(pkg_name)
             logger.warning(f"❌ {pkg_name} yüklü değil")
     
@@ -0,0 +1,328 @@
+# memory/management/commands/benchmark_search.py
+import json
+import os
+import time
+import tracemalloc
+from datetime import timedelta
+from unittest.mock import patch
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from memory.models import MemoryItem, MemoryTier, VideoFrame
+from memory.services.search_engines import ENGINES, BruteForceEngine, recall_at_k
+
+User = get_user_model()
+TEXT_DIM = 384
+CLIP_DIM = 512
+
+
+def _latency_stats(timings_ms):
+    timings = np.asarray(timings_ms)
+    total_seconds = timings.sum() / 1000
+    return {
+        'qps': round(len(timings) / total_seconds, 1) if total_seconds else None,
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p99_ms': round(float(np.percentile(timings, 99)), 3),
+    }
+
+
+def _peak_kb(func):
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+class Corpus:
+    """Bir boyuttaki (384/512) vektörler; anahtar = MemoryItem id'si (kareler için video id'si)."""
+
+    def __init__(self, name, keys, matrix, queries):
+        self.name = name
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.matrix = np.asarray(matrix, dtype=np.float32)
+        self.queries = np.asarray(queries, dtype=np.float32)
+
+
+class Command(BaseCommand):
+    help = (
+        'Hafıza arama motorlarını (mevcut döngü, vektörize, int8, IVF) sentetik veya mevcut '
+        'veri üzerinde karşılaştırır; QPS, p50/p99, bellek ve recall@k raporunu JSON olarak yazar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000, help='Üretilecek MemoryItem sayısı.')
+        parser.add_argument('--clip-ratio', type=float, default=0.3, help='512-d (CLIP) öğe oranı.')
+        parser.add_argument('--videos', type=int, default=200, help='Kareli video sayısı.')
+        parser.add_argument('--frames-per-video', type=int, default=20)
+        parser.add_argument('--clusters', type=int, default=100, help='Sentetik konu kümesi sayısı.')
+        parser.add_argument('--queries', type=int, default=200, help='Sorgu iş yükü boyutu.')
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--engines', default=','.join(name for name in ENGINES if name != 'brute_force'),
+                            help='Virgülle ayrılmış motorlar: ' + ', '.join(ENGINES))
+        parser.add_argument('--user', help='Sentetik veri yerine bu kullanıcının hafızasını kullan.')
+        parser.add_argument('--skip-manager', action='store_true',
+                            help='AdvancedMemoryManager.semantic_search ölçümünü atla.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Rapor yolu (varsayılan .cache/benchmarks/search-<zaman>.json).')
+
+    def handle(self, *args, **options):
+        engines = [name.strip() for name in options['engines'].split(',') if name.strip()]
+        unknown = set(engines) - set(ENGINES)
+        if unknown:
+            raise CommandError(f"Bilinmeyen motor(lar): {', '.join(sorted(unknown))}")
+
+        rng = np.random.default_rng(options['seed'])
+        if options['user']:
+            corpora, items = self.load_corpora(options['user'], options['queries'], rng)
+            source = {'user': options['user']}
+        else:
+            corpora, items = self.generate_corpora(options, rng)
+            source = {key: options[key] for key in (
+                'items', 'clip_ratio', 'videos', 'frames_per_video', 'clusters', 'seed'
+            )}
+
+        k = options['k']
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'config': {'source': source, 'queries': options['queries'], 'k': k, 'engines': engines},
+            'corpora': {corpus.name: {'rows': len(corpus.keys), 'keys': int(len(np.unique(corpus.keys)))}
+                        for corpus in corpora.values()},
+            'engines': [],
+        }
+
+        references = {}
+        for corpus in corpora.values():
+            exact = BruteForceEngine()
+            exact.build(corpus.keys, corpus.matrix)
+            references[corpus.name] = [exact.search(query, k) for query in corpus.queries]
+
+            for name in engines:
+                result = self.benchmark_engine(ENGINES[name], corpus, references[corpus.name], k)
+                report['engines'].append(result)
+                self.stdout.write(
+                    f"{corpus.name:<10} {name:<16} qps={result['qps']:<9} p50={result['p50_ms']:<8} "
+                    f"p99={result['p99_ms']:<8} recall@{k}={result['recall_at_k']:.3f} "
+                    f"index={result['index_kb']}KB"
+                )
+
+        if not options['skip_manager']:
+            report['manager'] = self.benchmark_manager(corpora, references, items, k)
+            manager = report['manager']
+            self.stdout.write(
+                f"{'mixed':<10} {'semantic_search':<16} qps={manager['qps']:<9} p50={manager['p50_ms']:<8} "
+                f"p99={manager['p99_ms']:<8} recall@{k}={manager['recall_at_k']:.3f}"
+            )
+
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, '.cache', 'benchmarks', f"search-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Rapor yazıldı: {output}"))
+
+    # --- Veri ---
+
+    def generate_corpora(self, options, rng):
+        """
+        Kümeli sentetik vektörler: her öğe/sorgu bir konu merkezi + gürültüdür,
+        böylece aynı kümedeki öğeler anlamlı (~0.5) benzerlik taşır.
+        """
+        n_items, clusters = options['items'], options['clusters']
+        n_clip = int(n_items * options['clip_ratio'])
+        n_videos = min(options['videos'], n_clip)
+
+        def clustered(count, dim, centers):
+            assignment = rng.integers(0, len(centers), size=count)
+            noise = rng.standard_normal((count, dim)).astype(np.float32) / np.sqrt(dim)
+            return centers[assignment] + noise
+
+        def unit_centers(dim):
+            centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+            return centers / np.linalg.norm(centers, axis=1, keepdims=True)
+
+        text_centers, clip_centers = unit_centers(TEXT_DIM), unit_centers(CLIP_DIM)
+        text_vectors = clustered(n_items - n_clip, TEXT_DIM, text_centers)
+        clip_vectors = clustered(n_clip, CLIP_DIM, clip_centers)
+        frame_vectors = clustered(n_videos * options['frames_per_video'], CLIP_DIM, clip_centers)
+
+        # Geçici anahtarlar; yönetici ölçümünde gerçek id'lerle değiştirilir
+        text_keys = np.arange(len(text_vectors))
+        clip_keys = np.arange(len(text_vectors), n_items)
+        video_keys = clip_keys[:n_videos]
+        frame_keys = np.repeat(video_keys, options['frames_per_video'])
+
+        queries = options['queries']
+        corpora = {
+            'text_384': Corpus('text_384', text_keys, text_vectors, clustered(queries, TEXT_DIM, text_centers)),
+            'clip_512': Corpus(
+                'clip_512', np.concatenate([clip_keys, frame_keys]),
+                np.vstack([clip_vectors, frame_vectors]), clustered(queries, CLIP_DIM, clip_centers)
+            ),
+        }
+        items = {
+            'text': list(zip(text_keys, text_vectors)),
+            'clip': list(zip(clip_keys, clip_vectors)),
+            'videos': set(video_keys.tolist()),
+            'frames': list(zip(frame_keys, frame_vectors)),
+        }
+        return corpora, items
+
+    def load_corpora(self, username, n_queries, rng):
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f"Kullanıcı bulunamadı: {username}")
+
+        by_dim = {TEXT_DIM: ([], []), CLIP_DIM: ([], [])}
+        rows = MemoryItem.objects.filter(user=user, vector_embedding__isnull=False).values_list(
+            'id', 'vector_embedding'
+        )
+        for item_id, blob in rows.iterator():
+            vector = np.frombuffer(blob, dtype=np.float32)
+            if vector.shape[0] in by_dim:
+                by_dim[vector.shape[0]][0].append(item_id)
+                by_dim[vector.shape[0]][1].append(vector)
+        frames = VideoFrame.objects.filter(memory_item__user=user).values_list('memory_item_id', 'vector_embedding')
+        for item_id, blob in frames.iterator():
+            vector = np.frombuffer(blob, dtype=np.float32)
+            if vector.shape[0] == CLIP_DIM:
+                by_dim[CLIP_DIM][0].append(item_id)
+                by_dim[CLIP_DIM][1].append(vector)
+
+        corpora = {}
+        for dim, name in ((TEXT_DIM, 'text_384'), (CLIP_DIM, 'clip_512')):
+            keys, vectors = by_dim[dim]
+            if not keys:
+                continue
+            matrix = np.vstack(vectors)
+            # Sorgular: rastgele öğeler + gürültü (gerçek metin sorgusu yok)
+            picks = matrix[rng.integers(0, len(matrix), size=n_queries)]
+            queries = picks + rng.standard_normal(picks.shape).astype(np.float32) / np.sqrt(dim)
+            corpora[name] = Corpus(name, keys, matrix, queries)
+        if not corpora:
+            raise CommandError("Kullanıcının vektörlü hafıza kaydı yok.")
+        return corpora, {'user': user}
+
+    # --- Ölçüm ---
+
+    def benchmark_engine(self, engine_class, corpus, references, k):
+        engine = engine_class()
+        started = time.perf_counter()
+        engine.build(corpus.keys, corpus.matrix)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        timings, recalls = [], []
+        for query, reference in zip(corpus.queries, references):
+            started = time.perf_counter()
+            results = engine.search(query, k)
+            timings.append((time.perf_counter() - started) * 1000)
+            recalls.append(recall_at_k(results, reference, k))
+
+        return {
+            'engine': engine.name,
+            'corpus': corpus.name,
+            **_latency_stats(timings),
+            'recall_at_k': round(float(np.mean(recalls)), 4),
+            'build_ms': round(build_ms, 1),
+            'index_kb': round(engine.memory_bytes() / 1024, 1),
+            'search_peak_kb': _peak_kb(lambda: engine.search(corpus.queries[0], k)),
+        }
+
+    def benchmark_manager(self, corpora, references, items, k):
+        """
+        Mevcut AdvancedMemoryManager.semantic_search uçtan uca ölçülür.
+        Sentetik veri geçici olarak veritabanına yazılır ve işlem sonunda geri alınır;
+        çeviri ve embedding modelleri sorgu vektörlerini döndüren sahtelerle değiştirilir.
+        """
+        from deep_translator import GoogleTranslator
+        from memory.services.advanced_memory_manager import AdvancedMemoryManager
+        from memory.services.ai_services import AIService
+
+        n_queries = min(len(corpus.queries) for corpus in corpora.values())
+        texts = [f"benchmark sorgu {index}" for index in range(n_queries)]
+        text_queries = corpora['text_384'].queries if 'text_384' in corpora else None
+        clip_queries = corpora['clip_512'].queries if 'clip_512' in corpora else None
+        lookup_text = {text: index for index, text in enumerate(texts)}
+
+        with transaction.atomic():
+            if 'user' in items:
+                user, id_map = items['user'], None
+            else:
+                user, id_map = self._write_synthetic_items(items)
+
+            def text_embedding(service, text):
+                return None if text_queries is None else text_queries[lookup_text[text]]
+
+            def clip_embedding(service, text):
+                return None if clip_queries is None else clip_queries[lookup_text[text]]
+
+            with patch.object(GoogleTranslator, 'translate', lambda self, text, **kw: text), \
+                    patch.object(AIService, 'get_text_embedding', text_embedding), \
+                    patch.object(AIService, 'get_clip_text_embedding', clip_embedding), \
+                    patch('builtins.print'):
+                manager = AdvancedMemoryManager(user)
+                timings, recalls = [], []
+                for index, text in enumerate(texts):
+                    started = time.perf_counter()
+                    results = manager.semantic_search(text, limit=k)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    found = [(result['id'], result['similarity_score']) for result in results]
+                    recalls.append(recall_at_k(found, self._mixed_reference(references, index, k, id_map), k))
+                peak_kb = _peak_kb(lambda: manager.semantic_search(texts[0], limit=k))
+
+            transaction.set_rollback(True)
+
+        return {
+            'engine': 'semantic_search',
+            'corpus': 'mixed',
+            **_latency_stats(timings),
+            'recall_at_k': round(float(np.mean(recalls)), 4),
+            'search_peak_kb': peak_kb,
+        }
+
+    @staticmethod
+    def _mixed_reference(references, index, k, id_map):
+        """Metin ve CLIP referanslarını ham kosinüs skoruna göre birleştirir (id'ler DB id'sine çevrilir)."""
+        merged = {}
+        for corpus_references in references.values():
+            for key, score in corpus_references[index]:
+                key = id_map[key] if id_map else key
+                merged[key] = max(score, merged.get(key, -2.0))
+        return sorted(merged.items(), key=lambda pair: -pair[1])[:k]
+
+    def _write_synthetic_items(self, items):
+        user = User.objects.create(
+            username=f"benchmark_{int(time.time())}", email=f"benchmark_{int(time.time())}@example.com"
+        )
+        tier, _ = MemoryTier.objects.get_or_create(name='long_term', defaults={'duration_minutes': 43200})
+        expires_at = timezone.now() + timedelta(days=30)
+
+        def build(key, vector, file_type):
+            return MemoryItem(
+                user=user, file_path=f"/benchmark/{key}", file_name=f"benchmark_{key}",
+                file_type=file_type, original_size=0, vector_embedding=vector.astype(np.float32).tobytes(),
+                structural_data='{}', memory_tier=tier, expires_at=expires_at,
+            )
+
+        rows = [(key, build(key, vector, 'text')) for key, vector in items['text']]
+        rows += [
+            (key, build(key, vector, 'video' if key in items['videos'] else 'image'))
+            for key, vector in items['clip']
+        ]
+        MemoryItem.objects.bulk_create([row for _, row in rows], batch_size=1000)
+        # bulk_create SQLite'ta id döndürür; eşleme sentetik anahtar -> DB id
+        id_map = {int(key): row.id for key, row in rows}
+        VideoFrame.objects.bulk_create([
+            VideoFrame(memory_item_id=id_map[int(key)], timestamp=float(index),
+                       vector_embedding=vector.astype(np.float32).tobytes())
+            for index, (key, vector) in enumerate(items['frames'])
+        ], batch_size=1000)
+        return user, id_map
@@ -1,278 +1,311 @@
 ﻿# memory/management/commands/generate_embeddings.py (Sync + Generate)
-from django.core.management.base import BaseCommand
+"""
+Eksik (veya --force ile tüm) MemoryItem vektörlerini toplu halde üretir.
+
+- Öğeler id sırasıyla `--batch-size`'lık gruplar halinde işlenir; her grup
+  tek bir model çağrısıyla (metin/görüntü) gömülür ve bulk_update ile yazılır.
+- `--workers N` ile gruplar süreç havuzuna dağıtılır; her işçi modelleri
+  bir kez yükler (bkz. memory.services.embedding_worker).
+- Her grup yazıldıktan sonra son id bir kontrol noktasına kaydedilir;
+  yarıda kalan çalışma aynı filtrelerle yeniden başlatıldığında kaldığı yerden devam eder.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from memory.models import MemoryItem, MemoryTier
-from memory.services.ai_services import AIService
-import os
-import mimetypes
-import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from memory.models import FaceEncoding, MemoryItem, VideoFrame
+from memory.services import disk_sync, embedding_worker, face_index
 
 User = get_user_model()
 
+CHECKPOINT_DIR = os.path.join(settings.BASE_DIR, '.cache', 'embeddings')
+
+
 class Command(BaseCommand):
-    help = 'Diskteki dosyaları tarar, eksikse hafızaya ekler ve vektörleri oluşturur.'
+    help = 'Diskteki dosyaları tarar, eksikse hafızaya ekler ve vektörleri toplu halde oluşturur.'
 
     def add_arguments(self, parser):
         parser.add_argument('--force', action='store_true', help='Vektörü olsa bile yeniden oluştur.')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='İşçi süreç sayısı (1 = aynı süreçte çalış).')
+        parser.add_argument('--batch-size', type=int, default=32, help='Grup başına öğe sayısı.')
+        parser.add_argument('--user', help='Yalnızca bu kullanıcının (kullanıcı adı veya id) öğeleri.')
+        parser.add_argument('--type', dest='kinds', action='append',
+                            choices=list(embedding_worker.KIND_RULES),
+                            help='Yalnızca bu türdeki öğeler (tekrarlanabilir).')
+        parser.add_argument('--limit', type=int, help='Bu çalışmada en fazla bu kadar öğe işle.')
+        parser.add_argument('--no-faces', action='store_true', help='Görüntülerde yüz tanımayı atla.')
+        parser.add_argument('--skip-sync', action='store_true', help='Disk senkronizasyonu adımını atla.')
+        parser.add_argument('--restart', action='store_true',
+                            help='Kontrol noktasını yok say ve baştan başla.')
+        parser.add_argument('--checkpoint', help='Kontrol noktası dosyası (varsayılan .cache/embeddings/).')
 
     def handle(self, *args, **options):
-        force_update = options['force']
-        ai_service = AIService()
-        
-        self.stdout.write("--- 1. ADIM: Disk ve Hafıza Senkronizasyonu ---")
-        self.sync_files_from_disk()
-        
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers ve --batch-size en az 1 olmalı.')
+
+        user = self.resolve_user(options['user'])
+        kinds = sorted(set(options['kinds'] or embedding_worker.KIND_RULES))
+
+        if not options['skip_sync']:
+            self.stdout.write("--- 1. ADIM: Disk ve Hafıza Senkronizasyonu ---")
+            self.sync_files_from_disk()
+
         self.stdout.write("\n--- 2. ADIM: Embedding (Vektör) Oluşturma ---")
-        
-        if force_update:
-            items = MemoryItem.objects.all()
+
+        items = MemoryItem.objects.filter(self.kind_filter(kinds))
+        if user is not None:
+            items = items.filter(user=user)
+        if options['force']:
             self.stdout.write(self.style.WARNING("Mod: FORCE (Tüm dosyalar yeniden işlenecek)"))
         else:
-            items = MemoryItem.objects.filter(vector_embedding__isnull=True)
+            items = items.filter(vector_embedding__isnull=True)
             self.stdout.write("Mod: Sadece eksik vektörler")
 
-        total_count = items.count()
-        self.stdout.write(f"İşlenecek dosya sayısı: {total_count}")
-
-        for item in items:
-            self.stdout.write(f" > [{item.id}] {item.file_name} işleniyor...", ending='')
-            
-            try:
-                if not item.file_path or not os.path.exists(item.file_path):
-                    self.stdout.write(self.style.ERROR(" DOSYA BULUNAMADI (Atlanıyor)"))
-                    continue
-
-                embedding = None
-                
-                # Resim mi?
-                if item.file_type == 'image' or item.file_name.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-                    embedding = ai_service.get_image_embedding(item.file_path)
-
-                    try:
-                        import face_recognition
-                        from memory.models import Person, FaceEncoding
-                    except ImportError:
-                        self.stdout.write(self.style.WARNING("Face recognition modülü eksik."))
-                        continue
-
-                    faces = ai_service.detect_and_encode_faces(item.file_path)
-                    
-                    if faces:
-                        self.stdout.write(f" -> {len(faces)} yüz bulundu. ", ending='')
-                        
-                        # Mevcut kayıtlı kişilerin yüz imzalarını (encoding) belleğe al
-                        # (Gerçek prodüksiyonda bu sorgu optimize edilmeli, şimdilik döngü içinde yapıyoruz)
-                        known_encodings = []
-                        known_people_ids = []
-                        
-                        # Veritabanındaki her kişiden 1 örnek yüz al
-                        for person in Person.objects.all():
-                            # O kişinin ilk yüz kaydını referans al
-                            sample_face = person.faces.first()
-                            if sample_face:
-                                # Binary veriyi numpy array'e çevir (float64 önemli!)
-                                known_encodings.append(
-                                    np.frombuffer(sample_face.encoding, dtype=np.float64)
-                                )
-                                known_people_ids.append(person.id)
-
-                        # Bulunan her yeni yüz için:
-                        for face in faces:
-                            current_encoding = face['encoding'] # Zaten numpy array geliyor
-                            found_person = None
-
-                            # Eğer veritabanında kayıtlı kimse varsa karşılaştır
-                            if known_encodings:
-                                # face_recognition kütüphanesi ile karşılaştırma yap
-                                # tolerance=0.6 standarttır. Daha düşük (0.5) daha katı, daha yüksek (0.7) daha gevşek.
-                                matches = face_recognition.compare_faces(known_encodings, current_encoding, tolerance=0.6)
-                                
-                                if True in matches:
-                                    # İlk eşleşen kişiyi al
-                                    first_match_index = matches.index(True)
-                                    person_id = known_people_ids[first_match_index]
-                                    found_person = Person.objects.get(id=person_id)
-                                    # print(f"   [Tanındı]: {found_person.name}")
-
-                            # Eşleşme yoksa YENİ KİŞİ oluştur
-                            if found_person is None:
-                                found_person = Person.objects.create(
-                                    user=item.user,
-                                    name=f"Kişi #{Person.objects.count() + 1}", # Geçici İsim
-                                    cover_photo=item.file_path # Bu fotoğrafı kapak yap
-                                )
-                                # Yeni kişiyi hafızadaki listeye de ekle ki aynı fotodaki diğer yüzlerle karışmasın
-                                known_encodings.append(current_encoding)
-                                known_people_ids.append(found_person.id)
-                                # print(f"   [Yeni]: {found_person.name}")
-
-                            # Yüzü veritabanına kaydet ve kişiyle ilişkilendir
-                            FaceEncoding.objects.create(
-                                person=found_person,
-                                memory_item=item,
-                                encoding=current_encoding.tobytes(), # Binary olarak kaydet
-                                location_top=face['location'][0],
-                                location_right=face['location'][1],
-                                location_bottom=face['location'][2],
-                                location_left=face['location'][3]
-                            )
-
-                        self.stdout.write(self.style.SUCCESS("İşlendi (Gruplandı)."))
-                    
-                # Metin/Kod mu?
-                elif item.file_type in ['text', 'pdf', 'code', 'document'] or \
-                     item.file_name.lower().endswith(('.txt', '.md', '.py', '.js', '.pdf', '.docx')):
-                    
-                    self.stdout.write(f" Metin Okunuyor: {item.file_name} ", ending='')
-                    
-                    # 1. İçeriği Çıkar
-                    content = ai_service.extract_text_from_file(item.file_path)
-                    
-                    if content and len(content.strip()) > 10:
-                        # 2. İçeriği Özetle/Kaydet (İleride RAG için kullanacağız)
-                        item.content_summary = content[:500] + "..." # Veritabanında özet olarak sakla
-                        
-                        # 3. Vektör Oluştur (Dosya Adı + İçerik Kombinasyonu)
-                        # Hem ismini hem içeriğini temsil eden hibrit bir vektör
-                        combined_text = f"{item.file_name} : {content[:1000]}"
-                        embedding = ai_service.get_text_embedding(combined_text)
-                        
-                        self.stdout.write(f"-> {len(content)} karakter okundu. ", ending='')
-                    else:
-                        # İçerik okunamadıysa veya boşsa sadece isminden üret
-                        self.stdout.write("(İçerik boş, isimden üretiliyor) ", ending='')
-                        embedding = ai_service.get_text_embedding(item.file_name)
-
-                    if embedding is not None:
-                        item.vector_embedding = embedding.tobytes()
-                        item.save()
-                        self.stdout.write(self.style.SUCCESS("OK"))
-                    else:
-                        self.stdout.write(self.style.ERROR("Vektör Hatası"))
-
-                elif item.file_type == 'video' or item.file_name.lower().endswith(('.mp4', '.mov', '.avi', '.mkv')):
-
-                    self.stdout.write(f" Video Analizi: {item.file_name} ", ending='')
-
-                    # Önce videonun genel bir vektörü var mı diye bak (thumbnail'den vb.)
-                    # Yoksa ilk kareyi kapak resmi yapabiliriz ama asıl olay VideoFrame tablosunda.
-                    
-                    frames = ai_service.analyze_video_content(item.file_path, interval_seconds=5) # 5 saniyede bir kare al
-
-                    # 2. Ses Analizi (YENİ) - Whisper Devreye Giriyor
-                    transcript = ai_service.transcribe_audio(item.file_path)
-                    
-                    # Transkripti kaydet
-                    if transcript:
-                        item.content_summary = f"[VIDEO TRANSCRIPT]: {transcript[:1000]}"
-                        self.stdout.write(f" + Ses Okundu ", ending='')
-
-                    if frames:
-                        # Ana memory item'a ilk karenin vektörünü koy (Genel arama için)
-                        embedding = frames[0]['embedding']
-                        item.vector_embedding = frames[0]['embedding'].tobytes()
-                        item.save()
-                        
-                        # Alt kareleri VideoFrame tablosuna kaydet
-                        from memory.models import VideoFrame # Import etmeyi unutma
-                        
-                        # Eskileri temizle (duplicate olmasın)
-                        VideoFrame.objects.filter(memory_item=item).delete()
-                        
-                        for frame in frames:
-                            VideoFrame.objects.create(
-                                memory_item=item,
-                                timestamp=frame['timestamp'],
-                                vector_embedding=frame['embedding'].tobytes()
-                            )
-                        
-                        self.stdout.write(self.style.SUCCESS(f" OK (Video: {len(frames)} kare)"))
-                    else:
-                        self.stdout.write(self.style.WARNING(" Video işlendi ama kare alınamadı."))
-
-                elif item.file_name.lower().endswith(('.mp3', '.wav', '.m4a', '.ogg')):
-                    self.stdout.write(f" Ses Analizi: {item.file_name} ", ending='')
-                    
-                    transcript = ai_service.transcribe_audio(item.file_path)
-                    
-                    if transcript:
-                        item.content_summary = transcript[:1000]
-                        # Metin embeddingi oluştur (İsminden değil, konuşmadan)
-                        combined = f"{item.file_name} : {transcript[:500]}"
-                        embedding = ai_service.get_text_embedding(combined)
-                        self.stdout.write(self.style.SUCCESS(" OK (Speech-to-Text)"))
-                    else:
-                        embedding = ai_service.get_text_embedding(item.file_name)
-                        self.stdout.write(" (Sessiz)")
-
-                if embedding is not None:
-                    # Numpy array ise bytes'a çevir
-                    if isinstance(embedding, np.ndarray):
-                        item.vector_embedding = embedding.tobytes()
-                    else:
-                        item.vector_embedding = embedding # Zaten bytes ise
-                        
-                    item.save()
-                    self.stdout.write(self.style.SUCCESS(" OK"))
-                else:
-                    self.stdout.write(self.style.ERROR(" BAŞARISIZ (Vektör yok)"))
-
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f" HATA: {e}"))
-                import traceback
-                traceback.print_exc()
-
-        self.stdout.write(self.style.SUCCESS('\n✅ İşlem Tamamlandı.'))
+        filters = {
+            'force': options['force'], 'user': user.pk if user else None, 'kinds': kinds,
+        }
+        checkpoint_path = options['checkpoint'] or self.default_checkpoint_path(filters)
+        checkpoint = {} if options['restart'] else self.load_checkpoint(checkpoint_path, filters)
+        cursor = checkpoint.get('last_id', 0)
+        if cursor:
+            self.stdout.write(f"Kontrol noktasından devam ediliyor: id > {cursor}")
+
+        total = items.filter(pk__gt=cursor).count()
+        if options['limit']:
+            total = min(total, options['limit'])
+        self.stdout.write(f"İşlenecek dosya sayısı: {total} (grup: {options['batch_size']}, işçi: {options['workers']})")
+
+        self.stats = {'ok': 0, 'missing': 0, 'failed': 0, 'faces': 0, 'frames': 0}
+        self.started = time.perf_counter()
+        processed = 0
+
+        batches = self.iter_batches(items, cursor, options['batch_size'], options['limit'])
+        worker_options = {
+            'detect_faces': not options['no_faces'],
+            # Tek süreçte yüz tespiti çekirdeklere yayılır; havuzda her işçi sıralı çalışır
+            'face_workers': None if options['workers'] == 1 else 1,
+        }
+
+        for tasks, results in self.run(batches, options['workers'], worker_options):
+            self.write_results(tasks, results)
+            processed += len(tasks)
+            cursor = tasks[-1]['id']
+            self.save_checkpoint(checkpoint_path, filters, cursor, processed + checkpoint.get('processed', 0))
+            self.report_progress(processed, total)
+
+        # Tamamlanan çalışmanın kontrol noktası silinir; sonraki çalışma baştan başlar
+        if not options['limit'] and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ İşlem Tamamlandı. {processed} öğe, {elapsed:.1f} sn "
+            f"(başarılı: {self.stats['ok']}, dosya yok: {self.stats['missing']}, "
+            f"başarısız: {self.stats['failed']}, yüz: {self.stats['faces']}, kare: {self.stats['frames']})"
+        ))
+
+    # --- Seçim ---
+
+    def resolve_user(self, value):
+        if not value:
+            return None
+        lookup = Q(username=value) | Q(pk=int(value)) if value.isdigit() else Q(username=value)
+        user = User.objects.filter(lookup).first()
+        if user is None:
+            raise CommandError(f"Kullanıcı bulunamadı: {value}")
+        return user
+
+    def kind_filter(self, kinds):
+        query = Q()
+        for kind in kinds:
+            file_types, extensions = embedding_worker.KIND_RULES[kind]
+            query |= Q(file_type__in=file_types)
+            for extension in extensions:
+                query |= Q(file_name__iendswith=extension)
+        return query
+
+    def iter_batches(self, items, cursor, batch_size, limit=None):
+        """id üzerinden keyset sayfalama; her grup bir görev listesi."""
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            rows = list(
+                items.filter(pk__gt=cursor).order_by('pk')
+                .values('id', 'file_name', 'file_path', 'file_type', 'user_id')[:size]
+            )
+            if not rows:
+                return
+            tasks = []
+            for row in rows:
+                row['kind'] = embedding_worker.classify(row['file_type'], row['file_name'])
+                tasks.append(row)
+            yield tasks
+            cursor = rows[-1]['id']
+            if remaining is not None:
+                remaining -= len(rows)
+
+    # --- Yürütme ---
+
+    def run(self, batches, workers, worker_options):
+        """(görevler, sonuçlar) çiftlerini grupların sırasıyla üretir."""
+        if workers == 1:
+            for tasks in batches:
+                yield tasks, embedding_worker.process_batch(self.payload(tasks), **worker_options)
+            return
+
+        # Çatallanan süreçler ana sürecin DB bağlantısını devralmasın
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=embedding_worker.init_worker) as pool:
+            in_flight = deque()
+            for tasks in batches:
+                in_flight.append((tasks, pool.submit(
+                    embedding_worker.process_batch, self.payload(tasks), **worker_options
+                )))
+                # Sıralı tüketim: kontrol noktası yalnızca tamamlanmış önekte ilerler
+                while len(in_flight) >= workers * 2:
+                    tasks_done, future = in_flight.popleft()
+                    yield tasks_done, future.result()
+            while in_flight:
+                tasks_done, future = in_flight.popleft()
+                yield tasks_done, future.result()
+
+    @staticmethod
+    def payload(tasks):
+        return [
+            {key: task[key] for key in ('id', 'kind', 'file_name', 'file_path')}
+            for task in tasks
+        ]
+
+    def write_results(self, tasks, results):
+        by_id = {task['id']: task for task in tasks}
+        updated, frames, faces = [], [], []
+        frame_items, face_items = [], []
+        replaced = 0
+
+        for result in results:
+            task = by_id[result['id']]
+            if result['error'] == 'missing':
+                self.stats['missing'] += 1
+                continue
+            if result['embedding'] is None:
+                self.stats['failed'] += 1
+                continue
+
+            item = MemoryItem(
+                pk=task['id'], vector_embedding=result['embedding'], content_summary=result['summary']
+            )
+            updated.append((item, result['summary'] is not None))
+            self.stats['ok'] += 1
+
+            if result['frames']:
+                frame_items.append(task['id'])
+                frames.extend(
+                    VideoFrame(memory_item_id=task['id'], timestamp=timestamp, vector_embedding=blob)
+                    for timestamp, blob in result['frames']
+                )
+            if result['faces'] is not None:
+                face_items.append(task['id'])
+                person_ids = face_index.assign_faces(
+                    task['user_id'], [face_index.decode(face['encoding']) for face in result['faces']],
+                    cover_photo=task['file_path'],
+                )
+                for face, person_id in zip(result['faces'], person_ids):
+                    top, right, bottom, left = face['location']
+                    faces.append(FaceEncoding(
+                        person_id=person_id, memory_item_id=task['id'], encoding=face['encoding'],
+                        location_top=top, location_right=right,
+                        location_bottom=bottom, location_left=left,
+                    ))
+
+        with transaction.atomic():
+            # Özeti olmayan öğelerde mevcut content_summary korunur
+            with_summary = [item for item, has_summary in updated if has_summary]
+            without_summary = [item for item, has_summary in updated if not has_summary]
+            if with_summary:
+                MemoryItem.objects.bulk_update(with_summary, ['vector_embedding', 'content_summary'])
+            if without_summary:
+                MemoryItem.objects.bulk_update(without_summary, ['vector_embedding'])
+            if frame_items:
+                # Eskileri temizle (duplicate olmasın)
+                VideoFrame.objects.filter(memory_item_id__in=frame_items).delete()
+                VideoFrame.objects.bulk_create(frames, batch_size=500)
+            if face_items:
+                # Yeniden vektörlenen öğenin yüzleri her durumda yenileriyle değişir
+                # (--force olmadan da: disk_sync değişen dosyanın vektörünü siler)
+                replaced = FaceEncoding.objects.filter(memory_item_id__in=face_items).delete()[0]
+            if faces:
+                FaceEncoding.objects.bulk_create(faces, batch_size=500)
+
+        if replaced:
+            # Silinen eski yüzler merkezlerde kaldı; indeks yeniden kurulsun
+            for user_id in {by_id[item_id]['user_id'] for item_id in face_items}:
+                face_index.invalidate(user_id)
+
+        self.stats['frames'] += len(frames)
+        self.stats['faces'] += len(faces)
+
+    def report_progress(self, processed, total):
+        elapsed = time.perf_counter() - self.started
+        rate = processed / elapsed if elapsed else 0.0
+        eta = (total - processed) / rate if rate and total > processed else 0.0
+        self.stdout.write(
+            f"  {processed}/{total} | {rate:.1f} öğe/sn | kalan ~{eta:.0f} sn | "
+            f"başarılı {self.stats['ok']}, başarısız {self.stats['failed']}, dosya yok {self.stats['missing']}"
+        )
+
+    # --- Kontrol noktası ---
+
+    @staticmethod
+    def default_checkpoint_path(filters):
+        digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(CHECKPOINT_DIR, f'checkpoint-{digest}.json')
+
+    def load_checkpoint(self, path, filters):
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding='utf-8') as handle:
+                checkpoint = json.load(handle)
+        except (OSError, ValueError):
+            self.stdout.write(self.style.WARNING(f"Kontrol noktası okunamadı, baştan başlanıyor: {path}"))
+            return {}
+        if checkpoint.get('filters') != filters:
+            self.stdout.write(self.style.WARNING("Kontrol noktası farklı filtrelerle oluşturulmuş, yok sayılıyor."))
+            return {}
+        return checkpoint
+
+    @staticmethod
+    def save_checkpoint(path, filters, last_id, processed):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'filters': filters, 'last_id': last_id, 'processed': processed,
+                'updated_at': timezone.now().isoformat(),
+            }, handle)
+        # Yarım yazılmış dosya kalmasın
+        os.replace(temporary, path)
 
     def sync_files_from_disk(self):
-        """Diskteki dosyaları tarayıp MemoryItem tablosuna ekler."""
-        uploads_dir = os.path.join(settings.MEDIA_ROOT, 'uploads')
-        
-        if not os.path.exists(uploads_dir):
-            self.stdout.write(self.style.WARNING(f"Upload klasörü bulunamadı: {uploads_dir}"))
+        """Diskteki yeni/değişen dosyaları MemoryItem tablosuna işler (bkz. sync_disk komutu)."""
+        if not os.path.exists(disk_sync.uploads_root()):
+            self.stdout.write(self.style.WARNING(f"Upload klasörü bulunamadı: {disk_sync.uploads_root()}"))
             return
 
-        # Bellek katmanını al
-        default_tier, _ = MemoryTier.objects.get_or_create(name="short_term")
-
-        # Klasörleri gez (uploads/USER_ID/DOSYA)
-        for user_id in os.listdir(uploads_dir):
-            user_path = os.path.join(uploads_dir, user_id)
-            
-            # Bu klasör ismi bir User ID mi?
-            if os.path.isdir(user_path) and user_id.isdigit():
-                try:
-                    user = User.objects.get(id=int(user_id))
-                except User.DoesNotExist:
-                    continue
-
-                for filename in os.listdir(user_path):
-                    file_path = os.path.join(user_path, filename)
-                    
-                    if os.path.isfile(file_path):
-                        # Veritabanında var mı kontrol et
-                        exists = MemoryItem.objects.filter(file_name=filename, user=user).exists()
-                        
-                        if not exists:
-                            # Dosya türünü tahmin et
-                            mime_type, _ = mimetypes.guess_type(file_path)
-                            file_type = 'unknown'
-                            if mime_type:
-                                if mime_type.startswith('image'): file_type = 'image'
-                                elif mime_type.startswith('text'): file_type = 'text'
-                                elif mime_type.startswith('video'): file_type = 'video'
-                            
-                            # --- DÜZELTME BURADA ---
-                            # Dosya boyutunu alıp 'original_size' olarak kaydediyoruz
-                            file_size_bytes = os.path.getsize(file_path)
-
-                            MemoryItem.objects.create(
-                                user=user,
-                                file_name=filename,
-                                file_path=file_path,
-                                file_type=file_type,
-                                original_size=file_size_bytes, # <-- Zorunlu alan eklendi
-                                memory_tier=default_tier
-                            )
-                            self.stdout.write(self.style.SUCCESS(f"  + Yeni dosya eklendi: {filename}"))
\ No newline at end of file
+        total = disk_sync.SyncResult()
+        for result in disk_sync.sync_all().values():
+            total.merge(result)
+        for name in total.new:
+            self.stdout.write(self.style.SUCCESS(f"  + Yeni dosya eklendi: {name}"))
+        self.stdout.write(total.summary())
@@ -3,18 +3,47 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.db.models import Count
-from datetime import timedelta
+from django.db import transaction
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import os
+import time
 import numpy as np
 import logging
-from memory.models import MemoryItem, MemoryTier
-from memory.services.advanced_memory_manager import AdvancedMemoryManager # Muhtemel Düzeltme
+from memory.models import FaceEncoding, MemoryItem, VideoFrame
+from memory.services import face_index
+from memory.services.tier_engine import TierEngine
+from memory.services.usage import UsageDelta, reconcile
 from memory.services.compression_engine import SemanticCompressionEngine   # Muhtemel Düzeltme
 from memory.services.ai_services import AIService
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 PCA_TRAIN_SAMPLE_SIZE = 10000 # PCA için toplanacak maksimum vektör sayısı
+CLEANUP_BATCH_SIZE = 500 # Temizlikte transaction başına silinecek öğe
+CLEANUP_IO_WORKERS = 8 # Dosya silme thread sayısı
+
+
+def _remove_file(path):
+    """(sonuç, bayt): sonuç 'removed' | 'missing' | 'error'."""
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return 'removed', size
+    except FileNotFoundError:
+        return 'missing', 0
+    except OSError as e:
+        logger.error(f"Dosya silinirken hata oluştu ({path}): {e}")
+        return 'error', 0
+
+
+def _stat_file(path):
+    """dry-run: silinecek dosyanın boyutu."""
+    try:
+        return 'removed', os.path.getsize(path)
+    except OSError:
+        return 'missing', 0
+
 
 class Command(BaseCommand):
     help = 'Bellek bakım işlemlerini gerçekleştirir: Temizlik, Sıkıştırma ve PCA Eğitimi.'
@@ -26,87 +55,130 @@ class Command(BaseCommand):
         
         # Yeni argüman
         parser.add_argument('--train_pca', action='store_true', help='Sıkıştırma motoru için PCA modelini eğitir.')
+        parser.add_argument('--reconcile-usage', action='store_true', help='Kullanım sayaçlarını MemoryItem tablosundan yeniden hesaplar.')
+        parser.add_argument('--dry-run', action='store_true', help='--cleanup/--compress/--reconcile-usage: hiçbir şey değiştirmeden neyin yapılacağını raporla.')
+        parser.add_argument('--batch-size', type=int, default=CLEANUP_BATCH_SIZE, help='--cleanup: transaction başına öğe sayısı.')
+        parser.add_argument('--io-workers', type=int, default=CLEANUP_IO_WORKERS, help='--cleanup: dosya silme thread sayısı.')
     
     def handle(self, *args, **options):
         # Hangi işlevlerin çalışacağını belirle
         should_compress = options['compress']
         should_cleanup = options['cleanup']
         should_train_pca = options['train_pca']
+        should_reconcile = options['reconcile_usage']
 
-        if not any([should_compress, should_cleanup, should_train_pca]):
-            self.stdout.write(self.style.WARNING("Hiçbir işlem belirtilmedi. --compress, --cleanup veya --train_pca kullanın."))
+        if not any([should_compress, should_cleanup, should_train_pca, should_reconcile]):
+            self.stdout.write(self.style.WARNING("Hiçbir işlem belirtilmedi. --compress, --cleanup, --train_pca veya --reconcile-usage kullanın."))
             return
 
         # Tek bir geçişte tüm işlemleri verimli bir şekilde yap
         if should_cleanup:
-            self.cleanup_expired()
+            self.cleanup_expired(
+                batch_size=options['batch_size'], io_workers=options['io_workers'], dry_run=options['dry_run']
+            )
             
         if should_compress:
-            self.compress_memories()
+            self.compress_memories(dry_run=options['dry_run'])
             
         if should_train_pca:
             self.train_pca_model()
+
+        # Diğer işlemler sayaçları zaten günceller; bu adım yalnızca kaymaları düzeltir
+        if should_reconcile:
+            self.reconcile_usage(dry_run=options['dry_run'])
             
         self.stdout.write(self.style.SUCCESS('Bellek bakımı tamamlandı.'))
 
     # --- İşlem 1: Memory Item Sıkıştırma ve Yükseltme ---
-    def compress_memories(self):
-        self.stdout.write(">> Kısa süreli belleği sıkıştırma ve yükseltme başlatılıyor...")
-        try:
-            # Sıkıştırma için uygun katmanı al (models.py'den varsayılan adı alıyoruz)
-            short_term_tier = MemoryTier.objects.get(name='short_term')
-        except MemoryTier.DoesNotExist:
-            self.stdout.write(self.style.ERROR("short_term MemoryTier bulunamadı. Atlanıyor."))
-            return
-
-        # Sıkıştırma eşiği: Şu andan itibaren 6 saat içinde süresi dolacaklar
-        expiration_threshold = timezone.now() + timedelta(hours=6)
-        
-        # Sıkıştırılması gereken öğeleri bul (yalnızca vector_embedding'i olanları)
-        memories_to_process = MemoryItem.objects.filter(
-            memory_tier=short_term_tier,
-            expires_at__lte=expiration_threshold,
-            vector_embedding__isnull=False,
-            compressed_embedding__isnull=True # Daha önce sıkıştırılmamış olanlar
-        ).select_related('user') # Kullanıcı verisini tek sorguda al
-
-        users = set(m.user for m in memories_to_process)
-        
-        for user in users:
-            manager = AdvancedMemoryManager(user)
-            user_memories = [m for m in memories_to_process if m.user == user]
-            self.stdout.write(f"  -> {user.username} için {len(user_memories)} öğe işleniyor.")
-            
-            for memory in user_memories:
-                # AdvancedMemoryManager'daki check_and_promote_memories metodunun mantığını çağır
-                manager.check_and_promote_memories_for_item(memory) # Yeni eklenen yardımcı metod
-                self.stdout.write(self.style.NOTICE(f"    [Sıkıştırıldı]: {memory.file_name[:40]}..."))
+    def compress_memories(self, dry_run=False):
+        """Tüm kullanıcıların katman geçişleri tek geçişte (bkz. tier_engine)."""
+        self.stdout.write(">> Katman geçişleri (sıkıştırma ve yükseltme) başlatılıyor..." + (" (dry-run)" if dry_run else ""))
+        started = time.perf_counter()
+        result = TierEngine(dry_run=dry_run).run()
+        self.stdout.write(self.style.SUCCESS(f"✅ {result.summary()} ({time.perf_counter() - started:.2f} sn)"))
+        return result
 
     # --- İşlem 2: Süresi Dolmuş Öğeleri Temizleme (Veritabanı ve Disk) ---
-    def cleanup_expired(self):
-        self.stdout.write(">> Süresi dolmuş memory itemlarını temizleme başlatılıyor...")
-        
-        expired_memories = MemoryItem.objects.filter(expires_at__lte=timezone.now())
-        total_count = expired_memories.count()
-        deleted_file_count = 0
+    def cleanup_expired(self, batch_size=CLEANUP_BATCH_SIZE, io_workers=CLEANUP_IO_WORKERS, dry_run=False):
+        """
+        Süresi dolmuş öğeleri id parçaları halinde siler: her parça tek bir
+        transaction'da queryset.delete() ile (VideoFrame/FaceEncoding toplu
+        cascade) silinir, dosyalar commit sonrası thread havuzunda diskten kaldırılır.
+        """
+        self.stdout.write(">> Süresi dolmuş memory itemlarını temizleme başlatılıyor..." + (" (dry-run)" if dry_run else ""))
 
+        now = timezone.now()
+        expired = MemoryItem.objects.filter(expires_at__lte=now)
+        total_count = expired.count()
         self.stdout.write(f"Toplam {total_count} süresi dolmuş öğe bulundu.")
-        
-        for memory in expired_memories:
-            # 1. Disk üzerindeki dosyaları sil (Ekran Görüntüsü veya İlgili Dosya)
-            paths_to_check = [memory.screenshot_path, memory.file_path]
-            for path in paths_to_check:
-                if path and os.path.exists(path):
-                    try:
-                        os.remove(path)
-                        deleted_file_count += 1
-                    except OSError as e:
-                        logger.error(f"Dosya silinirken hata oluştu ({path}): {e}")
-            
-            # 2. Veritabanı kaydını sil
-            memory.delete()
-            
-        self.stdout.write(self.style.SUCCESS(f"✅ {total_count} kayıt veritabanından, {deleted_file_count} dosya diskten silindi."))
+
+        started = time.perf_counter()
+        deleted_rows = Counter()
+        file_stats = Counter()
+        processed = 0
+        last_id = 0
+        removals = []
+
+        with ThreadPoolExecutor(max_workers=io_workers) as pool:
+            while True:
+                # dry-run'da satırlar silinmediği için keyset ile ilerlenir
+                chunk = list(
+                    expired.filter(pk__gt=last_id).order_by('pk')
+                    .values_list('pk', 'user_id', 'memory_tier_id', 'file_type', 'original_size', 'file_path', 'thumbnail_path')[:batch_size]
+                )
+                if not chunk:
+                    break
+                ids = [row[0] for row in chunk]
+                last_id = ids[-1]
+                paths = {path for row in chunk for path in row[5:] if path}
+                # Süresi dolmamış başka bir kayıt aynı dosyayı kullanıyorsa dosyaya dokunma
+                shared = set(
+                    MemoryItem.objects.filter(file_path__in=paths).exclude(pk__in=ids)
+                    .values_list('file_path', flat=True)
+                ) | set(
+                    MemoryItem.objects.filter(thumbnail_path__in=paths).exclude(pk__in=ids)
+                    .values_list('thumbnail_path', flat=True)
+                )
+                paths -= shared
+                file_stats['shared'] += len(shared)
+
+                if dry_run:
+                    deleted_rows['memory.MemoryItem'] += len(ids)
+                    deleted_rows['memory.VideoFrame'] += VideoFrame.objects.filter(memory_item_id__in=ids).count()
+                    deleted_rows['memory.FaceEncoding'] += FaceEncoding.objects.filter(memory_item_id__in=ids).count()
+                    removals.extend(pool.submit(_stat_file, path) for path in paths)
+                else:
+                    usage = UsageDelta()
+                    for _, user_id, tier_id, file_type, size, *_ in chunk:
+                        usage.add(user_id, tier_id, file_type, -1, -size)
+                    with transaction.atomic():
+                        _, per_model = MemoryItem.objects.filter(pk__in=ids).delete()
+                        usage.apply()
+                    deleted_rows.update(per_model)
+                    if per_model.get('memory.FaceEncoding'):
+                        for user_id in {row[1] for row in chunk}:
+                            face_index.invalidate(user_id)
+                    removals.extend(pool.submit(_remove_file, path) for path in paths)
+
+                processed += len(ids)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"  {processed}/{total_count} öğe | {processed / elapsed if elapsed else 0:.0f} öğe/sn")
+
+            for future in removals:
+                outcome, size = future.result()
+                file_stats[outcome] += 1
+                file_stats['bytes'] += size
+
+        elapsed = time.perf_counter() - started
+        verb = "silinecek" if dry_run else "silindi"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {deleted_rows['memory.MemoryItem']} kayıt {verb} "
+            f"(kare: {deleted_rows['memory.VideoFrame']}, yüz: {deleted_rows['memory.FaceEncoding']}); "
+            f"dosya: {file_stats['removed']} {verb} ({file_stats['bytes'] / (1024 * 1024):.1f} MB), "
+            f"{file_stats['missing']} bulunamadı, {file_stats['error']} hata, {file_stats['shared']} paylaşımlı atlandı. "
+            f"{elapsed:.2f} sn, {processed / elapsed if elapsed else 0:.0f} öğe/sn"
+        ))
+        return deleted_rows, file_stats
 
     # --- İşlem 3: PCA Modelini Eğitme ---
     def train_pca_model(self):
@@ -137,4 +209,14 @@ class Command(BaseCommand):
             engine.fit_and_save_pca(data_samples)
             self.stdout.write(self.style.SUCCESS(f"✅ PCA modeli {len(data_samples)} örnekle başarıyla eğitildi ve kaydedildi."))
         else:
-             self.stdout.write(self.style.WARNING("Toplanan örneklerde geçerli vektör bulunamadı."))
\ No newline at end of file
+             self.stdout.write(self.style.WARNING("Toplanan örneklerde geçerli vektör bulunamadı."))
+
+    # --- İşlem 4: Kullanım Sayaçlarını Doğrulama ---
+    def reconcile_usage(self, dry_run=False):
+        self.stdout.write(">> Kullanım sayaçları doğrulanıyor..." + (" (dry-run)" if dry_run else ""))
+        drift = reconcile(dry_run=dry_run)
+        for user_id, (stored_items, items, stored_bytes, size) in drift.items():
+            self.stdout.write(f"  [{user_id}] öğe: {stored_items} -> {items}, bayt: {stored_bytes} -> {size}")
+        verb = "düzeltilecek" if dry_run else "düzeltildi"
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(drift)} kullanıcının sayaçları {verb}."))
+        return drift
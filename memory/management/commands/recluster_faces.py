@@ -0,0 +1,101 @@
+# memory/management/commands/recluster_faces.py
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from memory.models import FaceEncoding, Person
+from memory.services import face_index
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Kullanıcının tüm yüz kodlamalarını Chinese Whispers ile yeniden kümeler ve '
+        'kişileri kümelere göre yeniden gruplar. İsim verilmiş kişiler korunur.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Yalnızca bu kullanıcı id(ler)i.')
+        parser.add_argument('--threshold', type=float, default=face_index.CLUSTER_THRESHOLD,
+                            help='Aynı kişi sayılacak en büyük yüz mesafesi.')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--keep-empty', action='store_true',
+                            help='Yüzü kalmayan isimsiz kişileri silme.')
+        parser.add_argument('--dry-run', action='store_true', help='Değişiklikleri yazmadan raporla.')
+
+    def handle(self, *args, **options):
+        user_ids = options['users'] or list(
+            FaceEncoding.objects.values_list('person__user_id', flat=True).distinct()
+        )
+        for user_id in sorted(set(user_ids)):
+            with transaction.atomic():
+                stats = self.recluster_user(user_id, options)
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+            if not options['dry_run']:
+                face_index.invalidate(user_id)
+            self.stdout.write(
+                f"[{user_id}] {stats['faces']} yüz -> {stats['clusters']} küme | "
+                f"taşınan yüz: {stats['moved']}, yeni kişi: {stats['created']}, "
+                f"silinen kişi: {stats['deleted']}" + (" (dry-run)" if options['dry_run'] else "")
+            )
+
+    def recluster_user(self, user_id, options):
+        rows = list(
+            FaceEncoding.objects.filter(person__user_id=user_id)
+            .order_by('id')
+            .values_list('id', 'person_id', 'encoding', 'memory_item__file_path')
+        )
+        stats = {'faces': len(rows), 'clusters': 0, 'moved': 0, 'created': 0, 'deleted': 0}
+        if not rows:
+            return stats
+
+        labels = face_index.chinese_whispers(
+            [face_index.decode(row[2]) for row in rows],
+            threshold=options['threshold'], iterations=options['iterations'],
+        )
+        clusters = {}
+        for row, label in zip(rows, labels):
+            clusters.setdefault(int(label), []).append(row)
+        stats['clusters'] = len(clusters)
+
+        people = {person.id: person for person in Person.objects.filter(user_id=user_id)}
+        claimed, target = set(), {}
+        # Büyük kümeler önce seçer: kişi, yüzlerinin çoğunun düştüğü kümede kalır
+        for label, members in sorted(clusters.items(), key=lambda item: -len(item[1])):
+            votes = Counter(row[1] for row in members)
+            candidates = sorted(
+                (person_id for person_id in votes if person_id not in claimed),
+                key=lambda person_id: (not people[person_id].is_identified, -votes[person_id], person_id),
+            )
+            if candidates:
+                person_id = candidates[0]
+            else:
+                person = Person.objects.create(
+                    user_id=user_id, name=f"Kişi #{len(people) + 1}", cover_photo=members[0][3],
+                )
+                people[person.id] = person
+                person_id = person.id
+                stats['created'] += 1
+            claimed.add(person_id)
+            target[label] = person_id
+
+        moved = [
+            FaceEncoding(pk=row[0], person_id=target[label])
+            for label, members in clusters.items() for row in members
+            if row[1] != target[label]
+        ]
+        FaceEncoding.objects.bulk_update(moved, ['person'], batch_size=500)
+        stats['moved'] = len(moved)
+
+        if not options['keep_empty']:
+            empty = [
+                person_id for person_id, person in people.items()
+                if person_id not in claimed and not person.is_identified
+            ]
+            stats['deleted'] = Person.objects.filter(pk__in=empty).delete()[1].get('memory.Person', 0)
+        return stats
@@ -0,0 +1,61 @@
+# memory/management/commands/sync_disk.py
+from django.core.management.base import BaseCommand, CommandError
+
+from memory.services import disk_sync
+
+
+class Command(BaseCommand):
+    help = (
+        'uploads/<user_id>/ klasörlerini manifest tabanlı artımlı olarak MemoryItem '
+        'tablosuna senkronize eder; --watch ile değişiklikleri sürekli izler.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Yalnızca bu kullanıcı id(ler)i.')
+        parser.add_argument('--prune', action='store_true',
+                            help='Diskten silinen dosyaların MemoryItem kayıtlarını da sil.')
+        parser.add_argument('--rebuild-manifest', action='store_true',
+                            help='Manifesti yok say; tüm dosyalar yeniden karşılaştırılır.')
+        parser.add_argument('--watch', action='store_true',
+                            help='inotify (inotify_simple) ile izle; yoksa --interval ile tara.')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='İzleme modunda tarama/okuma aralığı (sn).')
+        parser.add_argument('--verbose-files', action='store_true', help='Etkilenen dosya adlarını yaz.')
+
+    def handle(self, *args, **options):
+        manifest = disk_sync.Manifest()
+        if options['rebuild_manifest']:
+            manifest.users = {}
+
+        if options['watch']:
+            if options['users']:
+                raise CommandError('--watch tüm kullanıcı klasörlerini izler; --user ile birlikte kullanılamaz.')
+            mode = 'inotify' if disk_sync.INotify is not None else f"periyodik tarama ({options['interval']} sn)"
+            self.stdout.write(f"İzleniyor: {disk_sync.uploads_root()} [{mode}] (Ctrl+C ile çıkış)")
+            try:
+                disk_sync.watch(
+                    manifest=manifest, prune=options['prune'], interval=options['interval'],
+                    on_sync=lambda results: self.report(results, options['verbose_files'], quiet=True),
+                )
+            except KeyboardInterrupt:
+                self.stdout.write("İzleme durduruldu.")
+            return
+
+        results = disk_sync.sync_all(
+            manifest=manifest, user_ids=set(options['users']) if options['users'] else None,
+            prune=options['prune'],
+        )
+        self.report(results, options['verbose_files'])
+
+    def report(self, results, verbose=False, quiet=False):
+        total = disk_sync.SyncResult()
+        for user_id, result in results.items():
+            total.merge(result)
+            if verbose:
+                for label, names in (('+', result.new), ('~', result.changed), ('-', result.deleted)):
+                    for name in names:
+                        self.stdout.write(f"  {label} [{user_id}] {name}")
+        if quiet and not (total.new or total.changed or total.deleted):
+            return
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} kullanıcı klasörü: {total.summary()}"))
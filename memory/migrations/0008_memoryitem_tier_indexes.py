@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory', '0007_person_faceencoding'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='memoryitem',
+            index=models.Index(fields=['memory_tier', 'expires_at'], name='memory_memo_memory__0899ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memoryitem',
+            index=models.Index(fields=['expires_at'], name='memory_memo_expires_2ff462_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill(apps, schema_editor):
+    """Mevcut öğeler için başlangıç sayaçları (memory.services.usage.reconcile ile aynı hesap)."""
+    MemoryItem = apps.get_model('memory', 'MemoryItem')
+    MemoryUsageCounter = apps.get_model('memory', 'MemoryUsageCounter')
+    UserMemoryProfile = apps.get_model('memory', 'UserMemoryProfile')
+
+    totals = {}
+    counters = []
+    rows = MemoryItem.objects.values('user_id', 'memory_tier_id', 'file_type').annotate(
+        items=Count('id'), bytes=Sum('original_size'),
+    )
+    for row in rows:
+        size = row['bytes'] or 0
+        counters.append(MemoryUsageCounter(
+            user_id=row['user_id'], memory_tier_id=row['memory_tier_id'], file_type=row['file_type'],
+            items=row['items'], bytes=size,
+        ))
+        items, total = totals.get(row['user_id'], (0, 0))
+        totals[row['user_id']] = (items + row['items'], total + size)
+    MemoryUsageCounter.objects.bulk_create(counters, batch_size=500)
+
+    for user_id, (items, size) in totals.items():
+        UserMemoryProfile.objects.update_or_create(user_id=user_id, defaults={
+            'total_items': items, 'total_bytes': size, 'total_memory_used_mb': size / (1024 * 1024),
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory', '0008_memoryitem_tier_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usermemoryprofile',
+            name='total_bytes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usermemoryprofile',
+            name='total_items',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='MemoryUsageCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_type', models.CharField(max_length=50)),
+                ('items', models.IntegerField(default=0)),
+                ('bytes', models.BigIntegerField(default=0)),
+                ('memory_tier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='memory.memorytier')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'memory_tier', 'file_type')},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
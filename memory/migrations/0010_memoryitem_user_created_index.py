@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory', '0009_memory_usage_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='memoryitem',
+            index=models.Index(fields=['user', 'created_at'], name='memory_memo_user_id_312122_idx'),
+        ),
+    ]
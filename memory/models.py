@@ -7,6 +7,13 @@ import json
 from datetime import datetime, timedelta
 from django.utils import timezone
 
+# Katman adı -> öğenin bu katmanda kalma süresi (MemoryItem.expires_at)
+TIER_DURATIONS = {
+    'instant': timedelta(minutes=5),
+    'short_term': timedelta(hours=24),
+    'long_term': timedelta(days=30),
+}
+
 class MemoryTier(models.Model):
     TIER_CHOICES = [
         # duration_minutes: Instant için 5, Short Term için 24*60=1440, Long Term için 30*24*60=43200
@@ -31,10 +38,27 @@ class UserMemoryProfile(models.Model):
     last_activity = models.DateTimeField(auto_now=True)
     total_memory_used_mb = models.FloatField(default=0)
     memory_quota_mb = models.FloatField(default=1024)  # 1GB default quota
+    # MemoryUsageCounter toplamları (memory.services.usage günceller)
+    total_items = models.IntegerField(default=0)
+    total_bytes = models.BigIntegerField(default=0)
     
     def __str__(self):
         return f"{self.user.username} Memory Profile"
 
+class MemoryUsageCounter(models.Model):
+    """Kullanıcı/katman/dosya türü başına öğe ve bayt sayacı; F() ile artımlı güncellenir."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    memory_tier = models.ForeignKey(MemoryTier, on_delete=models.CASCADE)
+    file_type = models.CharField(max_length=50)
+    items = models.IntegerField(default=0)
+    bytes = models.BigIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('user', 'memory_tier', 'file_type')
+    
+    def __str__(self):
+        return f"{self.user_id} {self.memory_tier_id} {self.file_type}: {self.items} öğe, {self.bytes} bayt"
+
 class MemoryItem(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     file_path = models.CharField(max_length=500)
@@ -81,18 +105,20 @@ class MemoryItem(models.Model):
     window_title = models.CharField(max_length=255, blank=True, null=True)  # Eklendi
     application_name = models.CharField(max_length=100, blank=True, null=True)  # Eklendi
     
+    class Meta:
+        indexes = [
+            # Katman geçişi adayları (tier_engine) ve süresi dolanların temizliği
+            models.Index(fields=['memory_tier', 'expires_at']),
+            models.Index(fields=['expires_at']),
+            # Zaman çizelgesi (services/timeline.py)
+            models.Index(fields=['user', 'created_at']),
+        ]
+    
     def save(self, *args, **kwargs):
         if not self.expires_at:
-            # Basit süre sonu hesaplama
-            from datetime import timedelta
-            from django.utils import timezone
-            
-            if self.memory_tier.name == 'instant':
-                self.expires_at = timezone.now() + timedelta(minutes=5)
-            elif self.memory_tier.name == 'short_term':
-                self.expires_at = timezone.now() + timedelta(hours=24)
-            else:  # long_term
-                self.expires_at = timezone.now() + timedelta(days=30)
+            # Basit süre sonu hesaplama (bilinmeyen katmanlar long_term sayılır)
+            duration = TIER_DURATIONS.get(self.memory_tier.name, TIER_DURATIONS['long_term'])
+            self.expires_at = timezone.now() + duration
         
         if not self.file_name and self.file_path:
             import os
@@ -111,7 +137,8 @@ class UserActivity(models.Model):
     window_title = models.CharField(max_length=255, blank=True, null=True)
     context = models.JSONField(default=dict)
     screenshot_path = models.CharField(max_length=500, blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Tamponlu yazımda olay anını korumak için auto_now_add yerine default
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         indexes = [
@@ -0,0 +1,121 @@
+# memory/services/activity_buffer.py
+"""
+UserActivity kayıtlarının tamponlu yazımı.
+
+İstek yolunda olay yalnızca bellekteki kuyruğa eklenir; kayıtlar
+files.buffering.BufferedBulkWriter ile arka planda toplu (bulk_create)
+yazılır. Kuyruk MAX_PENDING'e ulaşırsa çağıran eşzamanlı boşaltır (geri
+basınç), süreç kapanırken kalanlar atexit ile yazılır.
+
+timestamp olay anında (ya da istemcinin gönderdiği değerle) doldurulur,
+boşaltma anında değil; istemci değeri yalnızca MAX_EVENT_AGE_HOURS geriye
+ve MAX_CLOCK_SKEW_SECONDS ileriye kadar kabul edilir. Her boşaltmada
+context_features önbelleği artımlı güncellenir. Yazılamayan parçalar
+BufferedBulkWriter tarafından yeniden denenir, sonra dead-letter'a yazılır.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from files.buffering import BufferedBulkWriter
+from memory.models import UserActivity
+from memory.services import context_features
+
+EVENT_FIELDS = ('activity_type', 'target_file', 'application', 'window_title', 'context', 'timestamp')
+MAX_LENGTHS = {
+    field.name: field.max_length
+    for field in UserActivity._meta.get_fields()
+    if getattr(field, 'max_length', None)
+}
+
+
+def _config():
+    return getattr(settings, 'USER_ACTIVITY_BUFFER', {})
+
+
+def _build_writer():
+    config = _config()
+    return BufferedBulkWriter(
+        UserActivity,
+        max_batch=config.get('MAX_BATCH', 500),
+        flush_interval=config.get('FLUSH_INTERVAL', 1.0),
+        max_pending=config.get('MAX_PENDING', 10000),
+        # Yazılan aktiviteler öneri/sıralama özelliklerini günceller
+        on_flush=[context_features.apply_activities],
+        name='UserActivity',
+    )
+
+
+activity_writer = _build_writer()
+
+
+def build_activity(user, activity_type, target_file=None, application=None, window_title=None,
+                   context=None, timestamp=None):
+    return UserActivity(
+        user=user,
+        activity_type=activity_type,
+        target_file=str(target_file) if target_file else None,
+        application=application,
+        window_title=window_title,
+        context=context or {},
+        timestamp=timestamp or timezone.now(),
+    )
+
+
+def record_activity(user, activity_type, **fields):
+    """Tek olayı tampona ekler (DB yazımı yok)."""
+    activity_writer.add(build_activity(user, activity_type, **fields))
+
+
+def parse_event(data):
+    """
+    İstemciden gelen olay sözlüğünü doğrular; build_activity argümanları döner.
+    Hatalı olayda ValueError.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Olay bir nesne olmalı.")
+    fields = {name: data.get(name) for name in EVENT_FIELDS if data.get(name) is not None}
+    if not fields.get('activity_type'):
+        raise ValueError("activity_type zorunlu.")
+    for name, max_length in MAX_LENGTHS.items():
+        if name in fields and len(str(fields[name])) > max_length:
+            raise ValueError(f"{name} en fazla {max_length} karakter olabilir.")
+    if 'context' in fields and not isinstance(fields['context'], dict):
+        raise ValueError("context bir nesne olmalı.")
+    if 'timestamp' in fields:
+        timestamp = parse_datetime(str(fields['timestamp']))
+        if timestamp is None:
+            raise ValueError("timestamp ISO 8601 biçiminde olmalı.")
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+        config = _config()
+        now = timezone.now()
+        max_age = timedelta(hours=config.get('MAX_EVENT_AGE_HOURS', 24))
+        max_skew = timedelta(seconds=config.get('MAX_CLOCK_SKEW_SECONDS', 300))
+        if timestamp < now - max_age:
+            raise ValueError("timestamp kabul edilen pencereden eski.")
+        if timestamp > now + max_skew:
+            raise ValueError("timestamp gelecekte olamaz.")
+        # Küçük saat kaymaları şimdiye çekilir
+        fields['timestamp'] = min(timestamp, now)
+    return fields
+
+
+def record_activities(user, events):
+    """
+    Toplu olay listesini doğrulayıp tampona ekler.
+    Dönüş: (kabul edilen sayısı, [{'index', 'error'}, ...]).
+    """
+    limit = _config().get('MAX_EVENTS_PER_REQUEST', 500)
+    if len(events) > limit:
+        raise ValueError(f"Tek istekte en fazla {limit} olay gönderilebilir.")
+    accepted, rejected = [], []
+    for index, data in enumerate(events):
+        try:
+            accepted.append(build_activity(user, **parse_event(data)))
+        except ValueError as e:
+            rejected.append({'index': index, 'error': str(e)})
+    activity_writer.extend(accepted)
+    return len(accepted), rejected
@@ -1,16 +1,18 @@
 ﻿# memory/services/advanced_memory_manager.py
 from django.utils import timezone
-from datetime import timedelta
 import numpy as np
 import logging
 from django.db.models import Q, F
 from django.db import models
 # Modellerini doğru yerden import ettiğine emin ol
-from ..models import MemoryItem, UserActivity, TimelineEvent, UserMemoryProfile, MemoryTier, VideoFrame
+from ..models import MemoryItem, UserMemoryProfile, MemoryTier, VideoFrame
 from .ai_services import AIService 
 from .compression_engine import SemanticCompressionEngine
-from django.db import models
+from .tier_engine import TierEngine
+from .usage import get_usage
+from . import timeline
 from deep_translator import GoogleTranslator
+from cloud_mvp.tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +57,7 @@ class AdvancedMemoryManager:
     
         return text
 
+    @traced('search.total')
     def semantic_search(self, query: str, file_type: str = None, limit: int = 10) -> list:
         print(f"\n🔎 AKILLI ARAMA (v5 - Text Content): '{query}'")
         
@@ -64,19 +67,21 @@ class AdvancedMemoryManager:
 
         try:
             # 1. Çeviri
-            try:
-                translated_query = self.translator.translate(query)
-                print(f"   🌍 Çeviri: '{query}' -> '{translated_query}'")
-            except: 
-                translated_query = query
+            with span('search.translate'):
+                try:
+                    translated_query = self.translator.translate(query)
+                    print(f"   🌍 Çeviri: '{query}' -> '{translated_query}'")
+                except: 
+                    translated_query = query
 
             # 2. Prompt Hazırlığı
             visual_prompt = f"{translated_query}"
             print(f"   ℹ️  AI Prompt: '{visual_prompt}'")
 
             # 3. Embedding Alma
-            query_vector_text = self.ai_service.get_text_embedding(translated_query) 
-            query_vector_clip = self.ai_service.get_clip_text_embedding(visual_prompt)
+            with span('search.embed'):
+                query_vector_text = self.ai_service.get_text_embedding(translated_query) 
+                query_vector_clip = self.ai_service.get_clip_text_embedding(visual_prompt)
 
             # 4. Adayları Filtrele
             filters = Q(user=self.user)
@@ -87,12 +92,19 @@ class AdvancedMemoryManager:
             if file_type:
                 filters &= Q(file_type=file_type)
 
-            candidates = MemoryItem.objects.filter(filters)
-            print(f"   -> Taranacak aday sayısı: {candidates.count()}")
+            # Adaylar ve kareler tek seferde yüklenir (ayrı COUNT sorgusu yok)
+            with span('search.candidates') as attrs:
+                candidates = list(MemoryItem.objects.filter(filters))
+                video_frames = []
+                if query_vector_clip is not None:
+                    video_frames = list(
+                        VideoFrame.objects.filter(memory_item__user=self.user).select_related('memory_item')
+                    )
+                attrs.update(items=len(candidates), frames=len(video_frames))
+            print(f"   -> Taranacak aday sayısı: {len(candidates)}")
 
             # --- 5. VİDEO KARELERİ (ÖNCELİK 1) ---
             if query_vector_clip is not None:
-                video_frames = VideoFrame.objects.filter(memory_item__user=self.user).select_related('memory_item')
                 for frame in video_frames:
                     frame_vector = np.frombuffer(frame.vector_embedding, dtype=np.float32)
                     if frame_vector.shape[0] != 512: continue
@@ -112,7 +124,7 @@ class AdvancedMemoryManager:
                                 'summary': f"✅ Aradığınız görüntü videonun {int(frame.timestamp)}. saniyesinde tespit edildi."
                             })
                     else:
-                        if "uploads" not in parent.file_name: safe_url = f"/media/uploads/{parent.user.id}/{parent.file_name}"
+                        if "uploads" not in parent.file_name: safe_url = f"/media/uploads/{parent.user_id}/{parent.file_name}"
                         else: safe_url = f"/media/{parent.file_name}"
                         
                         results_dict[parent.id] = {
@@ -162,7 +174,7 @@ class AdvancedMemoryManager:
                     print(f"      📖 Metin Eşleşti: {item.file_name}")
 
                 # URL
-                if "uploads" not in item.file_name: safe_url = f"/media/uploads/{item.user.id}/{item.file_name}"
+                if "uploads" not in item.file_name: safe_url = f"/media/uploads/{item.user_id}/{item.file_name}"
                 else: safe_url = f"/media/{item.file_name}"
 
                 results_dict[item.id] = {
@@ -187,97 +199,43 @@ class AdvancedMemoryManager:
 
     def get_fused_timeline(self, days: int = 7, limit: int = 100) -> list:
         """
-        TimelineEvent ve kritik UserActivity'leri birleştirip zamana ve öneme göre sıralar.
+        TimelineEvent ve kritik UserActivity'leri birleştirip zamana göre (yeniden eskiye) sıralar.
         """
-        time_threshold = timezone.now() - timedelta(days=days)
-
-        # 1. TimelineEvent'leri al (Doğrudan Recall olayları)
-        events = TimelineEvent.objects.filter(
-            user=self.user,
-            timestamp__gte=time_threshold
-        ).values('timestamp', 'event_type', 'title', 'description', 'confidence_score')
-        
-        timeline = []
-
-        # 2. Kritik UserActivity'leri al (örneğin dosya açma/kaydetme)
-        critical_activities = UserActivity.objects.filter(
-            user=self.user,
-            timestamp__gte=time_threshold
-        ).filter(
-            activity_type__in=['file_open', 'file_save', 'app_switch']
-        ).values('timestamp', 'activity_type', 'window_title', 'context')
-        
-        # 3. Her iki listeyi tek bir listede birleştir
-        for event in events:
-            event['source'] = 'TimelineEvent'
-            event['sort_key'] = event['timestamp']
-            timeline.append(event)
-            
-        for activity in critical_activities:
-            activity['source'] = 'UserActivity'
-            activity['event_type'] = activity.pop('activity_type')
-            activity['title'] = f"Aktivite: {activity['window_title']}"
-            activity['sort_key'] = activity['timestamp']
-            timeline.append(activity)
+        return self.get_fused_timeline_page(days=days, limit=limit).events
 
-        # 4. Birleştirilmiş listeyi zamana göre sırala (en yeniden en eskiye) ve limit uygula
-        timeline_sorted = sorted(timeline, key=lambda x: x['sort_key'], reverse=True)
-        
-        return timeline_sorted[:limit]
+    def get_fused_timeline_page(self, days: int = 7, limit: int = 100, cursor: str | None = None):
+        """get_fused_timeline'ın cursor ile sayfalanan hali (bkz. services/timeline.py)."""
+        return timeline.fused_timeline(self.user, days=days, limit=limit, cursor=cursor)
 
     # --- 3. Hafıza İstatistikleri ---
     def get_user_stats(self) -> dict:
         """
         Kullanıcının hafıza kullanımını ve katman dağılımını hesaplar.
         """
-        total_items = MemoryItem.objects.filter(user=self.user).count()
-        tier_distribution = MemoryItem.objects.filter(user=self.user).values('memory_tier__name').annotate(count=models.Count('memory_tier'))
-        
-        # quota bilgisini profilden al
-        quota_mb = self.user_profile.memory_quota_mb
-        used_mb = self.user_profile.total_memory_used_mb
+        # Sayılar kullanım sayaçlarından okunur (bkz. services/usage.py)
+        usage = get_usage(self.user)
+        quota_mb = usage['quota_mb']
+        used_mb = usage['used_mb']
         
         return {
-            'total_items': total_items,
+            'total_items': usage['items'],
             'memory_quota_mb': quota_mb,
             'memory_used_mb': used_mb,
             'memory_remaining_mb': quota_mb - used_mb,
-            'tier_distribution': list(tier_distribution),
+            'tier_distribution': [
+                {'memory_tier__name': name, 'count': bucket['items']} for name, bucket in usage['by_tier'].items()
+            ],
         }
 
     # --- 4. Periyodik İşlem: Katman Geçişi ---
     def check_and_promote_memories(self):
         """
         Süresi dolmak üzere olan 'short_term' öğeleri 'long_term' katmanına taşır ve sıkıştırır.
-        Bu metod memory_maintenance.py tarafından çağrılacaktır.
+        Tüm kullanıcılar için toplu geçiş memory_maintenance --compress ile yapılır.
         """
-        one_day_ago = timezone.now() - timedelta(days=1)
-        
-        # Süresi dolan veya dolmak üzere olan kısa süreli öğeleri bul
-        items_to_promote = MemoryItem.objects.filter(
-            user=self.user,
-            memory_tier__name='short_term',
-            expires_at__lte=timezone.now() + timedelta(hours=6) # Son 6 saat içinde dolacaklar
-        )
-        
-        for item in items_to_promote:
-            # 1. Sıkıştırma (Yalnızca uzun süreliye geçmeden önce)
-            # BinaryField olduğu için sıkıştırma sonucunu tekrar BinaryField olarak almalıyız
-            if not item.compressed_embedding:
-                try:
-                    # Sıkıştırma motorunu kullanarak vektörün boyutunu azalt
-                    compressed_data = self.compression_engine.compress_embedding(item.vector_embedding)
-                    item.compressed_embedding = compressed_data
-                except Exception as e:
-                    logger.error(f"Sıkıştırma hatası ({item.id}): {e}")
-            
-            # 2. Katmanı 'long_term' olarak güncelle ve expires_at'i sıfırla
-            long_term_tier = MemoryTier.objects.get(name='long_term')
-            item.memory_tier = long_term_tier
-            item.expires_at = None # save() metodu yeniden hesaplayacak
-            item.save()
-            
-            logger.info(f"MemoryItem {item.id} uzun süreli belleğe taşındı ve sıkıştırıldı.")
+        result = TierEngine(user_ids=[self.user.id], compression_engine=self.compression_engine).run()
+        logger.info(f"Katman geçişi ({self.user.id}): {result.summary()}")
+        return result
 
     def calculate_similarity(self, query, memory_item):
         """Basit benzerlik hesaplama"""
@@ -313,7 +271,6 @@ class AdvancedMemoryManager:
     def promote_to_long_term(self, memory_item):
         """Kisa sureli bellekten uzun sureli bellege tasi"""
         try:
-            from ..models import MemoryTier
             long_term_tier = MemoryTier.objects.get(name='long_term')
             
             # Semantik sıkıştırma uygula
@@ -337,50 +294,4 @@ class AdvancedMemoryManager:
     
     def get_timeline_events(self, days=7, limit=50):
         """Timeline events getir"""
-        start_date = timezone.now() - timedelta(days=days)
-        
-        from ..models import MemoryItem, UserActivity
-        
-        events = []
-        
-        # Memory item'ları
-        memories = MemoryItem.objects.filter(
-            user=self.user,
-            created_at__gte=start_date
-        ).select_related('memory_tier')[:limit//2]
-        
-        for memory in memories:
-            events.append({
-                'type': 'memory',
-                'timestamp': memory.created_at,
-                'title': f"{memory.file_name}",
-                'description': f"{memory.file_type} - {memory.memory_tier.name}",
-                'thumbnail': memory.thumbnail_path,
-                'metadata': {
-                    'file_path': memory.file_path,
-                    'memory_tier': memory.memory_tier.name,
-                    'access_count': memory.access_count
-                }
-            })
-        
-        # User activities
-        activities = UserActivity.objects.filter(
-            user=self.user,
-            timestamp__gte=start_date
-        )[:limit//2]
-        
-        for activity in activities:
-            events.append({
-                'type': 'activity',
-                'timestamp': activity.timestamp,
-                'title': f"{activity.activity_type}",
-                'description': activity.target_file or activity.application,
-                'metadata': {
-                    'activity_type': activity.activity_type,
-                    'application': activity.application,
-                    'window_title': activity.window_title
-                }
-            })
-        
-        events.sort(key=lambda x: x['timestamp'], reverse=True)
-        return events[:limit]
\ No newline at end of file
+        return timeline.recall_timeline(self.user, days=days, limit=limit).events
@@ -1,34 +1,29 @@
 ﻿# memory/services/ai_services.py (Düzeltilmiş)
-from transformers import pipeline
+"""
+AI/ML servisleri.
+
+Ağır kütüphaneler (torch, transformers, sentence_transformers, whisper,
+face_recognition, cv2, torch_geometric, scikit-image, matplotlib) modül
+seviyesinde içe aktarılmaz; her model ilk kullanıldığında kendi yükleyicisi
+içinde yüklenir. GNN/süperpiksel yığını `semantic_graph` modülündedir.
+Böylece migrate gibi komutlar ve AI kullanmayan endpoint'ler bu maliyeti ödemez.
+"""
 import numpy as np
 import logging
 import math
 import time
 import os
-import whisper
 import warnings
+from typing import TYPE_CHECKING
 warnings.filterwarnings("ignore")
 
+if TYPE_CHECKING:
+    import torch
+    from torch_geometric.data import Data
+
 os.environ["HF_HUB_OFFLINE"] = "1"
 os.environ["TRANSFORMERS_OFFLINE"] = "1"
 
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
-import torch.optim as optim
-import face_recognition
-import cv2
-import matplotlib.pyplot as plt
-
-from transformers import CLIPProcessor, CLIPModel
-from sentence_transformers import SentenceTransformer
-from PIL import Image
-from torch_geometric.data import Data
-from torch_geometric.nn import GCNConv
-from skimage.segmentation import slic
-from skimage import io
-from skimage.segmentation import mark_boundaries
-
 # Quantum Safe Library (Opsiyonel)
 try:
     import oqs
@@ -37,185 +32,20 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Geriye dönük uyumluluk: eskiden bu modülde tanımlı olan GNN yardımcıları
+_SEMANTIC_GRAPH_NAMES = {
+    'create_superpixels', 'visualize_superpixels', 'extract_node_features',
+    'create_edge_index', 'calculate_edge_weights', 'intelligent_prune_edges',
+    'add_gaussian_noise', 'LightweightTransformerEncoder', 'SemanticDecoder',
+    'HybridGNNTransformer', 'train_gcn_with_dp',
+}
 
-# ==================== YARDIMCI FONKSİYONLAR ====================
-
-def create_superpixels(image_path, n_segments=500, compactness=10):
-    """Belirtilen görüntü yolu için SLIC algoritması ile superpiksel oluşturur."""
-    try:
-        image = io.imread(image_path)
-        if image.dtype == np.uint8:
-            image = image.astype(np.float32) / 255.0
-    except FileNotFoundError:
-        print(f"HATA: '{image_path}' dosya yolu bulunamadı.")
-        return None, None, 0
-    except Exception as e:
-        print(f"Resim okuma hatası: {e}")
-        return None, None, 0
-
-    try:
-        labels = slic(
-            image,
-            n_segments=n_segments,
-            compactness=compactness,
-            enforce_connectivity=True,
-            sigma=0,
-            start_label=0
-        )
-        num_superpixels = len(np.unique(labels))
-        return image, labels, num_superpixels
-    except Exception as e:
-        logger.error(f"SLIC hatası: {e}")
-        return None, None, 0
-
-
-def visualize_superpixels(image, labels):
-    """Superpiksel sınırlarını orijinal görüntü üzerinde görselleştirir."""
-    fig, ax = plt.subplots(1, 1, figsize=(10, 10))
-    ax.imshow(mark_boundaries(image, labels, color=(1, 1, 1)))
-    ax.set_title("Oluşturulan Superpikseller (Düğümler)")
-    ax.axis('off')
-    plt.show()
-
-
-def extract_node_features(image_rgb, labels, num_nodes):
-    """Her bir superpiksel için ortalama RGB değerlerini hesaplar."""
-    height, width, channels = image_rgb.shape
-    node_features_np = np.zeros((num_nodes, channels), dtype=np.float32)
-    pixel_counts = np.zeros(num_nodes, dtype=np.int32)
-
-    for i in range(height):
-        for j in range(width):
-            label = labels[i, j]
-            if label < num_nodes:
-                node_features_np[label] += image_rgb[i, j]
-                pixel_counts[label] += 1
-
-    pixel_counts_expanded = pixel_counts[:, np.newaxis]
-    node_features_np = np.divide(
-        node_features_np,
-        pixel_counts_expanded,
-        out=node_features_np,
-        where=pixel_counts_expanded != 0
-    )
-
-    node_features_tensor = torch.tensor(node_features_np, dtype=torch.float)
-    y_reco = node_features_tensor.clone()
-    return node_features_tensor, y_reco
-
-
-def create_edge_index(labels):
-    """Superpiksel komşuluklarını bulur."""
-    height, width = labels.shape
-    adj_set = set()
-    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-
-    for r in range(height):
-        for c in range(width):
-            src_label = labels[r, c]
-            for dr, dc in directions:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < height and 0 <= nc < width:
-                    dest_label = labels[nr, nc]
-                    if src_label != dest_label:
-                        adj_set.add((int(src_label), int(dest_label)))
-                        adj_set.add((int(dest_label), int(src_label)))
-
-    if not adj_set:
-        return torch.zeros((2, 0), dtype=torch.long)
-
-    source_nodes = [edge[0] for edge in adj_set]
-    target_nodes = [edge[1] for edge in adj_set]
-    edge_index = torch.tensor([source_nodes, target_nodes], dtype=torch.long)
-    return edge_index
-
-
-def calculate_edge_weights(x, edge_index):
-    """Kenar ağırlıklarını hesaplar."""
-    if edge_index.size(1) == 0:
-        return torch.tensor([], dtype=torch.float)
-
-    source_nodes = edge_index[0]
-    target_nodes = edge_index[1]
-    source_features = x[source_nodes]
-    target_features = x[target_nodes]
-    diff_features = source_features - target_features
-    edge_weights = torch.norm(diff_features, p=2, dim=1)
-    return edge_weights
-
-
-def intelligent_prune_edges(x, edge_index, edge_weights, compression_ratio=0.7):
-    """Kenarları kırpar."""
-    if edge_weights.numel() == 0:
-        return edge_index, edge_weights
-
-    scores = edge_weights.cpu().numpy()
-    threshold = np.percentile(scores, (compression_ratio * 100))
-    mask = edge_weights >= threshold
-    mask_tensor = torch.from_numpy(mask).bool() if isinstance(mask, np.ndarray) else mask
-    pruned_edge_index = edge_index[:, mask_tensor]
-    pruned_edge_weights = edge_weights[mask_tensor]
-    return pruned_edge_index, pruned_edge_weights
-
-
-def add_gaussian_noise(g, clip_norm, epsilon, delta):
-    """Gradyanlara gürültü ekler."""
-    sigma = (clip_norm * math.sqrt(2 * math.log(1 / delta))) / epsilon
-    noise = torch.randn_like(g) * sigma
-    return g + noise
-
-
-# ==================== MODELLER ====================
-
-class LightweightTransformerEncoder(nn.Module):
-    def __init__(self, embed_dim, num_heads, dropout=0.1):
-        super().__init__()
-        encoder_layer = nn.TransformerEncoderLayer(
-            d_model=embed_dim,
-            nhead=num_heads,
-            dim_feedforward=embed_dim * 4,
-            dropout=dropout,
-            batch_first=True
-        )
-        self.transformer_encoder = nn.TransformerEncoder(encoder_layer, num_layers=1)
-
-    def forward(self, x):
-        x = x.unsqueeze(0)
-        x_global = self.transformer_encoder(x)
-        x_global = x_global.squeeze(0)
-        return x_global
-
-
-class SemanticDecoder(nn.Module):
-    def __init__(self, in_features, out_channels=3):
-        super().__init__()
-        self.fc1 = nn.Linear(in_features, in_features * 2)
-        self.fc2 = nn.Linear(in_features * 2, out_channels)
-
-    def forward(self, x):
-        x = F.relu(self.fc1(x))
-        return torch.sigmoid(self.fc2(x))
-
-
-class HybridGNNTransformer(nn.Module):
-    def __init__(self, in_channels, hidden_channels, num_classes, num_heads=4):
-        super().__init__()
-        self.gcn1 = GCNConv(in_channels, hidden_channels)
-        self.gcn2 = GCNConv(hidden_channels, hidden_channels)
-        self.transformer = LightweightTransformerEncoder(embed_dim=hidden_channels, num_heads=num_heads)
-        self.classifier = nn.Linear(hidden_channels, num_classes)
-        self.decoder = SemanticDecoder(hidden_channels, out_channels=3)
-
-    def forward(self, data):
-        x, edge_index, edge_attr = data.x, data.edge_index, data.edge_attr
-        x_local = F.relu(self.gcn1(x, edge_index, edge_attr))
-        x_local = F.dropout(x_local, p=0.5, training=self.training)
-        x_local = self.gcn2(x_local, edge_index, edge_attr)
-        x_global = self.transformer(x_local)
-        x_final = x_local + x_global
-        out_cls = F.log_softmax(self.classifier(x_final), dim=1)
-        out_reco = self.decoder(x_final)
-        return out_cls, out_reco
+
+def __getattr__(name):
+    if name in _SEMANTIC_GRAPH_NAMES:
+        from . import semantic_graph
+        return getattr(semantic_graph, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ==================== GÜVENLİK SINIFLAR ====================
@@ -226,6 +56,7 @@ class DifferentialPrivacy:
         self.delta = delta
 
     def add_noise(self, tensor):
+        import torch
         sigma = math.sqrt(2 * math.log(1.25 / self.delta)) / self.epsilon
         noise = torch.randn_like(tensor) * sigma
         return tensor + noise
@@ -303,43 +134,6 @@ class AdvancedSecurityModule:
         return image_data
 
 
-# ==================== EĞİTİM FONKSİYONU ====================
-
-def train_gcn_with_dp(model, data, optimizer, num_epochs, dp_enabled=False, clip_norm=1.0, epsilon=1.0, delta=1e-5, lambda_reco=0.5):
-    """Differential Privacy (DP) ile güçlendirilmiş eğitim döngüsü."""
-    classification_criterion = F.nll_loss
-    reconstruction_criterion = nn.MSELoss()
-
-    model.train()
-    for epoch in range(num_epochs):
-        optimizer.zero_grad()
-        out_cls, out_reco = model(data)
-
-        if data.y is not None and data.y.max() < out_cls.size(1):
-            cls_loss = classification_criterion(out_cls, data.y)
-        else:
-            cls_loss = 0.0
-
-        reco_loss = reconstruction_criterion(out_reco, data.y_reco)
-        total_loss = cls_loss + lambda_reco * reco_loss
-        total_loss.backward()
-
-        if dp_enabled:
-            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=clip_norm)
-            for param in model.parameters():
-                if param.grad is not None:
-                    param.grad.data = add_gaussian_noise(
-                        param.grad.data,
-                        clip_norm=clip_norm,
-                        epsilon=epsilon,
-                        delta=delta
-                    )
-
-        optimizer.step()
-
-    return model
-
-
 # ==================== ANA AI SERVICE SINIFI ====================
 
 class AIService:
@@ -363,6 +157,7 @@ class AIService:
         """Sentence Transformer modelini yalnızca ilk çağrıda yükler."""
         if self._text_model is None:
             try:
+                from sentence_transformers import SentenceTransformer
                 self._text_model = SentenceTransformer(self.SENTENCE_MODEL_NAME)
                 logger.info(f"{self.SENTENCE_MODEL_NAME} başarıyla yüklendi.")
             except Exception as e:
@@ -374,6 +169,7 @@ class AIService:
         """CLIP modelini yalnızca ilk çağrıda yükler."""
         if self._clip_model is None:
             try:
+                from transformers import CLIPProcessor, CLIPModel
                 self._clip_processor = CLIPProcessor.from_pretrained(self.CLIP_MODEL_NAME)
                 self._clip_model = CLIPModel.from_pretrained(self.CLIP_MODEL_NAME)
                 logger.info(f"CLIP modeli başarıyla yüklendi.")
@@ -385,6 +181,7 @@ class AIService:
         """Semantic GNN/Transformer modelini yükler."""
         if self._semantic_model is None:
             try:
+                from .semantic_graph import HybridGNNTransformer
                 IN_CHANNELS = 3
                 HIDDEN_CHANNELS = 128
                 NUM_CLASSES = 10
@@ -403,6 +200,7 @@ class AIService:
         """Soru-Cevap modelini lazy-load ile yükler (offline destekli)."""
         if self._qa_pipeline is None:
             try:
+                from transformers import pipeline
                 print("🧠 QA (Soru-Cevap) Modeli yükleniyor...")
             
                 # ÖNCE offline modda deneyelim
@@ -475,6 +273,8 @@ class AIService:
 
         if self._clip_model and self._clip_processor:
             try:
+                import torch
+                from PIL import Image
                 image = Image.open(image_path)
                 inputs = self._clip_processor(images=image, return_tensors="pt", padding=True)
                 with torch.no_grad():
@@ -495,6 +295,7 @@ class AIService:
 
         if self._clip_model and self._clip_processor:
             try:
+                import torch
                 inputs = self._clip_processor(text=[text], return_tensors="pt", padding=True)
                 with torch.no_grad():
                     text_features = self._clip_model.get_text_features(**inputs)
@@ -505,10 +306,75 @@ class AIService:
                 return None
         return None
 
+    def get_text_embeddings(self, texts, batch_size=32):
+        """
+        Birden çok metni tek model çağrısıyla vektöre dönüştürür.
+        Sıra korunur; boş metinler için None döner.
+        """
+        results = [None] * len(texts)
+        indices = [index for index, text in enumerate(texts) if text]
+        if not indices:
+            return results
+
+        self._load_text_model()
+
+        if self._text_model:
+            try:
+                vectors = self._text_model.encode([texts[index] for index in indices], batch_size=batch_size)
+                for index, vector in zip(indices, vectors):
+                    results[index] = np.asarray(vector, dtype=np.float32)
+                return results
+            except Exception as e:
+                logger.error(f"Toplu metin embedding hatası: {e}")
+
+        for index in indices:
+            results[index] = self._fallback_text_embedding(texts[index])
+        return results
+
+    def get_image_embeddings(self, image_paths, batch_size=16):
+        """
+        Görüntüleri CLIP ile `batch_size`'lık gruplar halinde vektöre dönüştürür.
+        Sıra korunur; okunamayan dosyalar için None döner.
+        """
+        results = [None] * len(image_paths)
+        self._load_clip_model()
+        if not (self._clip_model and self._clip_processor):
+            return results
+
+        import torch
+        from PIL import Image
+
+        for start in range(0, len(image_paths), batch_size):
+            indices, images = [], []
+            for index in range(start, min(start + batch_size, len(image_paths))):
+                try:
+                    with Image.open(image_paths[index]) as image:
+                        images.append(image.convert('RGB'))
+                    indices.append(index)
+                except Exception as e:
+                    logger.warning(f"Görüntü okunamadı ({image_paths[index]}): {e}")
+            if not images:
+                continue
+            try:
+                inputs = self._clip_processor(images=images, return_tensors="pt", padding=True)
+                with torch.no_grad():
+                    features = self._clip_model.get_image_features(**inputs)
+                vectors = features.cpu().numpy().astype(np.float32)
+                for index, vector in zip(indices, vectors):
+                    results[index] = vector
+            except Exception as e:
+                logger.error(f"Toplu görüntü embedding hatası: {e}")
+        return results
+
     # ==================== VİDEO ANALİZİ ====================
 
-    def analyze_video_content(self, video_path: str, interval_seconds: int = 5):
-        """Videoyu kare kare tarar ve embedding'leri çıkarır."""
+    def analyze_video_content(self, video_path: str, interval_seconds: int = 5, on_poster=None):
+        """
+        Videoyu kare kare tarar ve embedding'leri çıkarır.
+
+        on_poster verilirse ilk örneklenen kare (PIL.Image) ona iletilir;
+        poster için videonun tekrar çözülmesi gerekmez.
+        """
         if not os.path.exists(video_path):
             print(f"❌ Video bulunamadı: {video_path}")
             return []
@@ -518,6 +384,10 @@ class AIService:
             print("❌ CLIP Modeli yüklenemediği için video işlenemiyor.")
             return []
 
+        import cv2
+        import torch
+        from PIL import Image
+
         print(f"🎥 Video analizi başlıyor: {os.path.basename(video_path)} (Her {interval_seconds}sn'de bir)")
 
         frames_data = []
@@ -545,6 +415,11 @@ class AIService:
                 try:
                     rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                     pil_image = Image.fromarray(rgb_frame)
+                    if on_poster is not None and processed_count == 0:
+                        try:
+                            on_poster(pil_image)
+                        except Exception as e:
+                            logger.warning(f"Poster kaydedilemedi: {e}")
                     inputs = self._clip_processor(images=pil_image, return_tensors="pt", padding=True)
                     with torch.no_grad():
                         features = self._clip_model.get_image_features(**inputs)
@@ -573,6 +448,7 @@ class AIService:
         """Whisper modelini lazy-load ile yükler."""
         if not hasattr(self, '_whisper_model') or self._whisper_model is None:
             try:
+                import whisper
                 print("🎧 Whisper (Ses Modeli) yükleniyor... (Bu biraz zaman alabilir)")
                 # 'base' modeli hızlıdır, 'small' veya 'medium' daha hassastır.
                 # Türkçe için 'base' yeterli, cpu dostudur.
@@ -626,6 +502,13 @@ class AIService:
         if not self._semantic_model:
             return None, None
 
+        import torch
+        from torch_geometric.data import Data
+        from .semantic_graph import (
+            calculate_edge_weights, create_edge_index, create_superpixels,
+            extract_node_features, intelligent_prune_edges,
+        )
+
         image, labels, num_nodes = create_superpixels(image_path, n_segments=300)
         if image is None:
             return None, None
@@ -646,11 +529,14 @@ class AIService:
         )
         return graph_data, labels
 
-    def compress_graph_features(self, graph_data: Data) -> torch.Tensor:
+    def compress_graph_features(self, graph_data: 'Data') -> 'torch.Tensor':
         """Grafik verisini GNN/Transformer ile işler ve sıkıştırılmış özellikleri döndürür."""
         if not self._semantic_model:
             raise Exception("Semantic model yüklenemedi.")
 
+        import torch
+        import torch.nn.functional as F
+
         with torch.no_grad():
             x, edge_index, edge_attr = graph_data.x, graph_data.edge_index, graph_data.edge_attr
             x_local = F.relu(self._semantic_model.gcn1(x, edge_index, edge_attr))
@@ -659,11 +545,13 @@ class AIService:
             x_final = x_local + x_global
             return x_final
 
-    def decompress_graph_features(self, compressed_features: torch.Tensor) -> torch.Tensor:
+    def decompress_graph_features(self, compressed_features: 'torch.Tensor') -> 'torch.Tensor':
         """Sıkıştırılmış özellikleri alıp Decoder ile renkleri geri tahmin eder."""
         if not self._semantic_model:
             raise Exception("Semantic model yüklenemedi.")
 
+        import torch
+
         with torch.no_grad():
             out_reco = self._semantic_model.decoder(compressed_features)
             return out_reco
@@ -676,6 +564,9 @@ class AIService:
         if not self._semantic_model:
             return
 
+        import torch.optim as optim
+        from .semantic_graph import train_gcn_with_dp
+
         optimizer = optim.Adam(self._semantic_model.parameters(), lr=0.001)
 
         if not graph_data_list:
@@ -770,38 +661,20 @@ class AIService:
             return None
 
 
-        def detect_and_encode_faces(self, image_path: str):
-            """
-            Resimdeki yüzleri bulur ve 128 boyutlu vektörlerini çıkarır.
-            Dönüş: [{'encoding': np.array, 'location': (top, right, bottom, left)}, ...]
-            """
-            if not os.path.exists(image_path): return []
+    # ==================== YÜZ TANIMA ====================
 
-        try:
-            # Resmi yükle
-            image = face_recognition.load_image_file(image_path)
-            
-            # Yüzleri bul (HOG metodu hızlıdır, CNN daha iyidir ama GPU ister)
-            # Büyük resimlerde işlem hızlansın diye resmi küçültebiliriz ama şimdilik tam boyut.
-            face_locations = face_recognition.face_locations(image)
-            
-            if not face_locations:
-                return []
+    def detect_and_encode_faces(self, image_path: str):
+        """
+        Resimdeki yüzleri bulur ve 128 boyutlu vektörlerini çıkarır.
+        Dönüş: [{'encoding': np.array, 'location': (top, right, bottom, left)}, ...]
 
-            print(f"   👤 {len(face_locations)} Yüz Tespit Edildi.")
-            
-            # Yüzlerin haritasını (encoding) çıkar
-            face_encodings = face_recognition.face_encodings(image, face_locations)
-            
-            results = []
-            for face_encoding, face_location in zip(face_encodings, face_locations):
-                results.append({
-                    'encoding': face_encoding, # numpy array
-                    'location': face_location  # (top, right, bottom, left)
-                })
-            
-            return results
+        Tespit küçültülmüş kopyada yapılır, yalnızca yüz bölgeleri tam
+        çözünürlükte kodlanır (bkz. memory.services.faces).
+        """
+        from . import faces
+        return faces.detect_and_encode(image_path)
 
-        except Exception as e:
-            logger.error(f"Yüz tanıma hatası: {e}")
-            return []
\ No newline at end of file
+    def detect_and_encode_faces_batch(self, image_paths, workers=None):
+        """Birden çok görüntü için detect_and_encode_faces; süreç havuzunda paralel."""
+        from . import faces
+        return faces.detect_many(image_paths, workers=workers)
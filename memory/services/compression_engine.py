@@ -1,6 +1,5 @@
 # memory/compression_engine.py (Gelitirilmi Versiyon)
 import numpy as np
-from sklearn.decomposition import PCA
 import logging
 import pickle
 import os
@@ -15,6 +14,12 @@ logger = logging.getLogger(__name__)
 PCA_MODEL_PATH = 'data/pca_compression_model.pkl'
 TARGET_DIMENSION = 64 # rn: 384 boyutlu vektr 64 boyuta drmek
 
+def _new_pca():
+    # sklearn ~1 sn'de yuklenir; yalnizca PCA gerektiginde ice aktarilir
+    from sklearn.decomposition import PCA
+    return PCA(n_components=TARGET_DIMENSION)
+
+
 class SemanticCompressionEngine:
     """
     Vektor embedding'lerini (PCA) ve yapisal verileri (zlib) sikistirmaktan sorumlu motor.
@@ -36,9 +41,9 @@ class SemanticCompressionEngine:
                     logger.info("Kayitli PCA modeli basariyla yuklendi.")
             except Exception as e:
                 logger.error(f"PCA modeli yuklenirken hata olustu: {e}")
-                self._pca_model = PCA(n_components=TARGET_DIMENSION)
+                self._pca_model = _new_pca()
         else:
-            self._pca_model = PCA(n_components=TARGET_DIMENSION)
+            self._pca_model = _new_pca()
             logger.info(f"Yeni PCA modeli baslatildi. Egitim bekleniyor.")
 
     def semantic_compress_image(self, image_path: str, ai_service: AIService) -> dict | None:
@@ -99,6 +104,7 @@ class SemanticCompressionEngine:
              return None
              
         try:
+            import torch
             # 1. Veriyi Geri zme (Bytes -> Numpy/Tensor)
             features_np = np.frombuffer(memory_item.semantic_features, dtype=np.float32)
             metadata = memory_item.graph_metadata
@@ -177,6 +183,37 @@ class SemanticCompressionEngine:
             logger.error(f"Vektor sikistirma hatasi: {e}")
             return None
 
+    def compress_embeddings(self, original_embeddings: list) -> list:
+        """
+        Vektorleri tek bir matris donusumuyle sikistirir; sonuc ayni siradadir.
+        Bos veya PCA boyutuna uymayan girdiler icin None dondurulur.
+        """
+        results = [None] * len(original_embeddings)
+        if not self.is_trained:
+            logger.warning("PCA egitilmedi. Toplu sikistirma yapilamadi.")
+            return results
+
+        expected = self._pca_model.n_features_in_
+        rows, vectors = [], []
+        for row, original in enumerate(original_embeddings):
+            if original is None:
+                continue
+            vector = np.frombuffer(original, dtype=np.float32)
+            if vector.size == expected:
+                rows.append(row)
+                vectors.append(vector)
+        if not vectors:
+            return results
+
+        try:
+            compressed = self._pca_model.transform(np.vstack(vectors)).astype(np.float32)
+        except Exception as e:
+            logger.error(f"Toplu vektor sikistirma hatasi: {e}")
+            return results
+        for row, vector in zip(rows, compressed):
+            results[row] = vector.tobytes()
+        return results
+
     # --- 2. Yapsal Veri Sktrma ---
     def compress_structural_data(self, data: str) -> bytes:
         """JSON veya metin formatindaki yapisal veriyi zlib ile sikistirir."""
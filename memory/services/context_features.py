@@ -0,0 +1,163 @@
+# memory/services/context_features.py
+"""
+Öneri ve sıralama için kullanıcı başına bağlam özellikleri (feature store).
+
+get_behavioral_suggestions / analyze_user_context her çağrıda aktivite ve
+dosya türü aggregate'leri çalıştırmak yerine buradaki önbelleğe alınmış
+özellikleri okur:
+- recent:      son RECENT_LIMIT aktivite (zaman, tür, sorgu), yeniden eskiye
+- minutes:     son bir saatin dakika kovaları {dakika: {tür: adet}}; pencere
+               sınırı dakika çözünürlüğündedir
+- file_types:  dosya türü başına öğe sayısı ve toplam erişim; ayrı anahtarda
+               tutulur ve FILE_TYPES_TTL dolunca yeniden hesaplanır
+
+Aktivite özellikleri, aktivite tamponu boşaltıldıkça (activity_buffer
+on_flush) artımlı güncellenir ve her güncellemede `version` artar; önbellekte
+olmayan kullanıcı ilk okumada veritabanından hesaplanır. file_types ayrı
+anahtarda olduğundan yenilenmesi boşaltma iş parçacığının yazdığı kaydı
+ezmez (ve tersi). Anahtarlardaki
+SCHEMA_VERSION özellik tanımları değiştiğinde eski değerleri geçersiz kılar.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from memory.models import MemoryItem, UserActivity
+
+SCHEMA_VERSION = 2
+FEATURES_KEY = 'context_features:v{schema}:{user_id}'
+FILE_TYPES_KEY = 'context_file_types:v{schema}:{user_id}'
+FEATURES_TTL = 120
+FILE_TYPES_TTL = 60
+RECENT_LIMIT = 10
+RECENT_WINDOW = timedelta(days=7)
+ACTIVITY_WINDOW = timedelta(hours=1)
+
+
+def _key(user_id):
+    return FEATURES_KEY.format(schema=SCHEMA_VERSION, user_id=user_id)
+
+
+def _file_types_key(user_id):
+    return FILE_TYPES_KEY.format(schema=SCHEMA_VERSION, user_id=user_id)
+
+
+def _minute(timestamp):
+    return int(timestamp.timestamp() // 60)
+
+
+def _prune(features, now):
+    oldest = _minute(now - ACTIVITY_WINDOW)
+    features['minutes'] = {minute: types for minute, types in features['minutes'].items() if minute >= oldest}
+
+
+def _recent_entry(activity_type, timestamp, context):
+    query = context.get('query', '') if isinstance(context, dict) else ''
+    return (timestamp, activity_type, query)
+
+
+def _file_type_stats(user_id):
+    rows = MemoryItem.objects.filter(user_id=user_id).values('file_type').annotate(
+        count=Count('id'), total_access=Sum('access_count'),
+    ).order_by('-total_access')
+    return [
+        {'file_type': row['file_type'], 'count': row['count'], 'total_access': row['total_access'] or 0}
+        for row in rows
+    ]
+
+
+def _file_types(user_id):
+    stats = cache.get(_file_types_key(user_id))
+    if stats is None:
+        stats = _file_type_stats(user_id)
+        cache.set(_file_types_key(user_id), stats, FILE_TYPES_TTL)
+    return stats
+
+
+def compute(user_id, now=None):
+    """Aktivite özelliklerini veritabanından baştan hesaplar (önbellek ıskası)."""
+    now = now or timezone.now()
+    recent = [
+        _recent_entry(activity_type, timestamp, context)
+        for timestamp, activity_type, context in UserActivity.objects.filter(
+            user_id=user_id, timestamp__gte=now - RECENT_WINDOW,
+        ).order_by('-timestamp').values_list('timestamp', 'activity_type', 'context')[:RECENT_LIMIT]
+    ]
+    minutes = defaultdict(lambda: defaultdict(int))
+    for timestamp, activity_type in UserActivity.objects.filter(
+        user_id=user_id, timestamp__gte=now - ACTIVITY_WINDOW,
+    ).values_list('timestamp', 'activity_type'):
+        minutes[_minute(timestamp)][activity_type] += 1
+    return {
+        'version': 1,
+        'recent': recent,
+        'minutes': {minute: dict(types) for minute, types in minutes.items()},
+    }
+
+
+def get_features(user_id, now=None):
+    now = now or timezone.now()
+    features = cache.get(_key(user_id))
+    if features is None:
+        features = compute(user_id, now)
+        # Bu arada tampon boşaltılıp daha yeni bir değer yazıldıysa onu ezme
+        if not cache.add(_key(user_id), features, FEATURES_TTL):
+            features = cache.get(_key(user_id)) or features
+    _prune(features, now)
+    # Yalnızca dönen kopyaya eklenir; aktivite kaydı geri yazılmaz
+    features['file_types'] = _file_types(user_id)
+    return features
+
+
+def apply_activities(activities):
+    """
+    activity_buffer on_flush geri çağırımı: yazılan aktiviteleri önbellekteki
+    özelliklere işler ve sürümü artırır. Önbellekte olmayan kullanıcılar atlanır.
+    """
+    per_user = defaultdict(list)
+    for activity in activities:
+        per_user[activity.user_id].append(activity)
+
+    now = timezone.now()
+    for user_id, items in per_user.items():
+        features = cache.get(_key(user_id))
+        if features is None:
+            continue
+        oldest = now - ACTIVITY_WINDOW
+        for activity in items:
+            if activity.timestamp >= oldest:
+                types = features['minutes'].setdefault(_minute(activity.timestamp), {})
+                types[activity.activity_type] = types.get(activity.activity_type, 0) + 1
+        recent = features['recent'] + [
+            _recent_entry(activity.activity_type, activity.timestamp, activity.context) for activity in items
+        ]
+        features['recent'] = sorted(recent, key=lambda entry: entry[0], reverse=True)[:RECENT_LIMIT]
+        features['version'] += 1
+        _prune(features, now)
+        cache.set(_key(user_id), features, FEATURES_TTL)
+
+
+# --- Okuma yardımcıları ---
+
+def recent_searches(features, now=None):
+    """Son RECENT_LIMIT aktivite içindeki aramalar (son 7 gün), yeniden eskiye."""
+    oldest = (now or timezone.now()) - RECENT_WINDOW
+    return [query for timestamp, activity_type, query in features['recent']
+            if activity_type == 'search_query' and timestamp >= oldest]
+
+
+def recent_activity_types(features):
+    """Son bir saatteki aktivite türleri (tekrarlı), yeniden eskiye."""
+    return [
+        activity_type
+        for minute in sorted(features['minutes'], reverse=True)
+        for activity_type, count in features['minutes'][minute].items()
+        for _ in range(count)
+    ]
+
+
+def popular_file_types(features, limit=3):
+    return [row['file_type'] for row in features['file_types'] if row['total_access'] > 0][:limit]
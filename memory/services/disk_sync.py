@@ -0,0 +1,269 @@
+# memory/services/disk_sync.py
+"""
+MEDIA_ROOT/uploads/<user_id>/<dosya> klasörlerinin MemoryItem tablosuyla
+artımlı senkronizasyonu.
+
+Her dosyanın (mtime_ns, boyut, inode) bilgisi bir manifest dosyasında tutulur.
+Tarama `os.scandir` ile yapılır; manifestteki kayıtla aynı olan dosyalar için
+veritabanına hiç gidilmez. Kullanıcı başına bilinen dosyalar tek sorguda
+yüklenir, yeni dosyalar bulk_create ile eklenir.
+
+- yeni:       diskte var, manifestte ve veritabanında yok  -> MemoryItem oluşturulur
+- değişmiş:   stat bilgisi manifesttekinden farklı          -> boyut güncellenir; vektör,
+                                                              sıkıştırılmış vektör, özet, yüzler ve
+                                                              kareler silinir (generate_embeddings
+                                                              yeniden üretir)
+- silinmiş:   manifestte var, diskte yok                    -> prune=True ise MemoryItem silinir
+
+`watch()` inotify ile (inotify_simple kuruluysa) değişen klasörleri anında,
+değilse periyodik tarama ile senkronize eder.
+"""
+import json
+import logging
+import mimetypes
+import os
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from memory.models import FaceEncoding, MemoryItem, MemoryTier, VideoFrame
+from memory.services import face_index
+from memory.services.tier_engine import expires_at_for
+from memory.services.usage import UsageDelta
+
+logger = logging.getLogger(__name__)
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+    inotify_flags = None
+
+MANIFEST_PATH = os.path.join(settings.BASE_DIR, '.cache', 'disk_sync', 'manifest.json')
+# Değişen dosyada sıfırlanan alanlar
+STALE_FIELDS = ['original_size', 'vector_embedding', 'compressed_embedding', 'content_summary']
+
+
+def uploads_root():
+    return os.path.join(settings.MEDIA_ROOT, 'uploads')
+
+
+@dataclass
+class SyncResult:
+    new: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    deleted: list = field(default_factory=list)
+    unchanged: int = 0
+
+    def merge(self, other):
+        self.new += other.new
+        self.changed += other.changed
+        self.deleted += other.deleted
+        self.unchanged += other.unchanged
+
+    def summary(self):
+        return (f"yeni: {len(self.new)}, değişen: {len(self.changed)}, "
+                f"silinen: {len(self.deleted)}, değişmeyen: {self.unchanged}")
+
+
+class Manifest:
+    """{user_id: {dosya_adı: [mtime_ns, boyut, inode]}} — JSON olarak saklanır."""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.users = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as handle:
+                    self.users = json.load(handle)
+            except (OSError, ValueError):
+                logger.warning(f"Manifest okunamadı, baştan oluşturulacak: {path}")
+
+    def get(self, user_id):
+        return {name: tuple(stat) for name, stat in self.users.get(str(user_id), {}).items()}
+
+    def set(self, user_id, entries):
+        self.users[str(user_id)] = {name: list(stat) for name, stat in entries.items()}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump(self.users, handle)
+        os.replace(temporary, self.path)
+
+
+def guess_file_type(file_path):
+    mime_type, _ = mimetypes.guess_type(file_path)
+    if mime_type:
+        if mime_type.startswith('image'): return 'image'
+        elif mime_type.startswith('text'): return 'text'
+        elif mime_type.startswith('video'): return 'video'
+    return 'unknown'
+
+
+def scan_directory(path):
+    """{dosya_adı: (mtime_ns, boyut, inode)}; alt klasörler ve linkler atlanır."""
+    entries = {}
+    with os.scandir(path) as iterator:
+        for entry in iterator:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue  # tarama sırasında silindi
+            entries[entry.name] = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    return entries
+
+
+def sync_user(user_id, user_path, manifest, tier, prune=False):
+    current = scan_directory(user_path) if os.path.isdir(user_path) else {}
+    previous = manifest.get(user_id)
+    result = SyncResult()
+
+    candidates = {name for name, stat in current.items() if previous.get(name) != stat}
+    deleted = [name for name in previous if name not in current]
+    result.unchanged = len(current) - len(candidates)
+
+    if candidates or deleted:
+        known = {}  # dosya_adı -> (id, katman, tür, boyut)
+        rows = MemoryItem.objects.filter(user_id=user_id).values_list(
+            'file_name', 'id', 'memory_tier_id', 'file_type', 'original_size'
+        )
+        for file_name, *row in rows:
+            known.setdefault(file_name, row)
+        usage = UsageDelta()
+
+        new_items, changed_items = [], []
+        # bulk_create save()'i çağırmaz; süre sonu burada verilir
+        expires_at = expires_at_for(tier.name)
+        for name in sorted(candidates):
+            mtime_ns, size, _ = current[name]
+            if name not in known:
+                file_path = os.path.join(user_path, name)
+                new_items.append(MemoryItem(
+                    user_id=user_id, file_name=name, file_path=file_path,
+                    file_type=guess_file_type(file_path), original_size=size, memory_tier=tier,
+                    expires_at=expires_at,
+                ))
+                usage.add_item(new_items[-1])
+                result.new.append(name)
+            elif name in previous or size != known[name][3]:
+                # İçerik değişti: içerikten türetilen her şey bayatladı. Manifestte
+                # olmayan (ör. manifest yeniden kurulurken) dosyada yalnızca boyut
+                # karşılaştırılabilir
+                item_id, tier_id, file_type, old_size = known[name]
+                changed_items.append(MemoryItem(
+                    pk=item_id, original_size=size, vector_embedding=None,
+                    compressed_embedding=None, content_summary=None,
+                ))
+                usage.add(user_id, tier_id, file_type, 0, size - old_size)
+                result.changed.append(name)
+            else:
+                # Manifestte olmayan, veritabanındakiyle aynı boyuttaki dosya yalnızca manifeste alınır
+                result.unchanged += 1
+
+        with transaction.atomic():
+            if new_items:
+                MemoryItem.objects.bulk_create(new_items, batch_size=500)
+            if changed_items:
+                MemoryItem.objects.bulk_update(changed_items, STALE_FIELDS, batch_size=500)
+                changed_ids = [item.pk for item in changed_items]
+                VideoFrame.objects.filter(memory_item_id__in=changed_ids).delete()
+                if FaceEncoding.objects.filter(memory_item_id__in=changed_ids).delete()[0]:
+                    # Eski yüzler kişi merkezlerinden düşsün
+                    transaction.on_commit(lambda: face_index.invalidate(user_id))
+            if prune and deleted:
+                stale = [known[name] for name in deleted if name in known]
+                MemoryItem.objects.filter(pk__in=[row[0] for row in stale]).delete()
+                for _, tier_id, file_type, old_size in stale:
+                    usage.add(user_id, tier_id, file_type, -1, -old_size)
+            usage.apply()
+        result.deleted = deleted
+
+    manifest.set(user_id, current)
+    return result
+
+
+def user_directories(root, user_ids=None):
+    """{user_id: klasör_yolu}; yalnızca var olan kullanıcıların sayısal klasörleri."""
+    if not os.path.isdir(root):
+        return {}
+    folders = {}
+    with os.scandir(root) as iterator:
+        for entry in iterator:
+            if entry.is_dir() and entry.name.isdigit():
+                folders[int(entry.name)] = entry.path
+    if user_ids is not None:
+        folders = {user_id: path for user_id, path in folders.items() if user_id in user_ids}
+    existing = set(get_user_model().objects.filter(pk__in=folders).values_list('pk', flat=True))
+    return {user_id: path for user_id, path in folders.items() if user_id in existing}
+
+
+def sync_all(root=None, manifest=None, user_ids=None, prune=False):
+    """Tüm (veya verilen) kullanıcı klasörlerini senkronize eder; {user_id: SyncResult}."""
+    root = root or uploads_root()
+    manifest = manifest or Manifest()
+    tier, _ = MemoryTier.objects.get_or_create(name="short_term")
+    results = {}
+    for user_id, path in sorted(user_directories(root, user_ids).items()):
+        results[user_id] = sync_user(user_id, path, manifest, tier, prune=prune)
+    manifest.save()
+    return results
+
+
+def watch(root=None, manifest=None, prune=False, interval=5.0, on_sync=None, stop=None):
+    """
+    Klasörleri izler ve değişen kullanıcıları senkronize eder.
+    inotify_simple yoksa `interval` saniyede bir manifest tabanlı tarama yapılır.
+    `on_sync(results)` her senkronizasyondan sonra, `stop()` True döndüğünde döngü biter.
+    """
+    root = root or uploads_root()
+    manifest = manifest or Manifest()
+    stop = stop or (lambda: False)
+    report = on_sync or (lambda results: None)
+
+    report(sync_all(root, manifest, prune=prune))
+
+    if INotify is None:
+        logger.warning("inotify_simple kurulu değil; periyodik taramaya geçiliyor.")
+        while not stop():
+            time.sleep(interval)
+            report(sync_all(root, manifest, prune=prune))
+        return
+
+    os.makedirs(root, exist_ok=True)
+    inotify = INotify()
+    mask = (inotify_flags.CREATE | inotify_flags.DELETE | inotify_flags.CLOSE_WRITE
+            | inotify_flags.MOVED_TO | inotify_flags.MOVED_FROM | inotify_flags.ATTRIB)
+    root_wd = inotify.add_watch(root, inotify_flags.CREATE | inotify_flags.MOVED_TO)
+    watched = {}  # wd -> user_id
+
+    def watch_users():
+        for user_id, path in user_directories(root).items():
+            if user_id not in watched.values():
+                watched[inotify.add_watch(path, mask)] = user_id
+
+    watch_users()
+    try:
+        while not stop():
+            # read_delay: art arda gelen olayları tek senkronizasyonda topla
+            events = inotify.read(timeout=int(interval * 1000), read_delay=250)
+            if not events:
+                continue
+            dirty = set()
+            for event in events:
+                if event.wd == root_wd:
+                    watch_users()
+                    if event.name.isdigit():
+                        dirty.add(int(event.name))
+                elif event.wd in watched:
+                    dirty.add(watched[event.wd])
+            if dirty:
+                report(sync_all(root, manifest, user_ids=dirty, prune=prune))
+    finally:
+        inotify.close()
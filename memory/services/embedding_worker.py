@@ -0,0 +1,143 @@
+# memory/services/embedding_worker.py
+"""
+generate_embeddings komutunun işçi tarafı.
+
+Bu modül Django modellerine dokunmaz: işçi süreçler yalnızca dosyaları okur
+ve model çıkarımı yapar, sonuçları ana sürece döndürür; veritabanı yazımı
+ana süreçte toplu olarak yapılır. Her süreç kendi AIService örneğini (ve
+modellerini) ilk görevde bir kez yükler.
+"""
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+TEXT_EXTENSIONS = ('.txt', '.md', '.py', '.js', '.pdf', '.docx')
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.ogg')
+
+# tür -> (MemoryItem.file_type değerleri, dosya uzantıları); sıra önceliktir
+KIND_RULES = {
+    'image': (('image',), IMAGE_EXTENSIONS),
+    'text': (('text', 'pdf', 'code', 'document'), TEXT_EXTENSIONS),
+    'video': (('video',), VIDEO_EXTENSIONS),
+    'audio': ((), AUDIO_EXTENSIONS),
+}
+
+VIDEO_FRAME_INTERVAL = 5
+
+_service = None
+
+
+def classify(file_type, file_name):
+    name = (file_name or '').lower()
+    for kind, (file_types, extensions) in KIND_RULES.items():
+        if file_type in file_types or name.endswith(extensions):
+            return kind
+    return None
+
+
+def init_worker():
+    """ProcessPoolExecutor initializer: modeller süreç başına bir kez yüklenir."""
+    global _service
+    if _service is None:
+        from .ai_services import AIService
+        _service = AIService()
+    return _service
+
+
+def _result(task, **fields):
+    return {
+        'id': task['id'], 'embedding': None, 'summary': None,
+        'frames': None, 'faces': None, 'error': None, **fields,
+    }
+
+
+def process_batch(tasks, text_batch_size=32, image_batch_size=16, detect_faces=True, face_workers=1):
+    """
+    tasks: [{'id', 'kind', 'file_name', 'file_path'}, ...]
+    Dönüş (aynı sırada): [{'id', 'embedding' (bytes), 'summary', 'frames', 'faces', 'error'}, ...]
+
+    face_workers: grubun yüz tespiti için süreç sayısı (None = tüm çekirdekler).
+    İşçi havuzu içinde 1 kalmalı; aksi halde havuzlar iç içe açılır.
+    """
+    service = init_worker()
+    results = {}
+    pending_text = []  # (task, gömülecek metin, özet)
+    images = []
+
+    for task in tasks:
+        path = task['file_path']
+        if not path or not os.path.exists(path):
+            results[task['id']] = _result(task, error='missing')
+            continue
+        try:
+            if task['kind'] == 'image':
+                images.append(task)
+            elif task['kind'] == 'text':
+                content = service.extract_text_from_file(path)
+                if content and len(content.strip()) > 10:
+                    # Hem ismini hem içeriğini temsil eden hibrit vektör
+                    pending_text.append((task, f"{task['file_name']} : {content[:1000]}", content[:500] + "..."))
+                else:
+                    pending_text.append((task, task['file_name'], None))
+            elif task['kind'] == 'video':
+                results[task['id']] = _process_video(service, task)
+            elif task['kind'] == 'audio':
+                transcript = service.transcribe_audio(path)
+                if transcript:
+                    pending_text.append((task, f"{task['file_name']} : {transcript[:500]}", transcript[:1000]))
+                else:
+                    pending_text.append((task, task['file_name'], None))
+        except Exception as e:
+            logger.exception(f"Embedding hazırlığı başarısız ({path})")
+            results[task['id']] = _result(task, error=str(e))
+
+    if pending_text:
+        vectors = service.get_text_embeddings([text for _, text, _ in pending_text], batch_size=text_batch_size)
+        for (task, _, summary), vector in zip(pending_text, vectors):
+            results[task['id']] = _result(
+                task,
+                embedding=vector.tobytes() if vector is not None else None,
+                summary=summary,
+                error=None if vector is not None else 'embedding',
+            )
+
+    if images:
+        paths = [task['file_path'] for task in images]
+        vectors = service.get_image_embeddings(paths, batch_size=image_batch_size)
+        if detect_faces:
+            detected = service.detect_and_encode_faces_batch(paths, workers=face_workers)
+        else:
+            detected = [None] * len(images)
+        for task, vector, found in zip(images, vectors, detected):
+            faces = None
+            if found is not None:
+                faces = [
+                    {'encoding': face['encoding'].tobytes(), 'location': tuple(face['location'])}
+                    for face in found
+                ]
+            results[task['id']] = _result(
+                task,
+                embedding=vector.tobytes() if vector is not None else None,
+                faces=faces,
+                error=None if vector is not None else 'embedding',
+            )
+
+    return [results[task['id']] for task in tasks]
+
+
+def _process_video(service, task):
+    frames = service.analyze_video_content(task['file_path'], interval_seconds=VIDEO_FRAME_INTERVAL)
+    transcript = service.transcribe_audio(task['file_path'])
+    summary = f"[VIDEO TRANSCRIPT]: {transcript[:1000]}" if transcript else None
+    if not frames:
+        return _result(task, summary=summary, error='no_frames')
+    return _result(
+        task,
+        # Ana kayda ilk karenin vektörü (genel arama için)
+        embedding=frames[0]['embedding'].tobytes(),
+        summary=summary,
+        frames=[(frame['timestamp'], frame['embedding'].tobytes()) for frame in frames],
+    )
@@ -0,0 +1,223 @@
+# memory/services/face_index.py
+"""
+Kullanıcı başına yüz indeksi ve toplu yeniden kümeleme.
+
+- Her Person için yüz kodlamalarının ortalaması (merkez) tutulur; indeks
+  (N, 128) float64 merkez matrisi + person id dizisidir
+- Eşleştirme tek bir vektörel mesafe hesabıyla en yakın merkeze yapılır
+  (ilk eşleşen değil); yüz başına sorgu ya da kişi başına döngü yoktur.
+  Tarama kesindir ve kullanıcının kişi sayısında doğrusaldır (ANN yok);
+  kullanıcı başına birkaç bin kişiye kadar tek bir matris çarpımıdır
+- Yeni yüzler merkezleri artımlı günceller (koşan toplam); yeni kişi eklenince
+  cache'teki sürüm değişir, diğer süreçler yerel kopyalarını yeniden yükler
+- `chinese_whispers` tüm kodlamaları mesafe eşiğiyle kurulan graf üzerinde
+  kümeler; recluster_faces komutu bu kümelere göre kişileri yeniden gruplar
+"""
+import threading
+import time
+import uuid
+
+import numpy as np
+from django.core.cache import cache
+
+from memory.models import FaceEncoding, Person
+
+ENCODING_DIM = 128
+# face_recognition.compare_faces varsayılanı
+MATCH_TOLERANCE = 0.6
+# Kümeleme için dlib örneklerindeki eşik
+CLUSTER_THRESHOLD = 0.5
+VERSION_KEY = 'face_index:{user_id}:version'
+VERSION_TIMEOUT = 60 * 60 * 24
+VERSION_CHECK_INTERVAL = 5.0
+
+
+def decode(blob):
+    return np.frombuffer(blob, dtype=np.float64)
+
+
+class FaceIndex:
+    def __init__(self, person_ids=(), sums=None, counts=()):
+        count = len(person_ids)
+        capacity = max(16, count)
+        self._person_ids = np.zeros(capacity, dtype=np.int64)
+        self._sums = np.zeros((capacity, ENCODING_DIM), dtype=np.float64)
+        self._counts = np.zeros(capacity, dtype=np.int64)
+        self._centroids = np.zeros((capacity, ENCODING_DIM), dtype=np.float64)
+        self._rows = {}
+        self.size = 0
+        if count:
+            self._person_ids[:count] = person_ids
+            self._sums[:count] = sums
+            self._counts[:count] = counts
+            self._centroids[:count] = sums / np.maximum(counts, 1)[:, None]
+            self._rows = {int(person_id): row for row, person_id in enumerate(person_ids)}
+            self.size = count
+
+    @classmethod
+    def from_db(cls, user_id):
+        """Kullanıcının tüm yüz kodlamalarından tek sorguyla kurulur."""
+        rows = FaceEncoding.objects.filter(person__user_id=user_id).values_list('person_id', 'encoding')
+        person_ids, encodings = [], []
+        for person_id, blob in rows.iterator():
+            person_ids.append(person_id)
+            encodings.append(decode(blob))
+        if not person_ids:
+            return cls()
+        unique_ids, inverse = np.unique(np.asarray(person_ids, dtype=np.int64), return_inverse=True)
+        sums = np.zeros((len(unique_ids), ENCODING_DIM), dtype=np.float64)
+        np.add.at(sums, inverse, np.vstack(encodings))
+        counts = np.bincount(inverse, minlength=len(unique_ids))
+        return cls(unique_ids, sums, counts)
+
+    def nearest(self, encodings):
+        """
+        encodings: (F, 128). Dönüş: (person_ids (F,), mesafeler (F,));
+        indeks boşsa person_id -1, mesafe inf.
+        """
+        encodings = np.atleast_2d(np.asarray(encodings, dtype=np.float64))
+        if not self.size:
+            return np.full(len(encodings), -1, dtype=np.int64), np.full(len(encodings), np.inf)
+        centroids = self._centroids[:self.size]
+        # ||c - e||² = ||c||² - 2 c·e + ||e||²
+        squared = (
+            np.einsum('ij,ij->i', centroids, centroids)[None, :]
+            - 2.0 * encodings @ centroids.T
+            + np.einsum('ij,ij->i', encodings, encodings)[:, None]
+        )
+        best = np.argmin(squared, axis=1)
+        distances = np.sqrt(np.maximum(squared[np.arange(len(encodings)), best], 0.0))
+        return self._person_ids[best], distances
+
+    def add(self, person_id, encoding):
+        """Yüzü kişinin merkezine katar; kişi yoksa yeni satır açar. Yeni kişiyse True."""
+        row = self._rows.get(person_id)
+        created = row is None
+        if created:
+            if self.size == len(self._person_ids):
+                self._grow()
+            row = self.size
+            self._rows[person_id] = row
+            self._person_ids[row] = person_id
+            self.size += 1
+        self._sums[row] += encoding
+        self._counts[row] += 1
+        self._centroids[row] = self._sums[row] / self._counts[row]
+        return created
+
+    def _grow(self):
+        capacity = len(self._person_ids) * 2
+        for name in ('_person_ids', '_sums', '_counts', '_centroids'):
+            current = getattr(self, name)
+            grown = np.zeros((capacity,) + current.shape[1:], dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+
+_local = {}  # user_id -> {'version', 'index', 'checked_at'}
+_local_lock = threading.Lock()
+
+
+def _publish(user_id):
+    version = uuid.uuid4().hex
+    cache.set(VERSION_KEY.format(user_id=user_id), version, VERSION_TIMEOUT)
+    return version
+
+
+def get_index(user_id):
+    """
+    Kullanıcının yerel indeks kopyası; cache sürümü en fazla
+    VERSION_CHECK_INTERVAL'da bir kontrol edilir.
+    """
+    now = time.monotonic()
+    entry = _local.get(user_id)
+    if entry is not None and now - entry['checked_at'] < VERSION_CHECK_INTERVAL:
+        return entry['index']
+
+    with _local_lock:
+        version = cache.get(VERSION_KEY.format(user_id=user_id))
+        entry = _local.get(user_id)
+        if entry is not None and version is not None and version == entry['version']:
+            entry['checked_at'] = now
+            return entry['index']
+        index = FaceIndex.from_db(user_id)
+        if version is None:
+            version = _publish(user_id)
+        _local[user_id] = {'version': version, 'index': index, 'checked_at': now}
+        return index
+
+
+def invalidate(user_id):
+    """Kişiler toplu değiştiğinde (ör. yeniden kümeleme) tüm süreçlerdeki kopyaları bayatlatır."""
+    with _local_lock:
+        _local.pop(user_id, None)
+    cache.delete(VERSION_KEY.format(user_id=user_id))
+
+
+def assign_faces(user_id, encodings, cover_photo=None, tolerance=MATCH_TOLERANCE):
+    """
+    Her yüz için en yakın kişinin id'si; eşik dışındaysa yeni Person oluşturulur.
+    Aynı fotoğraftaki sonraki yüzler yeni kişilerle de karşılaştırılır.
+    """
+    index = get_index(user_id)
+    person_ids, created_any = [], False
+    # Görünen ad sırası: kişi sayısı çağrı başına en fazla bir kez sayılır
+    person_count = None
+    for encoding in encodings:
+        encoding = np.asarray(encoding, dtype=np.float64)
+        (person_id,), (distance,) = index.nearest(encoding)
+        if person_id < 0 or distance > tolerance:
+            if person_count is None:
+                person_count = Person.objects.filter(user_id=user_id).count()
+            person_count += 1
+            person = Person.objects.create(
+                user_id=user_id, name=f"Kişi #{person_count}", cover_photo=cover_photo,
+            )
+            person_id = person.id
+        created_any |= index.add(int(person_id), encoding)
+        person_ids.append(int(person_id))
+
+    if created_any:
+        # Yerel kopya güncel; diğer süreçler yeni kişiyi görmek için yeniden yüklesin
+        with _local_lock:
+            entry = _local.get(user_id)
+            if entry is not None:
+                entry['version'] = _publish(user_id)
+    return person_ids
+
+
+def chinese_whispers(encodings, threshold=CLUSTER_THRESHOLD, iterations=20, seed=0, block_size=2048):
+    """
+    Mesafesi `threshold` altındaki yüzler arasında kenar olan graf üzerinde
+    Chinese Whispers kümelemesi. Dönüş: (M,) küme etiketleri.
+    """
+    encodings = np.asarray(encodings, dtype=np.float64)
+    count = len(encodings)
+    norms = np.einsum('ij,ij->i', encodings, encodings)
+    neighbours = [None] * count
+    for start in range(0, count, block_size):
+        block = encodings[start:start + block_size]
+        squared = norms[start:start + block_size, None] - 2.0 * block @ encodings.T + norms[None, :]
+        adjacency = squared <= threshold * threshold
+        for offset, row in enumerate(adjacency):
+            node = start + offset
+            row[node] = False
+            neighbours[node] = np.flatnonzero(row)
+
+    labels = np.arange(count)
+    rng = np.random.default_rng(seed)
+    for _ in range(iterations):
+        changed = False
+        for node in rng.permutation(count):
+            adjacent = neighbours[node]
+            if not len(adjacent):
+                continue
+            values, votes = np.unique(labels[adjacent], return_counts=True)
+            best = values[np.argmax(votes)]
+            if best != labels[node]:
+                labels[node] = best
+                changed = True
+        if not changed:
+            break
+    # 0..K-1 aralığına sıkıştır
+    return np.unique(labels, return_inverse=True)[1]
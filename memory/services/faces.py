@@ -0,0 +1,119 @@
+# memory/services/faces.py
+"""
+Çok çözünürlüklü yüz tespiti ve kodlama.
+
+HOG tespiti piksel sayısıyla doğrusal ölçeklenir; 12-48 MP telefon
+fotoğraflarında tam çözünürlükte çalıştırmak saniyeler sürer. Burada:
+1. Görüntü bir kez çözülür, uzun kenarı DETECTION_SIDES[0] olacak şekilde
+   küçültülmüş kopyada yüz aranır; bulunamazsa bir sonraki (daha büyük)
+   çözünürlük denenir (gruptaki küçük yüzler için)
+2. Kutular tam çözünürlüğe ölçeklenir ve yalnızca bu bölgeler (pay ile)
+   kırpılıp kodlanır
+3. `detect_many` birden çok görüntüyü süreç havuzunda paralel işler
+
+face_recognition yalnızca ilk kullanımda içe aktarılır.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tespit için denenecek uzun kenar boyutları (piksel), küçükten büyüğe
+DETECTION_SIDES = (800, 1600)
+# Kodlama için kutunun etrafında bırakılan pay (kutu boyutuna oran)
+CROP_MARGIN = 0.25
+UPSAMPLE = 1
+
+
+def load_rgb(image_path):
+    from PIL import Image
+    with Image.open(image_path) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+def resize(image, side):
+    """Uzun kenarı `side` olacak şekilde küçültülmüş kopya ve ölçek (küçük/tam)."""
+    height, width = image.shape[:2]
+    scale = side / max(height, width)
+    if scale >= 1.0:
+        return image, 1.0
+    from PIL import Image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    small = Image.fromarray(image).resize(size, Image.BILINEAR)
+    return np.asarray(small), size[0] / width
+
+
+def scale_box(box, scale, height, width):
+    """Küçük görüntüdeki (top, right, bottom, left) kutuyu tam çözünürlüğe taşır."""
+    top, right, bottom, left = (value / scale for value in box)
+    return (
+        max(0, int(round(top))), min(width, int(round(right))),
+        min(height, int(round(bottom))), max(0, int(round(left))),
+    )
+
+
+def crop_around(image, box, margin=CROP_MARGIN):
+    """Kutu çevresinde paylı kırpım ve kutunun kırpım içindeki konumu."""
+    height, width = image.shape[:2]
+    top, right, bottom, left = box
+    pad_y = int((bottom - top) * margin)
+    pad_x = int((right - left) * margin)
+    y0, y1 = max(0, top - pad_y), min(height, bottom + pad_y)
+    x0, x1 = max(0, left - pad_x), min(width, right + pad_x)
+    # dlib bitişik bellek ister
+    crop = np.ascontiguousarray(image[y0:y1, x0:x1])
+    return crop, (top - y0, right - x0, bottom - y0, left - x0)
+
+
+def detect_boxes(image, sides=DETECTION_SIDES, upsample=UPSAMPLE):
+    """Tam çözünürlük koordinatlarında yüz kutuları; küçük çözünürlükten başlanır."""
+    import face_recognition
+    height, width = image.shape[:2]
+    for side in sides:
+        small, scale = resize(image, side)
+        boxes = face_recognition.face_locations(small, number_of_times_to_upsample=upsample)
+        if boxes:
+            return [scale_box(box, scale, height, width) for box in boxes]
+        if scale == 1.0:
+            break  # zaten tam çözünürlükte denendi
+    return []
+
+
+def detect_and_encode(image_path, sides=DETECTION_SIDES):
+    """
+    Dönüş: [{'encoding': np.array (128,), 'location': (top, right, bottom, left)}, ...]
+    Konumlar orijinal görüntü koordinatlarındadır.
+    """
+    if not os.path.exists(image_path):
+        return []
+    try:
+        import face_recognition
+        image = load_rgb(image_path)
+        results = []
+        for box in detect_boxes(image, sides):
+            crop, local_box = crop_around(image, box)
+            encodings = face_recognition.face_encodings(crop, known_face_locations=[local_box])
+            if encodings:
+                results.append({'encoding': encodings[0], 'location': box})
+        if results:
+            print(f"   👤 {len(results)} Yüz Tespit Edildi.")
+        return results
+    except Exception as e:
+        logger.error(f"Yüz tanıma hatası ({image_path}): {e}")
+        return []
+
+
+def detect_many(image_paths, workers=None, chunksize=4):
+    """
+    Görüntüleri süreç havuzunda paralel işler; sıra korunur.
+    workers=1 ise aynı süreçte sırayla çalışır.
+    """
+    image_paths = list(image_paths)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(image_paths) <= 1:
+        return [detect_and_encode(path) for path in image_paths]
+    with ProcessPoolExecutor(max_workers=min(workers, len(image_paths))) as pool:
+        return list(pool.map(detect_and_encode, image_paths, chunksize=chunksize))
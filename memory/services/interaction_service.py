@@ -1,11 +1,11 @@
 ﻿# memory/services/interaction_service.py
 import logging
 import json
-from django.utils import timezone
 from .ai_services import AIService
 from .advanced_memory_manager import AdvancedMemoryManager
-from ..models import UserActivity
+from .activity_buffer import record_activity
 from .homonyms_data import AMBIGUOUS_TERMS
+from cloud_mvp.tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +18,7 @@ class InteractionService:
         # Burayı zamanla genişletebilirsin.
         # Format: 'kelime': [{'text': 'Kullanıcıda görünecek', 'prompt': 'AI'ya gidecek net komut'}]
 
+    @traced('interaction.total')
     def process_message(self, message: str, context: dict = None):
         """
         Kullanıcı mesajını analiz eder, şaibe varsa soru sorar, yoksa arama yapar.
@@ -51,7 +52,8 @@ class InteractionService:
 
         try:
             # Hafızada Ara (AdvancedMemoryManager zaten translate yapıyor, o yüzden 'search_query' İngilizce olsa da sorun yok)
-            search_results = self.memory_manager.semantic_search(query=message, limit=5)
+            with span('interaction.search'):
+                search_results = self.memory_manager.semantic_search(query=message, limit=5)
             
             # Veri Temizliği
             clean_results = []
@@ -69,14 +71,14 @@ class InteractionService:
                 clean_results.append(clean_item)
 
             # Aktivite Kaydet
-            UserActivity.objects.create(
-                user=self.user,
-                activity_type='ai_interaction',
-                application='Qyptos Chat',
-                window_title=f"Sorgu: {message}",
-                timestamp=timezone.now(),
-                context={'query': message, 'results': len(clean_results)}
-            )
+            with span('interaction.activity_write'):
+                record_activity(
+                    self.user,
+                    'ai_interaction',
+                    application='Qyptos Chat',
+                    window_title=f"Sorgu: {message}"[:255],
+                    context={'query': message, 'results': len(clean_results)}
+                )
 
             # Yanıt Oluştur
             if not clean_results:
@@ -97,7 +99,8 @@ class InteractionService:
                         print(f"   🧠 Düşünüyor... ({top_file} üzerinden)")
                         
                         # AI Servisini çağırıp cevap iste
-                        answer_data = self.memory_manager.ai_service.answer_question(content_context, message)
+                        with span('interaction.answer'):
+                            answer_data = self.memory_manager.ai_service.answer_question(content_context, message)
                         
                         if answer_data:
                             extracted_answer = answer_data['answer']
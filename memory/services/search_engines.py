@@ -0,0 +1,221 @@
+# memory/services/search_engines.py
+"""
+Vektör arama motorları (benchmark ve karşılaştırma için ortak arayüz).
+
+Her motor `build(keys, matrix)` ile kurulur, `search(query, k)` ile
+[(key, skor), ...] döndürür. Aynı anahtar birden çok satırda olabilir
+(ör. bir videonun kareleri); sonuçta her anahtar en yüksek skoruyla bir kez yer alır.
+
+- LoopEngine:       mevcut semantic_search gibi satır başına Python döngüsü
+- VectorizedEngine: normalize float32 matris + tek matris çarpımı, anahtar başına
+                    en iyi skor (reduceat) + argpartition
+- QuantizedEngine:  int8 skaler kuantizasyon, adayları float32 ile yeniden sıralar
+- IVFEngine:        k-means kaba kuantizör + nprobe küme taraması (yaklaşık, ANN)
+- BruteForceEngine: float64 tam arama; recall@k için referans
+"""
+import numpy as np
+
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_unique(keys, scores, k):
+    """Skorlara göre azalan sırada ilk k benzersiz anahtar."""
+    order = np.argsort(-scores, kind='stable')
+    results, seen = [], set()
+    for index in order:
+        key = keys[index]
+        if key in seen:
+            continue
+        seen.add(key)
+        results.append((key, float(scores[index])))
+        if len(results) == k:
+            break
+    return results
+
+
+class SearchEngine:
+    name = 'base'
+
+    def build(self, keys, matrix):
+        raise NotImplementedError
+
+    def search(self, query, k=10):
+        raise NotImplementedError
+
+    def memory_bytes(self):
+        return 0
+
+
+class BruteForceEngine(SearchEngine):
+    name = 'brute_force'
+
+    def build(self, keys, matrix):
+        self.keys = np.asarray(keys)
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        self.matrix /= np.maximum(np.linalg.norm(self.matrix, axis=1, keepdims=True), 1e-12)
+
+    def search(self, query, k=10):
+        query = np.asarray(query, dtype=np.float64)
+        scores = self.matrix @ (query / max(np.linalg.norm(query), 1e-12))
+        return _top_unique(self.keys, scores, k)
+
+    def memory_bytes(self):
+        return self.matrix.nbytes + self.keys.nbytes
+
+
+class LoopEngine(SearchEngine):
+    """Vektörler bayt olarak tutulur, her sorguda satır satır çözülüp skorlanır."""
+    name = 'loop'
+
+    def build(self, keys, matrix):
+        self.rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in zip(keys, matrix)
+        ]
+
+    def search(self, query, k=10):
+        query = np.asarray(query, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        best = {}
+        for key, blob in self.rows:
+            vector = np.frombuffer(blob, dtype=np.float32)
+            score = float(np.dot(vector, query) / (np.linalg.norm(vector) * query_norm))
+            if score > best.get(key, -2.0):
+                best[key] = score
+        return sorted(best.items(), key=lambda pair: -pair[1])[:k]
+
+    def memory_bytes(self):
+        return sum(len(blob) for _, blob in self.rows)
+
+
+class VectorizedEngine(SearchEngine):
+    """
+    Satırlar anahtara göre gruplanır; her sorguda önce anahtar başına en
+    yüksek skor (maximum.reduceat), sonra benzersiz anahtarlar üzerinde
+    ilk k seçilir. Tekrarlı anahtarlar adayları azaltamaz.
+    """
+    name = 'vectorized'
+
+    def build(self, keys, matrix):
+        unique_keys, inverse = np.unique(np.asarray(keys), return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        self.keys = unique_keys
+        self.matrix = normalize_rows(matrix)[order]
+        self.offsets = np.searchsorted(inverse[order], np.arange(len(unique_keys)))
+
+    def search(self, query, k=10):
+        if not len(self.keys) or k <= 0:
+            return []
+        query = normalize_rows(np.asarray(query)[None, :])[0]
+        best = np.maximum.reduceat(self.matrix @ query, self.offsets)
+        if k < len(best):
+            top = np.argpartition(-best, k - 1)[:k]
+        else:
+            top = np.arange(len(best))
+        top = top[np.argsort(-best[top], kind='stable')]
+        return [(self.keys[index], float(best[index])) for index in top]
+
+    def memory_bytes(self):
+        return self.matrix.nbytes + self.keys.nbytes + self.offsets.nbytes
+
+
+class QuantizedEngine(SearchEngine):
+    """int8 vektörlerle kaba skor, en iyi `rerank` adayı float32 ile kesin skorlanır."""
+    name = 'quantized_int8'
+
+    def __init__(self, rerank=100):
+        self.rerank = rerank
+
+    def build(self, keys, matrix):
+        self.keys = np.asarray(keys)
+        normalized = normalize_rows(matrix)
+        self.scale = float(np.abs(normalized).max()) / 127.0 or 1.0
+        self.codes = np.round(normalized / self.scale).astype(np.int8)
+        # Yeniden sıralama için float16 kopya (float32'nin yarısı)
+        self.refine = normalized.astype(np.float16)
+
+    def search(self, query, k=10):
+        query = normalize_rows(np.asarray(query)[None, :])[0]
+        query_codes = np.round(query / self.scale).astype(np.int8)
+        coarse = self.codes.astype(np.int32) @ query_codes.astype(np.int32)
+        limit = min(len(coarse), max(self.rerank, k * 4))
+        candidates = np.argpartition(-coarse, limit - 1)[:limit] if limit < len(coarse) else np.arange(len(coarse))
+        exact = self.refine[candidates].astype(np.float32) @ query
+        return _top_unique(self.keys[candidates], exact, k)
+
+    def memory_bytes(self):
+        return self.codes.nbytes + self.refine.nbytes + self.keys.nbytes
+
+
+class IVFEngine(SearchEngine):
+    """
+    Inverted file index: vektörler k-means merkezlerine atanır, sorguda
+    yalnızca en yakın `nprobe` kümenin satırları taranır.
+    """
+    name = 'ivf'
+
+    def __init__(self, n_lists=None, nprobe=8, iterations=10, seed=0):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+
+    def build(self, keys, matrix):
+        self.keys = np.asarray(keys)
+        self.matrix = normalize_rows(matrix)
+        n_rows = len(self.matrix)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n_rows)))
+        rng = np.random.default_rng(self.seed)
+        centroids = self.matrix[rng.choice(n_rows, size=min(n_lists, n_rows), replace=False)].copy()
+
+        for _ in range(self.iterations):
+            assignment = np.argmax(self.matrix @ centroids.T, axis=1)
+            for index in range(len(centroids)):
+                members = self.matrix[assignment == index]
+                if len(members):
+                    centroids[index] = members.mean(axis=0)
+            centroids = normalize_rows(centroids)
+
+        assignment = np.argmax(self.matrix @ centroids.T, axis=1)
+        # Satırları kümeye göre sırala: her küme ardışık bir dilim olur
+        order = np.argsort(assignment, kind='stable')
+        self.matrix = self.matrix[order]
+        self.keys = self.keys[order]
+        counts = np.bincount(assignment, minlength=len(centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.centroids = centroids
+
+    def search(self, query, k=10):
+        query = normalize_rows(np.asarray(query)[None, :])[0]
+        nprobe = min(self.nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([
+            np.arange(self.offsets[index], self.offsets[index + 1]) for index in lists
+        ])
+        if not len(rows):
+            return []
+        scores = self.matrix[rows] @ query
+        return _top_unique(self.keys[rows], scores, k)
+
+    def memory_bytes(self):
+        return self.matrix.nbytes + self.keys.nbytes + self.centroids.nbytes + self.offsets.nbytes
+
+
+ENGINES = {
+    engine.name: engine
+    for engine in (BruteForceEngine, LoopEngine, VectorizedEngine, QuantizedEngine, IVFEngine)
+}
+
+
+def recall_at_k(results, reference, k):
+    """`reference` (kesin arama) ilk k anahtarından kaçının bulunduğu."""
+    expected = {key for key, _ in reference[:k]}
+    if not expected:
+        return 1.0
+    found = {key for key, _ in results[:k]}
+    return len(expected & found) / len(expected)
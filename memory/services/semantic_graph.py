@@ -0,0 +1,238 @@
+# memory/services/semantic_graph.py
+"""
+Süperpiksel grafı + GNN/Transformer sıkıştırma yığını.
+
+torch, torch_geometric, scikit-image ve matplotlib'e bağlıdır; bu yüzden
+ai_services tarafından yalnızca semantik model ilk kez gerektiğinde içe aktarılır.
+"""
+import logging
+import math
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import matplotlib.pyplot as plt
+from torch_geometric.nn import GCNConv
+from skimage.segmentation import slic
+from skimage import io
+from skimage.segmentation import mark_boundaries
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== YARDIMCI FONKSİYONLAR ====================
+
+def create_superpixels(image_path, n_segments=500, compactness=10):
+    """Belirtilen görüntü yolu için SLIC algoritması ile superpiksel oluşturur."""
+    try:
+        image = io.imread(image_path)
+        if image.dtype == np.uint8:
+            image = image.astype(np.float32) / 255.0
+    except FileNotFoundError:
+        print(f"HATA: '{image_path}' dosya yolu bulunamadı.")
+        return None, None, 0
+    except Exception as e:
+        print(f"Resim okuma hatası: {e}")
+        return None, None, 0
+
+    try:
+        labels = slic(
+            image,
+            n_segments=n_segments,
+            compactness=compactness,
+            enforce_connectivity=True,
+            sigma=0,
+            start_label=0
+        )
+        num_superpixels = len(np.unique(labels))
+        return image, labels, num_superpixels
+    except Exception as e:
+        logger.error(f"SLIC hatası: {e}")
+        return None, None, 0
+
+
+def visualize_superpixels(image, labels):
+    """Superpiksel sınırlarını orijinal görüntü üzerinde görselleştirir."""
+    fig, ax = plt.subplots(1, 1, figsize=(10, 10))
+    ax.imshow(mark_boundaries(image, labels, color=(1, 1, 1)))
+    ax.set_title("Oluşturulan Superpikseller (Düğümler)")
+    ax.axis('off')
+    plt.show()
+
+
+def extract_node_features(image_rgb, labels, num_nodes):
+    """Her bir superpiksel için ortalama RGB değerlerini hesaplar."""
+    height, width, channels = image_rgb.shape
+    node_features_np = np.zeros((num_nodes, channels), dtype=np.float32)
+    pixel_counts = np.zeros(num_nodes, dtype=np.int32)
+
+    for i in range(height):
+        for j in range(width):
+            label = labels[i, j]
+            if label < num_nodes:
+                node_features_np[label] += image_rgb[i, j]
+                pixel_counts[label] += 1
+
+    pixel_counts_expanded = pixel_counts[:, np.newaxis]
+    node_features_np = np.divide(
+        node_features_np,
+        pixel_counts_expanded,
+        out=node_features_np,
+        where=pixel_counts_expanded != 0
+    )
+
+    node_features_tensor = torch.tensor(node_features_np, dtype=torch.float)
+    y_reco = node_features_tensor.clone()
+    return node_features_tensor, y_reco
+
+
+def create_edge_index(labels):
+    """Superpiksel komşuluklarını bulur."""
+    height, width = labels.shape
+    adj_set = set()
+    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+    for r in range(height):
+        for c in range(width):
+            src_label = labels[r, c]
+            for dr, dc in directions:
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < height and 0 <= nc < width:
+                    dest_label = labels[nr, nc]
+                    if src_label != dest_label:
+                        adj_set.add((int(src_label), int(dest_label)))
+                        adj_set.add((int(dest_label), int(src_label)))
+
+    if not adj_set:
+        return torch.zeros((2, 0), dtype=torch.long)
+
+    source_nodes = [edge[0] for edge in adj_set]
+    target_nodes = [edge[1] for edge in adj_set]
+    edge_index = torch.tensor([source_nodes, target_nodes], dtype=torch.long)
+    return edge_index
+
+
+def calculate_edge_weights(x, edge_index):
+    """Kenar ağırlıklarını hesaplar."""
+    if edge_index.size(1) == 0:
+        return torch.tensor([], dtype=torch.float)
+
+    source_nodes = edge_index[0]
+    target_nodes = edge_index[1]
+    source_features = x[source_nodes]
+    target_features = x[target_nodes]
+    diff_features = source_features - target_features
+    edge_weights = torch.norm(diff_features, p=2, dim=1)
+    return edge_weights
+
+
+def intelligent_prune_edges(x, edge_index, edge_weights, compression_ratio=0.7):
+    """Kenarları kırpar."""
+    if edge_weights.numel() == 0:
+        return edge_index, edge_weights
+
+    scores = edge_weights.cpu().numpy()
+    threshold = np.percentile(scores, (compression_ratio * 100))
+    mask = edge_weights >= threshold
+    mask_tensor = torch.from_numpy(mask).bool() if isinstance(mask, np.ndarray) else mask
+    pruned_edge_index = edge_index[:, mask_tensor]
+    pruned_edge_weights = edge_weights[mask_tensor]
+    return pruned_edge_index, pruned_edge_weights
+
+
+def add_gaussian_noise(g, clip_norm, epsilon, delta):
+    """Gradyanlara gürültü ekler."""
+    sigma = (clip_norm * math.sqrt(2 * math.log(1 / delta))) / epsilon
+    noise = torch.randn_like(g) * sigma
+    return g + noise
+
+
+# ==================== MODELLER ====================
+
+class LightweightTransformerEncoder(nn.Module):
+    def __init__(self, embed_dim, num_heads, dropout=0.1):
+        super().__init__()
+        encoder_layer = nn.TransformerEncoderLayer(
+            d_model=embed_dim,
+            nhead=num_heads,
+            dim_feedforward=embed_dim * 4,
+            dropout=dropout,
+            batch_first=True
+        )
+        self.transformer_encoder = nn.TransformerEncoder(encoder_layer, num_layers=1)
+
+    def forward(self, x):
+        x = x.unsqueeze(0)
+        x_global = self.transformer_encoder(x)
+        x_global = x_global.squeeze(0)
+        return x_global
+
+
+class SemanticDecoder(nn.Module):
+    def __init__(self, in_features, out_channels=3):
+        super().__init__()
+        self.fc1 = nn.Linear(in_features, in_features * 2)
+        self.fc2 = nn.Linear(in_features * 2, out_channels)
+
+    def forward(self, x):
+        x = F.relu(self.fc1(x))
+        return torch.sigmoid(self.fc2(x))
+
+
+class HybridGNNTransformer(nn.Module):
+    def __init__(self, in_channels, hidden_channels, num_classes, num_heads=4):
+        super().__init__()
+        self.gcn1 = GCNConv(in_channels, hidden_channels)
+        self.gcn2 = GCNConv(hidden_channels, hidden_channels)
+        self.transformer = LightweightTransformerEncoder(embed_dim=hidden_channels, num_heads=num_heads)
+        self.classifier = nn.Linear(hidden_channels, num_classes)
+        self.decoder = SemanticDecoder(hidden_channels, out_channels=3)
+
+    def forward(self, data):
+        x, edge_index, edge_attr = data.x, data.edge_index, data.edge_attr
+        x_local = F.relu(self.gcn1(x, edge_index, edge_attr))
+        x_local = F.dropout(x_local, p=0.5, training=self.training)
+        x_local = self.gcn2(x_local, edge_index, edge_attr)
+        x_global = self.transformer(x_local)
+        x_final = x_local + x_global
+        out_cls = F.log_softmax(self.classifier(x_final), dim=1)
+        out_reco = self.decoder(x_final)
+        return out_cls, out_reco
+
+
+# ==================== EĞİTİM FONKSİYONU ====================
+
+def train_gcn_with_dp(model, data, optimizer, num_epochs, dp_enabled=False, clip_norm=1.0, epsilon=1.0, delta=1e-5, lambda_reco=0.5):
+    """Differential Privacy (DP) ile güçlendirilmiş eğitim döngüsü."""
+    classification_criterion = F.nll_loss
+    reconstruction_criterion = nn.MSELoss()
+
+    model.train()
+    for epoch in range(num_epochs):
+        optimizer.zero_grad()
+        out_cls, out_reco = model(data)
+
+        if data.y is not None and data.y.max() < out_cls.size(1):
+            cls_loss = classification_criterion(out_cls, data.y)
+        else:
+            cls_loss = 0.0
+
+        reco_loss = reconstruction_criterion(out_reco, data.y_reco)
+        total_loss = cls_loss + lambda_reco * reco_loss
+        total_loss.backward()
+
+        if dp_enabled:
+            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=clip_norm)
+            for param in model.parameters():
+                if param.grad is not None:
+                    param.grad.data = add_gaussian_noise(
+                        param.grad.data,
+                        clip_norm=clip_norm,
+                        epsilon=epsilon,
+                        delta=delta
+                    )
+
+        optimizer.step()
+
+    return model
@@ -0,0 +1,194 @@
+# memory/services/tier_engine.py
+"""
+Bellek katmanları arasında toplu geçiş.
+
+Tüm kullanıcıların adayları tek geçişte, (memory_tier, expires_at) indeksini
+kullanan sorgularla id parçaları halinde seçilir; katmanlar bir kez yüklenir.
+Her parçada vektörler tek bir PCA dönüşümüyle sıkıştırılır ve değişiklikler
+bulk_update ile tek transaction'da yazılır; kullanım sayaçları (usage) aynı
+transaction'da katmanlar arasında taşınır.
+
+Kurallar settings.MEMORY_TIER_POLICY ile ayarlanır:
+- promote:         süresi PROMOTE_WINDOW_HOURS içinde dolacak short_term öğeler,
+                   erişimi PROMOTE_MIN_ACCESS ve üzerindeyse long_term'e taşınır
+- evict:           EVICT_UNPROMOTED ise taşınamayan adayların süresi hemen
+                   doldurulur (memory_maintenance --cleanup siler)
+- instant promote: erişimi INSTANT_PROMOTE_MIN_ACCESS ve üzerindeki instant
+                   öğeler short_term'e taşınır
+- demote:          DEMOTE_IDLE_DAYS gündür erişilmeyen long_term öğeler
+                   short_term'e iner
+
+bulk_update/update MemoryItem.save()'i çağırmadığı için expires_at burada
+TIER_DURATIONS'a göre hesaplanır.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from memory.models import TIER_DURATIONS, MemoryItem, MemoryTier
+from memory.services.usage import UsageDelta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY = {
+    'PROMOTE_WINDOW_HOURS': 6,
+    'PROMOTE_MIN_ACCESS': 0,
+    'EVICT_UNPROMOTED': False,
+    'INSTANT_PROMOTE_MIN_ACCESS': None,
+    'DEMOTE_IDLE_DAYS': None,
+    'BATCH_SIZE': 1000,
+}
+
+
+def get_policy(overrides=None):
+    policy = dict(DEFAULT_POLICY)
+    policy.update(getattr(settings, 'MEMORY_TIER_POLICY', {}))
+    policy.update(overrides or {})
+    return policy
+
+
+def expires_at_for(tier_name, now=None):
+    """Öğenin `tier_name` katmanına girdiği andan itibaren süre sonu."""
+    return (now or timezone.now()) + TIER_DURATIONS.get(tier_name, TIER_DURATIONS['long_term'])
+
+
+@dataclass
+class TierResult:
+    promoted: int = 0
+    compressed: int = 0
+    evicted: int = 0
+    instant_promoted: int = 0
+    demoted: int = 0
+
+    def summary(self):
+        return (f"long_term'e taşınan: {self.promoted} (sıkıştırılan: {self.compressed}), "
+                f"süresi doldurulan: {self.evicted}, instant -> short_term: {self.instant_promoted}, "
+                f"long_term -> short_term: {self.demoted}")
+
+
+class TierEngine:
+    def __init__(self, policy=None, user_ids=None, compression_engine=None, dry_run=False):
+        self.policy = get_policy(policy)
+        self.user_ids = user_ids
+        self.dry_run = dry_run
+        self._compression = compression_engine
+        self._tiers = None
+
+    @property
+    def compression(self):
+        # PCA modeli yalnızca sıkıştırılacak vektör varsa yüklenir
+        if self._compression is None:
+            from .compression_engine import SemanticCompressionEngine
+            self._compression = SemanticCompressionEngine()
+        return self._compression
+
+    @property
+    def tiers(self):
+        if self._tiers is None:
+            self._tiers = {
+                name: MemoryTier.objects.get_or_create(name=name)[0]
+                for name in ('instant', 'short_term', 'long_term')
+            }
+        return self._tiers
+
+    def _items(self):
+        items = MemoryItem.objects.all()
+        if self.user_ids is not None:
+            items = items.filter(user_id__in=self.user_ids)
+        return items
+
+    def _chunks(self, queryset, fields):
+        last_id = 0
+        while True:
+            chunk = list(queryset.filter(pk__gt=last_id).order_by('pk').only(*fields)[:self.policy['BATCH_SIZE']])
+            if not chunk:
+                return
+            last_id = chunk[-1].pk
+            yield chunk
+
+    def run(self, now=None):
+        now = now or timezone.now()
+        result = TierResult()
+        self.promote_short_term(now, result)
+        if self.policy['INSTANT_PROMOTE_MIN_ACCESS'] is not None:
+            self.promote_instant(now, result)
+        if self.policy['DEMOTE_IDLE_DAYS'] is not None:
+            self.demote_idle(now, result)
+        return result
+
+    def promote_short_term(self, now, result):
+        short_term, long_term = self.tiers['short_term'], self.tiers['long_term']
+        min_access = self.policy['PROMOTE_MIN_ACCESS']
+        candidates = self._items().filter(
+            memory_tier=short_term,
+            expires_at__lte=now + timedelta(hours=self.policy['PROMOTE_WINDOW_HOURS']),
+        )
+        long_term_expiry = expires_at_for(long_term.name, now)
+
+        fields = ('id', 'user_id', 'file_type', 'original_size', 'access_count', 'vector_embedding', 'compressed_embedding')
+        for chunk in self._chunks(candidates, fields):
+            promote = [item for item in chunk if item.access_count >= min_access]
+            evict = [item for item in chunk if item.access_count < min_access] if self.policy['EVICT_UNPROMOTED'] else []
+            pending = [item for item in promote if item.vector_embedding and not item.compressed_embedding]
+            result.promoted += len(promote)
+            result.evicted += len(evict)
+            if self.dry_run:
+                result.compressed += len(pending)
+                continue
+
+            if pending:
+                compressed = self.compression.compress_embeddings([bytes(item.vector_embedding) for item in pending])
+                for item, data in zip(pending, compressed):
+                    if data is not None:
+                        item.compressed_embedding = data
+                        result.compressed += 1
+            usage = UsageDelta()
+            for item in promote:
+                item.memory_tier = long_term
+                item.expires_at = long_term_expiry
+                usage.move(item.user_id, short_term.id, long_term.id, item.file_type, 1, item.original_size)
+            for item in evict:
+                item.expires_at = now
+
+            with transaction.atomic():
+                MemoryItem.objects.bulk_update(promote, ['memory_tier', 'expires_at', 'compressed_embedding'])
+                MemoryItem.objects.bulk_update(evict, ['expires_at'])
+                usage.apply()
+            logger.info(f"{len(promote)} öğe long_term'e taşındı, {len(evict)} öğenin süresi dolduruldu.")
+
+    def promote_instant(self, now, result):
+        candidates = self._items().filter(
+            memory_tier=self.tiers['instant'],
+            access_count__gte=self.policy['INSTANT_PROMOTE_MIN_ACCESS'],
+        )
+        result.instant_promoted += self._move(candidates, 'short_term', now)
+
+    def demote_idle(self, now, result):
+        candidates = self._items().filter(
+            memory_tier=self.tiers['long_term'],
+            last_accessed__lt=now - timedelta(days=self.policy['DEMOTE_IDLE_DAYS']),
+        )
+        result.demoted += self._move(candidates, 'short_term', now)
+
+    def _move(self, candidates, tier_name, now):
+        """Tüm adayların yeni süre sonu aynı olduğundan tek UPDATE yeterlidir."""
+        if self.dry_run:
+            return candidates.count()
+        target = self.tiers[tier_name]
+        with transaction.atomic():
+            usage = UsageDelta()
+            groups = candidates.values('user_id', 'memory_tier_id', 'file_type').annotate(
+                items=Count('id'), bytes=Sum('original_size'),
+            )
+            for group in groups:
+                usage.move(group['user_id'], group['memory_tier_id'], target.id, group['file_type'],
+                           group['items'], group['bytes'] or 0)
+            # update() auto_now alanlarına (last_accessed) dokunmaz
+            moved = candidates.update(memory_tier=target, expires_at=expires_at_for(tier_name, now))
+            usage.apply()
+        return moved
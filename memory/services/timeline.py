@@ -0,0 +1,287 @@
+# memory/services/timeline.py
+"""
+Birden çok kaynaktan (MemoryItem, UserActivity, TimelineEvent) birleşik,
+cursor ile sayfalanan zaman çizelgesi.
+
+- Her kaynak kendi (user, zaman) indeksine göre sıralı, yalnızca gereken
+  sütunları `.values()` ile okuyan ve id parçalarıyla ilerleyen bir iteratördür
+- Kaynaklar heapq.merge ile k-yollu birleştirilir; sayfa tam olarak `limit`
+  olay içerir (kaynak başına limit//2 kesintisi yoktur) ve her kaynaktan en
+  fazla limit+1 satır okunur
+- Toplam sıra (zaman, kaynak sırası, id) anahtarıdır; cursor bu anahtarı ve
+  yönü taşır, böylece aynı zaman damgalı olaylar atlanmaz/tekrarlanmaz
+- `next_cursor` sıradaki, `previous_cursor` önceki sayfayı getirir
+- İstekten gelen limit `parse_limit` ile doğrulanır (en az 1, en fazla MAX_LIMIT)
+"""
+import base64
+import heapq
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Callable
+
+from django.db.models import Q
+from django.utils import timezone
+
+from memory.models import MemoryItem, TimelineEvent, UserActivity
+
+UNBOUNDED_CHUNK = 500
+# Bir sayfada dönebilecek en fazla olay
+MAX_LIMIT = 200
+CRITICAL_ACTIVITY_TYPES = ('file_open', 'file_save', 'app_switch')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class InvalidLimit(ValueError):
+    pass
+
+
+def parse_limit(value, default=None, maximum=MAX_LIMIT):
+    """
+    İstek parametresindeki sayfa boyutu. Verilmemişse `default`; sayı
+    olmayan ya da 1'den küçük değerler InvalidLimit, `maximum`'dan
+    büyükler `maximum`'a indirilir.
+    """
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise InvalidLimit("Geçersiz limit.")
+    if limit < 1:
+        raise InvalidLimit("limit en az 1 olmalı.")
+    return min(limit, maximum)
+
+
+@dataclass
+class Source:
+    name: str
+    queryset: object
+    timestamp_field: str
+    fields: tuple
+    format: Callable[[dict], dict]
+
+
+@dataclass
+class TimelinePage:
+    events: list = field(default_factory=list)
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+
+
+def encode_cursor(timestamp, source, row_id, backward=False):
+    payload = json.dumps({'t': timestamp.isoformat(), 's': source, 'i': row_id, 'b': int(backward)})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, source_names):
+    """Dönüş: ((zaman, kaynak sırası, id), geri_mi)."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        timestamp = datetime.fromisoformat(payload['t'])
+        rank = source_names.index(payload['s'])
+        return (timestamp, rank, int(payload['i'])), bool(payload['b'])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Geçersiz cursor.")
+
+
+def _after(source, rank, position, descending):
+    """Kaynağın, gezinme sırasında `position`'dan sonra gelen satırları."""
+    timestamp, position_rank, position_id = position
+    ts = source.timestamp_field
+    strict, loose, id_lookup = ('lt', 'lte', 'id__lt') if descending else ('gt', 'gte', 'id__gt')
+    # Aynı zaman damgasında kaynak sırası belirleyicidir
+    if rank == position_rank:
+        return Q(**{f'{ts}__{strict}': timestamp}) | Q(**{ts: timestamp, id_lookup: position_id})
+    comes_later = rank < position_rank if descending else rank > position_rank
+    return Q(**{f'{ts}__{loose if comes_later else strict}': timestamp})
+
+
+def _rows(source, rank, position, descending, chunk_size):
+    sign = '-' if descending else ''
+    ordered = source.queryset.order_by(f'{sign}{source.timestamp_field}', f'{sign}id').values(*source.fields)
+    while True:
+        chunk = ordered.filter(_after(source, rank, position, descending)) if position else ordered
+        rows = list(chunk[:chunk_size])
+        for row in rows:
+            yield (row[source.timestamp_field], rank, row['id']), row
+        if len(rows) < chunk_size:
+            return
+        position = (rows[-1][source.timestamp_field], rank, rows[-1]['id'])
+
+
+def merged_timeline(sources, limit=None, cursor=None, newest_first=True):
+    """
+    sources: Source listesi (sıra, eşit zaman damgalarında önceliği belirler).
+    limit=None ise tüm olaylar döner (cursor üretilmez).
+    """
+    if limit is not None and limit < 1:
+        raise InvalidLimit("limit en az 1 olmalı.")
+    names = [source.name for source in sources]
+    position, backward = decode_cursor(cursor, names) if cursor else (None, False)
+    descending = newest_first != backward
+    chunk_size = UNBOUNDED_CHUNK if limit is None else limit + 1
+
+    streams = [_rows(source, rank, position, descending, chunk_size) for rank, source in enumerate(sources)]
+    merged = heapq.merge(*streams, key=lambda entry: entry[0], reverse=descending)
+    if limit is None:
+        entries, has_more = list(merged), False
+    else:
+        entries = list(islice(merged, limit + 1))
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+    if backward:
+        entries.reverse()
+
+    page = TimelinePage(events=[sources[key[1]].format(row) for key, row in entries])
+    if limit is None or not entries:
+        return page
+
+    def cursor_at(entry, backward):
+        (timestamp, rank, row_id), _ = entry
+        return encode_cursor(timestamp, names[rank], row_id, backward)
+
+    if backward:
+        page.next_cursor = cursor_at(entries[-1], False)
+        page.previous_cursor = cursor_at(entries[0], True) if has_more else None
+    else:
+        page.next_cursor = cursor_at(entries[-1], False) if has_more else None
+        page.previous_cursor = cursor_at(entries[0], True) if position else None
+    return page
+
+
+# --- Kaynaklar ---
+
+def memory_source(user, start, end=None, fields=(), format=None):
+    items = MemoryItem.objects.filter(user=user, created_at__gte=start)
+    if end is not None:
+        items = items.filter(created_at__lt=end)
+    return Source('memory', items, 'created_at', ('id', 'created_at') + tuple(fields), format)
+
+
+def activity_source(user, start, end=None, activity_types=None, fields=(), format=None):
+    activities = UserActivity.objects.filter(user=user, timestamp__gte=start)
+    if end is not None:
+        activities = activities.filter(timestamp__lt=end)
+    if activity_types:
+        activities = activities.filter(activity_type__in=activity_types)
+    return Source('activity', activities, 'timestamp', ('id', 'timestamp') + tuple(fields), format)
+
+
+def event_source(user, start, fields=(), format=None):
+    events = TimelineEvent.objects.filter(user=user, timestamp__gte=start)
+    return Source('timeline_event', events, 'timestamp', ('id', 'timestamp') + tuple(fields), format)
+
+
+# --- Hazır görünümler ---
+
+def _recall_memory(row):
+    return {
+        'type': 'memory',
+        'timestamp': row['created_at'],
+        'title': f"{row['file_name']}",
+        'description': f"{row['file_type']} - {row['memory_tier__name']}",
+        'thumbnail': row['thumbnail_path'],
+        'metadata': {
+            'file_path': row['file_path'],
+            'memory_tier': row['memory_tier__name'],
+            'access_count': row['access_count'],
+        },
+    }
+
+
+def _recall_activity(row):
+    return {
+        'type': 'activity',
+        'timestamp': row['timestamp'],
+        'title': f"{row['activity_type']}",
+        'description': row['target_file'] or row['application'],
+        'metadata': {
+            'activity_type': row['activity_type'],
+            'application': row['application'],
+            'window_title': row['window_title'],
+        },
+    }
+
+
+def recall_timeline(user, days=7, limit=50, cursor=None):
+    """Windows Recall benzeri görünüm: hafıza öğeleri ve aktiviteler, yeniden eskiye."""
+    start = timezone.now() - timedelta(days=days)
+    return merged_timeline([
+        memory_source(user, start, fields=(
+            'file_name', 'file_type', 'file_path', 'thumbnail_path', 'access_count', 'memory_tier__name',
+        ), format=_recall_memory),
+        activity_source(user, start, fields=(
+            'activity_type', 'target_file', 'application', 'window_title',
+        ), format=_recall_activity),
+    ], limit=limit, cursor=cursor)
+
+
+def _fused_event(row):
+    row['source'] = 'TimelineEvent'
+    row['sort_key'] = row['timestamp']
+    return row
+
+
+def _fused_activity(row):
+    row['source'] = 'UserActivity'
+    row['event_type'] = row.pop('activity_type')
+    row['title'] = f"Aktivite: {row['window_title']}"
+    row['sort_key'] = row['timestamp']
+    return row
+
+
+def fused_timeline(user, days=7, limit=100, cursor=None):
+    """TimelineEvent'ler ve kritik aktiviteler, yeniden eskiye."""
+    start = timezone.now() - timedelta(days=days)
+    return merged_timeline([
+        event_source(user, start, fields=(
+            'event_type', 'title', 'description', 'confidence_score',
+        ), format=_fused_event),
+        activity_source(user, start, activity_types=CRITICAL_ACTIVITY_TYPES, fields=(
+            'activity_type', 'window_title', 'context',
+        ), format=_fused_activity),
+    ], limit=limit, cursor=cursor)
+
+
+def _day_memory(row):
+    return {
+        'type': 'memory',
+        'id': row['id'],
+        'timestamp': row['created_at'],
+        'title': row['file_name'],
+        'file_type': row['file_type'],
+        'file_path': row['file_path'],
+        'memory_tier': row['memory_tier__name'],
+        'thumbnail': row['thumbnail_path'],
+        'content_summary': row['content_summary'],
+    }
+
+
+def _day_activity(row):
+    return {
+        'type': 'activity',
+        'id': row['id'],
+        'timestamp': row['timestamp'],
+        'activity_type': row['activity_type'],
+        'application': row['application'],
+        'window_title': row['window_title'],
+        'target_file': row['target_file'],
+    }
+
+
+def day_timeline(user, day_start, limit=None, cursor=None):
+    """Bir günün olayları, eskiden yeniye; limit verilmezse tamamı."""
+    day_end = day_start + timedelta(days=1)
+    return merged_timeline([
+        memory_source(user, day_start, day_end, fields=(
+            'file_name', 'file_type', 'file_path', 'memory_tier__name', 'thumbnail_path', 'content_summary',
+        ), format=_day_memory),
+        activity_source(user, day_start, day_end, fields=(
+            'activity_type', 'application', 'window_title', 'target_file',
+        ), format=_day_activity),
+    ], limit=limit, cursor=cursor, newest_first=False)
@@ -0,0 +1,183 @@
+# memory/services/usage.py
+"""
+Kullanıcı başına bellek kullanım sayaçları ve kota kontrolü.
+
+MemoryItem ekleyen/silen/katman değiştiren her yol (yükleme, disk_sync,
+temizlik, tier_engine) değişikliği bir UsageDelta'da toplar ve aynı
+transaction içinde `apply()` ile yazar:
+- UserMemoryProfile.total_items / total_bytes / total_memory_used_mb
+- MemoryUsageCounter (kullanıcı, katman, dosya türü) satırları
+Güncellemeler F() ifadeleriyle yapılır; okuma-değiştirme-yazma yarışı yoktur.
+İstatistik uçları böylece tablo taramak yerine profil ve sayaç satırlarını okur.
+
+Sayaçlara yansımayan değişiklikler (admin, elle SQL) `reconcile()` ile
+düzeltilir (memory_maintenance --reconcile-usage). Kilit sırası her yerde
+önce profil, sonra sayaçlardır.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from memory.models import MemoryItem, MemoryUsageCounter, UserMemoryProfile
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+class UsageDelta:
+    """(user_id, tier_id, file_type) -> [öğe, bayt] farkları."""
+
+    def __init__(self):
+        self.rows = defaultdict(lambda: [0, 0])
+
+    def add(self, user_id, tier_id, file_type, items=1, size=0):
+        row = self.rows[(user_id, tier_id, file_type)]
+        row[0] += items
+        row[1] += size or 0
+
+    def add_item(self, item, sign=1):
+        self.add(item.user_id, item.memory_tier_id, item.file_type, sign, sign * (item.original_size or 0))
+
+    def move(self, user_id, from_tier_id, to_tier_id, file_type, items, size):
+        self.add(user_id, from_tier_id, file_type, -items, -size)
+        self.add(user_id, to_tier_id, file_type, items, size)
+
+    def apply(self):
+        """Çağıranın transaction'ı içinde çalıştırılmalıdır."""
+        totals = defaultdict(lambda: [0, 0])
+        for (user_id, _, _), (items, size) in self.rows.items():
+            totals[user_id][0] += items
+            totals[user_id][1] += size
+
+        for user_id, (items, size) in sorted(totals.items()):
+            if items or size:
+                _bump_profile(user_id, items, size)
+        for (user_id, tier_id, file_type), (items, size) in sorted(self.rows.items()):
+            if items or size:
+                _bump_counter(user_id, tier_id, file_type, items, size)
+        self.rows.clear()
+
+
+def _bump_profile(user_id, items, size):
+    changes = {
+        'total_items': F('total_items') + items,
+        'total_bytes': F('total_bytes') + size,
+        'total_memory_used_mb': F('total_memory_used_mb') + size / MB,
+    }
+    if not UserMemoryProfile.objects.filter(user_id=user_id).update(**changes):
+        UserMemoryProfile.objects.get_or_create(user_id=user_id)
+        UserMemoryProfile.objects.filter(user_id=user_id).update(**changes)
+
+
+def _bump_counter(user_id, tier_id, file_type, items, size):
+    counter = MemoryUsageCounter.objects.filter(user_id=user_id, memory_tier_id=tier_id, file_type=file_type)
+    changes = {'items': F('items') + items, 'bytes': F('bytes') + size}
+    if counter.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            MemoryUsageCounter.objects.create(
+                user_id=user_id, memory_tier_id=tier_id, file_type=file_type, items=items, bytes=size,
+            )
+    except IntegrityError:
+        # Eşzamanlı başka bir istek satırı az önce oluşturdu
+        counter.update(**changes)
+
+
+def record_created(item):
+    delta = UsageDelta()
+    delta.add_item(item)
+    delta.apply()
+
+
+def reserve_quota(user, incoming_bytes):
+    """
+    Yeni `incoming_bytes` kotayı aşacaksa QuotaExceeded. Profil satırı
+    kilitlenir; çağıranın transaction'ı içinde, MemoryItem oluşturulup
+    `record_created` ile sayaçlara yazılmadan hemen önce çağrılmalıdır.
+    Böylece aynı kullanıcının eşzamanlı yüklemeleri kilitte sıralanır ve
+    kalan boşluğu ikisi birden kullanamaz.
+    """
+    UserMemoryProfile.objects.get_or_create(user=user)
+    profile = UserMemoryProfile.objects.select_for_update().get(user=user)
+    limit = profile.memory_quota_mb * MB
+    if profile.total_bytes + incoming_bytes > limit:
+        raise QuotaExceeded(
+            f"Bellek kotası aşıldı: {profile.total_bytes / MB:.1f} MB kullanılıyor, "
+            f"kota {profile.memory_quota_mb:.0f} MB, yüklenen {incoming_bytes / MB:.1f} MB."
+        )
+    return profile
+
+
+def get_usage(user):
+    """Profil satırı ve kullanıcının sayaç satırlarından kullanım özeti (iki sorgu)."""
+    profile, _ = UserMemoryProfile.objects.get_or_create(user=user)
+    by_tier, by_file_type = defaultdict(lambda: {'items': 0, 'bytes': 0}), defaultdict(lambda: {'items': 0, 'bytes': 0})
+    rows = MemoryUsageCounter.objects.filter(user=user, items__gt=0).values_list('memory_tier__name', 'file_type', 'items', 'bytes')
+    for tier_name, file_type, items, size in rows:
+        for bucket in (by_tier[tier_name], by_file_type[file_type]):
+            bucket['items'] += items
+            bucket['bytes'] += size
+    return {
+        'profile': profile,
+        'items': profile.total_items,
+        'bytes': profile.total_bytes,
+        'used_mb': profile.total_bytes / MB,
+        'quota_mb': profile.memory_quota_mb,
+        'by_tier': dict(by_tier),
+        'by_file_type': dict(by_file_type),
+    }
+
+
+def reconcile(user_ids=None, dry_run=False):
+    """
+    Sayaçları MemoryItem tablosundan yeniden hesaplar.
+    Dönüş: {user_id: (sayaçtaki öğe, gerçek öğe, sayaçtaki bayt, gerçek bayt)} (yalnızca farklı olanlar).
+    """
+    if user_ids is None:
+        user_ids = (
+            set(MemoryItem.objects.values_list('user_id', flat=True).distinct())
+            | set(MemoryUsageCounter.objects.values_list('user_id', flat=True).distinct())
+            | set(UserMemoryProfile.objects.exclude(total_items=0, total_bytes=0).values_list('user_id', flat=True))
+        )
+
+    drift = {}
+    for user_id in sorted(user_ids):
+        with transaction.atomic():
+            UserMemoryProfile.objects.get_or_create(user_id=user_id)
+            profile = UserMemoryProfile.objects.select_for_update().get(user_id=user_id)
+            actual = {
+                (row['memory_tier_id'], row['file_type']): (row['items'], row['bytes'] or 0)
+                for row in MemoryItem.objects.filter(user_id=user_id)
+                .values('memory_tier_id', 'file_type').annotate(items=Count('id'), bytes=Sum('original_size'))
+            }
+            stored = {
+                (tier_id, file_type): (items, size)
+                for tier_id, file_type, items, size in MemoryUsageCounter.objects.filter(user_id=user_id)
+                .exclude(items=0, bytes=0).values_list('memory_tier_id', 'file_type', 'items', 'bytes')
+            }
+            items = sum(value[0] for value in actual.values())
+            size = sum(value[1] for value in actual.values())
+            if actual == stored and (profile.total_items, profile.total_bytes) == (items, size):
+                continue
+            drift[user_id] = (profile.total_items, items, profile.total_bytes, size)
+            if dry_run:
+                continue
+
+            MemoryUsageCounter.objects.filter(user_id=user_id).delete()
+            MemoryUsageCounter.objects.bulk_create([
+                MemoryUsageCounter(user_id=user_id, memory_tier_id=tier_id, file_type=file_type, items=count, bytes=total)
+                for (tier_id, file_type), (count, total) in actual.items()
+            ])
+            profile.total_items, profile.total_bytes, profile.total_memory_used_mb = items, size, size / MB
+            profile.save(update_fields=['total_items', 'total_bytes', 'total_memory_used_mb'])
+    if drift:
+        logger.info(f"Kullanım sayaçları {len(drift)} kullanıcı için düzeltildi.")
+    return drift
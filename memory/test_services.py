@@ -0,0 +1,836 @@
+# memory/test_services.py
+"""
+memory.services modülleri ve bakım komutlarının testleri. AI modelleri
+yüklenmez; model çağrıları sahte işçilerle değiştirilir.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import types
+from io import StringIO
+from unittest.mock import patch
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from django.utils import timezone
+
+from memory.management.commands.memory_maintenance import Command as MaintenanceCommand
+from memory.models import (
+    FaceEncoding, MemoryItem, MemoryTier, MemoryUsageCounter, Person, UserActivity, UserMemoryProfile,
+    VideoFrame,
+)
+from memory.services import (
+    activity_buffer, context_features, disk_sync, embedding_worker, face_index, faces, timeline, usage,
+)
+from memory.services.tier_engine import TierEngine
+from memory.views import get_timeline_by_date, get_windows_recall_timeline, track_user_activities_batch
+from memory.services.search_engines import BruteForceEngine, VectorizedEngine
+
+User = get_user_model()
+
+
+def create_items(user, count, tier_name='short_term', **fields):
+    tier, _ = MemoryTier.objects.get_or_create(name=tier_name)
+    return [
+        MemoryItem.objects.create(
+            user=user, memory_tier=tier, file_path=f'/yok/not{i}.txt', file_type='text',
+            original_size=100, structural_data='{}', **fields
+        ) for i in range(count)
+    ]
+
+
+class VectorizedEngineTests(SimpleTestCase):
+    """Tekrarlı anahtarlar ilk k'yı doldurmamalı; sonuç kesin aramayla aynı olmalı."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.query = rng.standard_normal(16).astype(np.float32)
+        # Sorguya çok yakın 50 kare tek bir videoya ait
+        frames = self.query + 0.01 * rng.standard_normal((50, 16))
+        others = rng.standard_normal((30, 16))
+        self.keys = ['video'] * 50 + [f'item{i}' for i in range(30)]
+        self.matrix = np.vstack([frames, others]).astype(np.float32)
+
+    def _search(self, engine, k):
+        engine.build(self.keys, self.matrix)
+        return engine.search(self.query, k=k)
+
+    def test_duplicates_do_not_crowd_out_other_keys(self):
+        results = self._search(VectorizedEngine(), k=5)
+        reference = self._search(BruteForceEngine(), k=5)
+        self.assertEqual([key for key, _ in results], [key for key, _ in reference])
+        self.assertEqual(len({key for key, _ in results}), 5)
+        for (_, score), (_, expected) in zip(results, reference):
+            self.assertAlmostEqual(score, expected, places=5)
+
+    def test_k_larger_than_unique_keys(self):
+        results = self._search(VectorizedEngine(), k=100)
+        self.assertEqual(len(results), 31)
+        self.assertEqual(results[0][0], 'video')
+        scores = [score for _, score in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_empty_index(self):
+        engine = VectorizedEngine()
+        engine.build([], np.zeros((0, 16), dtype=np.float32))
+        self.assertEqual(engine.search(self.query, k=3), [])
+
+
+class GenerateEmbeddingsCheckpointTests(TestCase):
+    """Yarıda kalan çalışma kontrol noktasından devam etmeli, işlenenleri tekrar etmemeli."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='gomucu', email='gomucu@example.com', password='password')
+        self.items = create_items(self.user, 5)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.checkpoint = os.path.join(self.directory, 'checkpoint.json')
+        self.processed = []
+
+    def _fake_batch(self, fail_on_call=None):
+        def process_batch(tasks, **options):
+            if len(self.processed) + 1 == fail_on_call:
+                raise RuntimeError('işçi çöktü')
+            self.processed.append([task['id'] for task in tasks])
+            return [
+                {'id': task['id'], 'embedding': b'\x00' * 8, 'summary': None,
+                 'frames': None, 'faces': None, 'error': None}
+                for task in tasks
+            ]
+        return process_batch
+
+    def _run(self, *args, fail_on_call=None):
+        with patch('memory.services.embedding_worker.process_batch', self._fake_batch(fail_on_call)):
+            call_command(
+                'generate_embeddings', '--skip-sync', '--batch-size', '2',
+                '--checkpoint', self.checkpoint, *args, stdout=StringIO()
+            )
+
+    def test_resume_after_crash(self):
+        ids = [item.id for item in self.items]
+        with self.assertRaises(RuntimeError):
+            self._run(fail_on_call=2)
+        with open(self.checkpoint, encoding='utf-8') as handle:
+            self.assertEqual(json.load(handle)['last_id'], ids[1])
+        self.assertEqual(MemoryItem.objects.filter(vector_embedding__isnull=False).count(), 2)
+
+        self.processed.clear()
+        self._run()
+        self.assertEqual(self.processed, [ids[2:4], ids[4:]])
+        self.assertFalse(MemoryItem.objects.filter(vector_embedding__isnull=True).exists())
+        # Tamamlanan çalışmanın kontrol noktası kalmaz
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_checkpoint_with_other_filters_is_ignored(self):
+        ids = [item.id for item in self.items]
+        with open(self.checkpoint, 'w', encoding='utf-8') as handle:
+            json.dump({'filters': {'force': True}, 'last_id': ids[3], 'processed': 4}, handle)
+        self._run()
+        self.assertEqual(sum(self.processed, []), ids)
+
+    def test_rerun_without_force_replaces_faces(self):
+        item = self.items[0]
+        person = Person.objects.create(user=self.user)
+        FaceEncoding.objects.create(
+            person=person, memory_item=item, encoding=face(0).tobytes(),
+            location_top=0, location_right=1, location_bottom=1, location_left=0,
+        )
+        MemoryItem.objects.exclude(pk=item.pk).update(vector_embedding=b'\x00')
+
+        def process_batch(tasks, **options):
+            return [
+                {'id': task['id'], 'embedding': b'\x00' * 8, 'summary': None, 'frames': None, 'error': None,
+                 'faces': [{'encoding': face(0).tobytes(), 'location': (0, 10, 10, 0)}]}
+                for task in tasks
+            ]
+
+        with patch('memory.services.embedding_worker.process_batch', process_batch), \
+                patch.object(face_index, 'invalidate') as invalidate:
+            call_command('generate_embeddings', '--skip-sync', '--checkpoint', self.checkpoint, stdout=StringIO())
+        # Eski yüz silinip yenisiyle değişir; kopya birikmez
+        self.assertEqual(FaceEncoding.objects.filter(memory_item=item).count(), 1)
+        invalidate.assert_called_once_with(self.user.id)
+
+    def test_restart_ignores_checkpoint(self):
+        with self.assertRaises(RuntimeError):
+            self._run('--force', fail_on_call=2)
+        self.processed.clear()
+        self._run('--force', '--restart')
+        self.assertEqual(sum(self.processed, []), [item.id for item in self.items])
+
+
+class EmbeddingWorkerTests(SimpleTestCase):
+    """Bir gruptaki görüntülerin yüzleri tek bir toplu çağrıyla bulunmalı."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.tasks = []
+        for i in range(3):
+            path = os.path.join(self.directory, f'resim{i}.jpg')
+            open(path, 'wb').close()
+            self.tasks.append({'id': i + 1, 'kind': 'image', 'file_name': f'resim{i}.jpg', 'file_path': path})
+        self.service = types.SimpleNamespace(
+            get_image_embeddings=lambda paths, batch_size: [np.zeros(4, dtype=np.float32) for _ in paths],
+            detect_and_encode_faces_batch=lambda paths, workers=None: [
+                [{'encoding': face(i), 'location': (0, 10, 10, 0)}] for i, _ in enumerate(paths)
+            ],
+        )
+
+    def test_faces_detected_in_one_batch_call(self):
+        with patch.object(self.service, 'detect_and_encode_faces_batch',
+                          wraps=self.service.detect_and_encode_faces_batch) as batch, \
+                patch.object(embedding_worker, '_service', self.service):
+            results = embedding_worker.process_batch(self.tasks, face_workers=2)
+        batch.assert_called_once_with([task['file_path'] for task in self.tasks], workers=2)
+        self.assertEqual([result['faces'][0]['encoding'] for result in results],
+                         [face(i).tobytes() for i in range(3)])
+
+    def test_no_faces_skips_detection(self):
+        with patch.object(self.service, 'detect_and_encode_faces_batch') as batch, \
+                patch.object(embedding_worker, '_service', self.service):
+            results = embedding_worker.process_batch(self.tasks, detect_faces=False)
+        batch.assert_not_called()
+        self.assertEqual([result['faces'] for result in results], [None] * 3)
+
+
+class DiskSyncTests(TestCase):
+    """Yeni, değişen ve silinen dosyalar manifestle bulunmalı; değişmeyenler veritabanına gitmemeli."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='esitle', email='esitle@example.com', password='password')
+        self.tier, _ = MemoryTier.objects.get_or_create(name='short_term')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.user_path = os.path.join(self.directory, 'uploads', str(self.user.id))
+        os.makedirs(self.user_path)
+        self.manifest = disk_sync.Manifest(os.path.join(self.directory, 'manifest.json'))
+
+    def _write(self, name, content, mtime=None):
+        path = os.path.join(self.user_path, name)
+        with open(path, 'wb') as handle:
+            handle.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def _sync(self, prune=False, manifest=None):
+        return disk_sync.sync_user(self.user.id, self.user_path, manifest or self.manifest, self.tier, prune=prune)
+
+    def test_new_changed_and_deleted(self):
+        self._write('a.txt', b'ilk', mtime=1_000_000)
+        self._write('b.txt', b'ikinci')
+        result = self._sync()
+        self.assertEqual(result.new, ['a.txt', 'b.txt'])
+        self.assertEqual(MemoryItem.objects.filter(user=self.user).count(), 2)
+        MemoryItem.objects.filter(user=self.user).update(vector_embedding=b'\x00')
+
+        # Değişmeyen klasör: veritabanına hiç gidilmez
+        with self.assertNumQueries(0):
+            result = self._sync()
+        self.assertEqual((result.new, result.changed, result.unchanged), ([], [], 2))
+
+        # Aynı boyut, farklı mtime da değişiklik sayılır
+        self._write('a.txt', b'son', mtime=2_000_000)
+        os.remove(os.path.join(self.user_path, 'b.txt'))
+        result = self._sync(prune=True)
+        self.assertEqual((result.changed, result.deleted), (['a.txt'], ['b.txt']))
+        item = MemoryItem.objects.get(user=self.user)
+        self.assertEqual(item.file_name, 'a.txt')
+        self.assertIsNone(item.vector_embedding)
+
+    def test_changed_file_drops_derived_data(self):
+        self._write('foto.jpg', b'eski', mtime=1_000_000)
+        self._sync()
+        item = MemoryItem.objects.get(user=self.user)
+        MemoryItem.objects.filter(pk=item.pk).update(
+            vector_embedding=b'\x00', compressed_embedding=b'\x01', content_summary='eski özet'
+        )
+        person = Person.objects.create(user=self.user)
+        FaceEncoding.objects.create(
+            person=person, memory_item=item, encoding=face(0).tobytes(),
+            location_top=0, location_right=1, location_bottom=1, location_left=0,
+        )
+        VideoFrame.objects.create(memory_item=item, timestamp=1.0, vector_embedding=b'\x00')
+
+        self._write('foto.jpg', b'yeni', mtime=2_000_000)
+        with patch.object(face_index, 'invalidate') as invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self._sync().changed, ['foto.jpg'])
+        item.refresh_from_db()
+        self.assertIsNone(item.vector_embedding)
+        self.assertIsNone(item.compressed_embedding)
+        self.assertIsNone(item.content_summary)
+        self.assertFalse(FaceEncoding.objects.filter(memory_item=item).exists())
+        self.assertFalse(VideoFrame.objects.filter(memory_item=item).exists())
+        invalidate.assert_called_once_with(self.user.id)
+
+    def test_deleted_kept_without_prune(self):
+        self._write('a.txt', b'veri')
+        self._sync()
+        os.remove(os.path.join(self.user_path, 'a.txt'))
+        result = self._sync()
+        self.assertEqual(result.deleted, ['a.txt'])
+        self.assertTrue(MemoryItem.objects.filter(user=self.user, file_name='a.txt').exists())
+
+    def test_rebuilt_manifest_compares_size_with_database(self):
+        self._write('same.txt', b'1234')
+        self._write('grown.txt', b'1234')
+        self._sync()
+        MemoryItem.objects.filter(user=self.user).update(vector_embedding=b'\x00')
+        self._write('grown.txt', b'12345678')
+
+        # --rebuild-manifest: manifest boş, yalnızca veritabanındaki boyut bilinir
+        result = self._sync(manifest=disk_sync.Manifest(os.path.join(self.directory, 'yeni.json')))
+        self.assertEqual((result.new, result.changed, result.unchanged), ([], ['grown.txt'], 1))
+        grown = MemoryItem.objects.get(user=self.user, file_name='grown.txt')
+        self.assertEqual(grown.original_size, 8)
+        self.assertIsNone(grown.vector_embedding)
+        self.assertIsNotNone(MemoryItem.objects.get(user=self.user, file_name='same.txt').vector_embedding)
+
+
+def face(axis, noise=0.0, seed=0):
+    """`axis` ekseni çevresinde 128 boyutlu sahte yüz kodlaması."""
+    encoding = np.zeros(face_index.ENCODING_DIM)
+    encoding[axis] = 1.0
+    return encoding + noise * np.random.default_rng(seed).standard_normal(face_index.ENCODING_DIM)
+
+
+class FaceIndexTests(TestCase):
+    """Yüz indeksi, eşleştirme ve yeniden kümeleme face_recognition olmadan test edilir."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='yuzler', email='yuzler@example.com', password='password')
+        self.item = create_items(self.user, 1)[0]
+        face_index.invalidate(self.user.id)
+        self.addCleanup(face_index.invalidate, self.user.id)
+
+    def _store(self, person, encoding):
+        return FaceEncoding.objects.create(
+            person=person, memory_item=self.item, encoding=np.asarray(encoding).tobytes(),
+            location_top=0, location_right=1, location_bottom=1, location_left=0,
+        )
+
+    def test_nearest_centroid_and_growth(self):
+        index = face_index.FaceIndex()
+        self.assertEqual(index.nearest(face(0))[0].tolist(), [-1])
+        for person_id in range(40):
+            self.assertTrue(index.add(person_id, face(person_id)))
+        self.assertFalse(index.add(3, face(3)))
+        person_ids, distances = index.nearest(np.vstack([face(3, 0.01), face(39, 0.01, seed=1)]))
+        self.assertEqual(person_ids.tolist(), [3, 39])
+        self.assertTrue(np.all(distances < 0.2))
+
+    def test_from_db_averages_encodings(self):
+        person = Person.objects.create(user=self.user, name='A')
+        self._store(person, face(0))
+        self._store(person, face(1))
+        index = face_index.FaceIndex.from_db(self.user.id)
+        self.assertEqual(index.size, 1)
+        (_,), (distance,) = index.nearest((face(0) + face(1)) / 2)
+        self.assertAlmostEqual(distance, 0.0)
+
+    def test_assign_faces_counts_people_once(self):
+        Person.objects.create(user=self.user, name='Eski')
+        encodings = [face(0), face(0, 0.01), face(1), face(2)]
+        # indeks yükleme, kişi sayısı (bir kez), 3 yeni kişi
+        with self.assertNumQueries(5):
+            person_ids = face_index.assign_faces(self.user.id, encodings)
+        self.assertEqual(person_ids[0], person_ids[1])
+        self.assertEqual(len(set(person_ids)), 3)
+        names = Person.objects.filter(pk__in=person_ids).order_by('id').values_list('name', flat=True)
+        self.assertEqual(list(names), ['Kişi #2', 'Kişi #3', 'Kişi #4'])
+        # Aynı süreçte indeks güncel: tekrar eşleştirme yeni kişi açmaz
+        self.assertEqual(face_index.assign_faces(self.user.id, [face(2, 0.01)]), [person_ids[3]])
+
+    def test_chinese_whispers_separates_clusters(self):
+        encodings = [face(0, 0.02, seed) for seed in range(5)] + [face(1, 0.02, seed) for seed in range(5, 9)]
+        labels = face_index.chinese_whispers(encodings).tolist()
+        self.assertEqual(len(set(labels[:5])), 1)
+        self.assertEqual(len(set(labels[5:])), 1)
+        self.assertNotEqual(labels[0], labels[5])
+        self.assertEqual(face_index.chinese_whispers([face(0), face(5)]).tolist(), [0, 1])
+
+    def test_recluster_faces(self):
+        named = Person.objects.create(user=self.user, name='Ayşe', is_identified=True)
+        mixed = Person.objects.create(user=self.user, name='Kişi #2')
+        stray = Person.objects.create(user=self.user, name='Kişi #3')
+        # Ayşe'nin yüzlerinden biri yanlışlıkla "mixed"e, mixed'in biri "stray"e atanmış
+        for seed in range(3):
+            self._store(named, face(0, 0.02, seed))
+        self._store(mixed, face(0, 0.02, 3))
+        for seed in range(4, 6):
+            self._store(mixed, face(1, 0.02, seed))
+        self._store(stray, face(1, 0.02, 6))
+
+        call_command('recluster_faces', '--user', str(self.user.id), '--dry-run', stdout=StringIO())
+        self.assertEqual(FaceEncoding.objects.filter(person=stray).count(), 1)
+
+        call_command('recluster_faces', '--user', str(self.user.id), stdout=StringIO())
+        self.assertEqual(FaceEncoding.objects.filter(person=named).count(), 4)
+        self.assertEqual(FaceEncoding.objects.filter(person=mixed).count(), 3)
+        self.assertFalse(Person.objects.filter(pk=stray.pk).exists())
+
+
+class FaceDetectionTests(SimpleTestCase):
+    """Küçültülmüş kopyada tespit, tam çözünürlükte kırpıp kodlama (sahte dedektörle)."""
+
+    def setUp(self):
+        self.calls = []
+
+    def _detector(self, boxes_by_side):
+        def face_locations(image, number_of_times_to_upsample=1):
+            side = max(image.shape[:2])
+            self.calls.append(side)
+            return boxes_by_side.get(side, [])
+
+        def face_encodings(image, known_face_locations=None):
+            self.calls.append(('encode', image.shape[:2], tuple(known_face_locations[0])))
+            return [np.zeros(face_index.ENCODING_DIM)]
+
+        module = types.SimpleNamespace(face_locations=face_locations, face_encodings=face_encodings)
+        return patch.dict(sys.modules, {'face_recognition': module})
+
+    def test_scale_box(self):
+        self.assertEqual(faces.scale_box((10, 60, 50, 20), 0.5, 1000, 1000), (20, 120, 100, 40))
+        # Tam çözünürlük sınırlarına kırpılır
+        self.assertEqual(faces.scale_box((-1, 410, 260, -2), 0.25, 1000, 1600), (0, 1600, 1000, 0))
+
+    def test_crop_around(self):
+        image = np.arange(100 * 100 * 3, dtype=np.uint8).reshape(100, 100, 3)
+        crop, local_box = faces.crop_around(image, (40, 60, 60, 40))
+        self.assertEqual(crop.shape[:2], (30, 30))
+        self.assertEqual(local_box, (5, 25, 25, 5))
+        self.assertTrue(crop.flags['C_CONTIGUOUS'])
+        np.testing.assert_array_equal(crop, image[35:65, 35:65])
+
+        # Kenardaki kutuda pay görüntü dışına taşmaz
+        crop, local_box = faces.crop_around(image, (0, 20, 20, 0))
+        self.assertEqual(crop.shape[:2], (25, 25))
+        self.assertEqual(local_box, (0, 20, 20, 0))
+
+    def test_detect_boxes_tries_larger_side_when_nothing_found(self):
+        image = np.zeros((1000, 2000, 3), dtype=np.uint8)
+        with self._detector({1600: [(80, 400, 160, 320)]}):
+            boxes = faces.detect_boxes(image)
+        self.assertEqual(self.calls, [800, 1600])
+        self.assertEqual(boxes, [(100, 500, 200, 400)])
+
+    def test_detect_boxes_small_image_runs_once(self):
+        image = np.zeros((300, 400, 3), dtype=np.uint8)
+        with self._detector({}):
+            self.assertEqual(faces.detect_boxes(image), [])
+        self.assertEqual(self.calls, [400])
+
+    def test_detect_and_encode_encodes_only_crops(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'grup.png')
+        from PIL import Image
+        Image.new('RGB', (2000, 1000)).save(path)
+
+        with self._detector({800: [(40, 200, 80, 160)]}):
+            results = faces.detect_and_encode(path)
+        self.assertEqual([result['location'] for result in results], [(100, 500, 200, 400)])
+        # Kodlayıcıya yalnızca paylı kırpım verilir (tam görüntü değil)
+        self.assertEqual(self.calls[1], ('encode', (150, 150), (25, 125, 125, 25)))
+
+
+class CleanupExpiredTests(TestCase):
+    """Süresi dolanlar parçalar halinde silinmeli; dry-run hiçbir şeye dokunmamalı."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='temiz', email='temiz@example.com', password='password')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        past = timezone.now() - timezone.timedelta(days=1)
+        self.expired = create_items(self.user, 5, expires_at=past)
+        self.alive = create_items(self.user, 1)[0]
+        self.paths = []
+        for item in self.expired:
+            path = os.path.join(self.directory, f'{item.id}.txt')
+            with open(path, 'wb') as handle:
+                handle.write(b'x' * 10)
+            MemoryItem.objects.filter(pk=item.pk).update(file_path=path)
+            self.paths.append(path)
+        # Son dosyayı süresi dolmamış bir kayıt da kullanıyor; silinmemeli
+        MemoryItem.objects.filter(pk=self.alive.pk).update(file_path=self.paths[-1])
+        VideoFrame.objects.create(memory_item=self.expired[0], timestamp=0.0, vector_embedding=b'\x00')
+        usage.reconcile([self.user.id])
+
+    def _cleanup(self, **options):
+        command = MaintenanceCommand(stdout=StringIO())
+        return command.cleanup_expired(batch_size=2, io_workers=2, **options)
+
+    def test_dry_run_changes_nothing(self):
+        deleted, files = self._cleanup(dry_run=True)
+        self.assertEqual(deleted['memory.MemoryItem'], 5)
+        self.assertEqual(deleted['memory.VideoFrame'], 1)
+        self.assertEqual((files['removed'], files['shared'], files['bytes']), (4, 1, 40))
+        self.assertEqual(MemoryItem.objects.count(), 6)
+        self.assertTrue(all(os.path.exists(path) for path in self.paths))
+
+    def test_command_flags(self):
+        out = StringIO()
+        call_command('memory_maintenance', '--cleanup', '--dry-run', '--batch-size', '2', stdout=out)
+        self.assertIn('5 kayıt silinecek', out.getvalue())
+        self.assertEqual(MemoryItem.objects.count(), 6)
+        call_command('memory_maintenance', '--cleanup', '--batch-size', '2', stdout=StringIO())
+        self.assertEqual(MemoryItem.objects.count(), 1)
+
+    def test_cleanup_in_chunks(self):
+        deleted, files = self._cleanup()
+        self.assertEqual(deleted['memory.MemoryItem'], 5)
+        self.assertEqual(deleted['memory.VideoFrame'], 1)
+        self.assertEqual(list(MemoryItem.objects.values_list('pk', flat=True)), [self.alive.pk])
+        self.assertEqual([os.path.exists(path) for path in self.paths], [False] * 4 + [True])
+        self.assertEqual((files['removed'], files['shared']), (4, 1))
+        # Sayaçlar silinenlerle birlikte güncellenir; düzeltilecek kayma kalmaz
+        self.assertEqual(UserMemoryProfile.objects.get(user=self.user).total_items, 1)
+        self.assertEqual(usage.reconcile([self.user.id], dry_run=True), {})
+
+    def test_missing_files_are_counted(self):
+        os.remove(self.paths[0])
+        _, files = self._cleanup()
+        self.assertEqual((files['removed'], files['missing']), (3, 1))
+
+
+class StubCompression:
+    def __init__(self):
+        self.calls = []
+
+    def compress_embeddings(self, vectors):
+        self.calls.append(len(vectors))
+        return [b'pca' for _ in vectors]
+
+
+class TierEngineTests(TestCase):
+    """Yükseltme, süre doldurma ve indirme kuralları; sayaçlar katmanla birlikte taşınmalı."""
+
+    policy = {
+        'PROMOTE_WINDOW_HOURS': 6, 'PROMOTE_MIN_ACCESS': 2, 'EVICT_UNPROMOTED': True,
+        'INSTANT_PROMOTE_MIN_ACCESS': 3, 'DEMOTE_IDLE_DAYS': 30, 'BATCH_SIZE': 1,
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='katman', email='katman@example.com', password='password')
+        self.now = timezone.now()
+        soon, later = self.now + timezone.timedelta(hours=1), self.now + timezone.timedelta(days=10)
+        self.hot, self.cold = create_items(self.user, 2, expires_at=soon, vector_embedding=b'\x00' * 8)
+        self.fresh = create_items(self.user, 1, expires_at=later)[0]
+        self.busy_instant, self.quiet_instant = create_items(self.user, 2, tier_name='instant', expires_at=later)
+        self.idle, self.recent = create_items(self.user, 2, tier_name='long_term', expires_at=later)
+        MemoryItem.objects.filter(pk=self.hot.pk).update(access_count=5)
+        MemoryItem.objects.filter(pk=self.busy_instant.pk).update(access_count=4)
+        MemoryItem.objects.filter(pk=self.idle.pk).update(last_accessed=self.now - timezone.timedelta(days=40))
+        usage.reconcile([self.user.id])
+        self.compression = StubCompression()
+
+    def _run(self, dry_run=False):
+        engine = TierEngine(policy=self.policy, compression_engine=self.compression, dry_run=dry_run)
+        return engine.run(now=self.now)
+
+    def _tier(self, item):
+        return MemoryItem.objects.select_related('memory_tier').get(pk=item.pk).memory_tier.name
+
+    def test_run_applies_all_policies(self):
+        result = self._run()
+        self.assertEqual(
+            (result.promoted, result.compressed, result.evicted, result.instant_promoted, result.demoted),
+            (1, 1, 1, 1, 1),
+        )
+        self.assertEqual(self._tier(self.hot), 'long_term')
+        self.assertEqual(bytes(MemoryItem.objects.get(pk=self.hot.pk).compressed_embedding), b'pca')
+        self.assertEqual(MemoryItem.objects.get(pk=self.cold.pk).expires_at, self.now)
+        self.assertEqual(self._tier(self.cold), 'short_term')
+        self.assertEqual(self._tier(self.fresh), 'short_term')
+        self.assertEqual(self._tier(self.busy_instant), 'short_term')
+        self.assertEqual(self._tier(self.quiet_instant), 'instant')
+        self.assertEqual(self._tier(self.idle), 'short_term')
+        self.assertEqual(self._tier(self.recent), 'long_term')
+        self.assertEqual(self.compression.calls, [1])
+        # Sayaçlar katman değişiklikleriyle aynı transaction'da taşındı
+        self.assertEqual(usage.reconcile([self.user.id], dry_run=True), {})
+        by_tier = usage.get_usage(self.user)['by_tier']
+        self.assertEqual({name: row['items'] for name, row in by_tier.items()},
+                         {'short_term': 4, 'long_term': 2, 'instant': 1})
+
+    def test_optional_policies_are_off_by_default(self):
+        self.policy = {'PROMOTE_MIN_ACCESS': 2}
+        result = self._run()
+        self.assertEqual((result.promoted, result.evicted, result.instant_promoted, result.demoted), (1, 0, 0, 0))
+        self.assertEqual(self._tier(self.busy_instant), 'instant')
+        self.assertEqual(self._tier(self.idle), 'long_term')
+
+    def test_dry_run_reports_without_writing(self):
+        result = self._run(dry_run=True)
+        self.assertEqual(
+            (result.promoted, result.compressed, result.evicted, result.instant_promoted, result.demoted),
+            (1, 1, 1, 1, 1),
+        )
+        self.assertEqual(self._tier(self.hot), 'short_term')
+        self.assertEqual(self._tier(self.idle), 'long_term')
+        self.assertEqual(self.compression.calls, [])
+
+
+class UsageCounterTests(TestCase):
+    """Sayaçlar artımlı güncellenmeli, reconcile kaymayı bulup düzeltmeli, kota kilitli profilde ayrılmalı."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sayac', email='sayac@example.com', password='password')
+        self.tier, _ = MemoryTier.objects.get_or_create(name='short_term')
+
+    def _record(self, size, file_type='text'):
+        item = create_items(self.user, 1)[0]
+        MemoryItem.objects.filter(pk=item.pk).update(original_size=size, file_type=file_type)
+        item.refresh_from_db()
+        usage.record_created(item)
+        return item
+
+    def _totals(self):
+        profile = UserMemoryProfile.objects.get(user=self.user)
+        counters = dict(
+            MemoryUsageCounter.objects.filter(user=self.user).values_list('file_type', 'bytes')
+        )
+        return profile.total_items, profile.total_bytes, counters
+
+    def test_record_created_and_move(self):
+        self._record(100)
+        self._record(50, file_type='image')
+        self.assertEqual(self._totals(), (2, 150, {'text': 100, 'image': 50}))
+
+        long_term, _ = MemoryTier.objects.get_or_create(name='long_term')
+        delta = usage.UsageDelta()
+        delta.move(self.user.id, self.tier.id, long_term.id, 'text', 1, 100)
+        delta.apply()
+        by_tier = usage.get_usage(self.user)['by_tier']
+        self.assertEqual(by_tier, {'short_term': {'items': 1, 'bytes': 50}, 'long_term': {'items': 1, 'bytes': 100}})
+        # Katman taşıma toplamları değiştirmez
+        self.assertEqual(self._totals()[:2], (2, 150))
+
+    def test_reconcile_fixes_drift(self):
+        self._record(100)
+        self._record(40)
+        # Sayaçlara yansımayan değişiklik (ör. elle SQL)
+        MemoryItem.objects.filter(user=self.user).order_by('pk').first().delete()
+        self.assertEqual(usage.reconcile(dry_run=True), {self.user.id: (2, 1, 140, 40)})
+        self.assertEqual(self._totals()[:2], (2, 140))
+
+        usage.reconcile()
+        self.assertEqual(self._totals(), (1, 40, {'text': 40}))
+        self.assertEqual(usage.reconcile(), {})
+
+    def test_reserve_quota(self):
+        UserMemoryProfile.objects.create(user=self.user, memory_quota_mb=1 / 1024)
+        self._record(1000)
+        with transaction.atomic():
+            self.assertEqual(usage.reserve_quota(self.user, 24).total_bytes, 1000)
+        with self.assertRaises(usage.QuotaExceeded), transaction.atomic():
+            usage.reserve_quota(self.user, 25)
+
+
+class TimelineTests(TestCase):
+    """Kaynaklar arası eşit zaman damgaları, ileri-geri sayfalama ve hatalı parametreler."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='zaman', email='zaman@example.com', password='password')
+        # Öğlen: tüm olaylar aynı güne düşer
+        self.now = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0)
+        items = create_items(self.user, 4)
+        # İki kaynakta da aynı anlara düşen olaylar
+        for index, item in enumerate(items):
+            MemoryItem.objects.filter(pk=item.pk).update(created_at=self.now - timezone.timedelta(minutes=index // 2))
+        for index in range(4):
+            UserActivity.objects.create(
+                user=self.user, activity_type='file_open', target_file=f'dosya{index}',
+                timestamp=self.now - timezone.timedelta(minutes=index // 2),
+            )
+
+    def _keys(self, events):
+        return [(event['type'], event['timestamp'], event.get('title'), event.get('description')) for event in events]
+
+    def _walk(self, limit):
+        pages, cursor = [], None
+        while True:
+            page = timeline.recall_timeline(self.user, limit=limit, cursor=cursor)
+            pages.append(page)
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_ties_across_sources_are_neither_skipped_nor_repeated(self):
+        everything = self._keys(timeline.recall_timeline(self.user, limit=100).events)
+        self.assertEqual(len(everything), 8)
+        for limit in (1, 3):
+            walked = sum((self._keys(page.events) for page in self._walk(limit)), [])
+            self.assertEqual(walked, everything)
+
+    def test_forward_then_back(self):
+        first = timeline.recall_timeline(self.user, limit=3)
+        self.assertIsNone(first.previous_cursor)
+        second = timeline.recall_timeline(self.user, limit=3, cursor=first.next_cursor)
+        third = timeline.recall_timeline(self.user, limit=3, cursor=second.next_cursor)
+        self.assertEqual(len(third.events), 2)
+        self.assertIsNone(third.next_cursor)
+
+        back = timeline.recall_timeline(self.user, limit=3, cursor=third.previous_cursor)
+        self.assertEqual(self._keys(back.events), self._keys(second.events))
+        back = timeline.recall_timeline(self.user, limit=3, cursor=back.previous_cursor)
+        self.assertEqual(self._keys(back.events), self._keys(first.events))
+        self.assertIsNone(back.previous_cursor)
+        # Geri gelinen sayfadan tekrar ileri
+        again = timeline.recall_timeline(self.user, limit=3, cursor=back.next_cursor)
+        self.assertEqual(self._keys(again.events), self._keys(second.events))
+
+    def test_bad_cursor(self):
+        unknown_source = timeline.encode_cursor(self.now, 'yok', 1)
+        for cursor in ('bozuk', 'e30=', unknown_source):
+            with self.assertRaises(timeline.InvalidCursor):
+                timeline.recall_timeline(self.user, limit=3, cursor=cursor)
+        response = self._get(get_windows_recall_timeline, cursor='bozuk')
+        self.assertEqual(response.status_code, 400)
+
+    def test_parse_limit(self):
+        self.assertEqual(timeline.parse_limit(None, default=50), 50)
+        self.assertEqual(timeline.parse_limit('10'), 10)
+        self.assertEqual(timeline.parse_limit('5000'), timeline.MAX_LIMIT)
+        for value in ('0', '-1', 'on'):
+            with self.assertRaises(timeline.InvalidLimit):
+                timeline.parse_limit(value)
+        with self.assertRaises(timeline.InvalidLimit):
+            timeline.recall_timeline(self.user, limit=0)
+
+    def _get(self, view, *args, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.user)
+        return view(request, *args)
+
+    def test_views_validate_limit(self):
+        day = self.now.date().isoformat()
+        for value in ('0', '-3', 'x'):
+            self.assertEqual(self._get(get_windows_recall_timeline, limit=value).status_code, 400)
+            self.assertEqual(self._get(get_timeline_by_date, day, limit=value).status_code, 400)
+
+        response = self._get(get_windows_recall_timeline, limit=5000)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_events'], 8)
+        # limit verilmeyen gün görünümü günün tamamını döndürür
+        response = self._get(get_timeline_by_date, day)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('next_cursor', response.data)
+        response = self._get(get_timeline_by_date, day, limit=3)
+        self.assertEqual(len(response.data['events']), 3)
+        self.assertIsNotNone(response.data['next_cursor'])
+
+
+class ActivityBatchTests(TestCase):
+    """Toplu aktivite uç noktası: kabul/ret yanıtı ve timestamp penceresi."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='olay', email='olay@example.com', password='password')
+        # Tampona eklenenler yakalanır; arka plan yazıcısı test veritabanına dokunmaz
+        patcher = patch.object(activity_buffer.activity_writer, 'extend')
+        self.extend = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, body):
+        request = APIRequestFactory().post('/', body, format='json')
+        force_authenticate(request, user=self.user)
+        return track_user_activities_batch(request)
+
+    def _buffered(self):
+        return [activity for call in self.extend.call_args_list for activity in call.args[0]]
+
+    def test_accepted_and_rejected_by_index(self):
+        now = timezone.now()
+        response = self._post({"events": [
+            {"activity_type": "file_open", "target_file": "a.txt"},
+            {"target_file": "eksik_tip.txt"},
+            "nesne değil",
+            {"activity_type": "app_focus", "context": "liste değil"},
+            {"activity_type": "file_open", "timestamp": "dün"},
+            {"activity_type": "search", "timestamp": (now - timezone.timedelta(hours=1)).isoformat()},
+        ]})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['accepted'], 2)
+        self.assertEqual([item['index'] for item in response.data['rejected']], [1, 2, 3, 4])
+        buffered = self._buffered()
+        self.assertEqual([activity.activity_type for activity in buffered], ['file_open', 'search'])
+        self.assertTrue(all(activity.user == self.user for activity in buffered))
+
+    def test_invalid_body(self):
+        self.assertEqual(self._post({"events": "tek olay"}).status_code, 400)
+        self.assertEqual(self._post({}).status_code, 400)
+        with override_settings(USER_ACTIVITY_BUFFER={'MAX_EVENTS_PER_REQUEST': 2}):
+            response = self._post({"events": [{"activity_type": "file_open"}] * 3})
+        self.assertEqual(response.status_code, 400)
+        self.extend.assert_not_called()
+
+    @override_settings(USER_ACTIVITY_BUFFER={'MAX_EVENT_AGE_HOURS': 24, 'MAX_CLOCK_SKEW_SECONDS': 300})
+    def test_timestamp_window(self):
+        now = timezone.now()
+        response = self._post({"events": [
+            {"activity_type": "eski", "timestamp": (now - timezone.timedelta(days=30)).isoformat()},
+            {"activity_type": "uzak_gelecek", "timestamp": (now + timezone.timedelta(hours=2)).isoformat()},
+            {"activity_type": "kayma", "timestamp": (now + timezone.timedelta(seconds=60)).isoformat()},
+            {"activity_type": "sinirda", "timestamp": (now - timezone.timedelta(hours=23)).isoformat()},
+        ]})
+        self.assertEqual(response.data['accepted'], 2)
+        self.assertEqual([item['index'] for item in response.data['rejected']], [0, 1])
+        skewed, recent = self._buffered()
+        # Küçük saat kayması şimdiye çekilir, pencere içindeki geçmiş korunur
+        self.assertLessEqual(skewed.timestamp, timezone.now())
+        self.assertGreaterEqual(skewed.timestamp, now)
+        self.assertEqual(recent.timestamp, now - timezone.timedelta(hours=23))
+
+
+class ContextFeaturesTests(TestCase):
+    """Tampon boşaltması ile file_types yenilemesi birbirinin yazdığını ezmez."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='ozellik', email='ozellik@example.com', password='password')
+        create_items(self.user, 2)
+
+    def _activity(self, activity_type, query=''):
+        return activity_buffer.build_activity(self.user, activity_type, context={'query': query})
+
+    def test_flush_and_file_types_refresh_do_not_overwrite_each_other(self):
+        features = context_features.get_features(self.user.id)
+        self.assertEqual(features['file_types'][0]['count'], 2)
+        self.assertEqual(features['recent'], [])
+
+        # Boşaltma iş parçacığı kaydı okuduktan sonra file_types yenilenir
+        stale = cache.get(context_features._key(self.user.id))
+        cache.delete(context_features._file_types_key(self.user.id))
+        create_items(self.user, 1)
+        self.assertEqual(context_features.get_features(self.user.id)['file_types'][0]['count'], 3)
+        with patch.object(context_features.cache, 'get', return_value=stale):
+            context_features.apply_activities([self._activity('search_query', 'rapor')])
+
+        features = context_features.get_features(self.user.id)
+        self.assertEqual(features['version'], 2)
+        self.assertEqual(context_features.recent_searches(features), ['rapor'])
+        self.assertEqual(features['file_types'][0]['count'], 3)
+
+        # Sonraki yenileme boşaltmanın yazdığı aktiviteleri silmez
+        cache.delete(context_features._file_types_key(self.user.id))
+        create_items(self.user, 1)
+        features = context_features.get_features(self.user.id)
+        self.assertEqual(features['file_types'][0]['count'], 4)
+        self.assertEqual(context_features.recent_searches(features), ['rapor'])
+        self.assertNotIn('file_types', cache.get(context_features._key(self.user.id)))
+
+    def test_file_types_cached_until_ttl(self):
+        context_features.get_features(self.user.id)
+        create_items(self.user, 1)
+        with self.assertNumQueries(0):
+            features = context_features.get_features(self.user.id)
+        self.assertEqual(features['file_types'][0]['count'], 2)
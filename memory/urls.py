@@ -27,6 +27,7 @@ urlpatterns = [
     path('search/', views.search_memories, name='memory-search'),
     path('intelligent-search/', views.intelligent_search, name='intelligent-search'),
     path('activity/', views.track_user_activity, name='track-activity'),
+    path('activity/batch/', views.track_user_activities_batch, name='track-activity-batch'),
     path('interact/', views.interact_with_ai, name='ai-interact'),
 
     # --- Chat Endpoint ---
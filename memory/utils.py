@@ -1,34 +1,22 @@
 # memory/utils.py
 from django.utils import timezone
-from datetime import timedelta
-from .models import UserActivity, MemoryItem
-from django.db import models
+from .services import context_features
+from .services.activity_buffer import record_activity
 
 def track_user_activity(user, activity_type, target_file=None, context=None):
-    """Kullanici aktivitelerini takip et"""
-    UserActivity.objects.create(
-        user=user,
-        activity_type=activity_type,
-        target_file=str(target_file) if target_file else None,
-        context=context or {},
-        timestamp=timezone.now()
-    )
+    """Kullanici aktivitelerini takip et (tamponlu, bkz. services/activity_buffer.py)"""
+    record_activity(user, activity_type, target_file=target_file, context=context)
 
 def get_behavioral_suggestions(user, query):
     """Kullanici davranislarina gore oneriler"""
     try:
-        # Son aktivitelere bak
-        recent_activities = UserActivity.objects.filter(
-            user=user,
-            timestamp__gte=timezone.now() - timedelta(days=7)
-        ).order_by('-timestamp')[:10]
+        # Onceden hesaplanmis baglam ozellikleri (bkz. services/context_features.py)
+        features = context_features.get_features(user.id)
         
         suggestions = []
         
         # Benzer aramalar ner
-        search_activities = [act for act in recent_activities if act.activity_type == 'search_query']
-        for activity in search_activities[:3]:
-            search_query = activity.context.get('query', '')
+        for search_query in context_features.recent_searches(features)[:3]:
             if search_query and search_query != query:
                 suggestions.append({
                     'type': 'previous_search',
@@ -38,10 +26,7 @@ def get_behavioral_suggestions(user, query):
                 })
         
         # Sk kullanlan dosya trlerini ner
-        file_type_stats = MemoryItem.objects.filter(user=user).values('file_type').annotate(
-            count=models.Count('id'),
-            total_access=models.Sum('access_count')
-        ).order_by('-total_access')[:3]
+        file_type_stats = features['file_types'][:3]
         
         for stat in file_type_stats:
             if stat['count'] > 0:
@@ -84,28 +69,16 @@ def analyze_user_context(user):
     """Kullanicinin mevcut contextini analiz et"""
     try:
         current_time = timezone.now()
-        
-        # Son aktiviteler
-        recent_activities = UserActivity.objects.filter(
-            user=user,
-            timestamp__gte=current_time - timedelta(hours=1)
-        )
-        
-        # Sk kullanlan dosya trleri
-        popular_file_types = MemoryItem.objects.filter(
-            user=user,
-            access_count__gt=0
-        ).values('file_type').annotate(
-            total_access=models.Sum('access_count')
-        ).order_by('-total_access')[:3]
+        features = context_features.get_features(user.id, current_time)
+        recent_activity_types = context_features.recent_activity_types(features)
         
         return {
             'time_of_day': current_time.hour,
             'day_of_week': current_time.weekday(),
             'is_weekend': current_time.weekday() >= 5,
-            'recent_activity_count': recent_activities.count(),
-            'recent_activity_types': list(recent_activities.values_list('activity_type', flat=True)),
-            'popular_file_types': [item['file_type'] for item in popular_file_types],
+            'recent_activity_count': len(recent_activity_types),
+            'recent_activity_types': recent_activity_types,
+            'popular_file_types': context_features.popular_file_types(features),
             'active_hours': 9 <= current_time.hour <= 17  # alma saatleri
         }
     except Exception as e:
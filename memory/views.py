@@ -4,16 +4,18 @@ from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .utils import get_behavioral_suggestions, rank_results_with_context, analyze_user_context, track_user_activity
+from .utils import get_behavioral_suggestions, rank_results_with_context, analyze_user_context
 from django.db import models
 import logging
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime
 from django.core.serializers.json import DjangoJSONEncoder
 from django.views.decorators.http import require_http_methods
 import json
 from django.contrib.auth.decorators import login_required
 import os # file_name için os eklendi
+from .services import activity_buffer, timeline
+from .services.timeline import InvalidCursor, InvalidLimit
 
 logger = logging.getLogger(__name__)
 
@@ -72,20 +74,24 @@ def get_fused_timeline_manager(request):
     try:
         # Sorgu parametrelerini güvenli bir şekilde al
         days = int(request.GET.get('days', 7)) # Varsayılan: Son 7 gün
-        limit = int(request.GET.get('limit', 100))
+        limit = timeline.parse_limit(request.GET.get('limit'), default=100)
         
-        if days <= 0 or limit <= 0:
-             return JsonResponse({'error': 'Gecersiz "days" veya "limit" degeri.'}, status=400)
+        if days <= 0:
+             return JsonResponse({'error': 'Gecersiz "days" degeri.'}, status=400)
 
         # İş mantığını AdvancedMemoryManager'a devret
         manager = AdvancedMemoryManager(request.user)
-        timeline_data = manager.get_fused_timeline(days=days, limit=limit)
+        page = manager.get_fused_timeline_page(days=days, limit=limit, cursor=request.GET.get('cursor'))
 
         return JsonResponse({
             'success': True,
-            'timeline': timeline_data
+            'timeline': page.events,
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
         }, encoder=EnhancedJSONEncoder)
 
+    except (InvalidCursor, InvalidLimit) as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
         # Beklenmedik hataları yakala ve 500 dön
         print(f"Timeline hatasi: {e}")
@@ -95,65 +101,23 @@ def get_fused_timeline_manager(request):
 @permission_classes([IsAuthenticated])
 def get_windows_recall_timeline(request):
     """Windows Recall benzeri, dogrudan DB'den okuma yapan timeline gorunumu (get_timeline fonksiyonunun yerine)"""
-    from .models import MemoryItem, UserActivity, UserMemoryProfile
-
     try:
         days = int(request.GET.get('days', 7))
-        limit = int(request.GET.get('limit', 50))
-        
-        # Basit timeline implementasyonu
-        start_date = timezone.now() - timedelta(days=days)
-        
-        events = []
-        
-        # Memory item'ları
-        memories = MemoryItem.objects.filter(
-            user=request.user,
-            created_at__gte=start_date
-        ).select_related('memory_tier')[:limit//2]
-        
-        for memory in memories:
-            events.append({
-                'type': 'memory',
-                'timestamp': memory.created_at,
-                'title': f"{memory.file_name}",
-                'description': f"{memory.file_type} - {memory.memory_tier.name}",
-                'thumbnail': memory.thumbnail_path,
-                'metadata': {
-                    'file_path': memory.file_path,
-                    'memory_tier': memory.memory_tier.name,
-                    'access_count': memory.access_count
-                }
-            })
-        
-        # User activities
-        activities = UserActivity.objects.filter(
-            user=request.user,
-            timestamp__gte=start_date
-        )[:limit//2]
-        
-        for activity in activities:
-            events.append({
-                'type': 'activity',
-                'timestamp': activity.timestamp,
-                'title': f"{activity.activity_type}",
-                'description': activity.target_file or activity.application,
-                'metadata': {
-                    'activity_type': activity.activity_type,
-                    'application': activity.application,
-                    'window_title': activity.window_title
-                }
-            })
+        limit = timeline.parse_limit(request.GET.get('limit'), default=50)
         
-        # Tarihe göre sırala
-        events.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Hafıza öğeleri ve aktiviteler zamana göre birleştirilir (tam olarak `limit` olay)
+        page = timeline.recall_timeline(request.user, days=days, limit=limit, cursor=request.GET.get('cursor'))
         
         return Response({
-            'timeline_events': events[:limit],
+            'timeline_events': page.events,
             'period_days': days,
-            'total_events': len(events)
+            'total_events': len(page.events),
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
         })
         
+    except (InvalidCursor, InvalidLimit) as e:
+        return Response({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Windows Recall Timeline hatasi: {str(e)}")
         return Response({"error": str(e)}, status=500)
@@ -185,63 +149,27 @@ def get_memory_stats_manager(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_timeline_by_date(request, date_str):
-    """Belirli bir tarih icin timeline getir"""
-    from .models import MemoryItem, UserActivity, UserMemoryProfile
-
+    """Belirli bir tarih icin timeline getir (limit/cursor verilirse sayfalı)"""
     try:
         target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         start_datetime = timezone.make_aware(datetime.combine(target_date, datetime.min.time()))
-        end_datetime = start_datetime + timedelta(days=1)
-        
-        # Memory item'ları
-        memories = MemoryItem.objects.filter(
-            user=request.user,
-            created_at__gte=start_datetime,
-            created_at__lt=end_datetime
-        ).select_related('memory_tier')
-        
-        # İlgili tarihteki aktiviteler
-        activities = UserActivity.objects.filter(
-            user=request.user,
-            timestamp__gte=start_datetime,
-            timestamp__lt=end_datetime
-        )
+        # limit verilmezse günün tamamı
+        limit = timeline.parse_limit(request.GET.get('limit'))
         
-        events = []
-        
-        for memory in memories:
-            events.append({
-                'type': 'memory',
-                'id': memory.id,
-                'timestamp': memory.created_at,
-                'title': memory.file_name,
-                'file_type': memory.file_type,
-                'file_path': memory.file_path,
-                'memory_tier': memory.memory_tier.name,
-                'thumbnail': memory.thumbnail_path,
-                'content_summary': memory.content_summary
-            })
-            
-        for activity in activities:
-            events.append({
-                'type': 'activity',
-                'id': activity.id,
-                'timestamp': activity.timestamp,
-                'activity_type': activity.activity_type,
-                'application': activity.application,
-                'window_title': activity.window_title,
-                'target_file': activity.target_file
-            })
-        
-        # Saate göre sırala
-        events.sort(key=lambda x: x['timestamp'])
+        # Hafıza öğeleri ve aktiviteler saate göre birleştirilir
+        page = timeline.day_timeline(request.user, start_datetime, limit=limit, cursor=request.GET.get('cursor'))
         
-        return Response({
+        response = {
             'date': date_str,
-            'events': events,
-            'total_events': len(events)
-        })
+            'events': page.events,
+            'total_events': len(page.events)
+        }
+        if limit is not None:
+            response.update(next_cursor=page.next_cursor, previous_cursor=page.previous_cursor)
+        return Response(response)
         
+    except (InvalidCursor, InvalidLimit) as e:
+        return Response({"error": str(e)}, status=400)
     except Exception as e:
         logger.error(f"Timeline by date hatasi: {str(e)}")
         return Response({"error": str(e)}, status=500)
@@ -250,7 +178,8 @@ def get_timeline_by_date(request, date_str):
 @permission_classes([IsAuthenticated])
 def get_detailed_memory_stats(request):
     """Kullanicinin memory istatistiklerini getir (get_memory_stats fonksiyonunun yerine, byte hesabi yapan versiyon)"""
-    from .models import MemoryItem, UserActivity, UserMemoryProfile
+    from .models import UserActivity
+    from .services.usage import get_usage
 
     try:
         logger.info(f"Memory stats istegi - Kullanici: {request.user.username}")
@@ -258,29 +187,19 @@ def get_detailed_memory_stats(request):
         # Debug bilgisi
         print(f"Kullanici: {request.user}, Authenticated: {request.user.is_authenticated}")
         
-        # Toplam memory item sayısı
-        total_items = MemoryItem.objects.filter(user=request.user).count()
+        # Öğe/bayt/dosya türü sayıları kullanım sayaçlarından (tablo taraması yok)
+        usage = get_usage(request.user)
+        memory_profile = usage['profile']
+        total_items = usage['items']
+        file_type_count = len(usage['by_file_type'])
+        total_size_bytes = usage['bytes']
         
         # Toplam aktivite sayısı
         total_activities = UserActivity.objects.filter(user=request.user).count()
         
-        # Farklı dosya türü sayısı
-        file_type_count = MemoryItem.objects.filter(user=request.user).values('file_type').distinct().count()
-        
-        # Gerçek memory kullanımı hesapla (MB cinsinden)
-        total_size_bytes = MemoryItem.objects.filter(user=request.user).aggregate(
-            total_size=models.Sum('original_size')
-        )['total_size'] or 0
-        
         used_memory = total_size_bytes / (1024 * 1024 * 1024)  # GB'ye çevir
         total_memory = 10  # GB
         
-        # Memory profili
-        memory_profile, created = UserMemoryProfile.objects.get_or_create(
-            user=request.user,
-            defaults={'learning_rate': 0.1, 'last_activity': timezone.now()}
-        )
-        
         stats = {
             'used_memory': round(used_memory, 2),
             'total_memory': total_memory,
@@ -305,21 +224,34 @@ def get_detailed_memory_stats(request):
 @permission_classes([IsAuthenticated])
 def track_user_activity(request):
     """Kullanici aktivitelerini takip et"""
-    data = request.data
-    activity_type = data.get('activity_type')
-    target_file = data.get('target_file')
-    context = data.get('context', {})
+    # Not: bu view utils.track_user_activity ile aynı adı taşıdığından olay doğrudan tampona eklenir
+    try:
+        fields = activity_buffer.parse_event(request.data)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
     
-    # Aktiviteyi memory sistemine kaydet
-    track_user_activity(
-        user=request.user,
-        activity_type=activity_type,
-        target_file=target_file,
-        context=context
-    )
+    # Aktiviteyi memory sistemine kaydet (tamponlu, toplu yazılır)
+    activity_buffer.record_activity(request.user, **fields)
     
     return Response({"status": "tracked"})
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def track_user_activities_batch(request):
+    """
+    Birden çok aktiviteyi tek istekte kaydeder.
+    Gövde: {"events": [{"activity_type", "target_file", "application", "window_title", "context", "timestamp"}, ...]}
+    """
+    events = request.data.get('events') if isinstance(request.data, dict) else None
+    if not isinstance(events, list):
+        return Response({"error": "'events' listesi zorunlu."}, status=400)
+    try:
+        accepted, rejected = activity_buffer.record_activities(request.user, events)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    
+    return Response({"status": "tracked", "accepted": accepted, "rejected": rejected}, status=202)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_memory_suggestions(request):
@@ -449,29 +381,24 @@ def get_user_memory_stats(request):
 @permission_classes([IsAuthenticated])
 def get_simple_memory_stats(request):
     """Kullanicinin memory istatistiklerini getir (get_memory_stats fonksiyonunun yerine, basit hesaplama yapan versiyon)"""
-    from .models import MemoryItem, UserActivity, UserMemoryProfile
+    from .models import UserActivity
+    from .services.usage import get_usage
 
     try:
         
-        # Toplam memory item sayısı
-        total_items = MemoryItem.objects.filter(user=request.user).count()
+        # Öğe ve dosya türü sayıları kullanım sayaçlarından
+        usage = get_usage(request.user)
+        memory_profile = usage['profile']
+        total_items = usage['items']
+        file_type_count = len(usage['by_file_type'])
         
         # Toplam aktivite sayısı
         total_activities = UserActivity.objects.filter(user=request.user).count()
         
-        # Farklı dosya türü sayısı
-        file_type_count = MemoryItem.objects.filter(user=request.user).values('file_type').distinct().count()
-        
         # Kullanılan memory hesaplama (örnek: her item 0.1 GB)
         used_memory = total_items * 0.1
         total_memory = 10  # GB
         
-        # Memory profili
-        memory_profile, created = UserMemoryProfile.objects.get_or_create(
-            user=request.user,
-            defaults={'learning_rate': 0.1, 'last_activity': timezone.now()}
-        )
-        
         return Response({
             'used_memory': round(used_memory, 2),
             'total_memory': total_memory,
@@ -8,5 +8,11 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     related_name='app_notifications'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Notification for {self.user}"
\ No newline at end of file
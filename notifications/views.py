@@ -10,6 +10,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from .models import Notification
 from rest_framework.views import APIView
+from cloud_mvp.pagination import paginate
 
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
@@ -19,6 +20,9 @@ class NotificationListView(generics.ListAPIView):
 
     def get(self, request):
         notifs = Notification.objects.filter(user=request.user).order_by("-created_at")
+        page = paginate(request, notifs, NotificationSerializer, "-created_at")
+        if page is not None:
+            return page
         serializer = NotificationSerializer(notifs, many=True)
         return Response(serializer.data)
 
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Performans regresyon paketi (API endpoint'leri).
+
+Çalıştırma:
+    python manage.py test perf --tag perf
+
+- PERF_SCALE=0.1           küçük veri setiyle hızlı deneme
+- PERF_UPDATE_BUDGETS=1    ölçülen değerlerden budgets.json'u yeniden yazar
+- PERF_REPORT=<yol>        rapor dosyası (varsayılan .cache/perf/endpoints.json)
+- PERF_STARTUP_BUDGET_MS   çıplak django.setup() içe aktarma bütçesi (varsayılan 1000)
+
+Normal `manage.py test` çalışmasında `perf` etiketli testler atlanır
+(bkz. cloud_mvp.test_runner).
+"""
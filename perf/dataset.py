@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# perf/dataset.py
+"""
+Performans testleri için sentetik veri seti.
+
+Kayıtlar bulk_create ile toplu eklenir (save()/sinyaller çalışmaz); bu yüzden
+arama ve trend tabloları seed sonunda topluca yeniden kurulur.
+Ölçek PERF_SCALE ortam değişkeniyle çarpılır (varsayılan 1.0).
+"""
+import os
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from chat.models import ChatThread, Message, UserStatus
+from files import search_index
+from files.models import CloudGroup, File, FileShare, GroupFile
+from files.trending import refresh_trending_scores
+from memory.models import MemoryItem, MemoryTier, VideoFrame
+from notifications.models import Notification
+
+BASE_SIZES = {
+    'users': 2000,
+    'files': 5000,
+    'shares': 2000,
+    'groups': 100,
+    'group_files': 2000,
+    'messages': 10000,
+    'notifications': 5000,
+    'memory_items': 3000,
+    'video_frames': 2000,
+}
+TEXT_DIM = 384
+CLIP_DIM = 512
+BATCH_SIZE = 1000
+PASSWORD = 'perf-password'
+
+FILE_EXTENSIONS = ('.pdf', '.jpg', '.png', '.mp4', '.txt', '.docx', '.mp3')
+WORDS = ('rapor', 'fatura', 'tatil', 'sunum', 'proje', 'toplanti', 'odev', 'butce', 'plan', 'notlar')
+
+User = get_user_model()
+
+
+def dataset_sizes(scale=None):
+    if scale is None:
+        scale = float(os.environ.get('PERF_SCALE', '1'))
+    return {name: max(1, int(size * scale)) for name, size in BASE_SIZES.items()}
+
+
+def random_vector(rng, dim):
+    vector = rng.standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _name(rng, index, extension=None):
+    words = rng.choice(WORDS, size=2, replace=False)
+    extension = extension or FILE_EXTENSIONS[index % len(FILE_EXTENSIONS)]
+    return f"{words[0]}_{words[1]}_{index}{extension}"
+
+
+def seed(scale=None, seed_value=42):
+    """
+    Veri setini oluşturur. Dönüş: ölçümlerde kullanılacak referans kayıtlar
+    (ana kullanıcı, grup, sohbet, ...) ve boyutlar.
+    """
+    rng = np.random.default_rng(seed_value)
+    sizes = dataset_sizes(scale)
+    now = timezone.now()
+
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        [User(username=f'perf_user_{i}', email=f'perf_user_{i}@example.com', password=password)
+         for i in range(sizes['users'])],
+        batch_size=BATCH_SIZE
+    )
+    users = list(User.objects.filter(username__startswith='perf_user_').order_by('id'))
+    main_user = users[0]
+
+    UserStatus.objects.bulk_create(
+        [UserStatus(user=user, is_online=bool(i % 3 == 0)) for i, user in enumerate(users) if i % 2 == 0],
+        batch_size=BATCH_SIZE
+    )
+
+    # Dosyaların yarısı ana kullanıcıya ait: liste endpoint'leri gerçekçi derinlikte olur
+    File.objects.bulk_create(
+        [File(
+            owner=main_user if i % 2 == 0 else users[i % len(users)],
+            file=f'uploads/perf/{_name(rng, i)}',
+            is_public=bool(i % 4 == 0),
+            file_size=int(rng.integers(1_000, 50_000_000)),
+        ) for i in range(sizes['files'])],
+        batch_size=BATCH_SIZE
+    )
+    public_files = list(File.objects.filter(is_public=True).values_list('id', flat=True))
+    FileShare.objects.bulk_create(
+        [FileShare(
+            file_id=public_files[i % len(public_files)],
+            share_type='public',
+            created_by=main_user,
+            max_views=1000,
+            view_count=int(rng.integers(0, 1000)),
+        ) for i in range(sizes['shares'])],
+        batch_size=BATCH_SIZE
+    )
+
+    CloudGroup.objects.bulk_create(
+        [CloudGroup(name=f'perf grup {i}', owner=main_user, invite_token=f'perf-invite-{i}',
+                    is_public=bool(i % 2 == 0))
+         for i in range(sizes['groups'])]
+    )
+    groups = list(CloudGroup.objects.filter(invite_token__startswith='perf-invite-').order_by('id'))
+    membership = CloudGroup.members.through
+    membership.objects.bulk_create(
+        [membership(cloudgroup_id=group.id, customuser_id=user.id)
+         for group in groups for user in users[:20]],
+        batch_size=BATCH_SIZE
+    )
+    GroupFile.objects.bulk_create(
+        [GroupFile(
+            group=groups[i % len(groups)],
+            uploader=users[i % 20],
+            file=f'group_files/perf/{_name(rng, i)}',
+            is_public=bool(i % 2 == 0),
+        ) for i in range(sizes['group_files'])],
+        batch_size=BATCH_SIZE
+    )
+
+    # Ana kullanıcının sohbetleri; mesajların çoğu tek bir uzun sohbette
+    ChatThread.objects.bulk_create(
+        [ChatThread(user1=main_user, user2=user) for user in users[1:51]]
+    )
+    threads = list(ChatThread.objects.filter(user1=main_user).order_by('id'))
+    Message.objects.bulk_create(
+        [Message(
+            thread=threads[0] if i % 2 == 0 else threads[i % len(threads)],
+            sender=main_user if i % 3 == 0 else threads[0].user2,
+            text=f"mesaj {i} {WORDS[i % len(WORDS)]}",
+        ) for i in range(sizes['messages'])],
+        batch_size=BATCH_SIZE
+    )
+    Notification.objects.bulk_create(
+        [Notification(user=main_user if i % 2 == 0 else users[i % len(users)], text=f"bildirim {i}")
+         for i in range(sizes['notifications'])],
+        batch_size=BATCH_SIZE
+    )
+
+    tier, _ = MemoryTier.objects.get_or_create(name='short_term', defaults={'duration_minutes': 1440})
+    items = []
+    for i in range(sizes['memory_items']):
+        is_video = i % 10 == 0
+        dim = CLIP_DIM if is_video or i % 3 == 0 else TEXT_DIM
+        name = _name(rng, i, '.mp4' if is_video else None)
+        items.append(MemoryItem(
+            user=main_user,
+            file_path=f'/perf/{name}',
+            file_name=name,
+            file_type='video' if is_video else os.path.splitext(name)[1].lstrip('.'),
+            original_size=int(rng.integers(1_000, 50_000_000)),
+            vector_embedding=random_vector(rng, dim).tobytes(),
+            structural_data='{}',
+            memory_tier=tier,
+            expires_at=now + timedelta(hours=24),
+            content_summary=f"{WORDS[i % len(WORDS)]} hakkında içerik {i}",
+        ))
+    MemoryItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+    video_ids = list(MemoryItem.objects.filter(user=main_user, file_type='video').values_list('id', flat=True))
+    VideoFrame.objects.bulk_create(
+        [VideoFrame(
+            memory_item_id=video_ids[i % len(video_ids)],
+            timestamp=float(i % 600),
+            vector_embedding=random_vector(rng, CLIP_DIM).tobytes(),
+        ) for i in range(sizes['video_frames'])],
+        batch_size=BATCH_SIZE
+    )
+
+    search_index.rebuild()
+    refresh_trending_scores()
+
+    return {
+        'sizes': sizes,
+        'user': main_user,
+        'group': groups[0],
+        'thread': threads[0],
+        'other_user': threads[0].user2,
+    }
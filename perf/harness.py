@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# perf/harness.py
+"""
+Endpoint ölçüm yardımcıları: sorgu sayısı, p50/p95 gecikme, tepe bellek
+ve kayıtlı bütçelerle (budgets.json) karşılaştırma. Ayrıca süreç açılışının
+içe aktarma maliyeti (`python -X importtime`).
+"""
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import zlib
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass
+from unittest.mock import patch
+
+import numpy as np
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'budgets.json')
+# Bütçe yeniden yazılırken ölçülen değerlere eklenen pay
+BUDGET_HEADROOM = {'max_queries': 0, 'p95_ms': 3.0, 'peak_kb': 1.5}
+
+
+@dataclass
+class EndpointResult:
+    name: str
+    status_code: int
+    queries: int
+    p50_ms: float
+    p95_ms: float
+    peak_kb: float
+    iterations: int
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def measure(name, request, iterations=20, warmup=2):
+    """
+    `request()` bir test client çağrısı yapar ve yanıt döndürür.
+    Isınma çağrılarından sonra sorgu sayısı tek bir çağrıda, gecikme tüm
+    iterasyonlarda, tepe bellek tracemalloc ile ayrı bir çağrıda ölçülür.
+    """
+    for _ in range(warmup):
+        request()
+
+    with CaptureQueriesContext(connection) as captured:
+        response = request()
+    queries = len(captured.captured_queries)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        request()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return EndpointResult(
+        name=name,
+        status_code=response.status_code,
+        queries=queries,
+        p50_ms=round(percentile(timings, 50), 2),
+        p95_ms=round(percentile(timings, 95), 2),
+        peak_kb=round(peak / 1024, 1),
+        iterations=iterations,
+    )
+
+
+def load_budgets(path=BUDGETS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def save_budgets(results, path=BUDGETS_PATH):
+    budgets = {}
+    for result in results:
+        budgets[result.name] = {
+            'max_queries': result.queries + BUDGET_HEADROOM['max_queries'],
+            'p95_ms': round(max(result.p95_ms, 1.0) * BUDGET_HEADROOM['p95_ms'], 1),
+            'peak_kb': round(max(result.peak_kb, 64.0) * BUDGET_HEADROOM['peak_kb'], 1),
+        }
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(budgets, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+    return budgets
+
+
+def budget_violations(result, budget, check_resources=False):
+    """
+    Bütçeyi aşan metriklerin açıklamaları (boş liste = bütçe içinde).
+    Sorgu sayısı makineden bağımsızdır ve her zaman denetlenir; p95 gecikme ve
+    tepe bellek bütçenin kaydedildiği makineye özgü olduğundan yalnızca
+    check_resources ile (aynı makinede) denetlenir.
+    """
+    if not budget:
+        return [f"{result.name}: kayıtlı bütçe yok"]
+    checks = [('queries', 'max_queries')]
+    if check_resources:
+        checks += [('p95_ms', 'p95_ms'), ('peak_kb', 'peak_kb')]
+    violations = []
+    for metric, key in checks:
+        limit = budget.get(key)
+        value = getattr(result, metric)
+        if limit is not None and value > limit:
+            violations.append(f"{result.name}: {metric}={value} > {key}={limit}")
+    return violations
+
+
+@dataclass
+class ImportProfile:
+    total_ms: float
+    modules: dict  # modül adı -> kümülatif süre (ms)
+
+    def top(self, count=15):
+        return sorted(self.modules.items(), key=lambda item: -item[1])[:count]
+
+
+def measure_imports(code='import django; django.setup()', settings_module='cloud_mvp.settings'):
+    """
+    `code`'u temiz bir Python sürecinde `-X importtime` ile çalıştırır.
+    total_ms, tüm modüllerin kendi (self) sürelerinin toplamıdır.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=root, env=env, capture_output=True, text=True, check=True,
+    )
+    total_us, modules = 0, {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        total_us += int(self_us)
+        modules[name.strip()] = int(cumulative_us) / 1000
+    return ImportProfile(total_ms=round(total_us / 1000, 1), modules=modules)
+
+
+def write_report(results, path, extra=None):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'endpoints': [asdict(result) for result in results],
+    }
+    if extra:
+        report.update(extra)
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2, default=str)
+    return path
+
+
+def fake_embedding(text, dim):
+    """Metinden deterministik birim vektör (model yüklemeden)."""
+    rng = np.random.default_rng(zlib.crc32((text or '').encode('utf-8')))
+    vector = rng.standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@contextmanager
+def stub_ai_models():
+    """
+    AI modellerini ve çeviri servisini devre dışı bırakır; ölçümler çevrimdışı
+    ve deterministik çalışır. Embedding'ler metin özetinden üretilir.
+    """
+    from deep_translator import GoogleTranslator
+    from memory.services.ai_services import AIService
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(GoogleTranslator, 'translate', lambda self, text, **kw: text))
+        stack.enter_context(patch.object(
+            AIService, 'get_text_embedding', lambda self, text: fake_embedding(text, 384)
+        ))
+        stack.enter_context(patch.object(
+            AIService, 'get_clip_text_embedding', lambda self, text: fake_embedding(text, 512)
+        ))
+        stack.enter_context(patch.object(
+            AIService, 'get_image_embedding', lambda self, path: fake_embedding(path, 512)
+        ))
+        yield
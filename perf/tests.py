@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# perf/tests.py
+import os
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, tag
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from perf import dataset
+from perf.harness import (
+    EndpointResult, budget_violations, load_budgets, measure, measure_imports, save_budgets, stub_ai_models,
+    write_report,
+)
+
+DEFAULT_REPORT_PATH = os.path.join(settings.BASE_DIR, '.cache', 'perf', 'endpoints.json')
+ITERATIONS = int(os.environ.get('PERF_ITERATIONS', '20'))
+# Gecikme/bellek bütçeleri makineye özgü; yalnızca bütçenin kaydedildiği
+# ortamda PERF_CHECK_RESOURCES=1 ile denetlenir
+CHECK_RESOURCES = os.environ.get('PERF_CHECK_RESOURCES') == '1'
+# Çıplak django.setup() için içe aktarma bütçesi (self sürelerin toplamı)
+STARTUP_IMPORT_BUDGET_MS = float(os.environ.get('PERF_STARTUP_BUDGET_MS', '1000'))
+HEAVY_MODULES = (
+    'torch', 'transformers', 'sentence_transformers', 'whisper', 'face_recognition',
+    'torch_geometric', 'skimage', 'matplotlib', 'sklearn', 'scipy',
+)
+
+
+@tag('perf')
+class EndpointBudgetTests(TestCase):
+    """
+    Sentetik veri seti üzerinde ana endpoint'lerin sorgu sayısı, p50/p95
+    gecikme ve tepe belleğini ölçer; sorgu bütçesini (ve istenirse gecikme/bellek
+    bütçesini) aşan olursa başarısız olur.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = dataset.seed()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(self.data['user'])
+
+    def _endpoints(self):
+        group = self.data['group']
+        thread = self.data['thread']
+        get, post = self.client.get, self.client.post
+        return [
+            ('files.list', lambda: get(reverse('file_upload_list'))),
+            ('files.list_page', lambda: get(reverse('file_upload_list'), {'page_size': 50})),
+            ('files.trending', lambda: get(reverse('trending_files'))),
+            ('files.search', lambda: get(reverse('search'), {'q': 'rapor'})),
+            # Aynı ad users.urls'te de tanımlı; reverse() oradakini döndürüyor
+            ('files.search_public', lambda: get('/api/api/search/public/', {'q': 'rapor fatura'})),
+            ('groups.list', lambda: get(reverse('group_list'))),
+            ('groups.detail', lambda: get(reverse('group_detail', args=[group.id]))),
+            ('groups.files_page', lambda: get(
+                reverse('group_file_upload_list', args=[group.id]), {'page_size': 50}
+            )),
+            ('chat.users', lambda: get(reverse('user_list'))),
+            ('chat.messages_page', lambda: get(reverse('chat_messages', args=[thread.id]), {'page_size': 50})),
+            ('memory.search', lambda: post(reverse('memory-search'), {'query': 'rapor'}, format='json')),
+            ('memory.timeline', lambda: get(reverse('get_timeline'))),
+            ('memory.stats', lambda: get(reverse('views.get_detailed_memory_stats'))),
+        ]
+
+    def test_endpoints_within_budget(self):
+        results = []
+        with stub_ai_models():
+            for name, request in self._endpoints():
+                results.append(measure(name, request, iterations=ITERATIONS))
+
+        report_path = os.environ.get('PERF_REPORT', DEFAULT_REPORT_PATH)
+        write_report(results, report_path, extra={'dataset': self.data['sizes']})
+
+        if os.environ.get('PERF_UPDATE_BUDGETS') == '1':
+            save_budgets(results)
+
+        budgets = load_budgets()
+        for result in results:
+            with self.subTest(endpoint=result.name):
+                self.assertLess(result.status_code, 400, f"{result.name} HTTP {result.status_code}")
+                violations = budget_violations(result, budgets.get(result.name), CHECK_RESOURCES)
+                self.assertFalse(violations, '\n'.join(violations))
+
+
+class BudgetViolationTests(SimpleTestCase):
+    """Gecikme ve bellek yalnızca istenirse denetlenir; sorgu sayısı her zaman."""
+
+    budget = {'max_queries': 4, 'p95_ms': 10.0, 'peak_kb': 100.0}
+
+    def _result(self, queries):
+        return EndpointResult('chat.messages_page', 200, queries, 20.0, 50.0, 500.0, 1)
+
+    def test_resources_checked_only_on_request(self):
+        self.assertEqual(budget_violations(self._result(4), self.budget), [])
+        self.assertEqual(len(budget_violations(self._result(4), self.budget, check_resources=True)), 2)
+
+    def test_queries_always_checked(self):
+        self.assertEqual(
+            budget_violations(self._result(5), self.budget),
+            ['chat.messages_page: queries=5 > max_queries=4'],
+        )
+
+
+class StartupImportTests(SimpleTestCase):
+    """ML yığını yalnızca ilk kullanımda yüklenmeli; süreç açılışı bunu ödememeli."""
+
+    def assertNoHeavyModules(self, profile):
+        loaded = sorted(name for name in profile.modules if name.split('.')[0] in HEAVY_MODULES)
+        self.assertFalse(loaded, f"Açılışta ağır modüller yüklendi: {', '.join(loaded[:10])}")
+
+    def test_setup_does_not_import_ml_stack(self):
+        self.assertNoHeavyModules(measure_imports())
+
+    def test_urlconf_does_not_import_ml_stack(self):
+        self.assertNoHeavyModules(measure_imports('import django; django.setup(); import cloud_mvp.urls'))
+
+    @tag('perf')
+    def test_setup_import_time_within_budget(self):
+        # Gürültüyü azaltmak için en iyi ölçüm
+        profile = min((measure_imports() for _ in range(3)), key=lambda item: item.total_ms)
+        slowest = ', '.join(f'{name}={ms:.0f}ms' for name, ms in profile.top(10))
+        self.assertLessEqual(
+            profile.total_ms, STARTUP_IMPORT_BUDGET_MS,
+            f"django.setup() içe aktarma {profile.total_ms}ms > {STARTUP_IMPORT_BUDGET_MS}ms ({slowest})"
+        )